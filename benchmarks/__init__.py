@@ -0,0 +1,5 @@
+"""Micro-benchmarks of the image pipeline components
+
+Run with `python -m benchmarks`. Inputs are synthetic frames, so no model
+weights, network access or sample images are needed.
+"""
@@ -0,0 +1,85 @@
+"""Run the micro-benchmarks
+
+Usage:
+    python -m benchmarks                                  # all sizes, print a table
+    python -m benchmarks --sizes vga,1080p --filter anonymize
+    python -m benchmarks --save benchmarks/baselines/main.json
+    python -m benchmarks --compare benchmarks/baselines/main.json --threshold 0.15
+"""
+
+import argparse
+import logging
+import sys
+from typing import List, Optional
+
+from benchmarks.cases import build_cases
+from benchmarks.frames import SIZES
+from benchmarks.harness import compare, format_comparison, format_results, load_results, run_case, save_results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser"""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Micro-benchmarks of the image pipeline components (synthetic frames, no model weights)"
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(SIZES),
+        help=f"Comma-separated frame sizes ({', '.join(SIZES)})"
+    )
+    parser.add_argument("--filter", help="Only run cases whose key contains this text")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed calls per case")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed calls before timing")
+    parser.add_argument("--save", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", help="Compare against a JSON baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="p50 slowdown flagged as a regression when comparing (0.1 = 10%%)"
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exit with status 1 if a case regressed beyond the threshold"
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Benchmark entry point"""
+    args = build_parser().parse_args(argv)
+    # Component logging would otherwise be part of the measurement
+    logging.getLogger("htw-emerging-photo").setLevel(logging.WARNING)
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        print(f"Unknown sizes: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    cases = [case for case in build_cases(sizes) if not args.filter or args.filter in case.key]
+    results = []
+    for case in cases:
+        print(f"Running {case.key}...", file=sys.stderr)
+        results.append(run_case(case, iterations=args.iterations, warmup=args.warmup))
+    print(format_results(results))
+
+    if args.save:
+        print(f"Saved baseline to {save_results(results, args.save)}", file=sys.stderr)
+
+    if args.compare:
+        comparisons = compare(results, load_results(args.compare))
+        print()
+        print(format_comparison(comparisons, args.threshold))
+        regressions = [row for row in comparisons if row.change > args.threshold]
+        if regressions:
+            print(f"{len(regressions)} cases slower than the baseline by more than {args.threshold:.0%}")
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Benchmark cases of the pipeline components"""
+
+from typing import Callable, List, Sequence
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.frames import SIZES, encode_upload, synthetic_boxes, synthetic_frame, vehicle_boxes
+from benchmarks.harness import Case
+from src.anonymization import Anonymizer, EncoderOptions, ResultFormatter
+from src.detection.base import DetectionBatch
+from src.detection.plates.classical import ClassicalPlateDetector
+from src.preprocessing import ImagePreprocessor, ImageValidator
+
+# Boxes filled by the anonymize cases
+BOX_COUNTS = (0, 10, 100)
+
+
+def _plate_detector() -> ClassicalPlateDetector:
+    """Plate detector without model weights (the contour routines need no torch)"""
+    return ClassicalPlateDetector()
+
+
+def _validate(frame: np.ndarray, image_format: str) -> Callable:
+    data = encode_upload(frame, image_format)
+    return lambda: ImageValidator.validate_image(data, max_size=len(data))
+
+
+def _preprocess(frame: np.ndarray) -> Callable:
+    preprocessor = ImagePreprocessor()
+    image = Image.fromarray(frame)
+    return lambda: preprocessor.preprocess(image)
+
+
+def _anonymize(frame: np.ndarray, boxes: DetectionBatch) -> Callable:
+    anonymizer = Anonymizer()
+    image = Image.fromarray(frame)
+    return lambda: anonymizer.anonymize(image, boxes)
+
+
+def _encode(frame: np.ndarray, image_format: str) -> Callable:
+    anonymizer = Anonymizer()
+    image = Image.fromarray(frame)
+    options = EncoderOptions(format=image_format)
+    return lambda: anonymizer._encode_image(image, options)
+
+
+def _format_response(frame: np.ndarray, boxes: DetectionBatch) -> Callable:
+    encoded = Anonymizer()._encode_image(Image.fromarray(frame), EncoderOptions(format="jpeg"))
+    faces = boxes[boxes.labels == "face"]
+    plates = boxes[boxes.labels == "plate"]
+    return lambda: ResultFormatter.format_response(
+        success=True,
+        processing_time=0.1,
+        anonymized_image=encoded,
+        face_detections=faces,
+        plate_detections=plates,
+        anonymization_color="#FFFF00",
+        image_format="jpeg"
+    )
+
+
+def _find_plates_in_region(frame: np.ndarray) -> Callable:
+    detector = _plate_detector()
+    x1, y1, x2, y2 = vehicle_boxes(frame.shape[1], frame.shape[0])[0]
+    roi = np.ascontiguousarray(frame[y1:y2, x1:x2])
+    return lambda: detector._find_plates_in_region(roi, x1, y1)
+
+
+def _detect_plates_with_contours(frame: np.ndarray) -> Callable:
+    detector = _plate_detector()
+    return lambda: detector._detect_plates_with_contours(frame)
+
+
+def build_cases(sizes: Sequence[str] = tuple(SIZES)) -> List[Case]:
+    """
+    All cases for the given frame sizes
+
+    Args:
+        sizes: Names from SIZES
+
+    Returns:
+        Cases in reporting order
+
+    Raises:
+        KeyError: If a size is unknown
+    """
+    cases = []
+    for size in sizes:
+        width, height = SIZES[size]
+        frame = synthetic_frame(width, height)
+
+        for image_format in ("jpeg", "png"):
+            cases.append(Case(
+                "validate_image", size, lambda f=frame, i=image_format: _validate(f, i), {"format": image_format}
+            ))
+        cases.append(Case("preprocess", size, lambda f=frame: _preprocess(f)))
+        for count in BOX_COUNTS:
+            boxes = synthetic_boxes(count, width, height)
+            cases.append(Case("anonymize", size, lambda f=frame, b=boxes: _anonymize(f, b), {"boxes": count}))
+        for image_format in ("png", "jpeg", "webp"):
+            cases.append(Case(
+                "encode_image", size, lambda f=frame, i=image_format: _encode(f, i), {"format": image_format}
+            ))
+        for count in BOX_COUNTS[1:]:
+            boxes = synthetic_boxes(count, width, height)
+            cases.append(Case(
+                "format_response", size, lambda f=frame, b=boxes: _format_response(f, b), {"boxes": count}
+            ))
+        cases.append(Case("find_plates_in_region", size, lambda f=frame: _find_plates_in_region(f)))
+        cases.append(Case("detect_plates_with_contours", size, lambda f=frame: _detect_plates_with_contours(f)))
+    return cases
@@ -0,0 +1,104 @@
+"""Synthetic benchmark inputs
+
+Frames are deterministic for a given size and seed: a gradient background
+with sensor-like noise (so encoders see realistic entropy) and a few vehicle
+shapes carrying plate-like rectangles with character bars (so the classical
+plate search has contours to work on).
+"""
+
+import io
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from src.detection.base import DetectionBatch
+
+# Standard frame sizes (width, height)
+SIZES: Dict[str, Tuple[int, int]] = {
+    "vga": (640, 480),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+
+def synthetic_frame(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """
+    Create an RGB frame with vehicles and plates
+
+    Args:
+        width: Frame width
+        height: Frame height
+        seed: Random seed (same seed, same frame)
+
+    Returns:
+        RGB uint8 array of shape (height, width, 3)
+    """
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(60, 180, width, dtype=np.float32)
+    frame = np.repeat(ramp[np.newaxis, :, np.newaxis], height, axis=0).repeat(3, axis=2)
+    frame += rng.normal(0, 8, size=frame.shape).astype(np.float32)
+    frame = np.clip(frame, 0, 255).astype(np.uint8)
+
+    for x1, y1, x2, y2 in vehicle_boxes(width, height):
+        color = tuple(int(c) for c in rng.integers(20, 200, size=3))
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, -1)
+
+        # Plate in the lower part of the vehicle, with dark character bars
+        plate_width = (x2 - x1) // 4
+        plate_height = max(10, plate_width // 4)
+        px1 = x1 + (x2 - x1 - plate_width) // 2
+        py1 = y2 - plate_height * 3
+        cv2.rectangle(frame, (px1, py1), (px1 + plate_width, py1 + plate_height), (245, 245, 245), -1)
+        bar_width = max(2, plate_width // 14)
+        for bx in range(px1 + bar_width, px1 + plate_width - bar_width, bar_width * 2):
+            cv2.rectangle(
+                frame,
+                (bx, py1 + plate_height // 5),
+                (bx + bar_width, py1 + plate_height * 4 // 5),
+                (10, 10, 10),
+                -1
+            )
+    return frame
+
+
+def vehicle_boxes(width: int, height: int) -> Tuple[Tuple[int, int, int, int], ...]:
+    """Vehicle boxes (x1, y1, x2, y2) drawn by synthetic_frame(), scaled to the frame"""
+    return tuple(
+        (int(width * left), int(height * 0.45), int(width * (left + 0.25)), int(height * 0.9))
+        for left in (0.05, 0.375, 0.7)
+    )
+
+
+def synthetic_boxes(count: int, width: int, height: int, seed: int = 0) -> DetectionBatch:
+    """
+    Random detection boxes inside a frame (2-10% of the frame dimensions)
+
+    Args:
+        count: Number of boxes
+        width: Frame width
+        height: Frame height
+        seed: Random seed
+
+    Returns:
+        DetectionBatch of alternating face and plate boxes
+    """
+    rng = np.random.default_rng(seed)
+    box_width = rng.uniform(0.02, 0.1, count) * width
+    box_height = rng.uniform(0.02, 0.1, count) * height
+    x1 = rng.uniform(0, width - box_width)
+    y1 = rng.uniform(0, height - box_height)
+    labels = np.where(np.arange(count) % 2 == 0, "face", "plate")
+    return DetectionBatch(
+        np.stack([x1, y1, box_width, box_height], axis=1),
+        rng.uniform(0.5, 1.0, count),
+        labels
+    )
+
+
+def encode_upload(frame: np.ndarray, image_format: str = "jpeg") -> bytes:
+    """Encode a frame the way a client would upload it"""
+    buffer = io.BytesIO()
+    Image.fromarray(frame).save(buffer, format=image_format.upper(), quality=90)
+    return buffer.getvalue()
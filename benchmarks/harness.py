@@ -0,0 +1,207 @@
+"""Timing, allocation tracking and JSON baselines
+
+Each case is timed over a number of iterations after a warm-up; the reported
+percentiles are computed from the per-iteration wall times. Allocations are
+measured in one extra iteration under tracemalloc, so tracing overhead does
+not distort the timings. tracemalloc sees Python and NumPy allocations but
+not the internal buffers of OpenCV.
+"""
+
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+
+@dataclass
+class Case:
+    """A benchmark: setup() prepares the inputs and returns the timed call"""
+    name: str
+    size: str
+    setup: Callable[[], Callable[[], Any]]
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        """Identifier used to match results against a baseline"""
+        params = ",".join(f"{name}={value}" for name, value in self.params.items())
+        return f"{self.name}[{self.size}{',' + params if params else ''}]"
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings and allocations of one case"""
+    key: str
+    name: str
+    size: str
+    params: Dict[str, Any]
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    mean_ms: float
+    min_ms: float
+    peak_alloc_kb: float  # Highest traced memory during one call
+    retained_kb: float  # Traced memory still allocated after the call
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return asdict(self)
+
+
+@dataclass
+class Comparison:
+    """A result next to its baseline"""
+    key: str
+    baseline_p50_ms: float
+    current_p50_ms: float
+    baseline_p95_ms: float
+    current_p95_ms: float
+
+    @property
+    def change(self) -> float:
+        """Relative p50 change (0.1 = 10% slower)"""
+        if self.baseline_p50_ms <= 0:
+            return 0.0
+        return self.current_p50_ms / self.baseline_p50_ms - 1.0
+
+
+def run_case(case: Case, iterations: int = 20, warmup: int = 2) -> BenchmarkResult:
+    """
+    Time a case and measure its allocations
+
+    Args:
+        case: Case to run
+        iterations: Timed calls
+        warmup: Untimed calls before timing (caches, lazy imports)
+
+    Returns:
+        BenchmarkResult of the case
+    """
+    function = case.setup()
+    for _ in range(warmup):
+        function()
+
+    durations = np.empty(max(1, iterations))
+    for index in range(len(durations)):
+        start_time = time.perf_counter()
+        function()
+        durations[index] = time.perf_counter() - start_time
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = function()
+        after, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+
+    durations_ms = durations * 1000
+    return BenchmarkResult(
+        key=case.key,
+        name=case.name,
+        size=case.size,
+        params=dict(case.params),
+        iterations=len(durations),
+        p50_ms=round(float(np.percentile(durations_ms, 50)), 4),
+        p95_ms=round(float(np.percentile(durations_ms, 95)), 4),
+        mean_ms=round(float(durations_ms.mean()), 4),
+        min_ms=round(float(durations_ms.min()), 4),
+        peak_alloc_kb=round((peak - before) / 1024, 1),
+        retained_kb=round((after - before) / 1024, 1)
+    )
+
+
+def environment() -> Dict[str, Any]:
+    """Machine and version details stored with a baseline"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    import cv2
+    import PIL
+    return {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "pillow": PIL.__version__
+    }
+
+
+def save_results(results: List[BenchmarkResult], path: Union[str, Path]) -> Path:
+    """
+    Write results and the environment as a JSON baseline
+
+    Returns:
+        Path of the written file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "environment": environment(),
+        "results": [result.to_dict() for result in results]
+    }, indent=2))
+    return path
+
+
+def load_results(path: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
+    """Results of a baseline file keyed by case key"""
+    data = json.loads(Path(path).read_text())
+    return {result["key"]: result for result in data["results"]}
+
+
+def compare(
+    results: List[BenchmarkResult],
+    baseline: Dict[str, Dict[str, Any]]
+) -> List[Comparison]:
+    """Pair results with the baseline entries of the same case (cases missing from either side are skipped)"""
+    return [
+        Comparison(
+            key=result.key,
+            baseline_p50_ms=baseline[result.key]["p50_ms"],
+            current_p50_ms=result.p50_ms,
+            baseline_p95_ms=baseline[result.key]["p95_ms"],
+            current_p95_ms=result.p95_ms
+        )
+        for result in results if result.key in baseline
+    ]
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    """Results as an aligned text table"""
+    width = max([len(result.key) for result in results] + [4])
+    lines = [f"{'case':<{width}}  {'p50 ms':>10}  {'p95 ms':>10}  {'peak KB':>10}  {'kept KB':>9}"]
+    for result in results:
+        lines.append(
+            f"{result.key:<{width}}  {result.p50_ms:>10.3f}  {result.p95_ms:>10.3f}  "
+            f"{result.peak_alloc_kb:>10.1f}  {result.retained_kb:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(comparisons: List[Comparison], threshold: Optional[float] = None) -> str:
+    """Comparisons as an aligned text table (changes above threshold are flagged)"""
+    width = max([len(row.key) for row in comparisons] + [4])
+    lines = [f"{'case':<{width}}  {'base p50':>10}  {'p50':>10}  {'base p95':>10}  {'p95':>10}  {'change':>8}"]
+    for row in comparisons:
+        flag = "  !" if threshold is not None and row.change > threshold else ""
+        lines.append(
+            f"{row.key:<{width}}  {row.baseline_p50_ms:>10.3f}  {row.current_p50_ms:>10.3f}  "
+            f"{row.baseline_p95_ms:>10.3f}  {row.current_p95_ms:>10.3f}  {row.change:>+7.1%}{flag}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,368 @@
+"""Load tests of the image API with concurrency sweeps
+
+Usage:
+    python -m benchmarks.loadtest --stub                                # in-process app, stub detectors
+    python -m benchmarks.loadtest --stub --concurrency 1,4,16,32 --mix vga=0.7,1080p=0.3
+    python -m benchmarks.loadtest --url http://localhost:8000 --duration 30 --output report.json
+
+Every concurrency level runs a closed loop: each virtual user sends its next
+request as soon as the previous one has completed, for the duration of the
+level. Uploads are synthetic JPEG frames picked from the size mix by weight.
+Per level the report has the throughput, latency percentiles (overall and per
+size) and the error and 503 rates.
+
+In-process runs drive the ASGI app through httpx without a network, with the
+load generator sharing the server's event loop; run against a uvicorn or
+gunicorn server over localhost to include the HTTP stack. --stub selects the
+stub detectors (face/plate_detection_model = "stub"), so the serving layer
+can be measured on machines without model weights.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from benchmarks.frames import SIZES, encode_upload, synthetic_frame
+from benchmarks.harness import environment
+
+try:
+    import httpx
+except ImportError:  # Optional dependency, only needed to run load tests
+    httpx = None
+
+ANONYMIZE_PATH = "/api/v1/anonymize"
+
+
+@dataclass
+class RequestRecord:
+    """Outcome of one request"""
+    size: str
+    status: int  # 0 if no response was received
+    latency: float  # Seconds
+    error: Optional[str] = None
+
+
+@dataclass
+class LevelReport:
+    """Results of one concurrency level"""
+    concurrency: int
+    requests: int
+    duration_seconds: float
+    throughput: float  # Completed requests per second
+    p50_ms: float
+    p90_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    max_ms: float
+    ok: int
+    errors: int  # Non-2xx responses (503 included) and failed connections
+    unavailable: int  # 503 responses
+    by_size: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def error_rate(self) -> float:
+        """Fraction of failed requests"""
+        return self.errors / self.requests if self.requests else 0.0
+
+    @property
+    def unavailable_rate(self) -> float:
+        """Fraction of 503 responses"""
+        return self.unavailable / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            **asdict(self),
+            "error_rate": round(self.error_rate, 4),
+            "unavailable_rate": round(self.unavailable_rate, 4)
+        }
+
+
+def percentiles(latencies: Sequence[float]) -> Dict[str, float]:
+    """p50/p90/p95/p99, mean and max in milliseconds"""
+    if len(latencies) == 0:
+        return {name: 0.0 for name in ("p50_ms", "p90_ms", "p95_ms", "p99_ms", "mean_ms", "max_ms")}
+    values = np.asarray(latencies) * 1000
+    p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 2),
+        "p90_ms": round(float(p90), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "mean_ms": round(float(values.mean()), 2),
+        "max_ms": round(float(values.max()), 2)
+    }
+
+
+def summarize(concurrency: int, records: List[RequestRecord], elapsed: float) -> LevelReport:
+    """
+    Aggregate the requests of one level
+
+    Args:
+        concurrency: Virtual users of the level
+        records: Completed requests
+        elapsed: Wall time of the level in seconds
+
+    Returns:
+        LevelReport of the level
+    """
+    ok = [record for record in records if 200 <= record.status < 300]
+    statuses: Dict[str, int] = {}
+    for record in records:
+        key = str(record.status) if record.status else "failed"
+        statuses[key] = statuses.get(key, 0) + 1
+
+    by_size = {}
+    for size in sorted({record.size for record in records}):
+        latencies = [record.latency for record in ok if record.size == size]
+        stats = percentiles(latencies)
+        by_size[size] = {
+            "requests": sum(1 for record in records if record.size == size),
+            "p50_ms": stats["p50_ms"],
+            "p95_ms": stats["p95_ms"]
+        }
+
+    return LevelReport(
+        concurrency=concurrency,
+        requests=len(records),
+        duration_seconds=round(elapsed, 3),
+        throughput=round(len(ok) / elapsed, 3) if elapsed > 0 else 0.0,
+        ok=len(ok),
+        errors=len(records) - len(ok),
+        unavailable=sum(1 for record in records if record.status == 503),
+        by_size=by_size,
+        statuses=statuses,
+        **percentiles([record.latency for record in ok])
+    )
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """
+    Parse "vga=0.7,1080p=0.3" into normalized weights
+
+    Raises:
+        ValueError: If a size is unknown or no weight is positive
+    """
+    weights = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        size, _, weight = entry.partition("=")
+        if size not in SIZES:
+            raise ValueError(f"Unknown size {size!r} (choose from {', '.join(SIZES)})")
+        weights[size] = float(weight) if weight else 1.0
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("The mix needs at least one positive weight")
+    return {size: weight / total for size, weight in weights.items()}
+
+
+def build_payloads(sizes: Sequence[str], variants: int = 3) -> Dict[str, List[bytes]]:
+    """JPEG uploads per size (different frames, so caches see distinct images)"""
+    return {
+        size: [encode_upload(synthetic_frame(*SIZES[size], seed=seed), "jpeg") for seed in range(max(1, variants))]
+        for size in sizes
+    }
+
+
+async def _virtual_user(
+    client,
+    payloads: Dict[str, List[bytes]],
+    mix: Dict[str, float],
+    deadline: float,
+    rng: random.Random,
+    records: List[RequestRecord]
+) -> None:
+    """Send requests back to back until the deadline"""
+    sizes, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        size = rng.choices(sizes, weights)[0]
+        payload = rng.choice(payloads[size])
+        start_time = time.perf_counter()
+        try:
+            response = await client.post(
+                ANONYMIZE_PATH,
+                params={"output_format": "jpeg"},
+                files={"file": (f"{size}.jpg", payload, "image/jpeg")}
+            )
+            records.append(RequestRecord(size, response.status_code, time.perf_counter() - start_time))
+        except httpx.HTTPError as e:
+            records.append(RequestRecord(size, 0, time.perf_counter() - start_time, str(e) or type(e).__name__))
+
+
+async def run_level(
+    client,
+    payloads: Dict[str, List[bytes]],
+    mix: Dict[str, float],
+    concurrency: int,
+    duration: float,
+    seed: int = 0
+) -> LevelReport:
+    """
+    Run one concurrency level
+
+    Args:
+        client: httpx.AsyncClient pointing at the app
+        payloads: Uploads per size
+        mix: Size weights
+        concurrency: Virtual users
+        duration: Seconds to keep sending
+        seed: Seed of the size and image choices
+
+    Returns:
+        LevelReport of the level
+    """
+    records: List[RequestRecord] = []
+    start_time = time.perf_counter()
+    deadline = start_time + duration
+    await asyncio.gather(*(
+        _virtual_user(client, payloads, mix, deadline, random.Random(seed * 1000 + user), records)
+        for user in range(concurrency)
+    ))
+    # In-flight requests finish after the deadline and are counted
+    return summarize(concurrency, records, time.perf_counter() - start_time)
+
+
+def format_report(reports: List[LevelReport]) -> str:
+    """Levels as an aligned text table"""
+    lines = [
+        f"{'users':>5}  {'req/s':>8}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}  "
+        f"{'requests':>8}  {'errors':>7}  {'503':>6}"
+    ]
+    for report in reports:
+        lines.append(
+            f"{report.concurrency:>5}  {report.throughput:>8.2f}  {report.p50_ms:>9.1f}  {report.p95_ms:>9.1f}  "
+            f"{report.p99_ms:>9.1f}  {report.requests:>8}  {report.error_rate:>7.1%}  {report.unavailable_rate:>6.1%}"
+        )
+    return "\n".join(lines)
+
+
+def max_concurrency_within(reports: List[LevelReport], p95_ms: float, max_error_rate: float = 0.01) -> Optional[int]:
+    """Highest level whose p95 and error rate stay within the limits (None if no level does)"""
+    passing = [
+        report.concurrency for report in reports
+        if report.ok and report.p95_ms <= p95_ms and report.error_rate <= max_error_rate
+    ]
+    return max(passing) if passing else None
+
+
+def create_in_process_app(stub: bool, stub_latency_ms: Optional[float]):
+    """Create the FastAPI app in this process (stub detectors must be selected before the import)"""
+    if stub:
+        os.environ["FACE_DETECTION_MODEL"] = "stub"
+        os.environ["PLATE_DETECTION_MODEL"] = "stub"
+        if stub_latency_ms is not None:
+            os.environ["STUB_DETECTOR_LATENCY_MS"] = str(stub_latency_ms)
+    from src.config import get_settings
+    get_settings.cache_clear()
+    from src.api.app import create_app
+    return create_app()
+
+
+async def run_sweep(args: argparse.Namespace, mix: Dict[str, float], levels: List[int]) -> List[LevelReport]:
+    """Warm up the target and run all levels"""
+    payloads = build_payloads(list(mix), args.variants)
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    timeout = httpx.Timeout(args.timeout)
+
+    app = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout)
+    else:
+        app = create_in_process_app(args.stub, args.stub_latency_ms)
+        # Per-request logging would otherwise be part of the measurement
+        logging.getLogger("htw-emerging-photo").setLevel(logging.WARNING)
+        await app.router.startup()
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://loadtest", limits=limits, timeout=timeout
+        )
+
+    reports = []
+    try:
+        async with client:
+            # Model loading and lazily started workers are not part of the first level
+            for size in mix:
+                await client.post(ANONYMIZE_PATH, files={"file": ("warmup.jpg", payloads[size][0], "image/jpeg")})
+            for concurrency in levels:
+                print(f"Running {concurrency} users for {args.duration:g}s...", file=sys.stderr)
+                reports.append(await run_level(client, payloads, mix, concurrency, args.duration, args.seed))
+    finally:
+        if app is not None:
+            await app.router.shutdown()
+    return reports
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser"""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.loadtest",
+        description="Concurrency sweep against the image anonymization API"
+    )
+    parser.add_argument("--url", help="Base URL of a running server (default: the app in this process)")
+    parser.add_argument("--stub", action="store_true", help="Use stub detectors (in-process only)")
+    parser.add_argument("--stub-latency-ms", type=float, help="Simulated detector latency of the stubs")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32", help="Comma-separated virtual user counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--mix", default="vga=0.6,1080p=0.3,4k=0.1", help="Image size weights")
+    parser.add_argument("--variants", type=int, default=3, help="Distinct frames per size")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the request sequence")
+    parser.add_argument("--slo-p95-ms", type=float, help="Report the highest level meeting this p95")
+    parser.add_argument("--output", help="Write the report as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Load test entry point"""
+    args = build_parser().parse_args(argv)
+    if httpx is None:
+        print("The load tester needs httpx (pip install httpx)", file=sys.stderr)
+        return 2
+    if args.url and args.stub:
+        print("--stub applies to the in-process app; start the server with "
+              "FACE_DETECTION_MODEL=stub PLATE_DETECTION_MODEL=stub instead", file=sys.stderr)
+        return 2
+
+    try:
+        mix = parse_mix(args.mix)
+        levels = sorted({int(level) for level in args.concurrency.split(",") if level.strip()})
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    reports = asyncio.run(run_sweep(args, mix, levels))
+    print(format_report(reports))
+
+    within = None
+    if args.slo_p95_ms is not None:
+        within = max_concurrency_within(reports, args.slo_p95_ms)
+        print(f"Highest concurrency with p95 <= {args.slo_p95_ms:g}ms and <1% errors: {within or 'none'}")
+
+    if args.output:
+        path = Path(args.output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "environment": environment(),
+            "target": args.url or ("in-process (stub detectors)" if args.stub else "in-process"),
+            "mix": mix,
+            "duration_seconds": args.duration,
+            "slo_p95_ms": args.slo_p95_ms,
+            "max_concurrency_within_slo": within,
+            "levels": [report.to_dict() for report in reports]
+        }, indent=2))
+        print(f"Saved report to {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""Replay a recorded request workload and compare latency distributions
+
+Usage:
+    python -m benchmarks.replay data/recordings --stub                     # in-process app, original arrival rate
+    python -m benchmarks.replay data/recordings --url http://localhost:8000 --speed 4
+    python -m benchmarks.replay data/recordings --stub --output data/replay-new.json \\
+        --baseline data/replay-main.json
+
+Requests are sent open loop at their recorded arrival offsets divided by
+--speed (--speed 0 sends them all at once, limited by --max-in-flight), so a
+slower build builds up a queue instead of slowing the arrivals down. Recorded
+uploads are sent as stored; records without an image get a synthetic frame of
+the recorded dimensions and format. Client latency is measured from the
+scheduled send time.
+
+The report puts the recorded server durations and stage timings (or those of
+a --baseline replay report) next to the replay's, taken from the
+Server-Timing header of each response.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.frames import encode_upload, synthetic_frame
+from benchmarks.harness import environment
+from benchmarks.loadtest import ANONYMIZE_PATH, create_in_process_app, httpx, percentiles
+from src.utils.recording import load_recording
+
+# Longest side of synthetic frames (the API downscales larger images anyway)
+MAX_SYNTHETIC_DIMENSION = 8192
+
+_MIME_TYPES = {"jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """Stage durations (ms) of a Server-Timing header ("stage;dur=1.2, ...")"""
+    timings = {}
+    for entry in filter(None, (part.strip() for part in (header or "").split(","))):
+        name, _, parameters = entry.partition(";")
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.strip().partition("=")
+            if key == "dur":
+                try:
+                    timings[name.strip()] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+def distributions(samples: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+    """
+    Millisecond samples per metric of successful requests
+
+    Args:
+        samples: Records of a recording, or requests of a replay report
+
+    Returns:
+        "server" (request duration), "client" (replays only) and one entry per stage
+    """
+    metrics: Dict[str, List[float]] = {}
+    for sample in samples:
+        if sample.get("status") != 200:
+            continue
+        timings = dict(sample.get("timings_ms") or {})
+        server = timings.pop("total", sample.get("duration_ms"))
+        for name, value in (("server", server), ("client", sample.get("latency_ms")), *timings.items()):
+            if value is not None:
+                metrics.setdefault(name, []).append(float(value))
+    return metrics
+
+
+def compare_distributions(
+    baseline: Dict[str, List[float]],
+    current: Dict[str, List[float]]
+) -> List[Dict[str, Any]]:
+    """Percentiles of each metric side by side (client and server first, then stages)"""
+    names = [name for name in ("client", "server") if name in baseline or name in current]
+    names += sorted((set(baseline) | set(current)) - {"client", "server"})
+    rows = []
+    for name in names:
+        before = percentiles(np.asarray(baseline.get(name, [])) / 1000)
+        after = percentiles(np.asarray(current.get(name, [])) / 1000)
+        change = (
+            after["p95_ms"] / before["p95_ms"] - 1.0
+            if name in baseline and name in current and before["p95_ms"] > 0 else None
+        )
+        rows.append({
+            "metric": name,
+            "baseline": before if name in baseline else None,
+            "current": after if name in current else None,
+            "p95_change": None if change is None else round(change, 4)
+        })
+    return rows
+
+
+def format_comparison(rows: List[Dict[str, Any]], baseline_name: str) -> str:
+    """Comparison rows as an aligned table"""
+    def cells(stats: Optional[Dict[str, float]]) -> str:
+        if stats is None:
+            return f"{'-':>8} {'-':>8} {'-':>8}"
+        return f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}"
+
+    width = max([len(row["metric"]) for row in rows] + [6])
+    lines = [
+        f"{'metric':<{width}}  {baseline_name:^26}   {'replay':^26}   {'p95':>7}",
+        f"{'':<{width}}  {'p50':>8} {'p95':>8} {'p99':>8}   {'p50':>8} {'p95':>8} {'p99':>8}   {'change':>7}"
+    ]
+    for row in rows:
+        change = f"{row['p95_change']:>+7.1%}" if row["p95_change"] is not None else f"{'-':>7}"
+        lines.append(f"{row['metric']:<{width}}  {cells(row['baseline'])}   {cells(row['current'])}   {change}")
+    return "\n".join(lines)
+
+
+class PayloadSource:
+    """Upload bytes of records: the stored image, or a synthetic frame of the same size and format"""
+
+    def __init__(self, variants: int = 3):
+        self.variants = max(1, variants)
+        self._synthetic: Dict[Tuple[int, int, str, int], bytes] = {}
+
+    def payload(self, index: int, record: Dict[str, Any]) -> Tuple[bytes, str]:
+        """Upload bytes and format of a record"""
+        image_format = str(record.get("source_format") or "jpeg").lower()
+        image_format = "jpeg" if image_format in ("jpg", "mpo") else image_format
+        if record.get("image") and Path(record["image"]).is_file():
+            return Path(record["image"]).read_bytes(), image_format
+
+        width = min(int(record.get("source_width") or record.get("width") or 640), MAX_SYNTHETIC_DIMENSION)
+        height = min(int(record.get("source_height") or record.get("height") or 480), MAX_SYNTHETIC_DIMENSION)
+        key = (width, height, image_format, index % self.variants)
+        if key not in self._synthetic:
+            self._synthetic[key] = encode_upload(synthetic_frame(width, height, seed=key[3]), image_format)
+        return self._synthetic[key], image_format
+
+
+async def replay(
+    client,
+    records: List[Dict[str, Any]],
+    payloads: List[Tuple[bytes, str]],
+    speed: float = 1.0,
+    max_in_flight: int = 64,
+    send_camera_ids: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Send the records at their (scaled) arrival offsets
+
+    Args:
+        client: httpx.AsyncClient pointing at the app
+        records: Recorded requests, oldest first
+        payloads: Upload bytes and format per record
+        speed: Arrival rate multiplier (0 = no delays)
+        max_in_flight: Requests outstanding at once
+        send_camera_ids: Whether to pass the recorded camera ids
+
+    Returns:
+        One result per record: status, client latency, server stage timings
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+    first_arrival = records[0].get("arrival", 0.0) if records else 0.0
+    start_time = time.perf_counter()
+
+    async def send(index: int, record: Dict[str, Any]) -> Dict[str, Any]:
+        offset = (record.get("arrival", first_arrival) - first_arrival) / speed if speed > 0 else 0.0
+        await asyncio.sleep(max(0.0, start_time + offset - time.perf_counter()))
+        scheduled = time.perf_counter() if speed <= 0 else start_time + offset
+        data, image_format = payloads[index]
+        params = {"output_format": record.get("output_format") or "jpeg"}
+        if send_camera_ids and record.get("camera_id"):
+            params["camera_id"] = record["camera_id"]
+
+        result: Dict[str, Any] = {"index": index, "status": 0, "source_width": record.get("source_width"),
+                                  "source_height": record.get("source_height")}
+        async with semaphore:
+            try:
+                response = await client.post(
+                    ANONYMIZE_PATH,
+                    params=params,
+                    files={"file": (f"replay.{image_format}", data, _MIME_TYPES.get(image_format, "image/jpeg"))}
+                )
+                result.update(status=response.status_code, timings_ms=parse_server_timing(
+                    response.headers.get("server-timing")
+                ))
+            except httpx.HTTPError as e:
+                result["error"] = str(e) or type(e).__name__
+        result["latency_ms"] = round((time.perf_counter() - scheduled) * 1000, 2)
+        return result
+
+    return list(await asyncio.gather(*(send(index, record) for index, record in enumerate(records))))
+
+
+async def run_replay(args: argparse.Namespace, records: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], float]:
+    """Create the client (in-process app or URL), replay and return results and wall time"""
+    source = PayloadSource()
+    payloads = [source.payload(index, record) for index, record in enumerate(records)]
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    timeout = httpx.Timeout(args.timeout)
+
+    app = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout)
+    else:
+        app = create_in_process_app(args.stub, args.stub_latency_ms)
+        # Per-request logging would otherwise be part of the measurement
+        logging.getLogger("htw-emerging-photo").setLevel(logging.WARNING)
+        await app.router.startup()
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://replay", limits=limits, timeout=timeout
+        )
+
+    try:
+        async with client:
+            # Model loading is not part of the replay
+            data, image_format = payloads[0]
+            await client.post(ANONYMIZE_PATH, files={"file": (f"warmup.{image_format}", data)})
+            start_time = time.perf_counter()
+            results = await replay(
+                client, records, payloads, args.speed, args.max_in_flight, not args.ignore_cameras
+            )
+            return results, time.perf_counter() - start_time
+    finally:
+        if app is not None:
+            await app.router.shutdown()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser"""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.replay",
+        description="Replay recorded image requests (RECORDING_ENABLED=true) and compare latencies"
+    )
+    parser.add_argument("recording", help="Recording directory or requests.jsonl file")
+    parser.add_argument("--url", help="Base URL of a running server (default: the app in this process)")
+    parser.add_argument("--stub", action="store_true", help="Use stub detectors (in-process only)")
+    parser.add_argument("--stub-latency-ms", type=float, help="Simulated detector latency of the stubs")
+    parser.add_argument("--speed", type=float, default=1.0, help="Arrival rate multiplier (0 = all at once)")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="Outstanding requests at most")
+    parser.add_argument("--limit", type=int, help="Only replay the first N records")
+    parser.add_argument("--ignore-cameras", action="store_true", help="Do not send the recorded camera ids")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Request timeout in seconds")
+    parser.add_argument("--baseline", help="Compare against an earlier replay report instead of the recording")
+    parser.add_argument("--output", help="Write the replay report as JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Replay entry point"""
+    args = build_parser().parse_args(argv)
+    if httpx is None:
+        print("The replay tool needs httpx (pip install httpx)", file=sys.stderr)
+        return 2
+    if args.url and args.stub:
+        print("--stub applies to the in-process app; start the server with "
+              "FACE_DETECTION_MODEL=stub PLATE_DETECTION_MODEL=stub instead", file=sys.stderr)
+        return 2
+
+    try:
+        records = load_recording(args.recording)[:args.limit]
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot read recording {args.recording}: {e}", file=sys.stderr)
+        return 2
+    if not records:
+        print("The recording has no requests", file=sys.stderr)
+        return 2
+
+    span = records[-1].get("arrival", 0.0) - records[0].get("arrival", 0.0)
+    print(
+        f"Replaying {len(records)} requests recorded over {span:.1f}s at {args.speed:g}x...",
+        file=sys.stderr
+    )
+    results, elapsed = asyncio.run(run_replay(args, records))
+
+    if args.baseline:
+        baseline_name = "baseline"
+        baseline = distributions(json.loads(Path(args.baseline).read_text())["requests"])
+    else:
+        baseline_name = "recorded"
+        baseline = distributions(records)
+    rows = compare_distributions(baseline, distributions(results))
+
+    errors = sum(1 for result in results if result["status"] != 200)
+    print(format_comparison(rows, baseline_name))
+    print(f"{len(results)} requests in {elapsed:.1f}s ({len(results) / elapsed:.2f} req/s), {errors} errors")
+
+    if args.output:
+        path = Path(args.output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "environment": environment(),
+            "recording": str(args.recording),
+            "target": args.url or ("in-process (stub detectors)" if args.stub else "in-process"),
+            "speed": args.speed,
+            "elapsed_seconds": round(elapsed, 3),
+            "errors": errors,
+            "comparison": rows,
+            "requests": results
+        }, indent=2))
+        print(f"Saved report to {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
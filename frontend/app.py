@@ -222,11 +222,13 @@ def display_results(result):
         st.image(image, use_column_width=True)
         
         # Download button
+        image_format = result.get("image_format", "png")
+        extension = "jpg" if image_format == "jpeg" else image_format
         st.download_button(
             label="💾 Download Anonymized Image",
             data=image_bytes,
-            file_name="anonymized_image.png",
-            mime="image/png",
+            file_name=f"anonymized_image.{extension}",
+            mime=f"image/{image_format}",
             use_container_width=True
         )
     
@@ -2,6 +2,20 @@
 
 from .anonymizer import Anonymizer
 from .result_formatter import ResultFormatter
+from .encoders import EncoderOptions, ImageEncoder
+from .pipeline import create_detectors, detect_regions
+from .engine import ImageTask, PipelineEngine, Stage, StageStats
 
-__all__ = ["Anonymizer", "ResultFormatter"]
+__all__ = [
+    "Anonymizer",
+    "ResultFormatter",
+    "EncoderOptions",
+    "ImageEncoder",
+    "create_detectors",
+    "detect_regions",
+    "ImageTask",
+    "PipelineEngine",
+    "Stage",
+    "StageStats",
+]
 
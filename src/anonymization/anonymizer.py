@@ -1,55 +1,117 @@
 """Image anonymization with yellow color fill"""
 
-import base64
-import io
-from typing import List, Tuple
-from PIL import Image, ImageDraw
+import logging
+from typing import List, Optional, Tuple, Union
+from PIL import Image, ImageColor, ImageDraw
 import numpy as np
 
-from src.detection.base import Detection
+from src.anonymization.encoders import EncoderOptions, ImageEncoder
+from src.detection.base import Detection, DetectionBatch
 from src.utils.logger import get_logger
+from src.utils.metrics import timed_stage
 
 
 class Anonymizer:
     """Anonymizes images by filling detected regions with yellow color"""
     
-    def __init__(self, color: str = "#FFFF00"):
+    def __init__(
+        self,
+        color: str = "#FFFF00",
+        encoder_options: Optional[EncoderOptions] = None
+    ):
         """
         Initialize anonymizer
         
         Args:
             color: Hex color code for anonymization (default: yellow #FFFF00)
+            encoder_options: Default output encoding (default: PNG)
         """
         self.color = color
+        self.color_rgb = ImageColor.getrgb(color)[:3]
+        self.encoder_options = encoder_options or EncoderOptions()
         self.logger = get_logger(self.__class__.__name__)
     
     def anonymize(
         self,
         image: Image.Image,
-        detections: List[Detection]
+        detections: Union[DetectionBatch, List[Detection]],
+        encoder_options: Optional[EncoderOptions] = None
     ) -> Tuple[Image.Image, str]:
         """
         Anonymize image by filling detected regions with yellow color
         
         Args:
             image: PIL Image object
-            detections: List of Detection objects (faces and plates)
+            detections: DetectionBatch (or list of Detection objects) of faces and plates
+            encoder_options: Optional per-request output encoding
             
         Returns:
             Tuple of (anonymized PIL Image, base64-encoded image string)
         """
+        with timed_stage("anonymize", regions=len(detections)):
+            anonymized_image = self._fill_regions(image, detections)
+        
+        # Encode to base64
+        options = encoder_options or self.encoder_options
+        with timed_stage("encode", format=options.format) as span:
+            base64_image = self._encode_image(anonymized_image, encoder_options)
+            span.set_attribute("base64_bytes", len(base64_image))
+        
+        return anonymized_image, base64_image
+    
+    def fill_array(
+        self,
+        image: np.ndarray,
+        detections: Union[DetectionBatch, List[Detection]]
+    ) -> np.ndarray:
+        """
+        Fill detected regions in place on an RGB array (used for video frames)
+        
+        Produces the same pixels as anonymize() (rectangle corners inclusive)
+        without a PIL round-trip or a copy of the frame.
+        
+        Args:
+            image: RGB image as numpy array (modified in place)
+            detections: DetectionBatch (or list of Detection objects)
+            
+        Returns:
+            The same array, anonymized
+        """
+        detections = DetectionBatch.from_detections(detections)
+        height, width = image.shape[:2]
+        for x1, y1, x2, y2 in detections.xyxy.tolist():
+            x1, y1 = max(0, x1), max(0, y1)
+            image[y1:min(height, y2 + 1), x1:min(width, x2 + 1)] = self.color_rgb
+        return image
+    
+    def _fill_regions(
+        self,
+        image: Image.Image,
+        detections: Union[DetectionBatch, List[Detection]]
+    ) -> Image.Image:
+        """
+        Fill detected regions on a copy of the image
+        
+        Args:
+            image: PIL Image object
+            detections: DetectionBatch (or list of Detection objects)
+            
+        Returns:
+            Anonymized copy of the image
+        """
         # Create a copy of the image
         anonymized_image = image.copy()
         draw = ImageDraw.Draw(anonymized_image)
         
+        detections = DetectionBatch.from_detections(detections)
+        log_regions = self.logger.isEnabledFor(logging.DEBUG)
+        
         # Fill each detection with yellow color
-        for detection in detections:
-            bbox = detection.bbox
-            x1 = bbox.x
-            y1 = bbox.y
-            x2 = bbox.x + bbox.width
-            y2 = bbox.y + bbox.height
-            
+        for (x1, y1, x2, y2), label, detection_id in zip(
+            detections.xyxy.tolist(),
+            detections.labels.tolist(),
+            detections.ids.tolist()
+        ):
             # Draw filled rectangle
             draw.rectangle(
                 [(x1, y1), (x2, y2)],
@@ -57,33 +119,31 @@ class Anonymizer:
                 outline=self.color
             )
             
-            self.logger.info(
-                f"Anonymized {detection.label} {detection.id} at "
-                f"({x1}, {y1}, {x2}, {y2}) size: {bbox.width}x{bbox.height} with {self.color}"
-            )
-        
-        self.logger.info(
-            f"Anonymized {len(detections)} regions with color {self.color}"
-        )
+            if log_regions:
+                self.logger.debug(
+                    "Anonymized %s %d at (%d, %d, %d, %d) size: %dx%d",
+                    label, detection_id, x1, y1, x2, y2, x2 - x1, y2 - y1
+                )
         
-        # Encode to base64
-        base64_image = self._encode_image(anonymized_image)
+        self.logger.debug("Anonymized %d regions with color %s", len(detections), self.color)
         
-        return anonymized_image, base64_image
+        return anonymized_image
     
-    def _encode_image(self, image: Image.Image) -> str:
+    def _encode_image(
+        self,
+        image: Image.Image,
+        encoder_options: Optional[EncoderOptions] = None
+    ) -> str:
         """
         Encode PIL Image to base64 string
         
         Args:
             image: PIL Image object
+            encoder_options: Output encoding (default: the anonymizer's options)
             
         Returns:
             Base64-encoded image string
         """
-        buffer = io.BytesIO()
-        image.save(buffer, format='PNG')
-        buffer.seek(0)
-        base64_str = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        return base64_str
+        encoder = ImageEncoder(encoder_options or self.encoder_options)
+        return encoder.encode_base64(image)
 
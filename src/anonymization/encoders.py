@@ -0,0 +1,192 @@
+"""Output image encoding (PNG, JPEG, WebP)"""
+
+import base64
+import io
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from src.utils.exceptions import EncodingError
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Canonical format name -> file extension used by cv2.imencode
+SUPPORTED_FORMATS = {
+    "png": ".png",
+    "jpeg": ".jpg",
+    "webp": ".webp",
+}
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+_FORMAT_ALIASES = {"jpg": "jpeg"}
+
+
+def normalize_format(output_format: str) -> str:
+    """
+    Normalize an output format name (case-insensitive, "jpg" -> "jpeg")
+
+    Args:
+        output_format: Requested format name
+
+    Returns:
+        Canonical format name
+
+    Raises:
+        EncodingError: If the format is not supported
+    """
+    name = output_format.strip().lower()
+    name = _FORMAT_ALIASES.get(name, name)
+    if name not in SUPPORTED_FORMATS:
+        raise EncodingError(
+            f"Unsupported output format: {output_format}. "
+            f"Supported formats: {', '.join(SUPPORTED_FORMATS)}"
+        )
+    return name
+
+
+@dataclass(frozen=True)
+class EncoderOptions:
+    """Output encoding parameters"""
+    format: str = "png"
+    jpeg_quality: int = 90  # 0-100
+    webp_quality: int = 90  # 1-100
+    png_compression: int = 3  # 0 (fastest) - 9 (smallest)
+    max_dimension: Optional[int] = None  # Downscale larger outputs
+
+    @classmethod
+    def from_settings(cls, settings, output_format: Optional[str] = None) -> "EncoderOptions":
+        """
+        Build encoder options from application settings
+
+        Args:
+            settings: Settings instance
+            output_format: Optional per-request format overriding the default
+
+        Returns:
+            EncoderOptions instance
+        """
+        return cls(
+            format=normalize_format(output_format or settings.output_format),
+            jpeg_quality=settings.jpeg_quality,
+            webp_quality=settings.webp_quality,
+            png_compression=settings.png_compression,
+            max_dimension=settings.max_output_dimension,
+        )
+
+    @property
+    def media_type(self) -> str:
+        """MIME type of the encoded output"""
+        return MEDIA_TYPES[self.format]
+
+    def output_scale(self, width: int, height: int) -> float:
+        """
+        Factor applied to an image of this size by max_dimension
+
+        Detection boxes multiplied by it are in the frame of the encoded output.
+
+        Args:
+            width: Input image width
+            height: Input image height
+
+        Returns:
+            Scale factor (1.0 if the image is not downscaled)
+        """
+        if not self.max_dimension or max(width, height) <= self.max_dimension:
+            return 1.0
+        return self.max_dimension / max(width, height)
+
+
+class ImageEncoder:
+    """Encodes RGB images using OpenCV (libjpeg-turbo/libpng/libwebp)"""
+
+    def __init__(self, options: Optional[EncoderOptions] = None):
+        """
+        Initialize encoder
+
+        Args:
+            options: Encoding parameters (default: PNG)
+        """
+        self.options = options or EncoderOptions()
+
+    def encode(self, image: Union[np.ndarray, Image.Image]) -> bytes:
+        """
+        Encode image to bytes in the configured format
+
+        Args:
+            image: RGB image as numpy array or PIL Image
+
+        Returns:
+            Encoded image bytes
+
+        Raises:
+            EncodingError: If encoding fails
+        """
+        array = np.asarray(image)
+        if array.ndim == 3 and array.shape[2] == 4:
+            array = cv2.cvtColor(array, cv2.COLOR_RGBA2RGB)
+
+        array = self._limit_size(array)
+
+        # OpenCV expects BGR channel order
+        if array.ndim == 3:
+            array = cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
+
+        ok, buffer = cv2.imencode(
+            SUPPORTED_FORMATS[self.options.format],
+            array,
+            self._imencode_params()
+        )
+        if ok:
+            return buffer.tobytes()
+
+        # Some OpenCV builds ship without a codec (e.g. WebP); fall back to Pillow
+        logger.warning(f"OpenCV could not encode {self.options.format}, falling back to Pillow")
+        return self._encode_with_pillow(array)
+
+    def encode_base64(self, image: Union[np.ndarray, Image.Image]) -> str:
+        """Encode image and return it as a base64 string"""
+        return base64.b64encode(self.encode(image)).decode('utf-8')
+
+    def _imencode_params(self) -> list:
+        """cv2.imencode parameters for the configured format"""
+        if self.options.format == "jpeg":
+            return [cv2.IMWRITE_JPEG_QUALITY, int(self.options.jpeg_quality)]
+        if self.options.format == "webp":
+            return [cv2.IMWRITE_WEBP_QUALITY, int(self.options.webp_quality)]
+        return [cv2.IMWRITE_PNG_COMPRESSION, int(self.options.png_compression)]
+
+    def _limit_size(self, array: np.ndarray) -> np.ndarray:
+        """Downscale the image if it exceeds the configured maximum dimension"""
+        height, width = array.shape[:2]
+        scale = self.options.output_scale(width, height)
+        if scale == 1.0:
+            return array
+
+        new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        return cv2.resize(array, new_size, interpolation=cv2.INTER_AREA)
+
+    def _encode_with_pillow(self, bgr_array: np.ndarray) -> bytes:
+        """Fallback encoder using Pillow"""
+        try:
+            rgb = cv2.cvtColor(bgr_array, cv2.COLOR_BGR2RGB) if bgr_array.ndim == 3 else bgr_array
+            buffer = io.BytesIO()
+            save_kwargs = {}
+            if self.options.format == "jpeg":
+                save_kwargs["quality"] = int(self.options.jpeg_quality)
+            elif self.options.format == "webp":
+                save_kwargs["quality"] = int(self.options.webp_quality)
+            else:
+                save_kwargs["compress_level"] = int(self.options.png_compression)
+            Image.fromarray(rgb).save(buffer, format=self.options.format.upper(), **save_kwargs)
+            return buffer.getvalue()
+        except Exception as e:
+            raise EncodingError(f"Failed to encode image as {self.options.format}: {str(e)}")
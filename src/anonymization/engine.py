@@ -0,0 +1,229 @@
+"""Stage-pipelined execution of image requests
+
+Every stage (decode, detect, encode) has its own worker threads and a bounded
+input queue. Requests flow from one stage to the next, so while one request
+is being detected the next one is already decoding and the previous one is
+encoding. A full queue blocks the stage in front of it, which pushes back on
+the submitters instead of buffering without limit.
+
+Per-stage busy time and queue depth show which stage is the bottleneck: it is
+the one with utilization near 1 and a full queue in front of it.
+"""
+
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from src.anonymization.encoders import EncoderOptions
+from src.detection import CameraProfile, DetectionBatch
+from src.utils.logger import get_logger
+
+# Ends a stage worker
+_STOP = object()
+
+
+@dataclass
+class ImageTask:
+    """State of one image request as it moves through the stages"""
+    image_bytes: bytes
+    encoder_options: EncoderOptions
+    camera_id: Optional[str] = None
+    camera_profile: Optional[CameraProfile] = None
+    # Filled in by the stages
+    source_format: Optional[str] = None  # Upload format as decoded (e.g. "JPEG")
+    source_size: Optional[Tuple[int, int]] = None  # Upload width and height
+    image_array: Optional[np.ndarray] = None
+    processed_image: Optional[Image.Image] = None
+    face_detections: Optional[DetectionBatch] = None
+    plate_detections: Optional[DetectionBatch] = None
+    anonymized_image: Optional[str] = None  # Base64-encoded output
+    cached: bool = False  # Detections reused from the near-duplicate cache
+
+
+@dataclass
+class Stage:
+    """A pipeline stage: a function applied to each item in place"""
+    name: str
+    function: Callable[[Any], None]
+    workers: int = 1
+    queue_size: int = 8
+
+
+@dataclass
+class StageStats:
+    """Counters of a pipeline stage"""
+    name: str
+    workers: int
+    queue_size: int
+    queue_depth: int = 0
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def utilization(self) -> float:
+        """Fraction of the workers' time spent processing"""
+        capacity = self.workers * self.elapsed_seconds
+        return self.busy_seconds / capacity if capacity > 0 else 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        """Mean processing time per item"""
+        count = self.processed + self.failed
+        return self.busy_seconds / count if count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "queue_size": self.queue_size,
+            "processed": self.processed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "mean_seconds": round(self.mean_seconds, 4),
+            "utilization": round(self.utilization, 3)
+        }
+
+
+class PipelineEngine:
+    """Runs items through a sequence of stages with bounded queues in between"""
+
+    def __init__(self, stages: Sequence[Stage]):
+        """
+        Initialize engine (call start() to launch the stage workers)
+
+        Args:
+            stages: Stages in processing order
+        """
+        self.stages = list(stages)
+        self.logger = get_logger(self.__class__.__name__)
+        self._queues: List[queue.Queue] = [
+            queue.Queue(maxsize=max(1, stage.queue_size)) for stage in self.stages
+        ]
+        self._stats = [
+            StageStats(name=stage.name, workers=max(1, stage.workers), queue_size=max(1, stage.queue_size))
+            for stage in self.stages
+        ]
+        self._stats_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._started_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the stage workers are up"""
+        return bool(self._threads)
+
+    def start(self) -> None:
+        """Launch the stage workers"""
+        if self.running:
+            return
+        self._started_at = time.perf_counter()
+        for index, stats in enumerate(self._stats):
+            for worker in range(stats.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(index,),
+                    name=f"pipeline-{stats.name}-{worker}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        self.logger.info(
+            "Started pipeline: " + " → ".join(f"{s.name} ({s.workers})" for s in self._stats)
+        )
+
+    def stop(self) -> None:
+        """Finish queued items and stop the workers"""
+        if not self.running:
+            return
+        # Stages are stopped in order, so items already past a stage still complete
+        for index, stats in enumerate(self._stats):
+            for _ in range(stats.workers):
+                self._queues[index].put(_STOP)
+            for thread in self._threads:
+                if thread.name.startswith(f"pipeline-{stats.name}-"):
+                    thread.join()
+        self._threads = []
+
+    def submit(self, item: Any, timeout: Optional[float] = None) -> Future:
+        """
+        Queue an item at the first stage
+
+        Blocks while the first stage's queue is full. Stage functions run in a
+        copy of the submitter's context, so context variables (such as the
+        request's timings) are visible to them.
+
+        Args:
+            item: Item passed to every stage function
+            timeout: Maximum seconds to wait for queue space (None waits forever)
+
+        Returns:
+            Future resolving to the item after the last stage (or to the first stage error)
+
+        Raises:
+            queue.Full: If there is no queue space within the timeout
+        """
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        context = contextvars.copy_context()
+        self._queues[0].put((item, future, context), timeout=timeout)
+        return future
+
+    def queue_depth(self, name: str) -> int:
+        """Items waiting in front of a stage"""
+        for stage, stage_queue in zip(self.stages, self._queues):
+            if stage.name == name:
+                return stage_queue.qsize()
+        raise KeyError(name)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage counters keyed by stage name"""
+        elapsed = time.perf_counter() - self._started_at if self._started_at is not None else 0.0
+        with self._stats_lock:
+            for stats, stage_queue in zip(self._stats, self._queues):
+                stats.queue_depth = stage_queue.qsize()
+                stats.elapsed_seconds = elapsed
+            return {stats.name: stats.to_dict() for stats in self._stats}
+
+    def _work(self, index: int) -> None:
+        """Worker loop of one stage"""
+        function = self.stages[index].function
+        stats = self._stats[index]
+        is_last = index == len(self.stages) - 1
+
+        while True:
+            entry = self._queues[index].get()
+            if entry is _STOP:
+                return
+            item, future, context = entry
+
+            start_time = time.perf_counter()
+            try:
+                context.run(function, item)
+                error = None
+            except Exception as e:
+                error = e
+            busy = time.perf_counter() - start_time
+
+            with self._stats_lock:
+                stats.busy_seconds += busy
+                if error is None:
+                    stats.processed += 1
+                else:
+                    stats.failed += 1
+
+            if error is not None:
+                future.set_exception(error)
+            elif is_last:
+                future.set_result(item)
+            else:
+                self._queues[index + 1].put((item, future, context))
@@ -0,0 +1,100 @@
+"""Single-image detection pipeline shared by the API and batch tools"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.detection import (
+    CameraProfile,
+    DetectionBatch,
+    Detector,
+    clean_detections,
+    create_detector,
+    detect_in_roi,
+)
+from src.utils.logger import get_logger
+from src.utils.metrics import timed_stage
+
+logger = get_logger(__name__)
+
+
+def create_detectors(settings) -> Tuple[Detector, Optional[Detector]]:
+    """
+    Create the face and plate detectors configured in the settings
+
+    Backends are looked up in the detector registry by face_detection_model
+    and plate_detection_model (e.g. "retinaface", "classical", "stub").
+
+    Args:
+        settings: Settings instance
+
+    Returns:
+        Tuple of (face detector, plate detector or None when disabled)
+    """
+    logger.info("Initializing face detector...")
+    face_detector = create_detector("face", settings.face_detection_model, settings)
+
+    plate_detector = None
+    if settings.enable_plate_detection:
+        logger.info("Initializing plate detector...")
+        plate_detector = create_detector("plate", settings.plate_detection_model, settings)
+
+    return face_detector, plate_detector
+
+
+def detect_regions(
+    image_array: np.ndarray,
+    face_detector: Detector,
+    plate_detector: Optional[Detector],
+    settings,
+    camera_profile: Optional[CameraProfile] = None,
+    crop_origin: Optional[Tuple[int, int, int, int]] = None
+) -> Tuple[DetectionBatch, DetectionBatch]:
+    """
+    Run face and plate detection and clean the boxes for rendering
+
+    Plate detection failures are logged and treated as "no plates", so the
+    faces are still anonymized.
+
+    Args:
+        image_array: Preprocessed RGB image
+        face_detector: Face detector
+        plate_detector: Plate detector (unused when plate detection is disabled)
+        settings: Settings instance (plate switch and box post-processing)
+        camera_profile: Optional camera profile restricting detectors to ROIs
+        crop_origin: (x, y, frame width, frame height) when the image is a crop of a
+            larger frame (see detect_in_roi)
+
+    Returns:
+        Tuple of (face detections, plate detections)
+    """
+    logger.debug("Running face detection")
+    with timed_stage("face_detect", model=settings.face_detection_model) as span:
+        face_detections = detect_in_roi(face_detector, image_array, "face", camera_profile, crop_origin)
+        span.set_attribute("detections", len(face_detections))
+
+    plate_detections = DetectionBatch.empty("plate")
+    if settings.enable_plate_detection and plate_detector is not None:
+        logger.debug("Running license plate detection")
+        try:
+            with timed_stage("plate_detect", model=settings.plate_detection_model) as span:
+                plate_detections = detect_in_roi(plate_detector, image_array, "plate", camera_profile, crop_origin)
+                span.set_attribute("detections", len(plate_detections))
+        except Exception as e:
+            logger.warning("License plate detection failed, continuing with faces only: %s", e)
+
+    # Clip, deduplicate and merge overlapping regions before rendering
+    image_height, image_width = image_array.shape[:2]
+    face_detections, plate_detections = (
+        clean_detections(
+            detections,
+            image_width,
+            image_height,
+            nms_iou_threshold=settings.nms_iou_threshold,
+            merge=settings.merge_overlapping_regions,
+            merge_iou_threshold=settings.merge_iou_threshold
+        )
+        for detections in (face_detections, plate_detections)
+    )
+
+    return face_detections, plate_detections
@@ -1,7 +1,7 @@
 """Format anonymization results for API response"""
 
-from typing import List, Dict, Any
-from src.detection.base import Detection
+from typing import List, Dict, Any, Optional, Union
+from src.detection.base import Detection, DetectionBatch
 
 
 class ResultFormatter:
@@ -11,11 +11,13 @@ class ResultFormatter:
     def format_response(
         success: bool,
         processing_time: float,
-        anonymized_image: str,
-        face_detections: List[Detection],
-        plate_detections: List[Detection],
+        anonymized_image: Optional[str],
+        face_detections: Union[DetectionBatch, List[Detection]],
+        plate_detections: Union[DetectionBatch, List[Detection]],
         anonymization_color: str,
-        error_message: str = None
+        error_message: str = None,
+        image_format: str = "png",
+        timings: Optional[Dict[str, float]] = None
     ) -> Dict[str, Any]:
         """
         Format anonymization results into JSON response
@@ -23,11 +25,13 @@ class ResultFormatter:
         Args:
             success: Whether anonymization was successful
             processing_time: Time taken for processing in seconds
-            anonymized_image: Base64-encoded anonymized image
-            face_detections: List of face Detection objects
-            plate_detections: List of plate Detection objects
+            anonymized_image: Base64-encoded anonymized image (None in sidecar files)
+            face_detections: DetectionBatch (or list of Detection objects) of faces
+            plate_detections: DetectionBatch (or list of Detection objects) of plates
             anonymization_color: Hex color used for anonymization
             error_message: Optional error message if success=False
+            image_format: Encoding of anonymized_image (png, jpeg or webp)
+            timings: Optional per-stage durations in milliseconds
             
         Returns:
             Formatted response dictionary
@@ -39,32 +43,18 @@ class ResultFormatter:
                 "processing_time": processing_time
             }
         
-        # Format face detections
-        faces_anonymized = [
-            {
-                "id": det.id,
-                "bbox": det.bbox.to_dict(),
-                "confidence": round(det.confidence, 2),
-                "anonymization_color": anonymization_color
-            }
-            for det in face_detections
-        ]
+        face_detections = DetectionBatch.from_detections(face_detections)
+        plate_detections = DetectionBatch.from_detections(plate_detections)
         
-        # Format plate detections
-        plates_anonymized = [
-            {
-                "id": det.id,
-                "bbox": det.bbox.to_dict(),
-                "confidence": round(det.confidence, 2),
-                "anonymization_color": anonymization_color
-            }
-            for det in plate_detections
-        ]
+        # Format face and plate detections
+        faces_anonymized = ResultFormatter._format_detections(face_detections, anonymization_color)
+        plates_anonymized = ResultFormatter._format_detections(plate_detections, anonymization_color)
         
-        return {
+        response: Dict[str, Any] = {
             "success": True,
             "processing_time": round(processing_time, 2),
             "anonymized_image": anonymized_image,
+            "image_format": image_format,
             "faces_anonymized": faces_anonymized,
             "plates_anonymized": plates_anonymized,
             "summary": {
@@ -74,6 +64,39 @@ class ResultFormatter:
                 "anonymization_color": anonymization_color
             }
         }
+        if timings is not None:
+            response["timings"] = timings
+        return response
+    
+    @staticmethod
+    def _format_detections(
+        detections: DetectionBatch,
+        anonymization_color: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Format a detection batch into response entries
+        
+        Args:
+            detections: DetectionBatch to format
+            anonymization_color: Hex color used for anonymization
+            
+        Returns:
+            List of detection dictionaries
+        """
+        confidences = [round(score, 2) for score in detections.scores.tolist()]
+        return [
+            {
+                "id": detection_id,
+                "bbox": {"x": x, "y": y, "width": w, "height": h},
+                "confidence": confidence,
+                "anonymization_color": anonymization_color
+            }
+            for detection_id, (x, y, w, h), confidence in zip(
+                detections.ids.tolist(),
+                detections.boxes.tolist(),
+                confidences
+            )
+        ]
     
     @staticmethod
     def format_error(error_message: str, status_code: int = 400) -> Dict[str, Any]:
@@ -2,10 +2,14 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 
 from src.config import get_settings
-from src.utils.logger import setup_logger
-from src.api.routes import anonymization
+from src.utils.logger import parse_sample_rates, setup_logger
+from src.utils.metrics import CONTENT_TYPE, REGISTRY
+from src.utils.tracing import configure_tracing, tracer
+from src.api.middleware import RequestContextMiddleware
+from src.api.routes import anonymization, jobs, video
 
 
 def create_app() -> FastAPI:
@@ -18,7 +22,15 @@ def create_app() -> FastAPI:
     settings = get_settings()
     
     # Setup logging
-    setup_logger("htw-emerging-photo", level=settings.log_level)
+    setup_logger(
+        "htw-emerging-photo",
+        level=settings.log_level,
+        log_format=settings.log_format,
+        sample_rates=parse_sample_rates(settings.log_sample_rates)
+    )
+    
+    # Export spans if tracing is enabled
+    configure_tracing(settings)
     
     # Create app
     app = FastAPI(
@@ -36,14 +48,28 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[settings.request_id_header],
     )
     
+    # Request ids and root spans (outermost, so CORS handling is traced too)
+    app.add_middleware(RequestContextMiddleware, header_name=settings.request_id_header)
+    
     # Include routers
     app.include_router(
         anonymization.router,
         prefix="/api/v1",
         tags=["anonymization"]
     )
+    app.include_router(
+        video.router,
+        prefix="/api/v1",
+        tags=["video"]
+    )
+    app.include_router(
+        jobs.router,
+        prefix="/api/v1",
+        tags=["jobs"]
+    )
     
     # Health check endpoint
     @app.get("/health", tags=["health"])
@@ -55,6 +81,12 @@ def create_app() -> FastAPI:
             "version": settings.app_version
         }
     
+    # Prometheus scrape endpoint
+    @app.get("/metrics", tags=["health"])
+    async def metrics():
+        """Stage latency histograms, counters and gauges (Prometheus text format)"""
+        return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+    
     # Startup event to pre-load models
     @app.on_event("startup")
     async def startup_event():
@@ -73,5 +105,13 @@ def create_app() -> FastAPI:
             logger.error(f"❌ Failed to load models: {e}")
             # Don't fail startup, models will be loaded on first request
     
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        """Stop the pipeline engine and inference processes and write out the queued spans"""
+        from src.api.routes.anonymization import shutdown_components
+        
+        shutdown_components()
+        tracer.configure(None)
+    
     return app
 
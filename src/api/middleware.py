@@ -0,0 +1,46 @@
+"""ASGI middleware"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.tracing import current_request_id, resolve_request_id, tracer
+
+
+class RequestContextMiddleware:
+    """
+    Assigns every HTTP request an id and traces it as the root span
+
+    The id is taken from the inbound header (or generated), set as the
+    current request id for the handler, its worker threads and the spans
+    opened on its behalf, and echoed in the response header.
+    """
+
+    def __init__(self, app: ASGIApp, header_name: str = "X-Request-ID"):
+        """
+        Initialize middleware
+
+        Args:
+            app: Wrapped application
+            header_name: Header carrying the request id
+        """
+        self.app = app
+        self.header_name = header_name
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = resolve_request_id(Headers(scope=scope).get(self.header_name))
+        token = current_request_id.set(request_id)
+        try:
+            with tracer.span("request", method=scope["method"], path=scope["path"]) as span:
+                async def send_with_request_id(message: Message) -> None:
+                    if message["type"] == "http.response.start":
+                        MutableHeaders(scope=message).append(self.header_name, request_id)
+                        span.set_attribute("status_code", message["status"])
+                    await send(message)
+
+                await self.app(scope, receive, send_with_request_id)
+        finally:
+            current_request_id.reset(token)
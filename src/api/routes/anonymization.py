@@ -1,47 +1,113 @@
 """Anonymization API endpoints"""
 
+import asyncio
+import functools
+import queue
+import threading
 import time
-from typing import Dict, Any
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
+from typing import Dict, Any, Optional
+from fastapi import APIRouter, UploadFile, File, Query, HTTPException, status
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
 from src.config import get_settings
 from src.preprocessing import ImageValidator, ImagePreprocessor
-from src.detection import FaceDetector, PlateDetector
-from src.anonymization import Anonymizer, ResultFormatter
-from src.utils.exceptions import InvalidImageError, DetectionError
-from src.utils.logger import get_logger
+from src.detection import CameraProfile, load_camera_profiles
+from src.anonymization import Anonymizer, ResultFormatter, EncoderOptions
+from src.anonymization.pipeline import create_detectors, detect_regions
+from src.anonymization.encoders import SUPPORTED_FORMATS
+from src.anonymization.engine import ImageTask, PipelineEngine, Stage
+from src.cache import NearDuplicateCache
+from src.inference import InferenceServer, create_inference_server
+from src.utils.exceptions import (
+    InvalidImageError,
+    DetectionError,
+    EncodingError,
+    CameraProfileError,
+)
+from src.utils.logger import bind_context, get_logger, unbind_context
+from src.utils.metrics import (
+    CACHE_LOOKUPS,
+    DETECTIONS,
+    ERRORS,
+    IN_FLIGHT,
+    QUEUE_DEPTH,
+    REQUEST_SECONDS,
+    StageTimings,
+    request_timings,
+    timed_stage,
+)
+from src.utils.profiling import RequestProfiler, current_capture, profiled
+from src.utils.recording import RequestRecorder
+from src.utils.tracing import current_request_id, tracer
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 # Initialize components (singleton pattern for POC)
 settings = get_settings()
-face_detector = None
-plate_detector = None
-anonymizer = None
-preprocessor = None
+face_detector: Any = None
+plate_detector: Any = None
+anonymizer: Any = None
+preprocessor: Any = None
+camera_profiles: Optional[Dict[str, CameraProfile]] = None
+near_duplicate_cache = (
+    NearDuplicateCache(
+        max_distance=settings.near_duplicate_max_distance,
+        max_entries=settings.near_duplicate_cache_size,
+        hash_size=settings.near_duplicate_hash_size
+    )
+    if settings.near_duplicate_cache else None
+)
+
+# Opt-in request profiler (sampled and slow requests)
+profiler = (
+    RequestProfiler(
+        settings.profiling_dir,
+        sample_rate=settings.profiling_sample_rate,
+        slow_threshold_ms=settings.profiling_slow_threshold_ms,
+        interval_ms=settings.profiling_interval_ms,
+        max_captures=settings.profiling_max_captures
+    )
+    if settings.profiling_enabled else None
+)
+
+# Opt-in recorder of request fingerprints (replayed by python -m benchmarks.replay)
+recorder = (
+    RequestRecorder(
+        settings.recording_dir,
+        store_images=settings.recording_store_images,
+        sample_rate=settings.recording_sample_rate
+    )
+    if settings.recording_enabled else None
+)
+
+# Detectors are shared by image requests and background video jobs
+inference_lock = threading.Lock()
+
+# With inference_processes > 0 the detectors live in separate processes
+inference_server: Optional[InferenceServer] = None
+
+# With pipeline_enabled, requests flow through decode/detect/encode stage workers
+pipeline_engine: Optional[PipelineEngine] = None
+engine_lock = threading.Lock()
 
 
 def get_components():
     """Lazy initialization of detection components"""
     global face_detector, plate_detector, anonymizer, preprocessor
     
-    if face_detector is None:
-        logger.info("Initializing face detector...")
-        face_detector = FaceDetector(
-            confidence_threshold=settings.face_confidence_threshold
-        )
-    
-    if plate_detector is None and settings.enable_plate_detection:
-        logger.info("Initializing plate detector...")
-        plate_detector = PlateDetector(
-            confidence_threshold=settings.plate_confidence_threshold
-        )
+    if settings.inference_processes > 0:
+        get_inference_server()
+    elif face_detector is None:
+        face_detector, plate_detector = create_detectors(settings)
     
     if anonymizer is None:
         logger.info("Initializing anonymizer...")
-        anonymizer = Anonymizer(color=settings.anonymization_color)
+        anonymizer = Anonymizer(
+            color=settings.anonymization_color,
+            encoder_options=EncoderOptions.from_settings(settings)
+        )
     
     if preprocessor is None:
         preprocessor = ImagePreprocessor()
@@ -49,9 +115,232 @@ def get_components():
     return face_detector, plate_detector, anonymizer, preprocessor
 
 
+def get_inference_server() -> Optional[InferenceServer]:
+    """
+    Start the inference processes on first use
+    
+    Returns:
+        Running InferenceServer, or None when detectors run in-process
+    """
+    global inference_server
+    
+    if settings.inference_processes <= 0:
+        return None
+    
+    with inference_lock:
+        if inference_server is None:
+            server = create_inference_server(settings)
+            server.start()
+            QUEUE_DEPTH.set_function(server.frames_in_flight, queue="inference")
+            inference_server = server
+    return inference_server
+
+
+def shutdown_components() -> None:
+    """Stop the pipeline engine and the inference processes and close the recorder (on application shutdown)"""
+    global pipeline_engine, inference_server
+    
+    if recorder is not None:
+        recorder.close()
+    if hasattr(plate_detector, "close"):
+        plate_detector.close()
+    if pipeline_engine is not None:
+        pipeline_engine.stop()
+        pipeline_engine = None
+    if inference_server is not None:
+        inference_server.stop()
+        inference_server = None
+
+
+def get_camera_profile(camera_id: Optional[str]) -> Optional[CameraProfile]:
+    """
+    Look up the ROI profile of a camera (profiles are loaded on first use)
+    
+    Args:
+        camera_id: Camera id from the request (None for no profile)
+        
+    Returns:
+        CameraProfile or None
+        
+    Raises:
+        CameraProfileError: If profiles are not configured or the camera is unknown
+    """
+    global camera_profiles
+    
+    if camera_id is None:
+        return None
+    
+    if camera_profiles is None:
+        if not settings.camera_profiles_path:
+            raise CameraProfileError("No camera profiles configured (camera_profiles_path)")
+        camera_profiles = load_camera_profiles(settings.camera_profiles_path)
+        logger.info("Loaded %d camera profiles", len(camera_profiles))
+    
+    if camera_id not in camera_profiles:
+        raise CameraProfileError(f"Unknown camera_id: {camera_id}")
+    return camera_profiles[camera_id]
+
+
+@profiled
+def decode_image(task: ImageTask) -> None:
+    """Decode stage: validate the upload and preprocess it for detection"""
+    with timed_stage("validate", upload_bytes=len(task.image_bytes)):
+        image = ImageValidator.validate_image(task.image_bytes, max_size=settings.max_upload_size)
+    with timed_stage("decode", format=image.format, image_width=image.width, image_height=image.height):
+        image.load()
+    task.source_format, task.source_size = image.format, image.size
+    with timed_stage("preprocess") as span:
+        task.image_array, task.processed_image = preprocessor.preprocess(image)
+        height, width = task.image_array.shape[:2]
+        span.set_attributes(image_width=width, image_height=height)
+
+
+@profiled
+def detect_image(task: ImageTask) -> None:
+    """Detect stage: faces and plates (reused from a near-duplicate when cached)"""
+    image_array = task.image_array
+    assert image_array is not None, "decode stage did not run"
+    
+    # Reuse the boxes of a near-identical recent image from the same camera
+    cached = None
+    if near_duplicate_cache is not None:
+        with tracer.span("cache_lookup", camera_id=task.camera_id) as span:
+            image_hash = near_duplicate_cache.hash_image(image_array)
+            cached = near_duplicate_cache.lookup(image_hash, image_array.shape, task.camera_id)
+            span.set_attribute("hit", cached is not None)
+        CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+    if cached is not None:
+        logger.debug("Near-duplicate of a cached image, reusing detections")
+        task.face_detections, task.plate_detections = cached
+        task.cached = True
+        return
+    
+    if inference_server is not None:
+        detections = inference_server.detect(image_array, task.camera_id)
+    else:
+        with inference_lock:
+            detections = detect_regions(
+                image_array, face_detector, plate_detector, settings, task.camera_profile
+            )
+    task.face_detections, task.plate_detections = detections
+    
+    if near_duplicate_cache is not None:
+        near_duplicate_cache.store(image_hash, image_array.shape, detections, task.camera_id)
+
+
+@profiled
+def encode_image(task: ImageTask) -> None:
+    """Encode stage: fill the detected regions and encode the output image"""
+    image, faces, plates = task.processed_image, task.face_detections, task.plate_detections
+    assert image is not None and faces is not None and plates is not None, "detect stage did not run"
+    _, task.anonymized_image = anonymizer.anonymize(image, faces + plates, task.encoder_options)
+    # Report boxes in the frame of the (possibly downscaled) output image
+    scale = task.encoder_options.output_scale(*image.size)
+    task.face_detections = faces.scale(scale)
+    task.plate_detections = plates.scale(scale)
+
+
+IMAGE_STAGES = (("decode", decode_image), ("detect", detect_image), ("encode", encode_image))
+
+
+def request_fields(
+    status_code: int,
+    elapsed_seconds: float,
+    task: Optional[ImageTask],
+    timings: StageTimings
+) -> Dict[str, Any]:
+    """Fingerprint of an image request (logged as its summary and recorded for replay)"""
+    fields: Dict[str, Any] = {"status": status_code, "duration_ms": round(elapsed_seconds * 1000, 1)}
+    if task is not None:
+        fields.update(upload_bytes=len(task.image_bytes), output_format=task.encoder_options.format)
+        if task.source_size is not None:
+            fields.update(
+                source_format=task.source_format,
+                source_width=task.source_size[0],
+                source_height=task.source_size[1]
+            )
+        if task.image_array is not None:
+            height, width = task.image_array.shape[:2]
+            fields.update(width=width, height=height)
+        if task.face_detections is not None and task.plate_detections is not None:
+            fields.update(
+                faces=len(task.face_detections),
+                plates=len(task.plate_detections),
+                cached=task.cached
+            )
+    fields["timings_ms"] = timings.to_dict()
+    return fields
+
+
+def log_request_summary(
+    status_code: int,
+    elapsed_seconds: float,
+    task: Optional[ImageTask],
+    timings: StageTimings
+) -> None:
+    """Log the one INFO record of an image request (stage and box details are DEBUG)"""
+    fields = request_fields(status_code, elapsed_seconds, task, timings)
+    logger.info(
+        "Image request finished with status %d in %.0fms", status_code, elapsed_seconds * 1000,
+        extra={"event": "request_summary", "fields": fields}
+    )
+
+
+def process_image(task: ImageTask) -> None:
+    """Run all stages of a request in the calling thread"""
+    for _, stage in IMAGE_STAGES:
+        stage(task)
+
+
+def get_pipeline_engine() -> Optional[PipelineEngine]:
+    """
+    Start the stage-pipelined engine on first use
+    
+    Returns:
+        Running PipelineEngine, or None when requests run their stages in sequence
+    """
+    global pipeline_engine
+    
+    if not settings.pipeline_enabled:
+        return None
+    
+    with engine_lock:
+        if pipeline_engine is None:
+            workers = {
+                "decode": settings.pipeline_io_workers,
+                "detect": settings.pipeline_compute_workers,
+                "encode": settings.pipeline_io_workers
+            }
+            engine = PipelineEngine([
+                Stage(name, function, workers=workers[name], queue_size=settings.pipeline_queue_size)
+                for name, function in IMAGE_STAGES
+            ])
+            engine.start()
+            for name, _ in IMAGE_STAGES:
+                QUEUE_DEPTH.set_function(
+                    functools.partial(engine.queue_depth, name),
+                    queue=f"pipeline_{name}"
+                )
+            pipeline_engine = engine
+    return pipeline_engine
+
+
 @router.post("/anonymize", response_model=Dict[str, Any])
 async def anonymize_image(
-    file: UploadFile = File(..., description="Image file (JPG/PNG, max 10MB)")
+    file: UploadFile = File(..., description="Image file (JPG/PNG, max 10MB)"),
+    output_format: Optional[str] = Query(
+        None,
+        description="Output encoding: png, jpeg or webp (default from settings)"
+    ),
+    camera_id: Optional[str] = Query(
+        None,
+        description="Camera profile restricting each detector to its regions of interest"
+    ),
+    include_timings: bool = Query(
+        False,
+        alias="timings",
+        description="Include per-stage durations (ms) in the response"
+    )
 ) -> JSONResponse:
     """
     Anonymize faces and license plates in uploaded image
@@ -66,6 +355,10 @@ async def anonymize_image(
     
     Args:
         file: Uploaded image file (JPG or PNG format, max 10MB)
+        output_format: Optional output encoding overriding the configured default
+        camera_id: Optional camera profile id (detectors run on their ROIs only)
+        include_timings: Whether to add a "timings" object (stage durations are
+            always sent in the Server-Timing header)
         
     Returns:
         JSON response with:
@@ -80,26 +373,33 @@ async def anonymize_image(
         HTTPException: If validation or processing fails
     """
     start_time = time.time()
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    IN_FLIGHT.inc()
+    # Stages of this request (also recorded from the worker threads)
+    timings = StageTimings()
+    timings_token = request_timings.set(timings)
+    capture = profiler.start_request() if profiler is not None else None
+    capture_token = current_capture.set(capture)
+    # Added to every record logged for this request, including its worker threads
+    context_token = bind_context(filename=file.filename, camera_id=camera_id)
+    task = None
     
     try:
-        # Read file
-        image_bytes = await file.read()
-        logger.info(f"Received file: {file.filename}, size: {len(image_bytes)} bytes")
-        
-        # Validate image
+        # Resolve output encoding and camera profile before doing any work
         try:
-            image = ImageValidator.validate_image(
-                image_bytes,
-                max_size=settings.max_upload_size
-            )
-        except InvalidImageError as e:
-            logger.warning(f"Image validation failed: {e}")
+            encoder_options = EncoderOptions.from_settings(settings, output_format)
+            camera_profile = get_camera_profile(camera_id)
+        except (EncodingError, CameraProfileError) as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=str(e)
             )
         
-        # Check file size explicitly for 413 error
+        # Read file
+        image_bytes = await file.read()
+        logger.debug("Received file: %s, size: %d bytes", file.filename, len(image_bytes))
+        
+        # Reject oversized uploads before they occupy any stage
         if len(image_bytes) > settings.max_upload_size:
             raise HTTPException(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
@@ -107,41 +407,41 @@ async def anonymize_image(
             )
         
         # Get components
-        face_det, plate_det, anon, preproc = get_components()
-        
-        # Preprocess image
-        image_array, processed_image = preproc.preprocess(image)
-        
-        # Detect faces
-        logger.info("Running face detection...")
-        face_detections = face_det.detect(image_array)
-        
-        # Detect license plates (only if enabled)
-        plate_detections = []
-        if settings.enable_plate_detection:
-            logger.info("Running license plate detection...")
-            try:
-                plate_detections = plate_det.detect(image_array)
-            except Exception as e:
-                logger.warning(f"License plate detection failed: {e}")
-                logger.info("Continuing with face detection only")
-        else:
-            logger.info("License plate detection is disabled (enable_plate_detection=False)")
-        
-        # Combine all detections
-        all_detections = face_detections + plate_detections
-        logger.info(
-            f"Total detections: {len(all_detections)} "
-            f"(faces: {len(face_detections)}, plates: {len(plate_detections)})"
-        )
+        get_components()
         
-        # Anonymize image
-        logger.info("Anonymizing image...")
-        anonymized_image, base64_image = anon.anonymize(
-            processed_image,
-            all_detections
+        task = ImageTask(
+            image_bytes=image_bytes,
+            encoder_options=encoder_options,
+            camera_id=camera_id,
+            camera_profile=camera_profile
         )
         
+        # Decode, detect and encode in worker threads, keeping the event loop free
+        try:
+            engine = get_pipeline_engine()
+            if engine is not None:
+                future = await run_in_threadpool(
+                    engine.submit, task, timeout=settings.pipeline_submit_timeout
+                )
+                await asyncio.wrap_future(future)
+            else:
+                await run_in_threadpool(process_image, task)
+        except queue.Full:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, retry later",
+                headers={"Retry-After": "1"}
+            )
+        except InvalidImageError as e:
+            logger.warning("Image validation failed: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        face_detections, plate_detections = task.face_detections, task.plate_detections
+        assert face_detections is not None and plate_detections is not None
+        
         # Calculate processing time
         processing_time = time.time() - start_time
         
@@ -149,33 +449,106 @@ async def anonymize_image(
         response = ResultFormatter.format_response(
             success=True,
             processing_time=processing_time,
-            anonymized_image=base64_image,
+            anonymized_image=task.anonymized_image,
             face_detections=face_detections,
             plate_detections=plate_detections,
-            anonymization_color=settings.anonymization_color
+            anonymization_color=settings.anonymization_color,
+            image_format=encoder_options.format,
+            timings=timings.to_dict() if include_timings else None
         )
         
-        logger.info(
-            f"Anonymization completed in {processing_time:.2f}s: "
-            f"{len(face_detections)} faces, {len(plate_detections)} plates"
-        )
+        DETECTIONS.inc(len(face_detections), label="face")
+        DETECTIONS.inc(len(plate_detections), label="plate")
         
-        return JSONResponse(content=response, status_code=status.HTTP_200_OK)
+        if capture is not None and profiler is not None and task.image_array is not None:
+            height, width = task.image_array.shape[:2]
+            await run_in_threadpool(profiler.finish, capture, processing_time, {
+                "filename": file.filename,
+                "upload_bytes": len(image_bytes),
+                "width": width,
+                "height": height,
+                "faces": len(face_detections),
+                "plates": len(plate_detections),
+                "plate_fallback": "plate_fallback" in timings.seconds(),
+                "cached": task.cached,
+                "camera_id": camera_id,
+                "output_format": encoder_options.format,
+                "timings_ms": timings.to_dict()
+            })
         
-    except HTTPException:
+        status_code = status.HTTP_200_OK
+        return JSONResponse(
+            content=response,
+            status_code=status_code,
+            headers={"Server-Timing": timings.server_timing(total_seconds=processing_time)}
+        )
+        
+    except HTTPException as e:
+        status_code = e.status_code
+        ERRORS.inc(kind="rejected")
         raise
     except DetectionError as e:
-        logger.error(f"Detection error: {e}")
+        logger.error("Detection error: %s", e)
+        ERRORS.inc(kind="detection")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Detection failed: {str(e)}"
         )
     except Exception as e:
-        logger.error(f"Unexpected error: {e}", exc_info=True)
+        logger.error("Unexpected error: %s", e, exc_info=True)
+        ERRORS.inc(kind="internal")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
         )
+    finally:
+        elapsed = time.time() - start_time
+        log_request_summary(status_code, elapsed, task, timings)
+        # Queued for the recorder's writer thread, so the response is not held up
+        if recorder is not None and recorder.should_record():
+            recorder.record({
+                "arrival": start_time,
+                "request_id": current_request_id.get(),
+                "camera_id": camera_id,
+                **request_fields(status_code, elapsed, task, timings)
+            }, task.image_bytes if task is not None else None)
+        unbind_context(context_token)
+        current_capture.reset(capture_token)
+        request_timings.reset(timings_token)
+        IN_FLIGHT.dec()
+        REQUEST_SECONDS.observe(elapsed, status=str(status_code))
+
+
+@router.post("/profiling")
+async def configure_profiling(
+    sample_rate: Optional[float] = Query(None, ge=0.0, le=1.0, description="Fraction of requests run under cProfile"),
+    slow_threshold_ms: Optional[float] = Query(None, ge=0.0, description="Keep profiles of slower requests (0 = off)")
+) -> Dict[str, Any]:
+    """
+    Change the profiling rules without a restart (requires profiling_enabled)
+    
+    Args:
+        sample_rate: New sample rate (unchanged if omitted)
+        slow_threshold_ms: New latency threshold (unchanged if omitted)
+        
+    Returns:
+        Current rules and the stored captures (newest first)
+        
+    Raises:
+        HTTPException: If profiling is disabled
+    """
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiling is disabled (profiling_enabled)"
+        )
+    profiler.configure(sample_rate=sample_rate, slow_threshold_ms=slow_threshold_ms)
+    return {
+        "sample_rate": profiler.sample_rate,
+        "slow_threshold_ms": profiler.slow_threshold_ms,
+        "directory": str(profiler.directory),
+        "captures": profiler.captures()
+    }
 
 
 @router.get("/info")
@@ -205,9 +578,42 @@ async def get_info() -> Dict[str, Any]:
             "max_upload_size_mb": settings.max_upload_size / (1024 * 1024),
             "supported_formats": ["JPG", "PNG"]
         },
+        "output": {
+            "default_format": settings.output_format,
+            "supported_formats": list(SUPPORTED_FORMATS),
+            "max_dimension": settings.max_output_dimension
+        },
+        "inference": {
+            "mode": "processes" if settings.inference_processes > 0 else "in_process",
+            "processes": settings.inference_processes
+        },
+        "camera_profiles": {
+            "configured": settings.camera_profiles_path is not None,
+            "cameras": sorted(camera_profiles) if camera_profiles else []
+        },
         "features": {
             "face_detection": True,
             "plate_detection": settings.enable_plate_detection
         }
     }
 
+
+@router.get("/stats")
+async def get_stats() -> Dict[str, Any]:
+    """
+    Get runtime performance counters
+    
+    Returns:
+        Counters for the two-stage plate fallback (invocations, per-frame cost,
+        vehicles searched/skipped), the near-duplicate cache and the request
+        pipeline stages (utilization and queue depth)
+    """
+    return {
+        "plate_fallback": (
+            plate_detector.get_fallback_stats() if hasattr(plate_detector, "get_fallback_stats") else None
+        ),
+        "near_duplicate_cache": (
+            near_duplicate_cache.stats.to_dict() if near_duplicate_cache is not None else None
+        ),
+        "pipeline": pipeline_engine.stats() if pipeline_engine is not None else None
+    }
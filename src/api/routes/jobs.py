@@ -0,0 +1,217 @@
+"""Queued image anonymization endpoints (processed by separate workers)"""
+
+import json
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, UploadFile, File, Query, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse
+
+from src.config import get_settings
+from src.preprocessing import ImageValidator
+from src.anonymization import EncoderOptions
+from src.anonymization.encoders import MEDIA_TYPES
+from src.api.routes.anonymization import get_camera_profile
+from src.jobs import Job, JobQueue, create_job_queue
+from src.utils.exceptions import (
+    InvalidImageError,
+    EncodingError,
+    CameraProfileError,
+    JobQueueError,
+)
+from src.utils.logger import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+settings = get_settings()
+job_queue = None
+
+
+def get_job_queue() -> JobQueue:
+    """Lazy initialization of the job queue"""
+    global job_queue
+    
+    if job_queue is None:
+        try:
+            job_queue = create_job_queue(settings)
+        except JobQueueError as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return job_queue
+
+
+def store_and_enqueue(
+    image_bytes: bytes,
+    output_format: str,
+    camera_id: Optional[str],
+    filename: Optional[str]
+) -> Job:
+    """
+    Validate an upload, store it in the jobs directory and queue it (blocking I/O)
+    
+    Args:
+        image_bytes: Uploaded image
+        output_format: Canonical output encoding
+        camera_id: Optional camera profile id
+        filename: Name of the upload (used for the result download)
+        
+    Returns:
+        Queued Job
+        
+    Raises:
+        InvalidImageError: If the upload is not a valid image
+    """
+    image = ImageValidator.validate_image(image_bytes, max_size=settings.max_upload_size)
+    # Opened before the input is written, so an unavailable queue leaves no file behind
+    queue = get_job_queue()
+    extension = ".png" if image.format == "PNG" else ".jpg"
+    relative_input = Path("inputs") / f"{uuid.uuid4().hex}{extension}"
+    input_path = Path(settings.jobs_dir) / relative_input
+    input_path.parent.mkdir(parents=True, exist_ok=True)
+    input_path.write_bytes(image_bytes)
+    
+    try:
+        return queue.enqueue(
+            {
+                "input": relative_input.as_posix(),
+                "output_format": output_format,
+                "camera_id": camera_id,
+                "filename": filename
+            },
+            max_attempts=settings.job_max_attempts
+        )
+    except Exception:
+        input_path.unlink(missing_ok=True)
+        raise
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_image(
+    file: UploadFile = File(..., description="Image file (JPG/PNG, max 10MB)"),
+    output_format: Optional[str] = Query(
+        None,
+        description="Output encoding: png, jpeg or webp (default from settings)"
+    ),
+    camera_id: Optional[str] = Query(
+        None,
+        description="Camera profile restricting each detector to its regions of interest"
+    )
+) -> JSONResponse:
+    """
+    Queue an image for anonymization by a worker process
+    
+    The image is validated and stored in the shared jobs directory; any
+    worker started with `python -m src.cli worker` picks it up.
+    
+    Args:
+        file: Uploaded image file
+        output_format: Optional output encoding overriding the configured default
+        camera_id: Optional camera profile id
+        
+    Returns:
+        JSON response with the job id and status URL (HTTP 202)
+        
+    Raises:
+        HTTPException: If validation fails or the queue is unavailable
+    """
+    try:
+        encoder_options = EncoderOptions.from_settings(settings, output_format)
+        get_camera_profile(camera_id)
+        image_bytes = await file.read()
+        # Validation, the file write and the SQLite insert stay off the event loop
+        job = await run_in_threadpool(
+            store_and_enqueue, image_bytes, encoder_options.format, camera_id, file.filename
+        )
+    except (EncodingError, CameraProfileError, InvalidImageError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    logger.info(f"Queued job {job.job_id} for {file.filename} ({len(image_bytes)} bytes)")
+    
+    return JSONResponse(
+        content={
+            "job_id": job.job_id,
+            "status": job.status,
+            "status_url": f"/api/v1/jobs/{job.job_id}"
+        },
+        status_code=status.HTTP_202_ACCEPTED
+    )
+
+
+@router.get("/jobs/stats")
+def get_job_stats() -> Dict[str, Any]:
+    """
+    Get queue depth and per-worker throughput
+    
+    Returns:
+        Job counts per status and worker stats
+    """
+    queue = get_job_queue()
+    return {
+        "jobs": queue.counts(),
+        "workers": [worker.to_dict() for worker in queue.workers()]
+    }
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str) -> Dict[str, Any]:
+    """
+    Get status of a queued job (with detections once completed)
+    
+    Args:
+        job_id: Job identifier
+        
+    Returns:
+        Job status dictionary
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    
+    response = {
+        "job_id": job.job_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "error": job.error,
+        "worker_id": job.lease_owner or (job.result or {}).get("worker_id"),
+        "result_url": None,
+        "details": None
+    }
+    if job.status == "completed" and job.result is not None:
+        response["result_url"] = f"/api/v1/jobs/{job_id}/result"
+        details_path = Path(settings.jobs_dir) / job.result["details"]
+        if details_path.exists():
+            response["details"] = json.loads(details_path.read_text())
+    return response
+
+
+@router.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str) -> FileResponse:
+    """
+    Download the anonymized image of a completed job
+    
+    Args:
+        job_id: Job identifier
+        
+    Returns:
+        Anonymized image file
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status != "completed" or job.result is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status}, result not available"
+        )
+    
+    output_path = Path(settings.jobs_dir) / job.result["output"]
+    if not output_path.exists():
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Result file no longer exists")
+    
+    return FileResponse(
+        output_path,
+        media_type=MEDIA_TYPES[job.payload["output_format"]],
+        filename=f"anonymized_{Path(job.payload.get('filename') or job_id).stem}{output_path.suffix}"
+    )
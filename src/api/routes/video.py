@@ -0,0 +1,271 @@
+"""Video anonymization API endpoints (asynchronous jobs)"""
+
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, UploadFile, File, Query, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse
+
+from src.config import get_settings
+from src.inference import RemoteFrameDetector
+from src.video import VideoAnonymizer, VideoStats, build_frame_detector, wrap_frame_detector
+from src.api.routes.anonymization import (
+    get_camera_profile,
+    get_components,
+    get_inference_server,
+    inference_lock,
+)
+from src.utils.exceptions import CameraProfileError
+from src.utils.logger import get_logger
+from src.utils.metrics import QUEUE_DEPTH
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+settings = get_settings()
+
+ALLOWED_VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv"}
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+@dataclass
+class VideoJob:
+    """State of a background video anonymization job"""
+    job_id: str
+    input_path: Path
+    output_path: Path
+    camera_id: Optional[str] = None
+    status: str = "queued"  # queued, running, completed, failed
+    error: Optional[str] = None
+    stats: VideoStats = field(default_factory=VideoStats)
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "error": self.error,
+            "stats": self.stats.to_dict(),
+            "result_url": (
+                f"/api/v1/video/jobs/{self.job_id}/result" if self.status == "completed" else None
+            )
+        }
+
+
+# In-memory job registry (single process POC)
+jobs: Dict[str, VideoJob] = {}
+video_executor = ThreadPoolExecutor(
+    max_workers=settings.video_max_concurrent_jobs,
+    thread_name_prefix="video-job"
+)
+QUEUE_DEPTH.set_function(
+    lambda: sum(job.status == "queued" for job in list(jobs.values())),
+    queue="video_jobs"
+)
+
+
+def evict_finished_jobs(now: Optional[float] = None) -> int:
+    """
+    Drop finished jobs past their TTL or beyond the retention count, deleting their files
+    
+    Args:
+        now: Current time (default: time.time())
+        
+    Returns:
+        Number of jobs dropped
+    """
+    now = time.time() if now is None else now
+    finished = sorted(
+        ((job.finished_at, job) for job in list(jobs.values()) if job.finished_at is not None),
+        key=lambda item: item[0]
+    )
+    excess = len(finished) - settings.video_max_finished_jobs
+    expired = [
+        job for index, (finished_at, job) in enumerate(finished)
+        if index < excess or now - finished_at > settings.video_job_ttl_seconds
+    ]
+    for job in expired:
+        jobs.pop(job.job_id, None)
+        job.input_path.unlink(missing_ok=True)
+        job.output_path.unlink(missing_ok=True)
+    if expired:
+        logger.info(f"Dropped {len(expired)} finished video jobs")
+    return len(expired)
+
+
+def _run_job(job: VideoJob) -> None:
+    """Run a video job (executed in the video thread pool)"""
+    job.status = "running"
+    try:
+        face_det, plate_det, anon, _ = get_components()
+        inference_server = get_inference_server()
+        frame_detector: Any
+        if inference_server is not None:
+            frame_detector = wrap_frame_detector(
+                settings,
+                RemoteFrameDetector(inference_server, job.camera_id)
+            )
+        else:
+            frame_detector = build_frame_detector(
+                settings,
+                face_det,
+                plate_det,
+                lock=inference_lock,
+                profile=get_camera_profile(job.camera_id)
+            )
+        video_anonymizer = VideoAnonymizer(
+            frame_detector,
+            anon,
+            queue_size=settings.video_queue_size,
+            codec=settings.video_codec
+        )
+        video_anonymizer.process(
+            job.input_path,
+            job.output_path,
+            progress=lambda stats: setattr(job, "stats", stats)
+        )
+        job.status = "completed"
+    except Exception as e:
+        logger.error(f"Video job {job.job_id} failed: {e}", exc_info=True)
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        job.finished_at = time.time()
+        job.input_path.unlink(missing_ok=True)
+
+
+@router.post("/video/anonymize", status_code=status.HTTP_202_ACCEPTED)
+async def anonymize_video(
+    file: UploadFile = File(..., description="Video file (MP4/AVI/MOV/MKV)"),
+    camera_id: Optional[str] = Query(
+        None,
+        description="Camera profile restricting each detector to its regions of interest"
+    )
+) -> JSONResponse:
+    """
+    Start anonymizing an uploaded video in the background
+    
+    The upload is streamed to disk, then frames are decoded, anonymized and
+    re-encoded by a bounded pipeline. Poll the returned job for progress.
+    
+    Args:
+        file: Uploaded video file
+        camera_id: Optional camera profile id (detectors run on their ROIs only)
+        
+    Returns:
+        JSON response with the job id and status URL (HTTP 202)
+        
+    Raises:
+        HTTPException: If the file type is unsupported or the upload too large
+    """
+    extension = Path(file.filename or "").suffix.lower()
+    if extension not in ALLOWED_VIDEO_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Unsupported video format: {extension or 'unknown'}. "
+                f"Allowed formats: {', '.join(sorted(ALLOWED_VIDEO_EXTENSIONS))}"
+            )
+        )
+    
+    try:
+        get_camera_profile(camera_id)
+    except CameraProfileError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    await run_in_threadpool(evict_finished_jobs)
+    
+    job_id = uuid.uuid4().hex
+    video_dir = Path(settings.uploads_dir) / "videos"
+    await run_in_threadpool(video_dir.mkdir, parents=True, exist_ok=True)
+    job = VideoJob(
+        job_id=job_id,
+        input_path=video_dir / f"{job_id}{extension}",
+        output_path=video_dir / f"{job_id}.anonymized.mp4",
+        camera_id=camera_id
+    )
+    
+    # Stream the upload to disk in chunks (constant memory, writes off the event loop)
+    size = 0
+    target = await run_in_threadpool(open, job.input_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > settings.max_video_upload_size:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"File size exceeds maximum allowed size of {settings.max_video_upload_size} bytes"
+                )
+            await run_in_threadpool(target.write, chunk)
+    except BaseException:
+        target.close()
+        job.input_path.unlink(missing_ok=True)
+        raise
+    finally:
+        target.close()
+    
+    logger.info(f"Received video: {file.filename}, size: {size} bytes, job: {job_id}")
+    
+    jobs[job_id] = job
+    asyncio.get_running_loop().run_in_executor(video_executor, _run_job, job)
+    
+    return JSONResponse(
+        content={
+            "job_id": job_id,
+            "status": job.status,
+            "status_url": f"/api/v1/video/jobs/{job_id}"
+        },
+        status_code=status.HTTP_202_ACCEPTED
+    )
+
+
+@router.get("/video/jobs/{job_id}")
+def get_video_job(job_id: str) -> Dict[str, Any]:
+    """
+    Get status and progress (frames, fps, detections) of a video job
+    
+    Args:
+        job_id: Job identifier
+        
+    Returns:
+        Job status dictionary
+    """
+    evict_finished_jobs()
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job.to_dict()
+
+
+@router.get("/video/jobs/{job_id}/result")
+def get_video_result(job_id: str) -> FileResponse:
+    """
+    Download the anonymized video of a completed job
+    
+    Args:
+        job_id: Job identifier
+        
+    Returns:
+        Anonymized video file
+    """
+    evict_finished_jobs()
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status}"
+        )
+    return FileResponse(
+        job.output_path,
+        media_type="video/mp4",
+        filename=f"anonymized_{job_id}.mp4"
+    )
@@ -0,0 +1,14 @@
+"""Batch processing module"""
+
+from .directory import BatchStats, DirectoryAnonymizer, iter_images
+from .manifest import Manifest
+from .watch import FolderWatcher, WatchStats
+
+__all__ = [
+    "BatchStats",
+    "DirectoryAnonymizer",
+    "FolderWatcher",
+    "Manifest",
+    "WatchStats",
+    "iter_images",
+]
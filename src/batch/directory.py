@@ -0,0 +1,435 @@
+"""Parallel anonymization of image directory trees
+
+Files are discovered lazily and fed to a process pool whose workers each own
+their detector instances. Outputs mirror the input tree, and every finished
+file is recorded in an append-only manifest so interrupted runs resume where
+they stopped and unchanged files are skipped.
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple, Union
+
+import cv2
+from PIL import Image
+
+from src.anonymization.anonymizer import Anonymizer
+from src.anonymization.result_formatter import ResultFormatter
+from src.anonymization.encoders import SUPPORTED_FORMATS, EncoderOptions, ImageEncoder
+from src.anonymization.pipeline import create_detectors, detect_regions
+from src.batch.manifest import Manifest
+from src.config import get_settings
+from src.detection.roi import load_camera_profiles
+from src.preprocessing import ImagePreprocessor
+from src.utils.exceptions import BatchProcessingError, CameraProfileError
+from src.utils.logger import get_logger, setup_worker_logging
+from src.utils.tracing import SpanContext, configure_tracing, continue_trace, current_span_context, tracer
+
+logger = get_logger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def iter_images(
+    root: Union[str, Path],
+    extensions: Tuple[str, ...] = IMAGE_EXTENSIONS,
+    exclude: Optional[Path] = None
+) -> Iterator[Path]:
+    """
+    Walk a directory tree lazily, yielding image files in a stable order
+
+    Args:
+        root: Root directory
+        extensions: Lower-case file extensions to include
+        exclude: Directory to skip (e.g. an output tree inside the input tree)
+
+    Yields:
+        Paths of image files
+    """
+    exclude = exclude.resolve() if exclude is not None else None
+    stack = [Path(root)]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as iterator:
+            entries = sorted(iterator, key=lambda entry: entry.name)
+
+        subdirectories = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if exclude is None or Path(entry.path).resolve() != exclude:
+                    subdirectories.append(Path(entry.path))
+            elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions:
+                yield Path(entry.path)
+        stack.extend(reversed(subdirectories))
+
+
+def shared_stems(directory: Union[str, Path], extensions: Tuple[str, ...] = IMAGE_EXTENSIONS) -> Set[str]:
+    """
+    Lower-case stems of more than one image in a directory (a.jpg and a.png)
+
+    Args:
+        directory: Directory to list
+        extensions: Lower-case file extensions counted as images
+
+    Returns:
+        Set of shared stems
+    """
+    stems = Counter(
+        os.path.splitext(name)[0].lower()
+        for name in os.listdir(directory)
+        if os.path.splitext(name)[1].lower() in extensions
+    )
+    return {stem for stem, count in stems.items() if count > 1}
+
+
+@dataclass
+class BatchStats:
+    """Progress and throughput of a directory run"""
+    total: int = 0  # Files found (0 when not counted up front)
+    processed: int = 0
+    skipped: int = 0  # Unchanged since a previous run
+    failed: int = 0
+    faces: int = 0
+    plates: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def images_per_second(self) -> float:
+        """Processed (and failed) files per second"""
+        done = self.processed + self.failed
+        return done / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Estimated seconds until all files are done (None if unknown)"""
+        remaining = self.total - self.processed - self.skipped - self.failed
+        if not self.total or self.images_per_second <= 0:
+            return None
+        return max(0, remaining) / self.images_per_second
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        data = asdict(self)
+        data["images_per_second"] = round(self.images_per_second, 2)
+        data["eta_seconds"] = round(self.eta_seconds, 1) if self.eta_seconds is not None else None
+        return data
+
+
+# Per-process worker state, set up once by init_worker
+_worker: Dict[str, Any] = {}
+
+
+def init_worker(output_format: Optional[str], threads: int = 1) -> None:
+    """
+    Create the detectors and encoder owned by one worker process
+
+    Args:
+        output_format: Default output encoding (None for the configured default)
+        threads: OpenCV/torch threads used by this process
+    """
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    settings = get_settings()
+    setup_worker_logging(settings)
+    configure_tracing(settings)
+    face_detector, plate_detector = create_detectors(settings)
+    profiles = {}
+    if settings.camera_profiles_path:
+        profiles = load_camera_profiles(settings.camera_profiles_path)
+
+    _worker.update(
+        settings=settings,
+        face_detector=face_detector,
+        plate_detector=plate_detector,
+        anonymizer=Anonymizer(color=settings.anonymization_color),
+        preprocessor=ImagePreprocessor(),
+        encoder=ImageEncoder(EncoderOptions.from_settings(settings, output_format)),
+        profiles=profiles
+    )
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write a file via a temporary name so readers never see partial output"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = path.with_name(path.name + ".partial")
+    partial_path.write_bytes(data)
+    os.replace(partial_path, path)
+
+
+def anonymize_file(
+    source: str,
+    target: str,
+    camera_id: Optional[str] = None,
+    sidecar: Optional[str] = None,
+    output_format: Optional[str] = None,
+    trace_parent: Optional[SpanContext] = None
+) -> Dict[str, Any]:
+    """
+    Anonymize one image with the detectors created by init_worker()
+
+    Args:
+        source: Input image path
+        target: Output image path (written atomically)
+        camera_id: Optional camera profile id
+        sidecar: Optional path of a detection JSON written next to the output
+        output_format: Optional encoding overriding the worker default
+        trace_parent: Span of the submitting process the file's span belongs to
+
+    Returns:
+        Face/plate counts and processing seconds
+    """
+    start_time = time.perf_counter()
+
+    with continue_trace(trace_parent), tracer.span("file", source=Path(source).name) as span:
+        with Image.open(source) as image:
+            image_array, _ = _worker["preprocessor"].preprocess(image)
+        height, width = image_array.shape[:2]
+        span.set_attributes(image_width=width, image_height=height)
+
+        face_detections, plate_detections = detect_regions(
+            image_array,
+            _worker["face_detector"],
+            _worker["plate_detector"],
+            _worker["settings"],
+            _worker["profiles"].get(camera_id) if camera_id else None
+        )
+        _worker["anonymizer"].fill_array(image_array, face_detections + plate_detections)
+        encoder = _worker["encoder"]
+        if output_format is not None:
+            encoder = ImageEncoder(EncoderOptions.from_settings(_worker["settings"], output_format))
+        encoded = encoder.encode(image_array)
+
+        _write_atomic(Path(target), encoded)
+        span.set_attributes(faces=len(face_detections), plates=len(plate_detections))
+    seconds = time.perf_counter() - start_time
+
+    if sidecar is not None:
+        settings = _worker["settings"]
+        # Boxes in the frame of the (possibly downscaled) output image
+        scale = encoder.options.output_scale(width, height)
+        face_detections, plate_detections = face_detections.scale(scale), plate_detections.scale(scale)
+        response = ResultFormatter.format_response(
+            success=True,
+            processing_time=seconds,
+            anonymized_image=None,
+            face_detections=face_detections,
+            plate_detections=plate_detections,
+            anonymization_color=settings.anonymization_color,
+            image_format=encoder.options.format
+        )
+        del response["anonymized_image"]
+        response["source_file"] = Path(source).name
+        response["anonymized_file"] = Path(target).name
+        _write_atomic(Path(sidecar), json.dumps(response, indent=2).encode("utf-8"))
+
+    return {
+        "faces": len(face_detections),
+        "plates": len(plate_detections),
+        "seconds": round(seconds, 4)
+    }
+
+
+class DirectoryAnonymizer:
+    """Anonymizes every image below a directory with a pool of worker processes"""
+
+    def __init__(
+        self,
+        input_dir: Union[str, Path],
+        output_dir: Union[str, Path],
+        workers: Optional[int] = None,
+        output_format: Optional[str] = None,
+        manifest_path: Optional[Union[str, Path]] = None,
+        camera_id: Optional[str] = None,
+        force: bool = False,
+        count_first: bool = True,
+        threads_per_worker: int = 1
+    ):
+        """
+        Initialize directory anonymizer
+
+        Args:
+            input_dir: Root of the input tree
+            output_dir: Root of the mirrored output tree
+            workers: Worker processes (default: all cores)
+            output_format: Output encoding (default from settings)
+            manifest_path: Manifest file (default: output_dir/manifest.jsonl)
+            camera_id: Optional camera profile restricting detectors to ROIs
+            force: Reprocess files even if the manifest marks them done
+            count_first: Count files up front so progress can show an ETA
+            threads_per_worker: OpenCV/torch threads per worker (avoids oversubscription)
+
+        Raises:
+            BatchProcessingError: If the input directory does not exist
+            EncodingError: If the output format is not supported
+            CameraProfileError: If the camera profile cannot be found
+        """
+        self.input_dir = Path(input_dir)
+        self.output_dir = Path(output_dir)
+        if not self.input_dir.is_dir():
+            raise BatchProcessingError(f"Input directory not found: {self.input_dir}")
+
+        settings = get_settings()
+        self.encoder_options = EncoderOptions.from_settings(settings, output_format)
+        if camera_id is not None:
+            if not settings.camera_profiles_path:
+                raise CameraProfileError("No camera profiles configured (camera_profiles_path)")
+            if camera_id not in load_camera_profiles(settings.camera_profiles_path):
+                raise CameraProfileError(f"Unknown camera_id: {camera_id}")
+
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.camera_id = camera_id
+        self.manifest_path = Path(manifest_path) if manifest_path else self.output_dir / MANIFEST_NAME
+        self.force = force
+        self.count_first = count_first
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.logger = get_logger(self.__class__.__name__)
+        self._stems_directory: Optional[Path] = None
+        self._shared_stems: Set[str] = set()
+
+    def target_path(self, source: Path) -> Path:
+        """
+        Output path of a source file (mirrored tree, output format extension)
+
+        Images sharing a stem in one directory (a.jpg and a.png) keep their own
+        extension in the name (a.jpg.png and a.png.png), so neither overwrites the other.
+        """
+        relative = source.relative_to(self.input_dir)
+        extension = SUPPORTED_FORMATS[self.encoder_options.format]
+        if source.stem.lower() in self._stems_shared_in(source.parent):
+            return self.output_dir / relative.parent / f"{relative.name}{extension}"
+        return (self.output_dir / relative).with_suffix(extension)
+
+    def _stems_shared_in(self, directory: Path) -> Set[str]:
+        """Lower-case stems of more than one image in a directory (cached for the last directory)"""
+        if directory != self._stems_directory:
+            self._stems_directory = directory
+            self._shared_stems = shared_stems(directory)
+        return self._shared_stems
+
+    def run(self, progress: Optional[Callable[[BatchStats], None]] = None) -> BatchStats:
+        """
+        Anonymize the directory tree
+
+        Args:
+            progress: Optional callback invoked after every finished file
+
+        Returns:
+            BatchStats of the run
+
+        Raises:
+            BatchProcessingError: If the worker processes cannot be started
+        """
+        stats = BatchStats()
+        if self.count_first:
+            stats.total = sum(1 for _ in self._iter_sources())
+
+        self.logger.info(
+            f"Anonymizing {stats.total or 'all'} images from {self.input_dir} to {self.output_dir} "
+            f"with {self.workers} workers"
+        )
+        start_time = time.perf_counter()
+        pending: Dict[Future, Tuple[str, os.stat_result, Path]] = {}
+
+        def collect(done) -> None:
+            for future in done:
+                relative, stat, target = pending.pop(future)
+                self._record(manifest, stats, future, relative, stat, target)
+                stats.elapsed_seconds = time.perf_counter() - start_time
+                if progress is not None:
+                    progress(stats)
+
+        manifest = Manifest(self.manifest_path).load()
+        try:
+            with tracer.span(
+                "batch", input_dir=str(self.input_dir), workers=self.workers
+            ) as batch_span, ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=init_worker,
+                initargs=(self.encoder_options.format, self.threads_per_worker)
+            ) as pool:
+                # Spans of the files are children of the batch span
+                trace_parent = current_span_context()
+                for source in self._iter_sources():
+                    relative = source.relative_to(self.input_dir).as_posix()
+                    stat = source.stat()
+                    target = self.target_path(source)
+                    if not self.force and manifest.is_current(relative, stat) and target.exists():
+                        stats.skipped += 1
+                        continue
+
+                    # Bounded submission keeps memory flat on huge trees
+                    while len(pending) >= self.workers * 2:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    future = pool.submit(
+                        anonymize_file, str(source), str(target), self.camera_id,
+                        trace_parent=trace_parent
+                    )
+                    pending[future] = (relative, stat, target)
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                batch_span.set_attributes(
+                    processed=stats.processed, skipped=stats.skipped, failed=stats.failed
+                )
+        except BrokenProcessPool as e:
+            raise BatchProcessingError(f"Worker processes failed: {str(e)}") from e
+        finally:
+            manifest.close()
+            stats.elapsed_seconds = time.perf_counter() - start_time
+
+        self.logger.info(
+            f"Directory anonymized: {stats.processed} processed, {stats.skipped} skipped, "
+            f"{stats.failed} failed in {stats.elapsed_seconds:.1f}s "
+            f"({stats.images_per_second:.2f} images/s)"
+        )
+        return stats
+
+    def _iter_sources(self) -> Iterator[Path]:
+        """Input images, excluding an output tree nested in the input tree"""
+        return iter_images(self.input_dir, exclude=self.output_dir)
+
+    def _record(
+        self,
+        manifest: Manifest,
+        stats: BatchStats,
+        future: Future,
+        relative: str,
+        stat: os.stat_result,
+        target: Path
+    ) -> None:
+        """Record the outcome of one file in the manifest and the stats"""
+        record = {
+            "path": relative,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "output": target.relative_to(self.output_dir).as_posix(),
+            "finished_at": time.time()
+        }
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            raise error
+        if error is not None:
+            self.logger.warning(f"Failed to anonymize {relative}: {error}")
+            record.update(status="error", error=str(error))
+            stats.failed += 1
+        else:
+            result = future.result()
+            record.update(status="ok", **result)
+            stats.processed += 1
+            stats.faces += result["faces"]
+            stats.plates += result["plates"]
+        manifest.append(record)
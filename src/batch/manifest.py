@@ -0,0 +1,115 @@
+"""Append-only JSONL manifest for resumable batch runs"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, TextIO, Union
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Manifest:
+    """
+    Append-only record of processed files
+
+    Each line is one JSON record keyed by the file path relative to the input
+    root. Later records supersede earlier ones, and a truncated last line
+    (from a crash mid-write) is ignored on load, so the file is safe to resume
+    from at any point.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Initialize manifest
+
+        Args:
+            path: Path of the JSONL file (created on first append)
+        """
+        self.path = Path(path)
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self._file: Optional[TextIO] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> "Manifest":
+        """Read existing records (latest record per path wins)"""
+        if not self.path.exists():
+            return self
+
+        skipped = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self.records[record["path"]] = record
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    skipped += 1
+        if skipped:
+            logger.warning(f"Ignored {skipped} unreadable manifest lines in {self.path}")
+        return self
+
+    def is_current(self, relative_path: str, stat: os.stat_result) -> bool:
+        """
+        Whether a file was already processed successfully and has not changed since
+
+        Args:
+            relative_path: Path relative to the input root
+            stat: Current os.stat() of the file
+
+        Returns:
+            True if the file can be skipped
+        """
+        record = self.records.get(relative_path)
+        return (
+            record is not None
+            and record.get("status") == "ok"
+            and record.get("size") == stat.st_size
+            and record.get("mtime_ns") == stat.st_mtime_ns
+        )
+
+    def get(self, relative_path: str) -> Optional[Dict[str, Any]]:
+        """Latest record of a path"""
+        return self.records.get(relative_path)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Append a record and flush it to disk
+
+        Args:
+            record: Record with at least a "path" key
+        """
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = self._open()
+            self._file.write(line)
+            self._file.flush()
+            self.records[record["path"]] = record
+
+    def _open(self) -> TextIO:
+        """Open for appending, terminating a line truncated by a crash"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        truncated = False
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                truncated = f.read(1) != b"\n"
+        file = open(self.path, "a", encoding="utf-8")
+        if truncated:
+            file.write("\n")
+        return file
+
+    def close(self) -> None:
+        """Close the underlying file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "Manifest":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,290 @@
+"""Watch-folder ingestion
+
+Camera gateways drop images into the uploads directory (locally or over
+NFS/SMB). The watcher picks up files once their size and modification time
+have settled, anonymizes them in a bounded process pool, writes the output
+image and a detection JSON next to the original, and then moves the original
+out of the uploads directory.
+
+Filesystem events (watchdog, if installed) only shorten the reaction time; a
+periodic scan always runs because network filesystems do not deliver inotify
+events for remote writes.
+"""
+
+import json
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from src.anonymization.encoders import SUPPORTED_FORMATS, EncoderOptions
+from src.anonymization.result_formatter import ResultFormatter
+from src.batch.directory import init_worker, anonymize_file, iter_images, shared_stems
+from src.config import get_settings
+from src.detection.roi import load_camera_profiles
+from src.utils.exceptions import BatchProcessingError
+from src.utils.logger import get_logger
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Optional dependency, polling is used instead
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = get_logger(__name__)
+
+# Outputs written next to the originals carry this marker and are not ingested
+OUTPUT_MARKER = ".anonymized"
+
+
+def is_output(path: Path) -> bool:
+    """Whether a file is named like a watcher output ("<stem>.anonymized.<output extension>")"""
+    return path.suffix.lower() in SUPPORTED_FORMATS.values() and Path(path.stem).suffix == OUTPUT_MARKER
+
+
+@dataclass
+class WatchStats:
+    """Counters of a watch-folder run"""
+    processed: int = 0
+    failed: int = 0
+    faces: int = 0
+    plates: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return asdict(self)
+
+
+class _WakeHandler(FileSystemEventHandler):
+    """Wakes the watch loop on filesystem events"""
+
+    def __init__(self, wake: threading.Event):
+        self.wake = wake
+
+    def on_any_event(self, event) -> None:
+        self.wake.set()
+
+
+class FolderWatcher:
+    """Anonymizes images dropped into a directory"""
+
+    def __init__(
+        self,
+        watch_dir: Union[str, Path],
+        originals_dir: Union[str, Path],
+        failed_dir: Union[str, Path],
+        workers: int = 2,
+        poll_interval: float = 1.0,
+        settle_seconds: float = 2.0,
+        output_format: Optional[str] = None,
+        use_inotify: bool = True
+    ):
+        """
+        Initialize folder watcher
+
+        Args:
+            watch_dir: Directory to watch (recursively)
+            originals_dir: Processed originals are moved here (tree mirrored)
+            failed_dir: Files that could not be processed are moved here
+            workers: Worker processes
+            poll_interval: Seconds between scans
+            settle_seconds: Size and mtime must be unchanged this long before a file is read
+            output_format: Output encoding (default from settings)
+            use_inotify: Use watchdog events when the package is installed
+
+        Raises:
+            BatchProcessingError: If the originals or failed directory lies inside the watched one
+        """
+        settings = get_settings()
+        self.watch_dir = Path(watch_dir)
+        self.originals_dir = Path(originals_dir)
+        self.failed_dir = Path(failed_dir)
+        for directory in (self.originals_dir, self.failed_dir):
+            if directory.resolve().is_relative_to(self.watch_dir.resolve()):
+                raise BatchProcessingError(
+                    f"{directory} must not be inside the watched directory {self.watch_dir}"
+                )
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.encoder_options = EncoderOptions.from_settings(settings, output_format)
+        self.use_inotify = use_inotify and Observer is not None
+        self.camera_ids = (
+            set(load_camera_profiles(settings.camera_profiles_path))
+            if settings.camera_profiles_path else set()
+        )
+        self.stats = WatchStats()
+        self.logger = get_logger(self.__class__.__name__)
+        # Candidate files: path -> (size, mtime_ns, time the signature was first seen)
+        self._candidates: Dict[Path, Tuple[int, int, float]] = {}
+        self._in_flight: Dict[Future, Path] = {}
+
+    def output_paths(self, source: Path) -> Tuple[Path, Path]:
+        """
+        Anonymized image and detection JSON written next to a source file
+
+        Images sharing a stem (a.jpg and a.png) keep their own extension in the
+        names (a.jpg.anonymized.png), as in the directory batch. So does a file
+        whose plain output name is taken: processed originals are moved away,
+        so a.png arriving after a.jpg was handled would otherwise overwrite it.
+        """
+        extension = SUPPORTED_FORMATS[self.encoder_options.format]
+        name = source.stem
+        if (
+            name.lower() in shared_stems(source.parent)
+            or source.with_name(f"{name}{OUTPUT_MARKER}{extension}").exists()
+        ):
+            name = source.name
+        return (
+            source.with_name(f"{name}{OUTPUT_MARKER}{extension}"),
+            source.with_name(f"{name}{OUTPUT_MARKER}.json")
+        )
+
+    def camera_id(self, source: Path) -> Optional[str]:
+        """Camera profile of a file, taken from its top-level subdirectory name"""
+        parts = source.relative_to(self.watch_dir).parts
+        return parts[0] if len(parts) > 1 and parts[0] in self.camera_ids else None
+
+    def run(self, stop: Optional[threading.Event] = None) -> WatchStats:
+        """
+        Watch until the stop event is set
+
+        Args:
+            stop: Event ending the loop (in-flight files are finished first)
+
+        Returns:
+            WatchStats of the run
+
+        Raises:
+            BatchProcessingError: If the worker processes fail
+        """
+        stop = stop or threading.Event()
+        wake = threading.Event()
+        self.watch_dir.mkdir(parents=True, exist_ok=True)
+
+        observer = None
+        if self.use_inotify:
+            observer = Observer()
+            observer.schedule(_WakeHandler(wake), str(self.watch_dir), recursive=True)
+            observer.start()
+
+        self.logger.info(
+            f"Watching {self.watch_dir} with {self.workers} workers "
+            f"({'events + polling' if observer else 'polling'} every {self.poll_interval}s)"
+        )
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=init_worker,
+                initargs=(self.encoder_options.format, 1)
+            ) as pool:
+                while not stop.is_set():
+                    self.poll(pool)
+                    wake.wait(self.poll_interval)
+                    wake.clear()
+
+                while self._in_flight:
+                    self._collect(wait_seconds=0.1)
+        except BrokenProcessPool as e:
+            raise BatchProcessingError(f"Worker processes failed: {str(e)}") from e
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+        self.logger.info(f"Stopped watching {self.watch_dir}: {self.stats.to_dict()}")
+        return self.stats
+
+    def poll(self, pool: ProcessPoolExecutor) -> None:
+        """Collect finished files, then submit files that have settled"""
+        self._collect()
+        now = time.monotonic()
+        busy = set(self._in_flight.values())
+        seen = set()
+
+        for source in iter_images(self.watch_dir):
+            if source in busy or is_output(source):
+                continue
+            try:
+                stat = source.stat()
+            except FileNotFoundError:
+                continue
+            seen.add(source)
+
+            signature = (stat.st_size, stat.st_mtime_ns)
+            previous = self._candidates.get(source)
+            if previous is None or previous[:2] != signature:
+                self._candidates[source] = (*signature, now)
+                continue
+            if now - previous[2] < self.settle_seconds or len(self._in_flight) >= self.workers * 2:
+                continue
+
+            del self._candidates[source]
+            image_path, json_path = self.output_paths(source)
+            future = pool.submit(
+                anonymize_file,
+                str(source),
+                str(image_path),
+                self.camera_id(source),
+                str(json_path)
+            )
+            self._in_flight[future] = source
+
+        # Forget candidates that disappeared before settling
+        for source in set(self._candidates) - seen:
+            del self._candidates[source]
+
+    def _collect(self, wait_seconds: float = 0.0) -> None:
+        """Handle finished files: move originals away and record the outcome"""
+        if wait_seconds:
+            time.sleep(wait_seconds)
+
+        for future in [future for future in self._in_flight if future.done()]:
+            source = self._in_flight.pop(future)
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                raise error
+
+            if error is None:
+                result = future.result()
+                self.stats.processed += 1
+                self.stats.faces += result["faces"]
+                self.stats.plates += result["plates"]
+                self._move(source, self.originals_dir)
+                self.logger.info(
+                    f"Anonymized {source.name}: {result['faces']} faces, "
+                    f"{result['plates']} plates in {result['seconds']:.2f}s"
+                )
+            else:
+                self.stats.failed += 1
+                self.logger.warning(f"Failed to anonymize {source}: {error}")
+                target = self._move(source, self.failed_dir)
+                if target is not None:
+                    error_json = ResultFormatter.format_response(
+                        success=False,
+                        processing_time=0.0,
+                        anonymized_image=None,
+                        face_detections=[],
+                        plate_detections=[],
+                        anonymization_color="",
+                        error_message=str(error)
+                    )
+                    target.with_name(f"{target.name}.error.json").write_text(json.dumps(error_json))
+
+    def _move(self, source: Path, destination_root: Path) -> Optional[Path]:
+        """Move a file below destination_root, mirroring its path and avoiding overwrites"""
+        target = destination_root / source.relative_to(self.watch_dir)
+        if target.exists():
+            target = target.with_name(f"{target.stem}.{time.time_ns()}{target.suffix}")
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(source), str(target))
+            return target
+        except OSError as e:
+            self.logger.error(f"Cannot move {source} to {destination_root}: {e}")
+            return None
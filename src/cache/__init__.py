@@ -0,0 +1,12 @@
+"""Result caching module"""
+
+from .perceptual import BKTree, dhash, hamming_distance
+from .near_duplicate import NearDuplicateCache, CacheStats
+
+__all__ = [
+    "BKTree",
+    "dhash",
+    "hamming_distance",
+    "NearDuplicateCache",
+    "CacheStats",
+]
@@ -0,0 +1,143 @@
+"""Near-duplicate result cache keyed by perceptual hash"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.cache.perceptual import BKTree, dhash
+from src.utils.logger import get_logger
+
+DEFAULT_SCOPE = "default"
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters of the near-duplicate cache"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary (with hit rate)"""
+        data = asdict(self)
+        lookups = self.hits + self.misses
+        data["hit_rate"] = round(self.hits / lookups, 4) if lookups else 0.0
+        return data
+
+
+class _Entry:
+    """Cached result with the hash and image shape it belongs to"""
+
+    __slots__ = ("image_hash", "shape", "value")
+
+    def __init__(self, image_hash: int, shape: Tuple[int, ...], value: Any):
+        self.image_hash = image_hash
+        self.shape = shape
+        self.value = value
+
+
+class _Scope:
+    """BK-tree index plus LRU order of one camera"""
+
+    def __init__(self):
+        self.tree = BKTree()
+        self.lru: "OrderedDict[int, _Entry]" = OrderedDict()
+
+
+class NearDuplicateCache:
+    """
+    Per-camera LRU cache of detection results for near-identical images
+
+    Images are keyed by a difference hash; a lookup returns the closest stored
+    result within a Hamming distance, so frames differing only by re-encoding
+    or a timestamp overlay reuse the stored boxes.
+    """
+
+    def __init__(self, max_distance: int = 6, max_entries: int = 256, hash_size: int = 16):
+        """
+        Initialize cache
+
+        Args:
+            max_distance: Maximum Hamming distance counted as a duplicate
+            max_entries: Entries kept per camera (least recently used are evicted)
+            hash_size: dHash grid size (hash_size^2 bits)
+        """
+        self.max_distance = max_distance
+        self.max_entries = max(1, max_entries)
+        self.hash_size = hash_size
+        self.stats = CacheStats()
+        self._scopes: Dict[str, _Scope] = {}
+        self._lock = threading.Lock()
+        self.logger = get_logger(self.__class__.__name__)
+
+    def hash_image(self, image: np.ndarray) -> int:
+        """Perceptual hash of an image"""
+        return dhash(image, self.hash_size)
+
+    def lookup(
+        self,
+        image_hash: int,
+        shape: Tuple[int, ...],
+        scope: Optional[str] = None
+    ) -> Optional[Any]:
+        """
+        Find the stored result of a near-identical image
+
+        Args:
+            image_hash: Hash from hash_image()
+            shape: Image shape (results are only reused for the same size)
+            scope: Camera id (None for the default scope)
+
+        Returns:
+            Stored value or None
+        """
+        with self._lock:
+            cached = self._scopes.get(scope or DEFAULT_SCOPE)
+            if cached is not None:
+                for distance, entry in cached.tree.search(image_hash, self.max_distance):
+                    if entry.shape == tuple(shape):
+                        cached.lru.move_to_end(id(entry))
+                        self.stats.hits += 1
+                        self.logger.debug(f"Near-duplicate hit (distance {distance})")
+                        return entry.value
+            self.stats.misses += 1
+            return None
+
+    def store(
+        self,
+        image_hash: int,
+        shape: Tuple[int, ...],
+        value: Any,
+        scope: Optional[str] = None
+    ) -> None:
+        """
+        Store the result of an image
+
+        Args:
+            image_hash: Hash from hash_image()
+            shape: Image shape
+            value: Result to cache (treated as immutable)
+            scope: Camera id (None for the default scope)
+        """
+        with self._lock:
+            cached = self._scopes.setdefault(scope or DEFAULT_SCOPE, _Scope())
+            entry = _Entry(image_hash, tuple(shape), value)
+            cached.tree.add(image_hash, entry)
+            cached.lru[id(entry)] = entry
+            self.stats.entries += 1
+
+            while len(cached.lru) > self.max_entries:
+                _, evicted = cached.lru.popitem(last=False)
+                cached.tree.remove(evicted)
+                self.stats.evictions += 1
+                self.stats.entries -= 1
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._scopes.clear()
+            self.stats.entries = 0
@@ -0,0 +1,133 @@
+"""Perceptual hashing and Hamming-distance indexing"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def dhash(image: np.ndarray, hash_size: int = 16) -> int:
+    """
+    Difference hash of an image
+
+    The image is converted to grayscale and downscaled to
+    (hash_size + 1) x hash_size; each bit records whether a pixel is brighter
+    than its right neighbour. Re-encoding and small overlays flip few bits.
+
+    Args:
+        image: RGB (or grayscale) image
+        hash_size: Grid size (the hash has hash_size^2 bits)
+
+    Returns:
+        Hash as a Python integer
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes"""
+    return (a ^ b).bit_count()
+
+
+class _Node:
+    """BK-tree node"""
+
+    __slots__ = ("key", "value", "children", "deleted")
+
+    def __init__(self, key: int, value: Any):
+        self.key = key
+        self.value = value
+        self.children: Dict[int, "_Node"] = {}
+        self.deleted = False
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes with Hamming distance
+
+    Range queries only visit children whose edge distance lies within
+    [d - radius, d + radius], so lookups stay fast as the tree grows. Removal
+    marks nodes as deleted; the tree is rebuilt once they outnumber live nodes.
+    """
+
+    def __init__(self):
+        self._root: Optional[_Node] = None
+        self._nodes: Dict[int, _Node] = {}  # id(value) -> node, for removal
+        self._deleted = 0
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def add(self, key: int, value: Any) -> None:
+        """
+        Insert a value under a hash
+
+        Args:
+            key: Hash
+            value: Stored object (identified by identity for removal)
+        """
+        node = _Node(key, value)
+        self._nodes[id(value)] = node
+        if self._root is None:
+            self._root = node
+            return
+
+        current = self._root
+        while True:
+            distance = hamming_distance(key, current.key)
+            child = current.children.get(distance)
+            if child is None:
+                current.children[distance] = node
+                return
+            current = child
+
+    def remove(self, value: Any) -> None:
+        """Remove a previously added value"""
+        node = self._nodes.pop(id(value), None)
+        if node is None:
+            return
+        node.deleted = True
+        node.value = None
+        self._deleted += 1
+        if self._deleted > len(self._nodes):
+            self._rebuild()
+
+    def search(self, key: int, radius: int) -> List[Tuple[int, Any]]:
+        """
+        Find all values within a Hamming distance
+
+        Args:
+            key: Query hash
+            radius: Maximum Hamming distance
+
+        Returns:
+            List of (distance, value), closest first
+        """
+        if self._root is None:
+            return []
+
+        matches = []
+        pending = [self._root]
+        while pending:
+            node = pending.pop()
+            distance = hamming_distance(key, node.key)
+            if distance <= radius and not node.deleted:
+                matches.append((distance, node.value))
+            for edge, child in node.children.items():
+                if distance - radius <= edge <= distance + radius:
+                    pending.append(child)
+
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def _rebuild(self) -> None:
+        """Rebuild the tree from live nodes"""
+        live = [(node.key, node.value) for node in self._nodes.values()]
+        self._root = None
+        self._nodes = {}
+        self._deleted = 0
+        for key, value in live:
+            self.add(key, value)
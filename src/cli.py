@@ -0,0 +1,348 @@
+"""Command line interface
+
+Usage:
+    python -m src.cli anonymize-video INPUT OUTPUT
+    python -m src.cli anonymize-dir INPUT_DIR OUTPUT_DIR
+    python -m src.cli watch
+    python -m src.cli worker
+    python -m src.cli evaluate DATASET --config default --config fast:face_det_size=320
+"""
+
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from src.config import get_settings
+from src.utils.exceptions import AnonymizationError
+from src.utils.logger import get_logger, parse_sample_rates, setup_logger
+from src.utils.tracing import configure_tracing
+
+logger = get_logger(__name__)
+
+
+def _anonymize_video(args: argparse.Namespace) -> int:
+    """Anonymize a video file"""
+    from src.api.routes.anonymization import get_camera_profile, get_components
+    from src.video import VideoAnonymizer, build_frame_detector
+
+    settings = get_settings()
+    overrides = {}
+    if args.keyframe_interval:
+        overrides["video_keyframe_interval"] = args.keyframe_interval
+    if args.motion_gating:
+        overrides["video_motion_gating"] = True
+    settings = settings.model_copy(update=overrides)
+    face_det, plate_det, anon, _ = get_components()
+
+    frame_detector = build_frame_detector(
+        settings,
+        face_det,
+        plate_det,
+        profile=get_camera_profile(args.camera_id)
+    )
+    video_anonymizer = VideoAnonymizer(
+        frame_detector,
+        anon,
+        queue_size=args.queue_size or settings.video_queue_size,
+        codec=args.codec or settings.video_codec,
+        log_every=args.log_every
+    )
+
+    stats = video_anonymizer.process(args.input, args.output)
+    print(
+        f"{stats.frames} frames in {stats.elapsed_seconds:.2f}s ({stats.fps:.1f} fps) | "
+        f"faces: {stats.faces}, plates: {stats.plates} | "
+        f"detector calls: {stats.detector_calls} ({stats.detector_calls_saved} saved) | "
+        f"decode {stats.decode_seconds:.2f}s, inference {stats.inference_seconds:.2f}s, "
+        f"encode {stats.encode_seconds:.2f}s"
+    )
+    motion = stats.detector_stats.get("motion")
+    if motion:
+        print(
+            f"motion: {motion['static_frames']} static, {motion['partial_frames']} partial, "
+            f"{motion['full_frames']} full frames (mean detected area {motion['mean_detected_area']:.1%})"
+        )
+    return 0
+
+
+def _stop_on_signals(stop: threading.Event) -> None:
+    """
+    Set the stop event on SIGINT/SIGTERM, so loops finish their in-flight work and return
+
+    A second signal raises KeyboardInterrupt to exit without waiting.
+    """
+    def handle(signum: int, frame) -> None:
+        if stop.is_set():
+            raise KeyboardInterrupt
+        logger.info(f"Received {signal.Signals(signum).name}, finishing in-flight work")
+        stop.set()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, handle)
+
+
+def _format_duration(seconds: float) -> str:
+    """Format seconds as H:MM:SS"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def _anonymize_dir(args: argparse.Namespace) -> int:
+    """Anonymize all images below a directory"""
+    from src.batch import BatchStats, DirectoryAnonymizer
+
+    directory_anonymizer = DirectoryAnonymizer(
+        args.input,
+        args.output,
+        workers=args.workers,
+        output_format=args.format,
+        manifest_path=args.manifest,
+        camera_id=args.camera_id,
+        force=args.force,
+        count_first=not args.no_count
+    )
+
+    last_report = 0.0
+
+    def report(stats: BatchStats) -> None:
+        nonlocal last_report
+        now = time.monotonic()
+        if now - last_report < args.report_interval:
+            return
+        last_report = now
+        done = stats.processed + stats.skipped + stats.failed
+        eta = _format_duration(stats.eta_seconds) if stats.eta_seconds is not None else "?"
+        print(
+            f"{done}/{stats.total or '?'} files | {stats.images_per_second:.2f} images/s | "
+            f"ETA {eta} | failed: {stats.failed}",
+            file=sys.stderr
+        )
+
+    stats = directory_anonymizer.run(progress=report)
+    print(
+        f"{stats.processed} processed, {stats.skipped} skipped, {stats.failed} failed "
+        f"in {_format_duration(stats.elapsed_seconds)} ({stats.images_per_second:.2f} images/s) | "
+        f"faces: {stats.faces}, plates: {stats.plates}"
+    )
+    return 1 if stats.failed else 0
+
+
+def _watch(args: argparse.Namespace) -> int:
+    """Watch the uploads directory until interrupted"""
+    from src.batch import FolderWatcher
+
+    settings = get_settings()
+    watcher = FolderWatcher(
+        args.dir or settings.uploads_dir,
+        settings.watch_originals_dir,
+        settings.watch_failed_dir,
+        workers=args.workers or settings.watch_workers,
+        poll_interval=settings.watch_poll_interval,
+        settle_seconds=settings.watch_settle_seconds,
+        output_format=args.format,
+        use_inotify=settings.watch_use_inotify and not args.poll
+    )
+
+    stop = threading.Event()
+    _stop_on_signals(stop)
+    try:
+        watcher.run(stop)
+    except KeyboardInterrupt:
+        stop.set()
+    print(
+        f"{watcher.stats.processed} processed, {watcher.stats.failed} failed | "
+        f"faces: {watcher.stats.faces}, plates: {watcher.stats.plates}"
+    )
+    return 0
+
+
+def _worker(args: argparse.Namespace) -> int:
+    """Process queued jobs until interrupted"""
+    from src.jobs import JobWorker, create_job_queue
+
+    settings = get_settings()
+    worker = JobWorker(
+        create_job_queue(settings),
+        settings.jobs_dir,
+        worker_id=args.worker_id,
+        lease_seconds=settings.job_lease_seconds,
+        poll_interval=settings.worker_poll_interval,
+        threads=args.threads
+    )
+
+    stop = threading.Event()
+    _stop_on_signals(stop)
+    try:
+        processed = worker.run(stop, max_jobs=args.max_jobs)
+    except KeyboardInterrupt:
+        stop.set()
+        return 0
+    print(f"{processed} jobs processed by {worker.worker_id}")
+    return 0
+
+
+def _evaluate(args: argparse.Namespace) -> int:
+    """Evaluate detector configurations on a labeled dataset"""
+    from src.evaluation import evaluate, format_results, load_dataset, parse_config
+    from src.evaluation.runner import RECALL_TARGETS
+
+    class_names = None
+    if args.classes:
+        try:
+            class_names = {
+                int(class_id): name
+                for class_id, _, name in (entry.partition("=") for entry in args.classes.split(","))
+            }
+        except ValueError:
+            print(f"Invalid --classes {args.classes!r} (expected e.g. 0=face,1=plate)", file=sys.stderr)
+            return 2
+    dataset = load_dataset(args.dataset, args.format, args.labels, class_names)
+    if args.limit:
+        dataset = dataset[:args.limit]
+    boxes = sum(len(item.labels) for item in dataset)
+    print(f"{len(dataset)} images, {boxes} labeled boxes", file=sys.stderr)
+
+    results = []
+    for config in [parse_config(value) for value in (args.config or ["default"])]:
+        print(f"Evaluating {config.name}...", file=sys.stderr)
+        results.append(evaluate(dataset, config, iou_threshold=args.iou, warmup=args.warmup))
+    print(format_results(results))
+
+    for result in results:
+        checks = ", ".join(
+            f"{label} recall {result.labels[label].recall:.1%} {'>=' if passed else '<'} {RECALL_TARGETS[label]:.0%}"
+            for label, passed in result.meets_targets().items()
+        )
+        if checks:
+            print(f"{result.config}: {checks}")
+
+    if args.output:
+        path = Path(args.output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "dataset": str(args.dataset),
+            "images": len(dataset),
+            "iou_threshold": args.iou,
+            "results": [result.to_dict() for result in results]
+        }, indent=2))
+        print(f"Saved report to {path}", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser"""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="HTW Emerging Photo - face and license plate anonymization"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    video = subparsers.add_parser("anonymize-video", help="Anonymize a video file")
+    video.add_argument("input", help="Input video file")
+    video.add_argument("output", help="Output video file (e.g. out.mp4)")
+    video.add_argument("--codec", help="FourCC of the output video (default from settings)")
+    video.add_argument("--queue-size", type=int, help="Frames buffered between stages")
+    video.add_argument(
+        "--keyframe-interval",
+        type=int,
+        help="Run full detection every N frames and track in between (default from settings)"
+    )
+    video.add_argument(
+        "--motion-gating",
+        action="store_true",
+        help="Skip detection on unchanged frames and detect only changed regions (static cameras)"
+    )
+    video.add_argument("--camera-id", help="Camera profile restricting detection to its ROIs")
+    video.add_argument("--log-every", type=int, default=100, help="Log progress every N frames")
+    video.set_defaults(handler=_anonymize_video)
+
+    directory = subparsers.add_parser(
+        "anonymize-dir",
+        help="Anonymize all images below a directory (resumable)"
+    )
+    directory.add_argument("input", help="Input directory")
+    directory.add_argument("output", help="Output directory (mirrors the input tree)")
+    directory.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    directory.add_argument("--format", help="Output format: png, jpeg or webp (default from settings)")
+    directory.add_argument("--manifest", help="Manifest file (default: OUTPUT/manifest.jsonl)")
+    directory.add_argument("--camera-id", help="Camera profile restricting detection to its ROIs")
+    directory.add_argument("--force", action="store_true", help="Reprocess files already in the manifest")
+    directory.add_argument("--no-count", action="store_true", help="Skip counting files up front (no ETA)")
+    directory.add_argument(
+        "--report-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between progress lines"
+    )
+    directory.set_defaults(handler=_anonymize_dir)
+
+    watch = subparsers.add_parser(
+        "watch",
+        help="Anonymize images dropped into the uploads directory (runs until interrupted)"
+    )
+    watch.add_argument("--dir", help="Directory to watch (default: uploads_dir)")
+    watch.add_argument("--workers", type=int, help="Worker processes (default from settings)")
+    watch.add_argument("--format", help="Output format: png, jpeg or webp (default from settings)")
+    watch.add_argument("--poll", action="store_true", help="Poll only, even if watchdog is installed")
+    watch.set_defaults(handler=_watch)
+
+    worker = subparsers.add_parser(
+        "worker",
+        help="Process jobs queued via POST /api/v1/jobs (run one per core or node)"
+    )
+    worker.add_argument("--worker-id", help="Worker id shown in stats (default: host-pid-random)")
+    worker.add_argument("--threads", type=int, default=1, help="OpenCV/torch threads of this worker")
+    worker.add_argument("--max-jobs", type=int, help="Exit after this many jobs")
+    worker.set_defaults(handler=_worker)
+
+    evaluation = subparsers.add_parser(
+        "evaluate",
+        help="Measure precision, recall, mAP and latency of detector configurations on labeled images"
+    )
+    evaluation.add_argument("dataset", help="COCO annotation JSON, or directory of images (COCO or YOLO labels)")
+    evaluation.add_argument(
+        "--config",
+        action="append",
+        help="NAME[:setting=value,...] to evaluate, repeatable (e.g. fast:face_det_size=320)"
+    )
+    evaluation.add_argument("--format", default="auto", help="Label format: auto, coco or yolo")
+    evaluation.add_argument("--labels", help="COCO image directory or YOLO labels directory")
+    evaluation.add_argument("--classes", help="YOLO class names, e.g. 0=face,1=license_plate")
+    evaluation.add_argument("--iou", type=float, default=0.5, help="IoU threshold of precision and recall")
+    evaluation.add_argument("--limit", type=int, help="Only evaluate the first N images")
+    evaluation.add_argument("--warmup", type=int, default=1, help="Untimed runs before timing each configuration")
+    evaluation.add_argument("--output", help="Write the results as JSON")
+    evaluation.set_defaults(handler=_evaluate)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point"""
+    args = build_parser().parse_args(argv)
+    settings = get_settings()
+    setup_logger(
+        "htw-emerging-photo",
+        level=settings.log_level,
+        log_format=settings.log_format,
+        sample_rates=parse_sample_rates(settings.log_sample_rates)
+    )
+    configure_tracing(settings)
+
+    try:
+        handler: Callable[[argparse.Namespace], int] = args.handler
+        return handler(args)
+    except AnonymizationError as e:
+        logger.error(str(e))
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,8 @@ class Settings(BaseSettings):
     app_version: str = "1.0.0"
     debug: bool = False
     log_level: str = "INFO"
+    log_format: str = "text"  # text or json (one object per record)
+    log_sample_rates: str = ""  # Fraction of records kept per event or logger, e.g. "PlateDetector=0.1"
     
     # API
     api_host: str = "0.0.0.0"
@@ -20,19 +22,125 @@ class Settings(BaseSettings):
     max_upload_size: int = 10485760  # 10MB in bytes
     
     # Detection
-    face_detection_model: str = "retinaface"
+    face_detection_model: str = "retinaface"  # Backend: retinaface, onnx, classical or stub
     face_confidence_threshold: float = 0.7
-    plate_detection_model: str = "yolo"
+    face_det_size: int = 640  # Input size of the retinaface/onnx backends (smaller is faster)
+    face_model_path: Optional[str] = None  # Detection model of the onnx backend (e.g. det_500m.onnx)
+    plate_detection_model: str = "yolo"  # Backend: yolo, onnx, classical or stub
+    plate_model_path: Optional[str] = None  # Weights of the yolo/onnx backends (.pt, .onnx, quantized exports)
     plate_confidence_threshold: float = 0.20  # Lower threshold for better detection
     enable_plate_detection: bool = True  # Enabled - using Hugging Face YOLOv11 model
     
+    # Stub detectors (face/plate_detection_model = "stub": no model, for load tests)
+    stub_detector_latency_ms: float = 20.0  # Simulated inference time per call
+    stub_detector_jitter_ms: float = 0.0  # Uniform +/- variation of the latency
+    stub_detector_boxes: int = 2  # Detections returned per image
+    
+    # Two-stage plate fallback budget (vehicle → plate contour search)
+    two_stage_min_vehicle_area: int = 4096  # Skip smaller vehicles (pixels)
+    two_stage_max_vehicles: int = 8  # Search only the largest N vehicles per frame
+    two_stage_max_crop_dimension: int = 640  # Downscale larger vehicle crops
+    two_stage_time_budget_ms: float = 250.0  # Per-frame time budget
+    two_stage_workers: int = 4  # Threads searching vehicle crops in parallel
+    
+    # Post-processing of detected boxes (per label, before rendering)
+    nms_iou_threshold: float = 0.5  # Drop duplicates overlapping a better box
+    merge_overlapping_regions: bool = True  # Merge overlapping fills into one region
+    merge_iou_threshold: float = 0.0  # 0 merges any overlap
+    
+    # Inference processes (detectors outside the API process, frames passed via shared memory)
+    inference_processes: int = 0  # 0 runs the detectors in the API process
+    inference_slots: int = 4  # Shared-memory frame slots (frames in flight)
+    inference_slot_megabytes: int = 48  # Slot capacity (48MB fits a 4096x4096 RGB frame)
+    inference_timeout: float = 30.0  # Seconds to wait for a free slot and for the result
+    inference_threads: int = 1  # OpenCV/torch threads per inference process
+    
+    # Request pipeline (decode → detect → encode stages overlap across requests)
+    pipeline_enabled: bool = False  # False runs each request's stages in sequence
+    pipeline_io_workers: int = 2  # Threads of the decode stage and of the encode stage
+    pipeline_compute_workers: int = 1  # Detection threads (more only help with inference processes)
+    pipeline_queue_size: int = 8  # Requests waiting in front of each stage
+    pipeline_submit_timeout: float = 5.0  # Seconds to wait for queue space before answering 503
+    
+    # Profiling (opt-in, captures are written to profiling_dir)
+    profiling_enabled: bool = False  # Also enables POST /api/v1/profiling to change the rules at runtime
+    profiling_sample_rate: float = 0.0  # Fraction of requests run under cProfile
+    profiling_slow_threshold_ms: float = 0.0  # Keep stack samples of slower requests (0 = off)
+    profiling_interval_ms: float = 5.0  # Stack sampling interval
+    profiling_dir: str = "./data/profiles"
+    profiling_max_captures: int = 50  # Oldest captures are deleted
+    
+    # Request recording (opt-in fingerprints for python -m benchmarks.replay)
+    recording_enabled: bool = False
+    recording_dir: str = "./data/recordings"
+    recording_sample_rate: float = 1.0  # Fraction of image requests recorded
+    recording_store_images: bool = False  # Also keep the uploads (unredacted originals)
+    
+    # Tracing (spans of stages and model calls appended to a JSON lines file)
+    tracing_enabled: bool = False
+    tracing_path: str = "./data/traces/spans.jsonl"  # Shared by the API, inference and batch processes
+    request_id_header: str = "X-Request-ID"  # Inbound request id (generated if missing), echoed in responses
+    
+    # Camera profiles (per-detector ROI polygons, selected by camera_id)
+    camera_profiles_path: Optional[str] = None  # JSON file, see src/detection/roi.py
+    
+    # Near-duplicate cache (perceptual hash, per camera)
+    near_duplicate_cache: bool = False  # Reuse boxes of near-identical recent images
+    near_duplicate_max_distance: int = 6  # Max Hamming distance counted as duplicate
+    near_duplicate_cache_size: int = 256  # Entries per camera (least recently used evicted)
+    near_duplicate_hash_size: int = 16  # dHash grid (hash_size^2 bits)
+    
     # Anonymization
     anonymization_color: str = "#FFFF00"  # Yellow
     
+    # Output encoding
+    output_format: str = "png"  # png, jpeg or webp (overridable per request)
+    jpeg_quality: int = 90  # 0-100
+    webp_quality: int = 90  # 1-100
+    png_compression: int = 3  # 0 (fastest) - 9 (smallest)
+    max_output_dimension: Optional[int] = None  # Downscale larger outputs (pixels; response boxes follow)
+    
+    # Video
+    video_queue_size: int = 8  # Frames buffered between decode/inference/encode stages
+    video_codec: str = "mp4v"  # FourCC of anonymized videos
+    max_video_upload_size: int = 524288000  # 500MB in bytes
+    video_max_concurrent_jobs: int = 1
+    video_job_ttl_seconds: float = 3600.0  # Finished jobs and their files are deleted after this
+    video_max_finished_jobs: int = 100  # Oldest finished jobs beyond this are deleted early
+    video_keyframe_interval: int = 1  # Full detection every N frames, tracking in between (1 = every frame)
+    video_track_iou_threshold: float = 0.3  # Minimum IoU to match a detection to a track
+    video_track_max_age: int = 1  # Keyframes a track survives without a matching detection
+    video_track_min_confidence: float = 0.5  # Uncertain tracks force an early keyframe
+    video_track_confidence_decay: float = 0.9  # Track confidence multiplier per tracked frame
+    video_track_padding: float = 0.05  # Box growth per tracked frame (fraction of box size)
+    video_motion_gating: bool = False  # Reuse detections on unchanged frames (static cameras)
+    video_motion_analysis_width: int = 160  # Width of the downscaled frame used for differencing
+    video_motion_threshold: int = 25  # Gray level difference counted as change
+    video_motion_min_changed_fraction: float = 0.001  # Below this, a frame is static
+    video_motion_max_dirty_fraction: float = 0.5  # Above this, the full frame is detected
+    video_motion_padding: int = 32  # Pixels added around dirty regions
+    video_motion_refresh_interval: int = 250  # Full detection at least every N frames (0 = never)
+    
     # Paths
     models_dir: str = "./data/models"
     uploads_dir: str = "./data/uploads"
     
+    # Job queue (the API enqueues, `python -m src.cli worker` processes)
+    job_queue_backend: str = "sqlite"
+    jobs_dir: str = "./data/jobs"  # Shared by API and workers: queue.db, inputs/, results/
+    job_lease_seconds: float = 60.0  # Jobs of unresponsive workers are reclaimed after this
+    job_max_attempts: int = 3
+    job_retry_delay: float = 5.0  # Seconds before a retry (multiplied by the attempt number)
+    worker_poll_interval: float = 1.0  # Seconds an idle worker waits between claims
+    
+    # Watch folder (python -m src.cli watch)
+    watch_originals_dir: str = "./data/originals"  # Originals are moved here after processing
+    watch_failed_dir: str = "./data/failed"  # Files that could not be processed
+    watch_workers: int = 2  # Worker processes
+    watch_poll_interval: float = 1.0  # Seconds between directory scans
+    watch_settle_seconds: float = 2.0  # File must be unchanged this long (debounces partial writes)
+    watch_use_inotify: bool = True  # Use watchdog events when installed (polling still runs for NFS/SMB)
+    
     # Streamlit
     streamlit_server_port: int = 8501
     streamlit_server_address: str = "0.0.0.0"
@@ -1,14 +1,55 @@
-"""Detection module for faces and license plates"""
+"""Detection module for faces and license plates
+
+Model-backed detectors are imported on first access, so the registry can
+create classical or stub detectors without loading insightface or torch.
+"""
+
+from importlib import import_module
+
+from .base import Detection, DetectionBatch, BoundingBox, Detector
+from .boxes import clip_boxes, iou_matrix, nms, merge_overlapping, clean_detections
+from .roi import CameraProfile, load_camera_profiles, detect_in_roi
+from .registry import available_backends, create_detector, register_detector
+from .stub import StubDetector
+
+_LAZY_IMPORTS = {
+    "FaceDetector": ".faces.detector",
+    "OnnxFaceDetector": ".faces.onnx",
+    "HaarFaceDetector": ".faces.classical",
+    "PlateDetector": ".plates.detector",
+    "ClassicalPlateDetector": ".plates.classical",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
 
-from .base import Detection, BoundingBox, Detector
-from .faces.detector import FaceDetector
-from .plates.detector import PlateDetector
 
 __all__ = [
     "Detection",
+    "DetectionBatch",
     "BoundingBox",
     "Detector",
+    "clip_boxes",
+    "iou_matrix",
+    "nms",
+    "merge_overlapping",
+    "clean_detections",
+    "CameraProfile",
+    "load_camera_profiles",
+    "detect_in_roi",
+    "available_backends",
+    "create_detector",
+    "register_detector",
     "FaceDetector",
+    "OnnxFaceDetector",
+    "HaarFaceDetector",
     "PlateDetector",
+    "ClassicalPlateDetector",
+    "StubDetector",
 ]
-
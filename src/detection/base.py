@@ -2,8 +2,9 @@
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Sequence, Union
 import numpy as np
+import numpy.typing as npt
 
 
 @dataclass
@@ -42,11 +43,182 @@ class Detection:
         }
 
 
+class DetectionBatch:
+    """
+    Array-backed collection of detections
+    
+    Boxes, scores, labels and ids are stored as parallel numpy arrays (one row
+    per detection) so detectors can fill a batch from model outputs in one step
+    and the anonymizer and formatter can consume it without per-box objects.
+    Iterating or indexing with an int yields Detection objects for callers that
+    expect the dataclass API.
+    """
+    
+    __slots__ = ("boxes", "scores", "labels", "ids")
+    
+    def __init__(
+        self,
+        boxes: npt.ArrayLike,
+        scores: npt.ArrayLike,
+        labels: Union[str, Sequence[str], np.ndarray],
+        ids: Optional[npt.ArrayLike] = None
+    ):
+        """
+        Initialize detection batch
+        
+        Args:
+            boxes: Array of shape (N, 4) with x, y, width, height
+            scores: Array of N confidence scores
+            labels: Label for all detections ("face" or "plate") or N labels
+            ids: Optional array of N detection ids (default: 1..N)
+        """
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        count = len(self.boxes)
+        if isinstance(labels, str):
+            self.labels = np.full(count, labels, dtype="<U8")
+        else:
+            self.labels = np.asarray(labels, dtype="<U8").reshape(-1)
+        if ids is None:
+            self.ids = np.arange(1, count + 1, dtype=np.int32)
+        else:
+            self.ids = np.asarray(ids, dtype=np.int32).reshape(-1)
+    
+    @classmethod
+    def empty(cls, label: str = "") -> "DetectionBatch":
+        """Create an empty batch"""
+        return cls(np.zeros((0, 4)), np.zeros(0), label)
+    
+    @classmethod
+    def from_xyxy(
+        cls,
+        xyxy: np.ndarray,
+        scores: np.ndarray,
+        label: Union[str, Sequence[str], np.ndarray],
+        ids: Optional[np.ndarray] = None
+    ) -> "DetectionBatch":
+        """
+        Create a batch from corner coordinates (x1, y1, x2, y2)
+        
+        Coordinates are truncated to integers like int() does for a single box.
+        """
+        xyxy = np.trunc(np.asarray(xyxy, dtype=np.float64).reshape(-1, 4))
+        boxes = np.empty_like(xyxy)
+        boxes[:, :2] = xyxy[:, :2]
+        boxes[:, 2:] = xyxy[:, 2:] - xyxy[:, :2]
+        return cls(boxes, scores, label, ids)
+    
+    @classmethod
+    def from_detections(cls, detections: Iterable[Detection]) -> "DetectionBatch":
+        """Create a batch from Detection objects"""
+        if isinstance(detections, DetectionBatch):
+            return detections
+        detections = list(detections)
+        if not detections:
+            return cls.empty()
+        return cls(
+            [(d.bbox.x, d.bbox.y, d.bbox.width, d.bbox.height) for d in detections],
+            [d.confidence for d in detections],
+            [d.label for d in detections],
+            [d.id for d in detections]
+        )
+    
+    @classmethod
+    def concatenate(cls, batches: Iterable["DetectionBatch"]) -> "DetectionBatch":
+        """Concatenate several batches (ids are kept)"""
+        batches = [cls.from_detections(b) for b in batches]
+        if not batches:
+            return cls.empty()
+        return cls(
+            np.concatenate([b.boxes for b in batches]),
+            np.concatenate([b.scores for b in batches]),
+            np.concatenate([b.labels for b in batches]),
+            np.concatenate([b.ids for b in batches])
+        )
+    
+    @property
+    def xyxy(self) -> np.ndarray:
+        """Boxes as corner coordinates (x1, y1, x2, y2)"""
+        return np.concatenate([self.boxes[:, :2], self.boxes[:, :2] + self.boxes[:, 2:]], axis=1)
+    
+    def select(self, index) -> "DetectionBatch":
+        """Subset by boolean mask, index array or slice"""
+        return DetectionBatch(self.boxes[index], self.scores[index], self.labels[index], self.ids[index])
+    
+    def offset(self, dx: int, dy: int) -> "DetectionBatch":
+        """Return a copy with boxes translated by (dx, dy)"""
+        boxes = self.boxes.copy()
+        boxes[:, 0] += dx
+        boxes[:, 1] += dy
+        return DetectionBatch(boxes, self.scores, self.labels, self.ids)
+    
+    def scale(self, factor: float) -> "DetectionBatch":
+        """Return a copy with box corners multiplied by `factor` (e.g. for a resized image)"""
+        if factor == 1.0:
+            return self
+        xyxy = np.trunc(self.xyxy * factor)
+        boxes = np.concatenate([xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]], axis=1)
+        return DetectionBatch(boxes, self.scores, self.labels, self.ids)
+    
+    def renumber(self, start: int = 1) -> "DetectionBatch":
+        """Return a copy with sequential ids starting at `start`"""
+        ids = np.arange(start, start + len(self), dtype=np.int32)
+        return DetectionBatch(self.boxes, self.scores, self.labels, ids)
+    
+    def to_detections(self) -> List[Detection]:
+        """Convert to a list of Detection objects"""
+        return list(self)
+    
+    def to_dict(self) -> List[dict]:
+        """Convert to a list of dictionaries (same shape as Detection.to_dict)"""
+        return [
+            {
+                "id": id_,
+                "bbox": {"x": x, "y": y, "width": w, "height": h},
+                "confidence": confidence,
+                "label": label
+            }
+            for id_, (x, y, w, h), confidence, label in zip(
+                self.ids.tolist(),
+                self.boxes.tolist(),
+                self.scores.tolist(),
+                self.labels.tolist()
+            )
+        ]
+    
+    def __len__(self) -> int:
+        return len(self.boxes)
+    
+    def __iter__(self) -> Iterator[Detection]:
+        for i in range(len(self)):
+            yield self[i]
+    
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            x, y, w, h = self.boxes[index].tolist()
+            return Detection(
+                id=int(self.ids[index]),
+                bbox=BoundingBox(x=x, y=y, width=w, height=h),
+                confidence=float(self.scores[index]),
+                label=str(self.labels[index])
+            )
+        return self.select(index)
+    
+    def __add__(self, other) -> "DetectionBatch":
+        return DetectionBatch.concatenate([self, other])
+    
+    def __radd__(self, other) -> "DetectionBatch":
+        return DetectionBatch.concatenate([other, self])
+    
+    def __repr__(self) -> str:
+        return f"DetectionBatch(n={len(self)})"
+
+
 class Detector(ABC):
     """Base interface for all detectors"""
     
     @abstractmethod
-    def detect(self, image: np.ndarray) -> List[Detection]:
+    def detect(self, image: np.ndarray) -> DetectionBatch:
         """
         Detect objects in image
         
@@ -54,7 +226,7 @@ class Detector(ABC):
             image: Image as numpy array (RGB)
             
         Returns:
-            List of Detection objects
+            DetectionBatch of detected objects
         """
         pass
     
@@ -0,0 +1,183 @@
+"""Vectorized bounding box operations shared by all detectors
+
+All functions take boxes as arrays of shape (N, 4) in corner format
+(x1, y1, x2, y2).
+"""
+
+from typing import Tuple
+import numpy as np
+
+from src.detection.base import DetectionBatch
+
+
+def clip_boxes(xyxy: np.ndarray, width: int, height: int) -> np.ndarray:
+    """
+    Clip boxes to the image area
+
+    Args:
+        xyxy: Boxes of shape (N, 4)
+        width: Image width
+        height: Image height
+
+    Returns:
+        Clipped copy of the boxes
+    """
+    clipped = np.array(xyxy, dtype=np.float64).reshape(-1, 4)
+    clipped[:, [0, 2]] = np.clip(clipped[:, [0, 2]], 0, width)
+    clipped[:, [1, 3]] = np.clip(clipped[:, [1, 3]], 0, height)
+    return clipped
+
+
+def box_areas(xyxy: np.ndarray) -> np.ndarray:
+    """Area of each box (0 for empty boxes)"""
+    xyxy = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+    return np.maximum(0, xyxy[:, 2] - xyxy[:, 0]) * np.maximum(0, xyxy[:, 3] - xyxy[:, 1])
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise intersection over union
+
+    Args:
+        a: Boxes of shape (N, 4)
+        b: Boxes of shape (M, 4)
+
+    Returns:
+        IoU matrix of shape (N, M)
+    """
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+
+    union = box_areas(a)[:, None] + box_areas(b)[None, :] - intersection
+    iou: np.ndarray = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+    return iou
+
+
+def nms(xyxy: np.ndarray, scores: np.ndarray, iou_threshold: float = 0.5) -> np.ndarray:
+    """
+    Greedy non-maximum suppression
+
+    Args:
+        xyxy: Boxes of shape (N, 4)
+        scores: N confidence scores
+        iou_threshold: Boxes overlapping a better box by more than this are dropped
+
+    Returns:
+        Indices of the kept boxes, best score first
+    """
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    order = np.argsort(-scores, kind="stable")
+    if len(order) == 0:
+        return order
+
+    ious = iou_matrix(xyxy, xyxy)
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed |= ious[i] > iou_threshold
+    return np.array(keep, dtype=np.int64)
+
+
+def merge_overlapping(
+    xyxy: np.ndarray,
+    iou_threshold: float = 0.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merge groups of overlapping boxes into their union bounding box
+
+    Boxes are grouped transitively: if A overlaps B and B overlaps C, all three
+    are merged even when A and C do not touch.
+
+    Args:
+        xyxy: Boxes of shape (N, 4)
+        iou_threshold: Boxes with IoU above this are merged (0 merges any overlap)
+
+    Returns:
+        Tuple of (merged boxes of shape (G, 4), group index of each input box)
+    """
+    xyxy = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+    count = len(xyxy)
+    if count == 0:
+        return xyxy.copy(), np.zeros(0, dtype=np.int64)
+
+    adjacency = iou_matrix(xyxy, xyxy) > iou_threshold
+    np.fill_diagonal(adjacency, True)
+
+    # Connected components by min-label propagation
+    labels = np.arange(count)
+    while True:
+        propagated = np.where(adjacency, labels[None, :], count).min(axis=1)
+        if np.array_equal(propagated, labels):
+            break
+        labels = propagated
+
+    _, groups = np.unique(labels, return_inverse=True)
+    group_count = groups.max() + 1
+    merged = np.empty((group_count, 4))
+    merged[:, :2] = np.inf
+    merged[:, 2:] = -np.inf
+    np.minimum.at(merged[:, 0], groups, xyxy[:, 0])
+    np.minimum.at(merged[:, 1], groups, xyxy[:, 1])
+    np.maximum.at(merged[:, 2], groups, xyxy[:, 2])
+    np.maximum.at(merged[:, 3], groups, xyxy[:, 3])
+    return merged, groups
+
+
+def clean_detections(
+    detections: DetectionBatch,
+    width: int,
+    height: int,
+    nms_iou_threshold: float = 0.5,
+    merge: bool = True,
+    merge_iou_threshold: float = 0.0
+) -> DetectionBatch:
+    """
+    Clip, deduplicate and merge detections before rendering
+
+    Each label is processed separately: boxes are clipped to the image, empty
+    boxes are dropped, duplicates are removed by NMS and (optionally) the
+    remaining overlapping boxes are merged into one fill region. Merged
+    regions keep the highest confidence of their group. Ids are renumbered.
+
+    Args:
+        detections: DetectionBatch to clean
+        width: Image width
+        height: Image height
+        nms_iou_threshold: IoU above which the lower-scored box is dropped
+        merge: Whether to merge overlapping boxes into their union
+        merge_iou_threshold: IoU above which boxes are merged (0 merges any overlap)
+
+    Returns:
+        Cleaned DetectionBatch
+    """
+    if len(detections) == 0:
+        return detections
+
+    cleaned = []
+    for label in dict.fromkeys(detections.labels.tolist()):
+        subset = detections.select(detections.labels == label)
+        xyxy = clip_boxes(subset.xyxy, width, height)
+        scores = subset.scores
+
+        valid = box_areas(xyxy) > 0
+        xyxy, scores = xyxy[valid], scores[valid]
+
+        keep = nms(xyxy, scores, nms_iou_threshold)
+        xyxy, scores = xyxy[keep], scores[keep]
+
+        if merge and len(xyxy) > 1:
+            xyxy, groups = merge_overlapping(xyxy, merge_iou_threshold)
+            group_scores = np.zeros(len(xyxy))
+            np.maximum.at(group_scores, groups, scores)
+            scores = group_scores
+
+        cleaned.append(DetectionBatch.from_xyxy(xyxy, scores, label))
+
+    return DetectionBatch.concatenate(cleaned)
@@ -1,6 +1,21 @@
 """Face detection module"""
 
-from .detector import FaceDetector
+from importlib import import_module
 
-__all__ = ["FaceDetector"]
+_LAZY_IMPORTS = {
+    "FaceDetector": ".detector",
+    "OnnxFaceDetector": ".onnx",
+    "HaarFaceDetector": ".classical",
+}
 
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = ["FaceDetector", "OnnxFaceDetector", "HaarFaceDetector"]
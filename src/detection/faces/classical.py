@@ -0,0 +1,85 @@
+"""Face detection with an OpenCV Haar cascade"""
+
+from typing import Any
+
+import cv2
+import numpy as np
+
+from src.detection.base import Detector, DetectionBatch
+from src.utils.exceptions import ModelLoadError, DetectionError
+from src.utils.logger import get_logger
+from src.utils.tracing import tracer
+
+
+class HaarFaceDetector(Detector):
+    """
+    Detects frontal faces with the Haar cascade shipped with OpenCV
+
+    Needs no model download and runs on the CPU in a few milliseconds per
+    frame, at a much lower recall than RetinaFace (profiles, small and
+    occluded faces). Scores are the logistic of the cascade's level weights
+    and only rank detections; strictness is set by min_neighbors.
+    """
+
+    CASCADE = "haarcascade_frontalface_default.xml"
+
+    def __init__(self, scale_factor: float = 1.1, min_neighbors: int = 5, min_size: int = 24):
+        """
+        Initialize Haar cascade face detector
+
+        Args:
+            scale_factor: Image pyramid step between scales
+            min_neighbors: Overlapping hits required to keep a face
+            min_size: Smallest face side in pixels
+        """
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self.model: Any = None
+        self.logger = get_logger(self.__class__.__name__)
+        self.load_model()
+
+    def load_model(self) -> None:
+        """Load the cascade from the OpenCV data directory"""
+        if not hasattr(cv2, "CascadeClassifier"):
+            raise ModelLoadError("This OpenCV build has no Haar cascades (install opencv-python 4.x)")
+        path = cv2.data.haarcascades + self.CASCADE  # type: ignore[attr-defined]
+        self.model = cv2.CascadeClassifier(path)
+        if self.model.empty():
+            raise ModelLoadError(f"Failed to load Haar cascade: {path}")
+        self.logger.info("Haar cascade face detector loaded")
+
+    def detect(self, image: np.ndarray) -> DetectionBatch:
+        """
+        Detect faces in image
+
+        Args:
+            image: Image as numpy array (RGB)
+
+        Returns:
+            DetectionBatch of faces
+        """
+        if self.model is None:
+            raise DetectionError("Model not loaded")
+
+        try:
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+            with tracer.span("haar_cascade", image_width=image.shape[1], image_height=image.shape[0]):
+                rects, _, weights = self.model.detectMultiScale3(
+                    gray,
+                    scaleFactor=self.scale_factor,
+                    minNeighbors=self.min_neighbors,
+                    minSize=(self.min_size, self.min_size),
+                    outputRejectLevels=True
+                )
+            if len(rects) == 0:
+                return DetectionBatch.empty("face")
+
+            scores = 1.0 / (1.0 + np.exp(-np.asarray(weights, dtype=np.float64).reshape(-1)))
+            batch = DetectionBatch(np.asarray(rects).reshape(-1, 4), scores, "face")
+            self.logger.debug("Haar cascade detected %d faces", len(batch))
+            return batch
+
+        except Exception as e:
+            self.logger.error("Face detection failed: %s", e, exc_info=True)
+            raise DetectionError(f"Face detection failed: {str(e)}")
@@ -1,25 +1,27 @@
 """Face detection using RetinaFace"""
 
-from typing import List
 import numpy as np
 from insightface.app import FaceAnalysis
 
-from src.detection.base import Detector, Detection, BoundingBox
+from src.detection.base import Detector, DetectionBatch
 from src.utils.exceptions import ModelLoadError, DetectionError
 from src.utils.logger import get_logger
+from src.utils.tracing import tracer
 
 
 class FaceDetector(Detector):
     """Detects faces using RetinaFace model"""
     
-    def __init__(self, confidence_threshold: float = 0.7):
+    def __init__(self, confidence_threshold: float = 0.7, det_size: int = 640):
         """
         Initialize face detector
         
         Args:
             confidence_threshold: Minimum confidence score for detections
+            det_size: Square input size of the detection model (smaller is faster, misses small faces)
         """
         self.confidence_threshold = confidence_threshold
+        self.det_size = det_size
         self.model = None
         self.logger = get_logger(self.__class__.__name__)
         self.load_model()
@@ -37,7 +39,7 @@ class FaceDetector(Detector):
                     name='buffalo_l',
                     providers=['CUDAExecutionProvider', 'CPUExecutionProvider']
                 )
-                self.model.prepare(ctx_id=0, det_size=(640, 640))
+                self.model.prepare(ctx_id=0, det_size=(self.det_size, self.det_size))
                 self.logger.info("RetinaFace model loaded successfully on CUDA GPU")
             except Exception as gpu_error:
                 self.logger.warning(f"CUDA not available: {gpu_error}")
@@ -46,14 +48,14 @@ class FaceDetector(Detector):
                     name='buffalo_l',
                     providers=['CPUExecutionProvider']
                 )
-                self.model.prepare(ctx_id=-1, det_size=(640, 640))
+                self.model.prepare(ctx_id=-1, det_size=(self.det_size, self.det_size))
                 self.logger.info("RetinaFace model loaded successfully on CPU")
                 
         except Exception as e:
             self.logger.error(f"Failed to load RetinaFace model: {e}")
             raise ModelLoadError(f"Failed to load RetinaFace model: {str(e)}")
     
-    def detect(self, image: np.ndarray) -> List[Detection]:
+    def detect(self, image: np.ndarray) -> DetectionBatch:
         """
         Detect faces in image
         
@@ -61,61 +63,47 @@ class FaceDetector(Detector):
             image: Image as numpy array (RGB)
             
         Returns:
-            List of Detection objects for faces
+            DetectionBatch of faces
         """
         if self.model is None:
             raise DetectionError("Model not loaded")
         
         try:
-            self.logger.info(f"Running face detection on image shape: {image.shape}")
+            self.logger.debug("Running face detection on image shape: %s", image.shape)
             
             # Ensure image is in correct format (RGB, uint8)
             if image.dtype != np.uint8:
                 image = (image * 255).astype(np.uint8) if image.max() <= 1.0 else image.astype(np.uint8)
             
             # Run detection
-            faces = self.model.get(image)
-            self.logger.info(f"RetinaFace returned {len(faces)} raw detections")
+            with tracer.span(
+                "retinaface",
+                model="buffalo_l",
+                image_width=image.shape[1],
+                image_height=image.shape[0]
+            ) as span:
+                faces = self.model.get(image)
+                span.set_attribute("raw_detections", len(faces))
+            self.logger.debug("RetinaFace returned %d raw detections", len(faces))
             
-            detections = []
-            for idx, face in enumerate(faces):
-                try:
-                    # Get bounding box
-                    bbox = face.bbox.astype(int)
-                    x, y, x2, y2 = bbox
-                    
-                    # Get confidence
-                    confidence = float(face.det_score)
-                    
-                    # Filter by confidence threshold
-                    if confidence < self.confidence_threshold:
-                        continue
-                    
-                    # Create detection
-                    detection = Detection(
-                        id=idx + 1,
-                        bbox=BoundingBox(
-                            x=int(x),
-                            y=int(y),
-                            width=int(x2 - x),
-                            height=int(y2 - y)
-                        ),
-                        confidence=confidence,
-                        label="face"
-                    )
-                    detections.append(detection)
-                except Exception as e:
-                    self.logger.warning(f"Failed to process face {idx}: {e}")
-                    continue
+            if not faces:
+                return DetectionBatch.empty("face")
             
-            self.logger.info(
-                f"Detected {len(detections)} faces "
-                f"(threshold: {self.confidence_threshold})"
+            # Gather boxes and scores of all faces in one pass
+            xyxy = np.stack([face.bbox for face in faces]).astype(int)
+            scores = np.array([face.det_score for face in faces], dtype=np.float64)
+            ids = np.arange(1, len(faces) + 1)
+            
+            # Filter by confidence threshold
+            keep = scores >= self.confidence_threshold
+            detections = DetectionBatch.from_xyxy(xyxy[keep], scores[keep], "face", ids[keep])
+            
+            self.logger.debug(
+                "Detected %d faces (threshold: %s)", len(detections), self.confidence_threshold
             )
             
             return detections
             
         except Exception as e:
-            self.logger.error(f"Face detection failed: {e}", exc_info=True)
+            self.logger.error("Face detection failed: %s", e, exc_info=True)
             raise DetectionError(f"Face detection failed: {str(e)}")
-
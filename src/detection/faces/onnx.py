@@ -0,0 +1,103 @@
+"""Face detection with a single ONNX detection model"""
+
+from pathlib import Path
+
+import numpy as np
+
+from src.detection.base import Detector, DetectionBatch
+from src.utils.exceptions import ModelLoadError, DetectionError
+from src.utils.logger import get_logger
+from src.utils.tracing import tracer
+
+
+class OnnxFaceDetector(Detector):
+    """
+    Detects faces with one insightface detection model (RetinaFace or SCRFD ONNX file)
+
+    Unlike FaceDetector, which prepares the whole buffalo_l model pack, only
+    the detection network is loaded and run, so lighter or quantized exports
+    (e.g. det_500m.onnx) can be swapped in.
+    """
+
+    def __init__(self, model_path: str, confidence_threshold: float = 0.7, det_size: int = 640):
+        """
+        Initialize ONNX face detector
+
+        Args:
+            model_path: Path of the ONNX detection model
+            confidence_threshold: Minimum confidence score for detections
+            det_size: Square input size of the model
+        """
+        self.model_path = model_path
+        self.confidence_threshold = confidence_threshold
+        self.det_size = det_size
+        self.model = None
+        self.logger = get_logger(self.__class__.__name__)
+        self.load_model()
+
+    def load_model(self) -> None:
+        """Load the ONNX model (CUDA if available, otherwise CPU)"""
+        if not Path(self.model_path).is_file():
+            raise ModelLoadError(f"Face detection model not found: {self.model_path}")
+        try:
+            from insightface.model_zoo import get_model
+
+            self.logger.info(f"Loading ONNX face detection model {self.model_path}...")
+            self.model = get_model(
+                self.model_path,
+                providers=['CUDAExecutionProvider', 'CPUExecutionProvider']
+            )
+            if self.model is None:
+                raise ModelLoadError(f"Not a supported face detection model: {self.model_path}")
+            self.model.prepare(
+                ctx_id=0,
+                input_size=(self.det_size, self.det_size),
+                det_thresh=self.confidence_threshold
+            )
+            self.logger.info("ONNX face detection model loaded successfully")
+        except ModelLoadError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Failed to load ONNX face detection model: {e}")
+            raise ModelLoadError(f"Failed to load ONNX face detection model: {str(e)}")
+
+    def detect(self, image: np.ndarray) -> DetectionBatch:
+        """
+        Detect faces in image
+
+        Args:
+            image: Image as numpy array (RGB)
+
+        Returns:
+            DetectionBatch of faces
+        """
+        if self.model is None:
+            raise DetectionError("Model not loaded")
+
+        try:
+            if image.dtype != np.uint8:
+                image = (image * 255).astype(np.uint8) if image.max() <= 1.0 else image.astype(np.uint8)
+
+            with tracer.span(
+                "onnx_face",
+                model=Path(self.model_path).name,
+                image_width=image.shape[1],
+                image_height=image.shape[0]
+            ) as span:
+                detections, _ = self.model.detect(image, max_num=0)
+                span.set_attribute("raw_detections", len(detections))
+
+            if len(detections) == 0:
+                return DetectionBatch.empty("face")
+
+            # Rows are x1, y1, x2, y2, score
+            keep = detections[:, 4] >= self.confidence_threshold
+            batch = DetectionBatch.from_xyxy(detections[keep, :4], detections[keep, 4], "face")
+            self.logger.debug(
+                "Detected %d faces (threshold: %s)", len(batch), self.confidence_threshold
+            )
+            return batch
+
+        except Exception as e:
+            self.logger.error("Face detection failed: %s", e, exc_info=True)
+            raise DetectionError(f"Face detection failed: {str(e)}")
@@ -1,6 +1,6 @@
 """License plate detection module"""
 
 from .detector import PlateDetector
+from .classical import ClassicalPlateDetector
 
-__all__ = ["PlateDetector"]
-
+__all__ = ["PlateDetector", "ClassicalPlateDetector"]
@@ -0,0 +1,45 @@
+"""License plate detection with the contour search only (no YOLO model)"""
+
+import numpy as np
+
+from src.detection.base import DetectionBatch
+from src.detection.plates.detector import PlateDetector
+from src.utils.exceptions import DetectionError
+from src.utils.tracing import tracer
+
+
+class ClassicalPlateDetector(PlateDetector):
+    """
+    Detects license plates by their rectangular, text-like contours
+
+    Uses the contour routine of PlateDetector on the whole frame without
+    loading YOLO weights: no download and no GPU, at the cost of more false
+    positives on signs and windows.
+    """
+
+    def load_model(self) -> None:
+        """Nothing to load (the contour search is pure OpenCV)"""
+        self.model = None
+        self.model_variant = "contours"
+        self.device = "cpu"
+        self._is_custom_model = False
+        self.use_two_stage_detection = False
+        self.logger.info("Using contour-based license plate detection (no model)")
+
+    def detect(self, image: np.ndarray) -> DetectionBatch:
+        """
+        Detect license plates in image
+
+        Args:
+            image: Image as numpy array (RGB)
+
+        Returns:
+            DetectionBatch of license plates
+        """
+        try:
+            with tracer.span("contours", image_width=image.shape[1], image_height=image.shape[0]):
+                detections = self._detect_plates_with_contours(image)
+            return detections.select(detections.scores >= self.confidence_threshold)
+        except Exception as e:
+            self.logger.error("License plate detection failed: %s", e, exc_info=True)
+            raise DetectionError(f"License plate detection failed: {str(e)}")
@@ -1,38 +1,108 @@
-"""License plate detection using YOLO and OCR fallback"""
+"""License plate detection using YOLO and OCR fallback
 
-from typing import List, Optional
+torch, ultralytics and huggingface_hub are imported when the YOLO model is
+loaded, so subclasses that only use the contour routines (ClassicalPlateDetector)
+run without them.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
 import numpy as np
-import torch
 import cv2
-from ultralytics import YOLO
-from scipy.signal import find_peaks
 from pathlib import Path
-from huggingface_hub import hf_hub_download, list_repo_files
 
-from src.detection.base import Detector, Detection, BoundingBox
+from src.detection.base import Detector, DetectionBatch
+from src.detection.boxes import clip_boxes
 from src.utils.exceptions import ModelLoadError, DetectionError
 from src.utils.logger import get_logger
+from src.utils.metrics import PLATE_FALLBACKS, timed_stage
+from src.utils.tracing import current_span, tracer
+
+
+@dataclass
+class FallbackStats:
+    """Cost counters for the two-stage (vehicle → plate) fallback"""
+    invocations: int = 0
+    vehicles_found: int = 0
+    vehicles_searched: int = 0
+    vehicles_skipped_small: int = 0
+    vehicles_skipped_cap: int = 0
+    vehicles_skipped_budget: int = 0
+    crops_downscaled: int = 0
+    budget_exhausted: int = 0
+    plates_found: int = 0
+    total_seconds: float = 0.0
+    last_seconds: float = 0.0
+    max_seconds: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary (with average cost per invocation)"""
+        data = asdict(self)
+        data["avg_seconds"] = self.total_seconds / self.invocations if self.invocations else 0.0
+        return data
 
 
 class PlateDetector(Detector):
     """Detects license plates using YOLO model"""
     
-    def __init__(self, confidence_threshold: float = 0.25):
+    VEHICLE_CLASSES = (2, 3, 5, 7)  # COCO: car, motorcycle, bus, truck
+    VEHICLE_CONFIDENCE = 0.4
+    
+    def __init__(
+        self,
+        confidence_threshold: float = 0.25,
+        two_stage_min_vehicle_area: int = 4096,
+        two_stage_max_vehicles: int = 8,
+        two_stage_max_crop_dimension: int = 640,
+        two_stage_time_budget_ms: float = 250.0,
+        two_stage_workers: int = 4,
+        model_path: Optional[str] = None
+    ):
         """
         Initialize plate detector
         
         Args:
             confidence_threshold: Minimum confidence score for detections
+            two_stage_min_vehicle_area: Vehicles smaller than this (pixels) are skipped
+            two_stage_max_vehicles: Maximum number of vehicles searched per frame (largest first)
+            two_stage_max_crop_dimension: Vehicle crops larger than this are downscaled
+            two_stage_time_budget_ms: Time budget for the fallback per frame
+            two_stage_workers: Number of threads searching vehicle crops in parallel
+            model_path: Plate model weights to load instead of the default search
+                (.pt, or an ONNX/OpenVINO export, e.g. a quantized one)
         """
         self.confidence_threshold = confidence_threshold
-        self.model = None
+        self.model_path = model_path
+        self.model: Any = None
+        self.model_variant: Optional[str] = None  # Weights in use (reported on traces)
         self.use_two_stage_detection = True  # Always use two-stage with YOLOv8n
+        self.two_stage_min_vehicle_area = two_stage_min_vehicle_area
+        self.two_stage_max_vehicles = two_stage_max_vehicles
+        self.two_stage_max_crop_dimension = two_stage_max_crop_dimension
+        self.two_stage_time_budget_ms = two_stage_time_budget_ms
+        self.two_stage_workers = max(1, two_stage_workers)
+        self.fallback_stats = FallbackStats()
+        self._stats_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
         self.logger = get_logger(self.__class__.__name__)
         self.load_model()
     
+    def get_fallback_stats(self) -> Dict[str, Any]:
+        """Get two-stage fallback cost counters"""
+        with self._stats_lock:
+            return self.fallback_stats.to_dict()
+    
     def load_model(self) -> None:
         """Load YOLO model with GPU support (MPS for Apple Silicon, CUDA for NVIDIA)"""
         try:
+            import torch
+            from ultralytics import YOLO
+            
             self.logger.info("Loading YOLO model for license plate detection...")
             
             # Detect available device: MPS (Apple Silicon) > CUDA (NVIDIA) > CPU
@@ -55,9 +125,18 @@ class PlateDetector(Detector):
             
             local_model = models_dir / 'license_plate_detector.pt'
             
-            if local_model.exists() and local_model.stat().st_size > 1000000:  # > 1MB (not HTML)
+            if self.model_path:
+                if not Path(self.model_path).exists():
+                    raise ModelLoadError(f"Plate detection model not found: {self.model_path}")
+                self.logger.info(f"Loading configured license plate model: {self.model_path}")
+                self.model = YOLO(self.model_path, task='detect')
+                self.model_variant = Path(self.model_path).name
+                self._is_custom_model = True
+                self.use_two_stage_detection = False
+            elif local_model.exists() and local_model.stat().st_size > 1000000:  # > 1MB (not HTML)
                 self.logger.info(f"✅ Loading custom license plate model: {local_model}")
                 self.model = YOLO(str(local_model))
+                self.model_variant = local_model.name
                 self._is_custom_model = True
                 self.use_two_stage_detection = False  # Trust the custom model
                 self.logger.info("✅ Custom license plate model loaded - will detect plates directly")
@@ -72,6 +151,7 @@ class PlateDetector(Detector):
                 
                 if loaded_model is not None:
                     self.model = loaded_model
+                    self.model_variant = repo_id
                     self._is_custom_model = True
                     self.use_two_stage_detection = False
                     self.logger.info(f"✅ License plate model loaded from Hugging Face: {repo_id}")
@@ -96,16 +176,21 @@ class PlateDetector(Detector):
                     self.logger.info("")
                     self.logger.info("=" * 80)
                     self.model = YOLO('yolov8n.pt')
+                    self.model_variant = 'yolov8n.pt'
                     self._is_custom_model = False
                     self.use_two_stage_detection = True
             
-            self.model.to(self.device)
+            # Exported models (ONNX, OpenVINO) pick their device at inference time
+            if self.model_path is None or self.model_path.endswith('.pt'):
+                self.model.to(self.device)
             self.logger.info(f"YOLO model loaded successfully on {self.device.upper()}")
+        except ModelLoadError:
+            raise
         except Exception as e:
             self.logger.error(f"Failed to load YOLO model: {e}")
             raise ModelLoadError(f"Failed to load YOLO model: {str(e)}")
     
-    def _load_model_from_huggingface(self, repo_id: str) -> Optional[YOLO]:
+    def _load_model_from_huggingface(self, repo_id: str) -> Optional[Any]:
         """
         Load YOLO model from Hugging Face Hub
         Downloads specific model file: license-plate-finetune-v1l.pt
@@ -120,6 +205,9 @@ class PlateDetector(Detector):
         
         # Download specific model file using hf_hub_download
         try:
+            from huggingface_hub import hf_hub_download, list_repo_files
+            from ultralytics import YOLO
+            
             self.logger.info("Listing available files in repository...")
             
             files = list_repo_files(repo_id)
@@ -156,7 +244,7 @@ class PlateDetector(Detector):
             self.logger.debug(f"Traceback: {traceback.format_exc()}")
             return None
     
-    def detect(self, image: np.ndarray) -> List[Detection]:
+    def detect(self, image: np.ndarray) -> DetectionBatch:
         """
         Detect license plates in image
         
@@ -164,163 +252,95 @@ class PlateDetector(Detector):
             image: Image as numpy array (RGB)
             
         Returns:
-            List of Detection objects for license plates
+            DetectionBatch of license plates
         """
         if self.model is None:
             raise DetectionError("Model not loaded")
         
         try:
-            self.logger.info(f"Running plate detection on image shape: {image.shape}")
+            self.logger.debug("Running plate detection on image shape: %s", image.shape)
             
             # Run detection with GPU device
             # For POC, we're using general object detection
             # In production, use a model trained specifically on license plates
-            results = self.model(image, verbose=False, device=self.device)
-            self.logger.info(f"YOLO returned {len(results)} result objects")
-            
-            detections = []
-            detection_id = 1
+            with tracer.span(
+                "yolo",
+                model=self.model_variant,
+                device=self.device,
+                image_width=image.shape[1],
+                image_height=image.shape[0]
+            ):
+                results = self.model(image, verbose=False, device=self.device)
+            self.logger.debug("YOLO returned %d result objects", len(results))
+            
+            # All boxes of all results as arrays (one device transfer per result)
+            xyxy, confidence, _ = _yolo_arrays(results)
+            self.logger.debug("Processing %d boxes from YOLO", len(xyxy))
             
             # Check if we have a custom license plate model
             has_custom_model = hasattr(self, '_is_custom_model') and self._is_custom_model
             
-            for result in results:
-                boxes = result.boxes
-                self.logger.info(f"Processing {len(boxes)} boxes from YOLO")
-                
-                for box in boxes:
-                    try:
-                        # Get confidence
-                        confidence = float(box.conf[0])
-                        
-                        self.logger.info(f"Box detected with confidence: {confidence:.3f} (threshold: {self.confidence_threshold})")
-                        
-                        # Filter by confidence threshold
-                        if confidence < self.confidence_threshold:
-                            self.logger.info(f"  → Skipped: confidence {confidence:.3f} < threshold {self.confidence_threshold}")
-                            continue
-                        
-                        # Get bounding box
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        
-                        # Ensure valid coordinates
-                        x1, x2 = min(x1, x2), max(x1, x2)
-                        y1, y2 = min(y1, y2), max(y1, y2)
-                        
-                        width = int(x2 - x1)
-                        height = int(y2 - y1)
-                        
-                        # Skip invalid boxes
-                        if width <= 0 or height <= 0:
-                            self.logger.warning(f"  → Skipped: invalid box dimensions {width}x{height}")
-                            continue
-                        
-                        aspect_ratio = width / height if height > 0 else 0
-                        
-                        self.logger.info(f"  → Box: ({int(x1)}, {int(y1)}, {int(x2)}, {int(y2)}), size: {width}x{height}, aspect: {aspect_ratio:.2f}")
-                        
-                        # For custom license plate models, trust the model completely
-                        if has_custom_model:
-                            # No validation - trust the specialized model
-                            self.logger.info(f"  → Using custom model: accepting all detections above confidence threshold")
-                        else:
-                            # More strict validation for general models
-                            if width < 10 or height < 5:
-                                self.logger.info(f"  → Skipped: too small {width}x{height}")
-                                continue
-                            
-                            # Very lenient aspect ratio check
-                            if aspect_ratio < 1.0 or aspect_ratio > 10.0:
-                                self.logger.info(f"  → Skipped: extreme aspect_ratio={aspect_ratio:.2f}")
-                                continue
-                        
-                        self.logger.info(
-                            f"✅ License plate accepted: {width}x{height}, "
-                            f"aspect={aspect_ratio:.2f}, conf={confidence:.2f}"
-                        )
-                        
-                        # Expand LEFT from top-right corner (double width)
-                        expanded_width = int(width * 2.0)   # Double the width
-                        x2_final = int(x2)  # Right edge stays
-                        x1_final = max(0, x2_final - expanded_width)  # Expand left
-                        
-                        # Keep original height (no y-axis padding)
-                        y1_final = int(y1)
-                        y2_final = int(y2)
-                        
-                        # Ensure coordinates are valid
-                        x1_final = max(0, x1_final)
-                        y1_final = max(0, y1_final)
-                        
-                        width_final = x2_final - x1_final
-                        height_final = y2_final - y1_final
-                        
-                        # Final validation
-                        if width_final <= 0 or height_final <= 0:
-                            self.logger.warning(f"  → Skipped: invalid final dimensions {width_final}x{height_final}")
-                            continue
-                        
-                        self.logger.info(
-                            f"  → Expanded 2x left: ({x1_final}, {y1_final}, {x2_final}, {y2_final}), "
-                            f"size: {width_final}x{height_final} (original: {width}x{height})"
-                        )
-                        
-                        # Create detection with expanded bbox from top-left corner
-                        detection = Detection(
-                            id=detection_id,
-                            bbox=BoundingBox(
-                                x=x1_final,
-                                y=y1_final,
-                                width=width_final,
-                                height=height_final
-                            ),
-                            confidence=confidence,
-                            label="plate"
-                        )
-                        detections.append(detection)
-                        detection_id += 1
-                    except Exception as e:
-                        self.logger.warning(f"Failed to process box: {e}")
-                        continue
-            
-            if len(detections) > 0:
-                self.logger.info(
-                    f"✅ YOLO detected {len(detections)} license plates "
-                    f"(threshold: {self.confidence_threshold})"
-                )
-            else:
-                self.logger.warning(
-                    f"⚠️ YOLO found 0 license plates. "
-                    f"Model: {self._is_custom_model if hasattr(self, '_is_custom_model') else 'unknown'}, "
-                    f"Total boxes: {sum(len(r.boxes) for r in results)}"
-                )
-                
-                # If YOLO didn't find any plates, use two-stage detection as fallback
-                if self.use_two_stage_detection:
-                    self.logger.info("No plates detected by primary model. Trying two-stage detection (car → plate)...")
-                    two_stage_detections = self._detect_plates_two_stage(image, results)
-                    detections.extend(two_stage_detections)
-                else:
-                    self.logger.info("No plates detected. Troubleshooting tips:")
-                    self.logger.info("  1. Ensure image has visible license plates")
-                    self.logger.info("  2. Check confidence threshold (current: {})".format(self.confidence_threshold))
-                    self.logger.info("  3. Verify model is appropriate for your plate type (US/EU/Asian)")
+            # Ensure valid coordinates
+            x1 = np.minimum(xyxy[:, 0], xyxy[:, 2])
+            x2 = np.maximum(xyxy[:, 0], xyxy[:, 2])
+            y1 = np.minimum(xyxy[:, 1], xyxy[:, 3])
+            y2 = np.maximum(xyxy[:, 1], xyxy[:, 3])
+            
+            width = np.trunc(x2 - x1)
+            height = np.trunc(y2 - y1)
+            aspect_ratio = width / np.maximum(height, 1)
+            
+            # Filter by confidence threshold and skip invalid boxes
+            keep = (confidence >= self.confidence_threshold) & (width > 0) & (height > 0)
+            
+            # For custom license plate models, trust the model completely;
+            # general models get a minimum size and a very lenient aspect ratio check
+            if not has_custom_model:
+                keep &= (width >= 10) & (height >= 5)
+                keep &= (aspect_ratio >= 1.0) & (aspect_ratio <= 10.0)
+            
+            # Expand LEFT from top-right corner (double width), keep original height
+            x2_final = np.trunc(x2)  # Right edge stays
+            x1_final = x2_final - width * 2.0  # Expand left
+            y1_final = np.trunc(y1)
+            y2_final = np.trunc(y2)
+            
+            # Clip to the image and validate
+            image_height, image_width = image.shape[:2]
+            final_xyxy = clip_boxes(
+                np.stack([x1_final, y1_final, x2_final, y2_final], axis=1),
+                image_width,
+                image_height
+            )
+            keep &= (final_xyxy[:, 2] > final_xyxy[:, 0]) & (final_xyxy[:, 3] > final_xyxy[:, 1])
+            
+            detections = DetectionBatch.from_xyxy(final_xyxy[keep], confidence[keep], "plate")
+            
+            self.logger.debug(
+                "Plate boxes: %d raw, %d above threshold, %d accepted (threshold: %s, model: %s)",
+                len(xyxy), (confidence >= self.confidence_threshold).sum(), len(detections),
+                self.confidence_threshold, self.model_variant
+            )
+            
+            # If YOLO didn't find any plates, use two-stage detection as fallback
+            if len(detections) == 0 and self.use_two_stage_detection:
+                self.logger.debug("No plates detected by primary model, trying two-stage detection (car → plate)")
+                PLATE_FALLBACKS.inc()
+                with timed_stage("plate_fallback"):
+                    detections = self._detect_plates_two_stage(image, results)
             
             return detections
             
         except Exception as e:
-            self.logger.error(f"License plate detection failed: {e}", exc_info=True)
+            self.logger.error("License plate detection failed: %s", e, exc_info=True)
             raise DetectionError(f"License plate detection failed: {str(e)}")
     
-    def _detect_plates_with_contours(self, image: np.ndarray) -> List[Detection]:
+    def _detect_plates_with_contours(self, image: np.ndarray) -> DetectionBatch:
         """
         Fallback method: Detect license plates using contour detection
         Works well for European plates with clear rectangular shapes
         """
-        self.logger.info("Using contour-based detection for license plates...")
-        
-        detections = []
-        detection_id = 1
+        self.logger.debug("Using contour-based detection for license plates")
         
         try:
             # Convert to grayscale
@@ -329,10 +349,6 @@ class PlateDetector(Detector):
             # Apply bilateral filter to reduce noise while keeping edges sharp
             gray = cv2.bilateralFilter(gray, 11, 17, 17)
             
-            # Apply adaptive thresholding to enhance text regions (typical for plates)
-            thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                          cv2.THRESH_BINARY, 11, 2)
-            
             # Edge detection with stricter parameters
             edges = cv2.Canny(gray, 50, 150)
             
@@ -341,198 +357,299 @@ class PlateDetector(Detector):
             dilated = cv2.dilate(edges, kernel, iterations=1)
             
             # Find contours
-            contours, _ = cv2.findContours(dilated.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
-            # Sort contours by area (largest first)
-            contours = sorted(contours, key=cv2.contourArea, reverse=True)[:20]
+            # Bounding rectangles and areas of the 20 largest contours
+            rects, contour_area = _contour_geometry(contours, limit=20)
+            x, y, w, h = rects.T
             
             image_area = image.shape[0] * image.shape[1]
             image_height, image_width = image.shape[:2]
             
-            candidates = []
+            # Balanced European license plate characteristics:
+            # - Aspect ratio: 1.8:1 to 6.0:1 (European plates vary)
+            # - Size: 0.3% to 12% of image
+            # - Minimum dimensions: 50x18 pixels
+            # - Maximum dimensions: not more than 50% of image width/height
+            # - Rectangularity (extent) of at least 65%
+            aspect_ratio = w / np.maximum(h, 1)
+            relative_size = (w * h) / image_area if image_area > 0 else np.zeros(len(w))
+            extent = np.divide(w * h, contour_area, out=np.full(len(w), 0.8), where=contour_area > 0)
+            
+            mask = (
+                (aspect_ratio >= 1.8) & (aspect_ratio <= 6.0)
+                & (relative_size >= 0.003) & (relative_size <= 0.12)
+                & (w >= 50) & (h >= 18)
+                & (w <= image_width * 0.5) & (h <= image_height * 0.5)
+                & (extent >= 0.65)
+            )
+            
+            # Text-like patterns (plates have text): edge density and horizontal
+            # variance, both read from a single integral image of the edge map
+            if mask.any():
+                integral = cv2.integral((cv2.Canny(gray, 30, 150) > 0).astype(np.uint8))
+                edge_density = _box_sums(integral, rects) / (w * h)
+                horizontal_variance = _row_sum_variance(integral, rects, mask) * (255.0 ** 2)
+                
+                # License plates typically have 3-30% edge density (more lenient)
+                mask &= (edge_density >= 0.03) & (edge_density <= 0.35)
+                # Horizontal text patterns (more lenient variance check)
+                mask &= horizontal_variance >= 50
+            else:
+                edge_density = np.zeros(len(w))
             
-            for contour in contours:
-                # Get bounding rectangle
-                x, y, w, h = cv2.boundingRect(contour)
-                
-                # Calculate aspect ratio
-                aspect_ratio = w / h if h > 0 else 0
-                
-                # Calculate relative size
-                box_area = w * h
-                relative_size = box_area / image_area if image_area > 0 else 0
-                
-                # Balanced European license plate characteristics:
-                # - Aspect ratio: 1.8:1 to 6.0:1 (European plates vary)
-                # - Size: 0.3% to 12% of image
-                # - Minimum dimensions: 50x18 pixels
-                # - Maximum dimensions: not more than 50% of image width/height
-                
-                if not (1.8 <= aspect_ratio <= 6.0):
-                    self.logger.debug(f"Rejected: aspect_ratio={aspect_ratio:.2f}")
-                    continue
-                
-                if not (0.003 <= relative_size <= 0.12):
-                    self.logger.debug(f"Rejected: relative_size={relative_size:.4f}")
-                    continue
-                
-                if w < 50 or h < 18:
-                    self.logger.debug(f"Rejected: too small {w}x{h}")
-                    continue
-                
-                if w > image_width * 0.5 or h > image_height * 0.5:
-                    self.logger.debug(f"Rejected: too large {w}x{h}")
-                    continue
-                
-                # Check rectangularity (should be mostly rectangular)
-                rect_area = w * h
-                contour_area = cv2.contourArea(contour)
-                extent = 0.8  # Default if calculation fails
-                if contour_area > 0:
-                    extent = rect_area / contour_area
-                    if extent < 0.65:  # Should be at least 65% rectangular
-                        self.logger.debug(f"Rejected: extent={extent:.2f}")
-                        continue
-                
-                # Extract ROI and check for text-like patterns (plates have text)
-                edge_density = 0.1  # Default
-                horizontal_variance = 1000  # Default (pass)
-                
-                roi = gray[y:y+h, x:x+w]
-                if roi.size > 0:
-                    # Check edge density (plates have lots of edges from text)
-                    roi_edges = cv2.Canny(roi, 30, 150)
-                    edge_density = np.sum(roi_edges > 0) / roi.size
-                    
-                    # License plates typically have 3-30% edge density (more lenient)
-                    if not (0.03 <= edge_density <= 0.35):
-                        self.logger.debug(f"Rejected: edge_density={edge_density:.3f}")
-                        continue
-                    
-                    # Check for horizontal text patterns (most plates have horizontal text)
-                    horizontal_edges = np.sum(roi_edges, axis=1)
-                    if len(horizontal_edges) > 0:
-                        horizontal_variance = np.var(horizontal_edges)
-                        # More lenient variance check
-                        if horizontal_variance < 50:
-                            self.logger.debug(f"Rejected: horizontal_variance={horizontal_variance:.1f}")
-                            continue
-                
-                # Store candidate with score
-                # Boost score for typical plate characteristics
-                aspect_score = 1.0
-                if 2.0 <= aspect_ratio <= 5.0:  # Typical European plate
-                    aspect_score = 1.5
-                
-                score = aspect_ratio * edge_density * extent * aspect_score
-                candidates.append((score, x, y, w, h, aspect_ratio, relative_size, edge_density))
+            self.logger.debug("Contour candidates: %d/%d passed filters", mask.sum(), len(w))
+            
+            # Boost score for typical plate characteristics (typical European plate)
+            aspect_score = np.where((aspect_ratio >= 2.0) & (aspect_ratio <= 5.0), 1.5, 1.0)
+            score = aspect_ratio * edge_density * extent * aspect_score
             
             # Sort by score and take top 5 candidates
-            candidates.sort(reverse=True, key=lambda x: x[0])
-            
-            for score, x, y, w, h, aspect_ratio, relative_size, edge_density in candidates[:5]:
-                # Create detection
-                detection = Detection(
-                    id=detection_id,
-                    bbox=BoundingBox(
-                        x=int(x),
-                        y=int(y),
-                        width=int(w),
-                        height=int(h)
-                    ),
-                    confidence=min(0.95, 0.7 + (score / 10)),  # Variable confidence based on score
-                    label="plate"
-                )
-                detections.append(detection)
-                self.logger.info(
-                    f"Contour-based plate {detection_id}: "
-                    f"{w}x{h}, aspect={aspect_ratio:.2f}, size={relative_size:.4f}, "
-                    f"edge_density={edge_density:.3f}, score={score:.3f}"
-                )
-                detection_id += 1
+            candidates = np.flatnonzero(mask)
+            candidates = candidates[np.argsort(-score[candidates], kind="stable")][:5]
+            
+            # Variable confidence based on score
+            detections = DetectionBatch(
+                rects[candidates],
+                np.minimum(0.95, 0.7 + score[candidates] / 10),
+                "plate"
+            )
+            
+            if self.logger.isEnabledFor(logging.DEBUG):
+                for detection_id, i in enumerate(candidates, start=1):
+                    self.logger.debug(
+                        "Contour-based plate %d: %dx%d, aspect=%.2f, size=%.4f, edge_density=%.3f, score=%.3f",
+                        detection_id, w[i], h[i], aspect_ratio[i], relative_size[i], edge_density[i], score[i]
+                    )
             
-            self.logger.info(f"Contour-based detection found {len(detections)} potential plates")
+            self.logger.debug("Contour-based detection found %d potential plates", len(detections))
             return detections
             
         except Exception as e:
-            self.logger.warning(f"Contour-based detection failed: {e}")
-            return []
+            self.logger.warning("Contour-based detection failed: %s", e)
+            return DetectionBatch.empty("plate")
     
-    def _detect_plates_two_stage(self, image: np.ndarray, yolo_results) -> List[Detection]:
+    def _detect_plates_two_stage(self, image: np.ndarray, yolo_results) -> DetectionBatch:
         """
         Two-stage detection: First find cars, then find license plates within car regions
         This is more reliable as it narrows down the search space
+        
+        The search is budgeted: tiny vehicles are skipped, only the largest
+        vehicles are searched, large crops are downscaled and crops are searched in
+        parallel. Searches check the deadline between their edge passes, so once
+        the time budget is spent they stop instead of holding the worker threads.
         """
-        self.logger.info("Using two-stage detection: car → license plate...")
+        self.logger.debug("Using two-stage detection: car → license plate")
+        
+        start_time = time.perf_counter()
+        image_height, image_width = image.shape[:2]
+        detections = DetectionBatch.empty("plate")
         
-        detections = []
-        detection_id = 1
+        found = searched = skipped_small = skipped_cap = skipped_budget = downscaled = 0
+        budget_exhausted = False
         
         try:
-            # Step 1: Find all vehicles (cars, trucks, buses, motorcycles)
-            vehicle_classes = [2, 3, 5, 7]  # car, motorcycle, bus, truck
-            vehicle_regions = []
-            
-            for result in yolo_results:
-                boxes = result.boxes
-                for box in boxes:
-                    cls = int(box.cls[0])
-                    confidence = float(box.conf[0])
-                    
-                    # Check if it's a vehicle with reasonable confidence
-                    if cls in vehicle_classes and confidence > 0.4:
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        vehicle_regions.append((int(x1), int(y1), int(x2), int(y2)))
-                        self.logger.info(f"Found vehicle: {int(x1)},{int(y1)} to {int(x2)},{int(y2)}")
-            
-            if len(vehicle_regions) == 0:
-                self.logger.info("No vehicles detected, cannot use two-stage detection")
-                return []
-            
-            self.logger.info(f"Found {len(vehicle_regions)} vehicles, searching for plates within them...")
-            
-            # Step 2: For each vehicle, search for license plate using contour detection
-            for vehicle_idx, (vx1, vy1, vx2, vy2) in enumerate(vehicle_regions):
-                # Extract vehicle ROI
-                vehicle_roi = image[vy1:vy2, vx1:vx2]
-                
-                if vehicle_roi.size == 0:
+            # Step 1: Find all vehicles (cars, trucks, buses, motorcycles) with reasonable confidence
+            xyxy, confidence, cls = _yolo_arrays(yolo_results)
+            is_vehicle = np.isin(cls.astype(int), self.VEHICLE_CLASSES) & (confidence > self.VEHICLE_CONFIDENCE)
+            
+            regions = np.trunc(xyxy[is_vehicle]).astype(np.int64)
+            regions[:, [0, 2]] = np.clip(regions[:, [0, 2]], 0, image_width)
+            regions[:, [1, 3]] = np.clip(regions[:, [1, 3]], 0, image_height)
+            
+            found = len(regions)
+            if found == 0:
+                self.logger.debug("No vehicles detected, cannot use two-stage detection")
+                return detections
+            
+            # Step 2: Apply the area budget - skip tiny vehicles, keep the largest ones
+            areas = (
+                np.maximum(0, regions[:, 2] - regions[:, 0])
+                * np.maximum(0, regions[:, 3] - regions[:, 1])
+            )
+            large_enough = np.flatnonzero(areas >= self.two_stage_min_vehicle_area)
+            skipped_small = found - len(large_enough)
+            order = large_enough[np.argsort(-areas[large_enough], kind="stable")]
+            skipped_cap = max(0, len(order) - self.two_stage_max_vehicles)
+            candidates = [tuple(region) for region in regions[order[:self.two_stage_max_vehicles]].tolist()]
+            
+            self.logger.debug(
+                "Found %d vehicles, searching %d for plates (skipped %d small, %d over cap)",
+                found, len(candidates), skipped_small, skipped_cap
+            )
+            
+            # Step 3: Search vehicle crops in parallel within the time budget
+            deadline = start_time + self.two_stage_time_budget_ms / 1000.0
+            executor = self._get_executor()
+            # Each search runs in a copy of this context, so its span nests under plate_fallback
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._search_vehicle, image, region, deadline)
+                for region in candidates
+            ]
+            done, not_done = wait(futures, timeout=max(0.0, deadline - time.perf_counter()))
+            
+            if not_done:
+                budget_exhausted = True
+                for future in not_done:
+                    future.cancel()
+                self.logger.warning(
+                    "Two-stage time budget (%.0fms) exhausted, %d vehicles not searched",
+                    self.two_stage_time_budget_ms, len(not_done),
+                    extra={"event": "plate_fallback_budget"}
+                )
+            
+            # Collect in vehicle order so detection IDs are deterministic
+            vehicle_batches = []
+            for vehicle_idx, future in enumerate(futures):
+                if future not in done:
+                    skipped_budget += 1
                     continue
-                
-                self.logger.info(f"Searching in vehicle {vehicle_idx + 1}: {vx2-vx1}x{vy2-vy1}")
-                
-                # Find plates within this vehicle
-                plate_detections = self._find_plates_in_region(vehicle_roi, vx1, vy1)
-                
-                for plate_det in plate_detections:
-                    # Adjust detection ID
-                    plate_det.id = detection_id
-                    detections.append(plate_det)
-                    self.logger.info(
-                        f"Found plate {detection_id} in vehicle {vehicle_idx + 1}: "
-                        f"{plate_det.bbox.width}x{plate_det.bbox.height}"
-                    )
-                    detection_id += 1
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.logger.warning("Plate search failed in vehicle %d: %s", vehicle_idx + 1, e)
+                    continue
+                if result is None:
+                    # Stopped at the deadline before the wait returned
+                    budget_exhausted = True
+                    skipped_budget += 1
+                    continue
+                plate_detections, was_downscaled = result
+                searched += 1
+                downscaled += int(was_downscaled)
+                vehicle_batches.append(plate_detections)
+                self.logger.debug("Found %d plates in vehicle %d", len(plate_detections), vehicle_idx + 1)
             
-            self.logger.info(f"Two-stage detection found {len(detections)} license plates")
+            # Adjust detection IDs
+            detections = DetectionBatch.concatenate(vehicle_batches).renumber()
+            
+            self.logger.debug("Two-stage detection found %d license plates", len(detections))
             return detections
             
         except Exception as e:
-            self.logger.warning(f"Two-stage detection failed: {e}")
-            return []
+            self.logger.warning("Two-stage detection failed: %s", e)
+            detections = DetectionBatch.empty("plate")
+            return detections
+        
+        finally:
+            elapsed = time.perf_counter() - start_time
+            current_span().set_attributes(
+                vehicles_found=found,
+                vehicles_searched=searched,
+                vehicles_skipped_small=skipped_small,
+                vehicles_skipped_cap=skipped_cap,
+                vehicles_skipped_budget=skipped_budget,
+                budget_exhausted=budget_exhausted,
+                plates=len(detections)
+            )
+            with self._stats_lock:
+                stats = self.fallback_stats
+                stats.invocations += 1
+                stats.vehicles_found += found
+                stats.vehicles_searched += searched
+                stats.vehicles_skipped_small += skipped_small
+                stats.vehicles_skipped_cap += skipped_cap
+                stats.vehicles_skipped_budget += skipped_budget
+                stats.crops_downscaled += downscaled
+                stats.budget_exhausted += int(budget_exhausted)
+                stats.plates_found += len(detections)
+                stats.total_seconds += elapsed
+                stats.last_seconds = elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Lazily create the thread pool used to search vehicle crops"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.two_stage_workers,
+                thread_name_prefix="plate-fallback"
+            )
+        return self._executor
+    
+    def close(self) -> None:
+        """Shut down the vehicle search threads (queued searches are cancelled)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def __del__(self) -> None:
+        self.close()
     
-    def _find_plates_in_region(self, roi: np.ndarray, offset_x: int, offset_y: int) -> List[Detection]:
+    def _search_vehicle(
+        self,
+        image: np.ndarray,
+        region: Tuple[int, int, int, int],
+        deadline: Optional[float] = None
+    ) -> Optional[Tuple[DetectionBatch, bool]]:
+        """
+        Search a single vehicle crop for plates, downscaling large crops
+        
+        Args:
+            image: Full image as numpy array (RGB)
+            region: Vehicle box (x1, y1, x2, y2) in image coordinates
+            deadline: time.perf_counter() value after which the search stops
+            
+        Returns:
+            Tuple of (plate detections in image coordinates, whether the crop was downscaled),
+            or None if the deadline passed first
+        """
+        if _expired(deadline):
+            return None
+        with tracer.span("vehicle_search", region=list(region)) as span:
+            vx1, vy1, vx2, vy2 = region
+            vehicle_roi = image[vy1:vy2, vx1:vx2]
+            if vehicle_roi.size == 0:
+                return DetectionBatch.empty("plate"), False
+            
+            roi_height, roi_width = vehicle_roi.shape[:2]
+            scale = 1.0
+            if max(roi_height, roi_width) > self.two_stage_max_crop_dimension:
+                scale = self.two_stage_max_crop_dimension / max(roi_height, roi_width)
+                vehicle_roi = cv2.resize(
+                    vehicle_roi,
+                    (max(1, int(roi_width * scale)), max(1, int(roi_height * scale))),
+                    interpolation=cv2.INTER_AREA
+                )
+            span.set_attributes(crop_width=roi_width, crop_height=roi_height, scale=round(scale, 3))
+            
+            self.logger.debug("Searching in vehicle: %dx%d (scale %.2f)", roi_width, roi_height, scale)
+            
+            if scale == 1.0:
+                plate_detections = self._find_plates_in_region(vehicle_roi, vx1, vy1, deadline)
+                if plate_detections is None:
+                    span.set_attribute("budget_exhausted", True)
+                    return None
+                span.set_attribute("plates", len(plate_detections))
+                return plate_detections, False
+            
+            # Map plates found in the downscaled crop back to image coordinates
+            plate_detections = self._find_plates_in_region(vehicle_roi, 0, 0, deadline)
+            if plate_detections is None:
+                span.set_attribute("budget_exhausted", True)
+                return None
+            plate_detections.boxes = np.round(plate_detections.boxes / scale).astype(np.int32)
+            span.set_attribute("plates", len(plate_detections))
+            return plate_detections.offset(vx1, vy1), True
+    
+    def _find_plates_in_region(
+        self,
+        roi: np.ndarray,
+        offset_x: int,
+        offset_y: int,
+        deadline: Optional[float] = None
+    ) -> Optional[DetectionBatch]:
         """
         Find license plates within a specific region (typically a vehicle)
         Uses multiple detection techniques with very lenient criteria
-        """
-        detections = []
         
+        Returns None if the deadline (a time.perf_counter() value) passes
+        between the edge passes.
+        """
         try:
             roi_height, roi_width = roi.shape[:2]
             roi_area = roi_width * roi_height
             
-            self.logger.info(f"Analyzing vehicle region: {roi_width}x{roi_height}")
+            self.logger.debug("Analyzing vehicle region: %dx%d", roi_width, roi_height)
             
             # Convert to grayscale
             gray = cv2.cvtColor(roi, cv2.COLOR_RGB2GRAY)
@@ -541,10 +658,14 @@ class PlateDetector(Detector):
             # Method 1: Bilateral filter + Canny
             gray_filtered = cv2.bilateralFilter(gray, 11, 17, 17)
             edges1 = cv2.Canny(gray_filtered, 30, 150)
+            if _expired(deadline):
+                return None
             
             # Method 2: Gaussian blur + Canny (different thresholds)
             gray_blur = cv2.GaussianBlur(gray, (5, 5), 0)
             edges2 = cv2.Canny(gray_blur, 20, 100)
+            if _expired(deadline):
+                return None
             
             # Method 3: Adaptive threshold
             thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
@@ -559,120 +680,179 @@ class PlateDetector(Detector):
             kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
             edges = cv2.dilate(edges, kernel, iterations=1)
             edges = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel)
+            if _expired(deadline):
+                return None
             
             # Find contours
-            contours, _ = cv2.findContours(edges.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            
+            self.logger.debug("Found %d contours in vehicle", len(contours))
+            
+            # Bounding rectangles and areas of the 20 largest contours
+            rects, contour_area = _contour_geometry(contours, limit=20)
+            x, y, w, h = rects.T
+            
+            # VERY LENIENT license plate characteristics:
+            # - Aspect ratio: 1.3:1 to 8.0:1 (accept almost anything wider than tall)
+            # - Size: 0.5% to 40% of vehicle area
+            # - Minimum dimensions: 25x10 pixels
+            # - Maximum dimensions: 60% of vehicle width/height
+            # - Can be anywhere in lower 85% of vehicle
+            # - Rectangularity (extent) of at least 40%
+            aspect_ratio = w / np.maximum(h, 1)
+            relative_size = (w * h) / roi_area if roi_area > 0 else np.zeros(len(w))
+            extent = np.divide(w * h, contour_area, out=np.full(len(w), 0.8), where=contour_area > 0)
+            
+            mask = (
+                (aspect_ratio >= 1.3) & (aspect_ratio <= 8.0)
+                & (relative_size >= 0.005) & (relative_size <= 0.40)
+                & (w >= 25) & (h >= 10)
+                & (w <= roi_width * 0.6) & (h <= roi_height * 0.6)
+                & (y >= roi_height * 0.15)
+                & (extent >= 0.4)
+            )
+            
+            # Very lenient edge density check (2-50%), read from a single
+            # integral image of the edge map instead of running Canny per candidate
+            if mask.any():
+                integral = cv2.integral((cv2.Canny(gray, 20, 150) > 0).astype(np.uint8))
+                edge_density = _box_sums(integral, rects) / (w * h)
+                mask &= (edge_density >= 0.02) & (edge_density <= 0.50)
+            else:
+                edge_density = np.zeros(len(w))
             
-            self.logger.info(f"Found {len(contours)} contours in vehicle")
+            # Score candidates
+            aspect_score = np.where((aspect_ratio >= 1.8) & (aspect_ratio <= 6.0), 2.0, 1.0)
+            score = aspect_ratio * edge_density * extent * aspect_score
             
-            # Sort by area and take top 20
-            contours = sorted(contours, key=cv2.contourArea, reverse=True)[:20]
+            # Sort and take top 5 candidates per vehicle
+            candidates = np.flatnonzero(mask)
+            candidates = candidates[np.argsort(-score[candidates], kind="stable")]
             
-            candidates = []
+            self.logger.debug("Found %d candidates in vehicle region, selecting top 5", len(candidates))
             
-            for contour in contours:
-                x, y, w, h = cv2.boundingRect(contour)
-                
-                # Calculate aspect ratio
-                aspect_ratio = w / h if h > 0 else 0
-                
-                # Calculate relative size (relative to vehicle)
-                box_area = w * h
-                relative_size = box_area / roi_area if roi_area > 0 else 0
-                
-                # VERY LENIENT license plate characteristics:
-                # - Aspect ratio: 1.3:1 to 8.0:1 (accept almost anything wider than tall)
-                # - Size: 0.5% to 40% of vehicle area
-                # - Minimum dimensions: 25x10 pixels
-                # - Maximum dimensions: 60% of vehicle width/height
-                # - Can be anywhere in lower 85% of vehicle
-                
-                # Log all contours for debugging
-                self.logger.debug(f"Contour {contours.index(contour)}: {w}x{h}, aspect={aspect_ratio:.2f}, size={relative_size:.4f}")
-                
-                if aspect_ratio < 1.3 or aspect_ratio > 8.0:
-                    self.logger.debug(f"  → Rejected: aspect_ratio={aspect_ratio:.2f}")
-                    continue
-                
-                if relative_size < 0.005 or relative_size > 0.40:
-                    self.logger.debug(f"  → Rejected: relative_size={relative_size:.4f}")
-                    continue
-                
-                if w < 25 or h < 10:
-                    self.logger.debug(f"  → Rejected: too small {w}x{h}")
-                    continue
-                
-                if w > roi_width * 0.6 or h > roi_height * 0.6:
-                    self.logger.debug(f"  → Rejected: too large {w}x{h}")
-                    continue
-                
-                # Very lenient position check
-                if y < roi_height * 0.15:  # Skip only if in top 15% of vehicle
-                    self.logger.debug(f"  → Rejected: too high (y={y}/{roi_height})")
-                    continue
-                
-                # Very lenient rectangularity
-                rect_area = w * h
-                contour_area = cv2.contourArea(contour)
-                extent = 0.8
-                if contour_area > 0:
-                    extent = rect_area / contour_area
-                    if extent < 0.4:  # Very lenient - 40%
-                        self.logger.debug(f"  → Rejected: extent={extent:.2f}")
-                        continue
-                
-                # Extract plate ROI
-                plate_roi = gray[y:y+h, x:x+w]
-                if plate_roi.size == 0:
-                    continue
-                
-                # Very lenient edge density check
-                plate_edges = cv2.Canny(plate_roi, 20, 150)
-                edge_density = np.sum(plate_edges > 0) / plate_roi.size
-                
-                # Accept almost any edge density (2-50%)
-                if edge_density < 0.02 or edge_density > 0.50:
-                    self.logger.debug(f"  → Rejected: edge_density={edge_density:.3f}")
-                    continue
-                
-                # Score this candidate
-                aspect_score = 2.0 if 1.8 <= aspect_ratio <= 6.0 else 1.0
-                score = aspect_ratio * edge_density * extent * aspect_score
-                
-                self.logger.info(
-                    f"✓ CANDIDATE: {w}x{h}, aspect={aspect_ratio:.2f}, "
-                    f"edge={edge_density:.3f}, extent={extent:.2f}, score={score:.3f}"
-                )
-                
-                candidates.append((score, x, y, w, h, aspect_ratio, edge_density))
+            candidates = candidates[:5]
             
-            # Sort and take top 5 candidates per vehicle
-            candidates.sort(reverse=True, key=lambda x: x[0])
+            # Detections with global coordinates (ids are reassigned by the caller)
+            detections = DetectionBatch(
+                rects[candidates],
+                np.minimum(0.95, 0.80 + score[candidates] / 20),
+                "plate"
+            ).offset(offset_x, offset_y)
             
-            if len(candidates) == 0:
-                self.logger.warning(f"⚠️ No candidates found in vehicle region")
-            else:
-                self.logger.info(f"✅ Found {len(candidates)} candidates, selecting top 5")
-            
-            for score, x, y, w, h, aspect_ratio, edge_density in candidates[:5]:
-                # Create detection with global coordinates
-                detection = Detection(
-                    id=1,  # Will be reassigned by caller
-                    bbox=BoundingBox(
-                        x=int(offset_x + x),
-                        y=int(offset_y + y),
-                        width=int(w),
-                        height=int(h)
-                    ),
-                    confidence=min(0.95, 0.80 + (score / 20)),
-                    label="plate"
-                )
-                detections.append(detection)
-                self.logger.info(f"Selected plate candidate with score {score:.3f}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                for i in candidates:
+                    self.logger.debug(
+                        "Selected plate candidate %dx%d, aspect=%.2f, edge=%.3f, extent=%.2f, score=%.3f",
+                        w[i], h[i], aspect_ratio[i], edge_density[i], extent[i], score[i]
+                    )
             
             return detections
             
         except Exception as e:
-            self.logger.warning(f"Failed to find plates in region: {e}")
-            return []
+            self.logger.warning("Failed to find plates in region: %s", e)
+            return DetectionBatch.empty("plate")
+
 
+def _expired(deadline: Optional[float]) -> bool:
+    """Whether a time.perf_counter() deadline has passed (None never expires)"""
+    return deadline is not None and time.perf_counter() >= deadline
+
+
+def _yolo_arrays(results) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Boxes, confidences and classes of all YOLO results as numpy arrays
+    
+    Args:
+        results: Results returned by the ultralytics model
+        
+    Returns:
+        Tuple of (float array of shape (N, 4) with x1, y1, x2, y2; N confidences; N class ids)
+    """
+    xyxy, confidence, cls = [np.zeros((0, 4))], [np.zeros(0)], [np.zeros(0)]
+    for result in results:
+        boxes = result.boxes
+        if len(boxes) == 0:
+            continue
+        xyxy.append(boxes.xyxy.cpu().numpy().reshape(-1, 4))
+        confidence.append(boxes.conf.cpu().numpy().reshape(-1))
+        cls.append(boxes.cls.cpu().numpy().reshape(-1))
+    return (
+        np.concatenate(xyxy).astype(np.float64),
+        np.concatenate(confidence).astype(np.float64),
+        np.concatenate(cls)
+    )
+
+
+def _contour_geometry(contours, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bounding rectangles and areas of the largest contours
+    
+    Args:
+        contours: Contours from cv2.findContours
+        limit: Number of contours to keep (largest area first)
+        
+    Returns:
+        Tuple of (int64 array of shape (N, 4) with x, y, w, h; float array of contour areas)
+    """
+    if len(contours) == 0:
+        return np.zeros((0, 4), dtype=np.int64), np.zeros(0)
+    
+    areas = np.array([cv2.contourArea(contour) for contour in contours])
+    # Stable descending sort, same order as sorted(..., reverse=True)
+    order = np.argsort(-areas, kind="stable")[:limit]
+    rects = np.array([cv2.boundingRect(contours[i]) for i in order], dtype=np.int64)
+    return rects, areas[order]
+
+
+def _box_sums(integral: np.ndarray, rects: np.ndarray) -> np.ndarray:
+    """
+    Sum of the source image inside each rectangle, from its integral image
+    
+    Args:
+        integral: Integral image from cv2.integral (shape (H + 1, W + 1))
+        rects: Array of shape (N, 4) with x, y, w, h
+        
+    Returns:
+        Array of N sums
+    """
+    x, y, w, h = rects.T
+    sums: np.ndarray = (
+        integral[y + h, x + w] - integral[y, x + w]
+        - integral[y + h, x] + integral[y, x]
+    ).astype(np.float64)
+    return sums
+
+
+def _row_sum_variance(integral: np.ndarray, rects: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Variance of the per-row sums inside each rectangle, from its integral image
+    
+    Args:
+        integral: Integral image from cv2.integral (shape (H + 1, W + 1))
+        rects: Array of shape (N, 4) with x, y, w, h
+        mask: Rectangles to evaluate; the others get a variance of 0
+        
+    Returns:
+        Array of N variances
+    """
+    variance = np.zeros(len(rects))
+    if not mask.any():
+        return variance
+    
+    x, y, w, h = rects[mask].T
+    offsets = np.arange(h.max())
+    valid = offsets[None, :] < h[:, None]
+    rows = np.minimum(y[:, None] + offsets[None, :], y[:, None] + h[:, None] - 1)
+    
+    # Row r of the rectangle: I[r+1, x+w] - I[r, x+w] - I[r+1, x] + I[r, x]
+    right = (x + w)[:, None]
+    left = x[:, None]
+    row_sums = (
+        integral[rows + 1, right] - integral[rows, right]
+        - integral[rows + 1, left] + integral[rows, left]
+    ).astype(np.float64)
+    
+    mean = (row_sums * valid).sum(axis=1) / h
+    variance[mask] = (((row_sums - mean[:, None]) ** 2) * valid).sum(axis=1) / h
+    return variance
@@ -0,0 +1,161 @@
+"""Detector backends selectable by name
+
+Factories are registered per kind ("face" or "plate") under the names used by
+the face_detection_model and plate_detection_model settings. Each factory
+imports its detector when called, so selecting the classical or stub backends
+never loads insightface, torch or ultralytics.
+
+Built-in backends:
+    face:  retinaface (insightface buffalo_l), onnx (single ONNX detection
+           model, e.g. SCRFD det_500m), classical (OpenCV Haar cascade), stub
+    plate: yolo (custom, Hugging Face or YOLOv8n two-stage weights), onnx
+           (exported or quantized YOLO model), classical (contour search), stub
+"""
+
+from typing import Any, Callable, Dict, List
+
+from src.detection.base import Detector
+from src.utils.exceptions import ModelLoadError
+from src.utils.logger import get_logger
+
+DetectorFactory = Callable[[Any], Detector]
+
+KINDS = ("face", "plate")
+
+_backends: Dict[str, Dict[str, DetectorFactory]] = {kind: {} for kind in KINDS}
+
+logger = get_logger(__name__)
+
+
+def register_detector(kind: str, name: str) -> Callable[[DetectorFactory], DetectorFactory]:
+    """
+    Register a factory creating a detector from the settings
+
+    Usage:
+        @register_detector("face", "mymodel")
+        def _create_mymodel(settings):
+            return MyFaceDetector(settings.face_confidence_threshold)
+
+    Args:
+        kind: "face" or "plate"
+        name: Backend name used in the settings
+
+    Returns:
+        Decorator registering the factory (a later registration replaces an earlier one)
+    """
+    if kind not in _backends:
+        raise ValueError(f"Unknown detector kind {kind!r} (expected one of {', '.join(KINDS)})")
+
+    def decorator(factory: DetectorFactory) -> DetectorFactory:
+        _backends[kind][name] = factory
+        return factory
+
+    return decorator
+
+
+def available_backends(kind: str) -> List[str]:
+    """Registered backend names of a kind"""
+    return sorted(_backends.get(kind, {}))
+
+
+def create_detector(kind: str, name: str, settings) -> Detector:
+    """
+    Create the detector registered under a backend name
+
+    Args:
+        kind: "face" or "plate"
+        name: Backend name (face_detection_model / plate_detection_model)
+        settings: Settings instance passed to the factory
+
+    Returns:
+        Detector instance
+
+    Raises:
+        ModelLoadError: If no backend of that name is registered or the model cannot be loaded
+    """
+    factory = _backends.get(kind, {}).get(name)
+    if factory is None:
+        raise ModelLoadError(
+            f"Unknown {kind} detection model {name!r} (available: {', '.join(available_backends(kind))})"
+        )
+    logger.info(f"Creating {kind} detector backend: {name}")
+    return factory(settings)
+
+
+def _require_model_path(path, setting: str) -> str:
+    """Model path of a backend that has no default weights"""
+    if not path:
+        raise ModelLoadError(f"The onnx backend needs {setting.upper()} pointing to a model file")
+    return str(path)
+
+
+@register_detector("face", "retinaface")
+def _create_retinaface(settings) -> Detector:
+    from src.detection.faces.detector import FaceDetector
+    return FaceDetector(
+        confidence_threshold=settings.face_confidence_threshold,
+        det_size=settings.face_det_size
+    )
+
+
+@register_detector("face", "onnx")
+def _create_onnx_face(settings) -> Detector:
+    from src.detection.faces.onnx import OnnxFaceDetector
+    return OnnxFaceDetector(
+        _require_model_path(settings.face_model_path, "face_model_path"),
+        confidence_threshold=settings.face_confidence_threshold,
+        det_size=settings.face_det_size
+    )
+
+
+@register_detector("face", "classical")
+def _create_classical_face(settings) -> Detector:
+    from src.detection.faces.classical import HaarFaceDetector
+    return HaarFaceDetector()
+
+
+@register_detector("plate", "yolo")
+def _create_yolo_plate(settings) -> Detector:
+    from src.detection.plates.detector import PlateDetector
+    return PlateDetector(model_path=settings.plate_model_path, **_plate_options(settings))
+
+
+@register_detector("plate", "onnx")
+def _create_onnx_plate(settings) -> Detector:
+    model_path = _require_model_path(settings.plate_model_path, "plate_model_path")
+    from src.detection.plates.detector import PlateDetector
+    return PlateDetector(model_path=model_path, **_plate_options(settings))
+
+
+@register_detector("plate", "classical")
+def _create_classical_plate(settings) -> Detector:
+    from src.detection.plates.classical import ClassicalPlateDetector
+    return ClassicalPlateDetector(**_plate_options(settings))
+
+
+def _plate_options(settings) -> Dict[str, Any]:
+    """PlateDetector arguments shared by the plate backends"""
+    return {
+        "confidence_threshold": settings.plate_confidence_threshold,
+        "two_stage_min_vehicle_area": settings.two_stage_min_vehicle_area,
+        "two_stage_max_vehicles": settings.two_stage_max_vehicles,
+        "two_stage_max_crop_dimension": settings.two_stage_max_crop_dimension,
+        "two_stage_time_budget_ms": settings.two_stage_time_budget_ms,
+        "two_stage_workers": settings.two_stage_workers
+    }
+
+
+def _create_stub(label: str) -> DetectorFactory:
+    def factory(settings) -> Detector:
+        from src.detection.stub import StubDetector
+        return StubDetector(
+            label,
+            latency_ms=settings.stub_detector_latency_ms,
+            jitter_ms=settings.stub_detector_jitter_ms,
+            boxes=settings.stub_detector_boxes
+        )
+    return factory
+
+
+for _kind in KINDS:
+    register_detector(_kind, "stub")(_create_stub(_kind))
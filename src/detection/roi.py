@@ -0,0 +1,190 @@
+"""Per-camera region-of-interest profiles
+
+Fixed cameras only show plates on road areas and faces on platforms and
+sidewalks. A camera profile defines polygon ROIs per detector label; each
+detector then runs on the bounding rectangle of its polygons only, and the
+results are mapped back to frame coordinates.
+
+Profiles are loaded from a JSON file keyed by camera id:
+
+    {
+        "bus-stop-1": {
+            "frame_size": [1920, 1080],
+            "plate": [[[0, 600], [1920, 600], [1920, 1080], [0, 1080]]],
+            "face": [[[200, 100], [900, 100], [900, 700], [200, 700]]]
+        }
+    }
+
+Polygon points are pixels of `frame_size` (scaled to the actual image), or
+normalized 0-1 coordinates when `frame_size` is omitted. A label without an
+entry is detected on the full frame; an empty polygon list disables it.
+"""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.detection.base import Detector, DetectionBatch
+from src.utils.exceptions import CameraProfileError
+
+ROI_LABELS = ("face", "plate")
+
+
+@dataclass
+class CameraProfile:
+    """Polygon ROIs per detector label for one camera"""
+    camera_id: str
+    rois: Dict[str, List[np.ndarray]] = field(default_factory=dict)
+    frame_size: Optional[Tuple[int, int]] = None  # (width, height) of the polygon coordinates
+
+    @classmethod
+    def from_dict(cls, camera_id: str, data: dict) -> "CameraProfile":
+        """
+        Build a profile from its JSON representation
+
+        Args:
+            camera_id: Camera id
+            data: Profile dictionary
+
+        Returns:
+            CameraProfile instance
+
+        Raises:
+            CameraProfileError: If the profile is malformed
+        """
+        if not isinstance(data, dict):
+            raise CameraProfileError(f"Camera profile '{camera_id}' must be an object")
+
+        unknown = set(data) - set(ROI_LABELS) - {"frame_size"}
+        if unknown:
+            raise CameraProfileError(
+                f"Camera profile '{camera_id}' has unknown keys: {', '.join(sorted(unknown))}"
+            )
+
+        frame_size = data.get("frame_size")
+        if frame_size is not None:
+            if len(frame_size) != 2 or min(frame_size) <= 0:
+                raise CameraProfileError(f"Camera profile '{camera_id}': invalid frame_size {frame_size}")
+            frame_size = (int(frame_size[0]), int(frame_size[1]))
+
+        rois = {}
+        for label in ROI_LABELS:
+            if label not in data:
+                continue
+            polygons = []
+            for polygon in data[label]:
+                points = np.asarray(polygon, dtype=np.float64)
+                if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+                    raise CameraProfileError(
+                        f"Camera profile '{camera_id}': {label} polygons need at least 3 (x, y) points"
+                    )
+                polygons.append(points)
+            rois[label] = polygons
+
+        return cls(camera_id=camera_id, rois=rois, frame_size=frame_size)
+
+    def region(self, label: str, width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Bounding rectangle of a label's polygons in image coordinates
+
+        Args:
+            label: Detection label ("face" or "plate")
+            width: Image width
+            height: Image height
+
+        Returns:
+            (x1, y1, x2, y2), possibly empty when the label is disabled, or
+            None when the label is detected on the full frame
+        """
+        polygons = self.rois.get(label)
+        if polygons is None:
+            return None
+        if not polygons:
+            return (0, 0, 0, 0)
+
+        points = np.concatenate(polygons)
+        reference_width, reference_height = self.frame_size or (1, 1)
+        xs = points[:, 0] * width / reference_width
+        ys = points[:, 1] * height / reference_height
+
+        x1, x2 = int(np.clip(np.floor(xs.min()), 0, width)), int(np.clip(np.ceil(xs.max()), 0, width))
+        y1, y2 = int(np.clip(np.floor(ys.min()), 0, height)), int(np.clip(np.ceil(ys.max()), 0, height))
+        return (x1, y1, x2, y2)
+
+
+def load_camera_profiles(path: Union[str, Path]) -> Dict[str, CameraProfile]:
+    """
+    Load camera profiles from a JSON file
+
+    Args:
+        path: Path to the profiles file
+
+    Returns:
+        Mapping of camera id to CameraProfile
+
+    Raises:
+        CameraProfileError: If the file cannot be read or is malformed
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise CameraProfileError(f"Cannot load camera profiles from {path}: {str(e)}")
+
+    if not isinstance(data, dict):
+        raise CameraProfileError(f"Camera profiles in {path} must be an object keyed by camera id")
+
+    return {
+        str(camera_id): CameraProfile.from_dict(str(camera_id), profile)
+        for camera_id, profile in data.items()
+    }
+
+
+def detect_in_roi(
+    detector: Detector,
+    image: np.ndarray,
+    label: str,
+    profile: Optional[CameraProfile] = None,
+    crop_origin: Optional[Tuple[int, int, int, int]] = None
+) -> DetectionBatch:
+    """
+    Run a detector on the ROI of a camera profile
+
+    Args:
+        detector: Detector to run
+        image: RGB image
+        label: Label of the detector ("face" or "plate")
+        profile: Camera profile (None detects on the full frame)
+        crop_origin: (x, y, frame width, frame height) when the image is a crop taken
+            at (x, y) of a larger frame; the ROI is then placed in frame coordinates
+
+    Returns:
+        DetectionBatch in full image coordinates
+    """
+    if profile is None:
+        return detector.detect(image)
+
+    height, width = image.shape[:2]
+    if crop_origin is None:
+        region = profile.region(label, width, height)
+    else:
+        x, y, frame_width, frame_height = crop_origin
+        region = profile.region(label, frame_width, frame_height)
+        if region is not None:
+            x1, y1, x2, y2 = region
+            region = (
+                min(max(x1 - x, 0), width), min(max(y1 - y, 0), height),
+                min(max(x2 - x, 0), width), min(max(y2 - y, 0), height)
+            )
+    if region is None:
+        return detector.detect(image)
+
+    x1, y1, x2, y2 = region
+    if x2 <= x1 or y2 <= y1:
+        return DetectionBatch.empty(label)
+
+    crop = np.ascontiguousarray(image[y1:y2, x1:x2])
+    return detector.detect(crop).offset(x1, y1)
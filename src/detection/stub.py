@@ -0,0 +1,80 @@
+"""Deterministic stand-in detector for load and performance testing
+
+Returns a fixed number of boxes derived from the image size after a
+configurable delay, without loading any model. The delay is a sleep, which
+releases the GIL like a native model call does, so the serving layer
+(threads, pipeline stages, inference processes) behaves as it would with a
+real model of that latency.
+"""
+
+import random
+import time
+
+import numpy as np
+
+from src.detection.base import Detector, DetectionBatch
+
+
+class StubDetector(Detector):
+    """Detector returning synthetic boxes after a simulated inference delay"""
+
+    def __init__(
+        self,
+        label: str,
+        latency_ms: float = 20.0,
+        jitter_ms: float = 0.0,
+        boxes: int = 2
+    ):
+        """
+        Initialize stub detector
+
+        Args:
+            label: Label of the returned detections ("face" or "plate")
+            latency_ms: Simulated inference time per call
+            jitter_ms: Uniform random variation added to the latency (+/-)
+            boxes: Detections returned per image
+        """
+        self.label = label
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.boxes = boxes
+        self.calls = 0
+        self.load_model()
+
+    def load_model(self) -> None:
+        """Nothing to load"""
+
+    def detect(self, image: np.ndarray) -> DetectionBatch:
+        """
+        Return synthetic boxes for an image
+
+        Boxes only depend on the image size and label, so repeated calls and
+        all processes return the same detections.
+
+        Args:
+            image: Image as numpy array (RGB)
+
+        Returns:
+            DetectionBatch of `boxes` detections
+        """
+        self.calls += 1
+        delay = self.latency_ms + (random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        height, width = image.shape[:2]
+        if self.boxes <= 0 or width < 8 or height < 8:
+            return DetectionBatch.empty(self.label)
+
+        # Evenly spaced boxes across the frame, in a row per label
+        index = np.arange(self.boxes)
+        box_width = max(1, width // (2 * self.boxes + 1))
+        box_height = max(1, height // 8)
+        top = height // 4 if self.label == "face" else height * 5 // 8
+        boxes = np.stack([
+            (2 * index + 1) * box_width,
+            np.full(self.boxes, top),
+            np.full(self.boxes, box_width),
+            np.full(self.boxes, box_height)
+        ], axis=1)
+        return DetectionBatch(boxes, np.full(self.boxes, 0.9), self.label)
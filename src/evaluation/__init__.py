@@ -0,0 +1,29 @@
+"""Accuracy and speed evaluation of detector configurations on labeled images"""
+
+from .datasets import LabeledImage, load_coco, load_dataset, load_yolo
+from .metrics import LabelMetrics, MetricAccumulator, average_precision, match_predictions
+from .runner import (
+    EvaluationConfig,
+    EvaluationResult,
+    evaluate,
+    format_results,
+    pareto_front,
+    parse_config,
+)
+
+__all__ = [
+    "LabeledImage",
+    "load_coco",
+    "load_dataset",
+    "load_yolo",
+    "LabelMetrics",
+    "MetricAccumulator",
+    "average_precision",
+    "match_predictions",
+    "EvaluationConfig",
+    "EvaluationResult",
+    "evaluate",
+    "format_results",
+    "pareto_front",
+    "parse_config",
+]
@@ -0,0 +1,229 @@
+"""Labeled images in COCO or YOLO format
+
+Both formats are reduced to pixel boxes (x1, y1, x2, y2) labeled "face" or
+"plate". Category names are matched through LABEL_ALIASES; objects of other
+categories are ignored.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+from src.batch.directory import iter_images
+from src.utils.exceptions import EvaluationError
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LABEL_ALIASES = {
+    "face": "face",
+    "faces": "face",
+    "human_face": "face",
+    "plate": "plate",
+    "plates": "plate",
+    "license_plate": "plate",
+    "licence_plate": "plate",
+    "licenseplate": "plate",
+    "number_plate": "plate",
+}
+
+# Class ids of YOLO labels without a classes.txt
+DEFAULT_YOLO_CLASSES = {0: "face", 1: "plate"}
+
+COCO_ANNOTATION_NAMES = ("annotations.json", "_annotations.coco.json", "instances.json")
+
+
+@dataclass
+class LabeledImage:
+    """An image and its ground-truth boxes"""
+    path: Path
+    boxes: np.ndarray  # Shape (N, 4): x1, y1, x2, y2 in pixels
+    labels: np.ndarray  # N labels, "face" or "plate"
+
+    def boxes_of(self, label: str) -> np.ndarray:
+        """Ground-truth boxes of one label"""
+        boxes: np.ndarray = self.boxes[self.labels == label]
+        return boxes
+
+
+def normalize_label(name: str) -> Optional[str]:
+    """Map a category name to "face" or "plate" (None for other categories)"""
+    return LABEL_ALIASES.get(name.strip().lower().replace(" ", "_").replace("-", "_"))
+
+
+def _labeled_image(path: Path, boxes: List[List[float]], labels: List[str]) -> LabeledImage:
+    return LabeledImage(
+        path,
+        np.asarray(boxes, dtype=np.float64).reshape(-1, 4),
+        np.asarray(labels, dtype="<U8")
+    )
+
+
+def load_coco(annotation_file: Union[str, Path], images_dir: Optional[Union[str, Path]] = None) -> List[LabeledImage]:
+    """
+    Load a COCO detection annotation file
+
+    Args:
+        annotation_file: JSON file with images, categories and annotations
+        images_dir: Directory of the file_name paths (default: the JSON file's directory)
+
+    Returns:
+        Labeled images in annotation order (crowd annotations are skipped)
+
+    Raises:
+        EvaluationError: If the file is not a COCO annotation file
+    """
+    annotation_file = Path(annotation_file)
+    images_dir = Path(images_dir) if images_dir else annotation_file.parent
+    try:
+        data = json.loads(annotation_file.read_text())
+        categories = {category["id"]: normalize_label(category["name"]) for category in data["categories"]}
+        images = {image["id"]: image["file_name"] for image in data["images"]}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise EvaluationError(f"Invalid COCO annotation file {annotation_file}: {e}")
+
+    boxes: Dict[int, List[List[float]]] = {image_id: [] for image_id in images}
+    labels: Dict[int, List[str]] = {image_id: [] for image_id in images}
+    for annotation in data.get("annotations", []):
+        label = categories.get(annotation.get("category_id"))
+        if label is None or annotation.get("iscrowd") or annotation.get("image_id") not in images:
+            continue
+        x, y, width, height = annotation["bbox"]
+        boxes[annotation["image_id"]].append([x, y, x + width, y + height])
+        labels[annotation["image_id"]].append(label)
+
+    unmapped = sorted(category["name"] for category in data["categories"] if not normalize_label(category["name"]))
+    if unmapped:
+        logger.info(f"Ignoring COCO categories: {', '.join(unmapped)}")
+
+    return [
+        _labeled_image(images_dir / file_name, boxes[image_id], labels[image_id])
+        for image_id, file_name in images.items()
+    ]
+
+
+def _yolo_label_path(image_path: Path, images_root: Path, labels_dir: Optional[Path]) -> Path:
+    """Label file of an image (labels_dir tree, Ultralytics images/ → labels/ layout, or next to the image)"""
+    if labels_dir is not None:
+        return labels_dir / image_path.relative_to(images_root).with_suffix(".txt")
+    parts = list(image_path.parts)
+    if "images" in parts:
+        index = len(parts) - 1 - parts[::-1].index("images")
+        parts[index] = "labels"
+        candidate = Path(*parts).with_suffix(".txt")
+        if candidate.exists():
+            return candidate
+    return image_path.with_suffix(".txt")
+
+
+def _yolo_class_names(root: Path, labels_dir: Optional[Path]) -> Dict[int, str]:
+    """Class names of classes.txt (one per line) if present"""
+    for directory in filter(None, (labels_dir, root, root.parent)):
+        classes_file = directory / "classes.txt"
+        if classes_file.is_file():
+            names = [line.strip() for line in classes_file.read_text().splitlines() if line.strip()]
+            return dict(enumerate(names))
+    return {}
+
+
+def load_yolo(
+    images_dir: Union[str, Path],
+    labels_dir: Optional[Union[str, Path]] = None,
+    class_names: Optional[Dict[int, str]] = None
+) -> List[LabeledImage]:
+    """
+    Load images with YOLO label files ("class cx cy w h" per line, normalized)
+
+    Images without a label file have no objects.
+
+    Args:
+        images_dir: Directory tree of images
+        labels_dir: Tree of label files mirroring images_dir (default: see _yolo_label_path)
+        class_names: Class id → category name (default: classes.txt, else 0=face, 1=plate)
+
+    Returns:
+        Labeled images in file order
+
+    Raises:
+        EvaluationError: If a label file is malformed
+    """
+    images_dir = Path(images_dir)
+    labels_dir = Path(labels_dir) if labels_dir else None
+    names = class_names or _yolo_class_names(images_dir, labels_dir) or DEFAULT_YOLO_CLASSES
+    classes = {class_id: normalize_label(name) for class_id, name in names.items()}
+
+    dataset = []
+    for image_path in iter_images(images_dir):
+        boxes, labels = [], []
+        label_path = _yolo_label_path(image_path, images_dir, labels_dir)
+        if label_path.is_file():
+            with Image.open(image_path) as image:
+                width, height = image.size
+            for line_number, line in enumerate(label_path.read_text().splitlines(), start=1):
+                if not line.strip():
+                    continue
+                try:
+                    class_id, x, y, box_width, box_height = line.split()[:5]
+                    label = classes.get(int(class_id))
+                    cx, cy = float(x) * width, float(y) * height
+                    w, h = float(box_width) * width, float(box_height) * height
+                except ValueError:
+                    raise EvaluationError(f"Malformed YOLO label in {label_path}:{line_number}: {line!r}")
+                if label is None:
+                    continue
+                boxes.append([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
+                labels.append(label)
+        dataset.append(_labeled_image(image_path, boxes, labels))
+    return dataset
+
+
+def load_dataset(
+    path: Union[str, Path],
+    labels_format: str = "auto",
+    images_dir: Optional[Union[str, Path]] = None,
+    class_names: Optional[Dict[int, str]] = None
+) -> List[LabeledImage]:
+    """
+    Load a COCO or YOLO dataset
+
+    With labels_format "auto", a JSON file or a directory containing one of
+    COCO_ANNOTATION_NAMES is read as COCO, anything else as YOLO.
+
+    Args:
+        path: COCO JSON file, or dataset/images directory
+        labels_format: "auto", "coco" or "yolo"
+        images_dir: COCO image directory, or YOLO labels directory
+        class_names: YOLO class id → category name
+
+    Returns:
+        Labeled images
+
+    Raises:
+        EvaluationError: If the dataset is missing or has no images
+    """
+    path = Path(path)
+    if not path.exists():
+        raise EvaluationError(f"Dataset not found: {path}")
+
+    annotation_file = None
+    if path.is_file():
+        annotation_file = path
+    elif labels_format != "yolo":
+        annotation_file = next((path / name for name in COCO_ANNOTATION_NAMES if (path / name).is_file()), None)
+
+    if labels_format == "coco" or (labels_format == "auto" and annotation_file is not None):
+        if annotation_file is None:
+            raise EvaluationError(f"No COCO annotation file in {path}")
+        dataset = load_coco(annotation_file, images_dir)
+    elif labels_format in ("auto", "yolo"):
+        dataset = load_yolo(path, images_dir, class_names)
+    else:
+        raise EvaluationError(f"Unknown label format {labels_format!r} (expected auto, coco or yolo)")
+
+    if not dataset:
+        raise EvaluationError(f"No images found in {path}")
+    return dataset
@@ -0,0 +1,161 @@
+"""Detection metrics: matching, precision/recall and COCO-style average precision"""
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from src.detection.boxes import iou_matrix
+
+# IoU thresholds of the COCO mAP (0.50:0.05:0.95)
+COCO_IOU_THRESHOLDS = tuple(np.round(np.linspace(0.5, 0.95, 10), 2))
+
+
+def match_predictions(
+    predictions: np.ndarray,
+    scores: np.ndarray,
+    ground_truth: np.ndarray,
+    iou_threshold: float = 0.5
+) -> np.ndarray:
+    """
+    Greedily match predictions to ground truth, best score first
+
+    Each ground-truth box is matched at most once, to the unmatched
+    prediction overlapping it most.
+
+    Args:
+        predictions: Predicted boxes (N, 4) as x1, y1, x2, y2
+        scores: N confidence scores
+        ground_truth: Ground-truth boxes (M, 4)
+        iou_threshold: Minimum IoU of a match
+
+    Returns:
+        Boolean array of N flags (True = true positive), in the input order
+    """
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+    true_positive = np.zeros(len(scores), dtype=bool)
+    if len(scores) == 0 or len(ground_truth) == 0:
+        return true_positive
+
+    iou = iou_matrix(predictions, ground_truth)
+    matched = np.zeros(iou.shape[1], dtype=bool)
+    for index in np.argsort(-scores, kind="stable"):
+        candidates = np.where(matched, -1.0, iou[index])
+        best = int(np.argmax(candidates))
+        if candidates[best] >= iou_threshold:
+            matched[best] = True
+            true_positive[index] = True
+    return true_positive
+
+
+def average_precision(true_positive: np.ndarray, scores: np.ndarray, ground_truth: int) -> float:
+    """
+    Area under the interpolated precision/recall curve (COCO 101-point)
+
+    Args:
+        true_positive: Flags of all predictions of a dataset
+        scores: Their confidence scores
+        ground_truth: Number of ground-truth boxes
+
+    Returns:
+        Average precision, NaN without ground truth
+    """
+    if ground_truth == 0:
+        return float("nan")
+    if len(scores) == 0:
+        return 0.0
+
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    hits = np.cumsum(np.asarray(true_positive, dtype=np.float64)[order])
+    recall = hits / ground_truth
+    precision = hits / np.arange(1, len(hits) + 1)
+    # Precision envelope: best precision at this or any higher recall
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+
+    recall_points = np.linspace(0.0, 1.0, 101)
+    index = np.searchsorted(recall, recall_points, side="left")
+    interpolated = np.where(index < len(precision), precision[np.minimum(index, len(precision) - 1)], 0.0)
+    return float(interpolated.mean())
+
+
+@dataclass
+class LabelMetrics:
+    """Accuracy of one label over a dataset"""
+    label: str
+    ground_truth: int
+    predictions: int
+    true_positives: int  # At the primary IoU threshold
+    precision: float
+    recall: float
+    ap50: float  # AP at IoU 0.5
+    ap: float  # AP averaged over IoU 0.50:0.95
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary (NaN as None)"""
+        return {key: (None if isinstance(value, float) and np.isnan(value) else value)
+                for key, value in asdict(self).items()}
+
+
+class MetricAccumulator:
+    """Collects matches per label and IoU threshold over a dataset"""
+
+    def __init__(self, labels: Sequence[str] = ("face", "plate"), iou_threshold: float = 0.5):
+        """
+        Initialize accumulator
+
+        Args:
+            labels: Labels to evaluate
+            iou_threshold: IoU threshold of precision and recall
+        """
+        self.iou_threshold = iou_threshold
+        self.thresholds = tuple(sorted({iou_threshold, 0.5, *COCO_IOU_THRESHOLDS}))
+        self._scores: Dict[str, List[np.ndarray]] = {label: [] for label in labels}
+        self._matches: Dict[str, Dict[float, List[np.ndarray]]] = {
+            label: {threshold: [] for threshold in self.thresholds} for label in labels
+        }
+        self._ground_truth: Dict[str, int] = {label: 0 for label in labels}
+
+    @property
+    def labels(self) -> List[str]:
+        """Evaluated labels"""
+        return list(self._scores)
+
+    def add(self, label: str, predictions: np.ndarray, scores: np.ndarray, ground_truth: np.ndarray) -> None:
+        """
+        Add the predictions and ground truth of one image
+
+        Args:
+            label: Label of the boxes
+            predictions: Predicted boxes (N, 4) as x1, y1, x2, y2
+            scores: N confidence scores
+            ground_truth: Ground-truth boxes (M, 4)
+        """
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        self._scores[label].append(scores)
+        self._ground_truth[label] += len(ground_truth)
+        for threshold in self.thresholds:
+            self._matches[label][threshold].append(
+                match_predictions(predictions, scores, ground_truth, threshold)
+            )
+
+    def result(self, label: str) -> LabelMetrics:
+        """Metrics of one label"""
+        scores = np.concatenate(self._scores[label]) if self._scores[label] else np.zeros(0)
+        matches = {
+            threshold: np.concatenate(flags) if flags else np.zeros(0, dtype=bool)
+            for threshold, flags in self._matches[label].items()
+        }
+        ground_truth = self._ground_truth[label]
+        true_positives = int(matches[self.iou_threshold].sum())
+        coco_ap = [average_precision(matches[threshold], scores, ground_truth) for threshold in COCO_IOU_THRESHOLDS]
+
+        return LabelMetrics(
+            label=label,
+            ground_truth=ground_truth,
+            predictions=len(scores),
+            true_positives=true_positives,
+            precision=true_positives / len(scores) if len(scores) else float("nan"),
+            recall=true_positives / ground_truth if ground_truth else float("nan"),
+            ap50=average_precision(matches[0.5], scores, ground_truth),
+            ap=float(np.mean(coco_ap)) if ground_truth else float("nan")
+        )
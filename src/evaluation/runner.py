@@ -0,0 +1,222 @@
+"""Run detector configurations over a labeled dataset
+
+A configuration is a named set of settings overrides (detector backends,
+thresholds, det_size, ...). Each one is evaluated through the same
+create_detectors/detect_regions path the API uses, so the reported boxes are
+the boxes that would be anonymized: post-processed, merged and, for the YOLO
+plate backend, widened. Latency is the wall time of detect_regions per image,
+after warm-up, without decoding.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import numpy as np
+from PIL import Image
+from pydantic import ValidationError
+
+from src.anonymization.pipeline import create_detectors, detect_regions
+from src.config.settings import Settings
+from src.evaluation.datasets import LabeledImage
+from src.evaluation.metrics import LabelMetrics, MetricAccumulator
+from src.preprocessing import ImagePreprocessor
+from src.utils.exceptions import EvaluationError
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# NFR-1.1 (docs/REQUIREMENTS.md), checked against recall: a missed region is a privacy leak
+RECALL_TARGETS = {"face": 0.80, "plate": 0.70}
+
+
+@dataclass
+class EvaluationConfig:
+    """A named set of settings overrides"""
+    name: str
+    overrides: Dict[str, Any] = field(default_factory=dict)
+
+    def settings(self) -> Settings:
+        """Settings from the environment with the overrides applied"""
+        try:
+            return Settings(**self.overrides)
+        except ValidationError as e:
+            raise EvaluationError(f"Invalid settings in configuration {self.name!r}: {e}")
+
+
+def parse_config(value: str) -> EvaluationConfig:
+    """
+    Parse "NAME:key=value,key=value" (or just NAME for the configured settings)
+
+    Example:
+        "fast:face_det_size=320,plate_detection_model=classical"
+    """
+    name, _, assignments = value.partition(":")
+    overrides = {}
+    for assignment in filter(None, (part.strip() for part in assignments.split(","))):
+        key, separator, setting = assignment.partition("=")
+        if not separator:
+            raise EvaluationError(f"Expected key=value in configuration {name!r}, got {assignment!r}")
+        overrides[key.strip().lower()] = setting.strip()
+    return EvaluationConfig(name.strip() or "default", overrides)
+
+
+@dataclass
+class EvaluationResult:
+    """Accuracy and speed of one configuration"""
+    config: str
+    overrides: Dict[str, str]
+    images: int
+    labels: Dict[str, LabelMetrics]
+    p50_ms: float
+    p95_ms: float
+    mean_ms: float
+    throughput: float  # Images per second of detection time
+
+    @property
+    def map50(self) -> float:
+        """Mean AP at IoU 0.5 over labels with ground truth"""
+        values = [metrics.ap50 for metrics in self.labels.values() if metrics.ground_truth]
+        return float(np.mean(values)) if values else float("nan")
+
+    @property
+    def map(self) -> float:
+        """Mean AP over IoU 0.50:0.95 and labels with ground truth"""
+        values = [metrics.ap for metrics in self.labels.values() if metrics.ground_truth]
+        return float(np.mean(values)) if values else float("nan")
+
+    def meets_targets(self) -> Dict[str, bool]:
+        """Recall of each evaluated label against RECALL_TARGETS"""
+        return {
+            label: bool(metrics.recall >= RECALL_TARGETS[label])
+            for label, metrics in self.labels.items()
+            if label in RECALL_TARGETS and metrics.ground_truth
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            "config": self.config,
+            "overrides": self.overrides,
+            "images": self.images,
+            "labels": {label: metrics.to_dict() for label, metrics in self.labels.items()},
+            "map50": None if np.isnan(self.map50) else round(self.map50, 4),
+            "map": None if np.isnan(self.map) else round(self.map, 4),
+            "p50_ms": self.p50_ms,
+            "p95_ms": self.p95_ms,
+            "mean_ms": self.mean_ms,
+            "throughput": self.throughput,
+            "meets_targets": self.meets_targets()
+        }
+
+
+def evaluate(
+    dataset: List[LabeledImage],
+    config: EvaluationConfig,
+    iou_threshold: float = 0.5,
+    warmup: int = 1,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> EvaluationResult:
+    """
+    Evaluate one configuration on a dataset
+
+    Args:
+        dataset: Labeled images
+        config: Configuration to evaluate
+        iou_threshold: IoU threshold of precision and recall
+        warmup: Untimed detection runs on the first image
+        progress: Optional callback (images done, total)
+
+    Returns:
+        EvaluationResult of the configuration
+    """
+    settings = config.settings()
+    face_detector, plate_detector = create_detectors(settings)
+    preprocessor = ImagePreprocessor()
+    labels = ("face", "plate") if settings.enable_plate_detection else ("face",)
+    accumulator = MetricAccumulator(labels, iou_threshold)
+    latencies = np.empty(len(dataset))
+
+    for index, item in enumerate(dataset):
+        with Image.open(item.path) as image:
+            original_width = image.width
+            image_array, _ = preprocessor.preprocess(image)
+        # Ground truth follows the preprocessor's downscaling of large images
+        scale = image_array.shape[1] / original_width
+
+        if index == 0:
+            for _ in range(warmup):
+                detect_regions(image_array, face_detector, plate_detector, settings)
+
+        start_time = time.perf_counter()
+        detections = dict(zip(("face", "plate"), detect_regions(image_array, face_detector, plate_detector, settings)))
+        latencies[index] = time.perf_counter() - start_time
+
+        for label in labels:
+            accumulator.add(label, detections[label].xyxy, detections[label].scores, item.boxes_of(label) * scale)
+        if progress is not None:
+            progress(index + 1, len(dataset))
+
+    latencies_ms = latencies * 1000
+    return EvaluationResult(
+        config=config.name,
+        overrides=dict(config.overrides),
+        images=len(dataset),
+        labels={label: accumulator.result(label) for label in labels},
+        p50_ms=round(float(np.percentile(latencies_ms, 50)), 2),
+        p95_ms=round(float(np.percentile(latencies_ms, 95)), 2),
+        mean_ms=round(float(latencies_ms.mean()), 2),
+        throughput=round(len(dataset) / float(latencies.sum()), 3) if latencies.sum() > 0 else 0.0
+    )
+
+
+def pareto_front(results: List[EvaluationResult]) -> Set[str]:
+    """
+    Configurations not beaten in both mAP@0.5 and p50 latency by another one
+
+    Returns:
+        Names of the Pareto-optimal configurations
+    """
+    def accuracy(result: EvaluationResult) -> float:
+        return -1.0 if np.isnan(result.map50) else result.map50
+
+    front = set()
+    for result in results:
+        dominated = any(
+            accuracy(other) >= accuracy(result) and other.p50_ms <= result.p50_ms
+            and (accuracy(other) > accuracy(result) or other.p50_ms < result.p50_ms)
+            for other in results if other is not result
+        )
+        if not dominated:
+            front.add(result.config)
+    return front
+
+
+def _format_value(value: float, digits: int = 3) -> str:
+    return "-" if np.isnan(value) else f"{value:.{digits}f}"
+
+
+def format_results(results: List[EvaluationResult]) -> str:
+    """Results as an aligned table, fastest first, Pareto-optimal configurations marked with *"""
+    front = pareto_front(results)
+    width = max([len(result.config) for result in results] + [6])
+    lines = [
+        f"{'config':<{width}}    {'face P':>6} {'face R':>6} {'AP50':>6}   {'plate P':>7} {'plate R':>7} {'AP50':>6}"
+        f"   {'mAP50':>6} {'mAP':>6}   {'p50 ms':>8} {'p95 ms':>8} {'img/s':>7}"
+    ]
+    for result in sorted(results, key=lambda result: result.p50_ms):
+        face = result.labels.get("face")
+        plate = result.labels.get("plate")
+        nan = float("nan")
+        marker = "*" if result.config in front else " "
+        lines.append(
+            f"{result.config:<{width}} {marker}  "
+            f"{_format_value(face.precision if face else nan):>6} {_format_value(face.recall if face else nan):>6} "
+            f"{_format_value(face.ap50 if face else nan):>6}   "
+            f"{_format_value(plate.precision if plate else nan):>7} {_format_value(plate.recall if plate else nan):>7} "
+            f"{_format_value(plate.ap50 if plate else nan):>6}   "
+            f"{_format_value(result.map50):>6} {_format_value(result.map):>6}   "
+            f"{result.p50_ms:>8.1f} {result.p95_ms:>8.1f} {result.throughput:>7.2f}"
+        )
+    lines.append("* Pareto-optimal (no configuration is both more accurate and faster)")
+    return "\n".join(lines)
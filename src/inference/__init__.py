@@ -0,0 +1,31 @@
+"""Out-of-process inference (detectors in dedicated processes, frames in shared memory)"""
+
+from .ring import FrameRing
+from .server import InferenceServer, RemoteFrameDetector
+
+
+def create_inference_server(settings) -> InferenceServer:
+    """
+    Create the inference server configured in the settings (not started)
+
+    Args:
+        settings: Settings instance
+
+    Returns:
+        InferenceServer instance
+    """
+    return InferenceServer(
+        processes=settings.inference_processes,
+        slots=settings.inference_slots,
+        slot_bytes=settings.inference_slot_megabytes * 2 ** 20,
+        timeout=settings.inference_timeout,
+        threads=settings.inference_threads
+    )
+
+
+__all__ = [
+    "FrameRing",
+    "InferenceServer",
+    "RemoteFrameDetector",
+    "create_inference_server",
+]
@@ -0,0 +1,107 @@
+"""Shared-memory frame ring
+
+A single shared-memory block is split into fixed-size slots. The owning
+process copies a frame into a free slot and sends only the slot index, shape
+and dtype to the inference processes, which map the slot as a numpy array
+without copying. Pixels never go through pickle or a pipe.
+"""
+
+import queue
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.utils.exceptions import DetectionError
+
+
+class FrameRing:
+    """Fixed-size frame slots in one shared-memory block"""
+
+    def __init__(
+        self,
+        slots: int,
+        slot_bytes: int,
+        name: Optional[str] = None
+    ):
+        """
+        Create a ring, or attach to an existing one
+
+        Args:
+            slots: Number of frame slots
+            slot_bytes: Capacity of each slot in bytes
+            name: Name of an existing block to attach to (None creates a new block)
+        """
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        self.memory = shared_memory.SharedMemory(
+            name=name,
+            create=self.owner,
+            size=slots * slot_bytes if self.owner else 0
+        )
+        # Free slots (only used by the owner, which hands them out)
+        self._free: "queue.Queue[int]" = queue.Queue()
+        if self.owner:
+            for slot in range(slots):
+                self._free.put(slot)
+
+    @property
+    def name(self) -> str:
+        """Name other processes attach to"""
+        return self.memory.name
+
+    def acquire(self, timeout: Optional[float] = None) -> int:
+        """
+        Take a free slot, waiting until one is released
+
+        Args:
+            timeout: Maximum wait in seconds (None waits forever)
+
+        Returns:
+            Slot index
+
+        Raises:
+            DetectionError: If no slot becomes free in time
+        """
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise DetectionError(f"No free inference slot within {timeout}s")
+
+    def release(self, slot: int) -> None:
+        """Return a slot to the free list"""
+        self._free.put(slot)
+
+    def write(self, slot: int, frame: np.ndarray) -> Tuple[Tuple[int, ...], str]:
+        """
+        Copy a frame into a slot
+
+        Args:
+            slot: Slot index from acquire()
+            frame: Frame to copy
+
+        Returns:
+            Tuple of (shape, dtype string) needed to read the frame back
+
+        Raises:
+            DetectionError: If the frame does not fit into a slot
+        """
+        if frame.nbytes > self.slot_bytes:
+            raise DetectionError(
+                f"Frame of {frame.nbytes} bytes exceeds the inference slot size "
+                f"of {self.slot_bytes} bytes"
+            )
+        self.view(slot, frame.shape, frame.dtype.str)[...] = frame
+        return frame.shape, frame.dtype.str
+
+    def view(self, slot: int, shape: Tuple[int, ...], dtype: str) -> np.ndarray:
+        """Array mapped onto a slot (no copy)"""
+        view: np.ndarray = np.ndarray(shape, dtype=dtype, buffer=self.memory.buf, offset=slot * self.slot_bytes)
+        return view
+
+    def close(self) -> None:
+        """Detach from the block; the owner also frees it"""
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
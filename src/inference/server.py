@@ -0,0 +1,447 @@
+"""Detector processes fed through shared memory
+
+The API process decodes and preprocesses images, copies them into a
+FrameRing and queues a small request (slot, shape, dtype, camera id, trace
+context). Each inference process owns its own detectors, runs the same
+detection pipeline as the in-process path on the mapped slot and returns the
+detection arrays over a result pipe. Model execution thus never holds the API process's GIL, and
+HTTP handling keeps running while frames are being detected.
+
+Each process has its own request queue and result pipe, so the frames a
+process holds are known and a process killed mid-write cannot block the
+others. When a process dies its pipe reaches end-of-file: the frames it held
+fail, their slots are freed and a new process takes its place.
+"""
+
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.detection import DetectionBatch
+from src.inference.ring import FrameRing
+from src.utils.exceptions import DetectionError
+from src.utils.logger import get_logger, setup_worker_logging
+from src.utils.metrics import collect_timings, record_stage
+from src.utils.tracing import configure_tracing, continue_trace, current_span_context, tracer
+
+# Ends the serving loop of an inference process and the result dispatcher
+_STOP = None
+
+# Boxes and stage seconds of one frame, as returned by an inference process
+InferenceResult = Tuple[Tuple[DetectionBatch, DetectionBatch], Dict[str, float]]
+
+
+def _serve(
+    ring_name: str,
+    slots: int,
+    slot_bytes: int,
+    requests: multiprocessing.Queue,
+    results: Connection,
+    threads: int
+) -> None:
+    """Serving loop of an inference process"""
+    # Imported here so the parent process does not need the model packages
+    from src.anonymization.pipeline import create_detectors, detect_regions
+    from src.config import get_settings
+    from src.detection.roi import load_camera_profiles
+
+    import cv2
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    settings = get_settings()
+    setup_worker_logging(settings)
+    configure_tracing(settings)
+    ring = FrameRing(slots, slot_bytes, name=ring_name)
+    camera_profiles = (
+        load_camera_profiles(settings.camera_profiles_path)
+        if settings.camera_profiles_path else {}
+    )
+    try:
+        face_detector, plate_detector = create_detectors(settings)
+    except Exception as e:
+        results.send(("ready", None, f"Cannot load detectors: {e}"))
+        ring.close()
+        return
+    results.send(("ready", None, None))
+
+    while True:
+        request = requests.get()
+        if request is _STOP:
+            break
+        request_id, slot, shape, dtype, camera_id, crop_origin, trace_parent = request
+        frame = ring.view(slot, shape, dtype)
+        try:
+            # Stage timings travel back with the boxes, spans join the caller's trace
+            with continue_trace(trace_parent), collect_timings() as timings:
+                detections = detect_regions(
+                    frame, face_detector, plate_detector, settings, camera_profiles.get(camera_id), crop_origin
+                )
+            results.send((request_id, (detections, timings.seconds()), None))
+        except Exception as e:
+            results.send((request_id, None, str(e)))
+        finally:
+            # The mapped view must be gone before the ring can be closed
+            del frame
+
+    ring.close()
+
+
+class InferenceServer:
+    """Pool of detector processes sharing one frame ring"""
+
+    def __init__(
+        self,
+        processes: int = 1,
+        slots: int = 4,
+        slot_bytes: int = 4096 * 4096 * 3,
+        timeout: float = 30.0,
+        threads: int = 1
+    ):
+        """
+        Initialize inference server (call start() to launch the processes)
+
+        Args:
+            processes: Inference processes, each loading its own detectors
+            slots: Frame slots, i.e. frames in flight at once
+            slot_bytes: Capacity of a slot (largest preprocessed frame accepted)
+            timeout: Seconds a request may wait for a slot and for its result
+            threads: OpenCV/torch threads per inference process
+        """
+        self.processes = max(1, processes)
+        self.slots = max(1, slots)
+        self.slot_bytes = slot_bytes
+        self.timeout = timeout
+        self.threads = threads
+        self.logger = get_logger(self.__class__.__name__)
+        self.ring: Optional[FrameRing] = None
+        self._context = multiprocessing.get_context("spawn")
+        # Process, request queue and result pipe per worker index (None once given up)
+        self._workers: List[BaseProcess] = []
+        self._requests: List[multiprocessing.Queue] = []
+        self._results: List[Optional[Connection]] = []
+        # Wakes the dispatcher up to exit
+        self._wakeup: Optional[Tuple[Connection, Connection]] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        # Request id -> (future, slot, worker index)
+        self._pending: Dict[int, Tuple["Future[InferenceResult]", int, int]] = {}
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count()
+
+    @property
+    def running(self) -> bool:
+        """Whether the inference processes are up"""
+        return self._dispatcher is not None
+
+    def frames_in_flight(self) -> int:
+        """Frames queued or being detected"""
+        with self._pending_lock:
+            return len(self._pending)
+
+    def start(self) -> None:
+        """
+        Launch the inference processes and wait until their models are loaded
+
+        Raises:
+            DetectionError: If a process fails to load its detectors
+        """
+        if self.running:
+            return
+        self.ring = FrameRing(self.slots, self.slot_bytes)
+        for index in range(self.processes):
+            self._spawn(index)
+
+        errors = [error for error in map(self._wait_ready, range(self.processes)) if error is not None]
+        if errors:
+            self._shutdown_workers()
+            self._close_ring()
+            raise DetectionError(f"Inference processes failed to start: {errors[0]}")
+
+        self._wakeup = self._context.Pipe(duplex=False)
+        self._dispatcher = threading.Thread(target=self._dispatch, name="inference-results", daemon=True)
+        self._dispatcher.start()
+        self.logger.info(
+            f"Started {self.processes} inference processes with {self.slots} frame slots "
+            f"of {self.slot_bytes / 2 ** 20:.0f} MB"
+        )
+
+    def stop(self) -> None:
+        """Stop the inference processes and free the shared memory"""
+        if self._dispatcher is None or self._wakeup is None:
+            return
+        # The dispatcher exits first, so exiting processes are not replaced
+        self._wakeup[1].send(_STOP)
+        self._dispatcher.join()
+        self._dispatcher = None
+        for connection in self._wakeup:
+            connection.close()
+        self._wakeup = None
+        self._shutdown_workers()
+        self._close_ring()
+
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future, _, _ in pending.values():
+            future.set_exception(DetectionError("Inference server stopped"))
+        self.logger.info("Inference processes stopped")
+
+    def submit(
+        self,
+        image_array: np.ndarray,
+        camera_id: Optional[str] = None,
+        crop_origin: Optional[Tuple[int, int, int, int]] = None
+    ) -> "Future[InferenceResult]":
+        """
+        Queue an image for detection on the least busy process
+
+        Blocks only while all slots are in use.
+
+        Args:
+            image_array: Preprocessed RGB image
+            camera_id: Optional camera profile id (loaded by the inference processes)
+            crop_origin: (x, y, frame width, frame height) when the image is a crop of a
+                larger frame (see detect_in_roi)
+
+        Returns:
+            Future resolving to ((face detections, plate detections), stage seconds)
+
+        Raises:
+            DetectionError: If the server is not running, no slot frees up, the image is
+                too large or no inference process is alive
+        """
+        ring = self.ring
+        if not self.running or ring is None:
+            raise DetectionError("Inference server is not running")
+
+        slot = ring.acquire(self.timeout)
+        try:
+            shape, dtype = ring.write(slot, image_array)
+        except DetectionError:
+            ring.release(slot)
+            raise
+
+        future: "Future[InferenceResult]" = Future()
+        # Running futures cannot be cancelled, so the result can always be set
+        future.set_running_or_notify_cancel()
+        request_id = next(self._ids)
+        with self._pending_lock:
+            load = {
+                index: 0 for index, process in enumerate(self._workers)
+                if process.is_alive() and self._results[index] is not None
+            }
+            if not load:
+                ring.release(slot)
+                raise DetectionError("No inference process is alive")
+            for _, _, index in self._pending.values():
+                if index in load:
+                    load[index] += 1
+            worker = min(load, key=load.__getitem__)
+            self._pending[request_id] = (future, slot, worker)
+            self._requests[worker].put(
+                (request_id, slot, shape, dtype, camera_id, crop_origin, current_span_context())
+            )
+        return future
+
+    def detect(
+        self,
+        image_array: np.ndarray,
+        camera_id: Optional[str] = None,
+        crop_origin: Optional[Tuple[int, int, int, int]] = None
+    ) -> Tuple[DetectionBatch, DetectionBatch]:
+        """
+        Detect faces and plates in an image (blocking)
+
+        Args:
+            image_array: Preprocessed RGB image
+            camera_id: Optional camera profile id
+            crop_origin: (x, y, frame width, frame height) when the image is a crop of a
+                larger frame (see detect_in_roi)
+
+        Returns:
+            Tuple of (face detections, plate detections)
+
+        Raises:
+            DetectionError: If detection fails or times out
+        """
+        with tracer.span("inference", camera_id=camera_id):
+            future = self.submit(image_array, camera_id, crop_origin)
+            try:
+                detections, stage_seconds = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                raise DetectionError(f"Inference timed out after {self.timeout}s")
+
+        # Stages measured in the inference process count for this process's request
+        for stage, seconds in stage_seconds.items():
+            record_stage(stage, seconds)
+        return detections
+
+    def _spawn(self, index: int) -> None:
+        """Start the inference process of a worker index with a new request queue and result pipe"""
+        assert self.ring is not None
+        requests = self._context.Queue()
+        reader, writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_serve,
+            args=(self.ring.name, self.slots, self.slot_bytes, requests, writer, self.threads),
+            name=f"inference-{index}",
+            daemon=True
+        )
+        process.start()
+        # Only the process may hold the write end, so its exit ends the pipe
+        writer.close()
+        with self._pending_lock:
+            if index < len(self._workers):
+                self._workers[index] = process
+                self._requests[index] = requests
+                self._results[index] = reader
+            else:
+                self._workers.append(process)
+                self._requests.append(requests)
+                self._results.append(reader)
+
+    def _wait_ready(self, index: int) -> Optional[str]:
+        """Wait for a process to load its detectors and return its error, if any"""
+        connection = self._results[index]
+        assert connection is not None
+        try:
+            _, _, error = connection.recv()
+        except EOFError:
+            return "process exited while loading"
+        return None if error is None else str(error)
+
+    def _dispatch(self) -> None:
+        """Resolve futures from the result pipes, free their slots and replace dead processes"""
+        assert self._wakeup is not None
+        wakeup = self._wakeup[0]
+        while True:
+            readers = {
+                connection: index for index, connection in enumerate(self._results)
+                if connection is not None
+            }
+            for connection in wait([wakeup, *readers]):
+                if connection is wakeup:
+                    return
+                assert isinstance(connection, Connection)
+                index = readers[connection]
+                try:
+                    request_id, result, error = connection.recv()
+                except EOFError:
+                    self._replace_worker(index)
+                    continue
+                if request_id == "ready":
+                    # A replacement process finished loading; one that cannot is not retried
+                    if error is not None:
+                        self.logger.error(f"Replacement inference process failed to start: {error}")
+                        with self._pending_lock:
+                            self._results[index] = None
+                        connection.close()
+                    continue
+                with self._pending_lock:
+                    entry = self._pending.pop(request_id, None)
+                if entry is None:
+                    continue
+                future, slot, _ = entry
+                # The slot is only reused once the inference process is done with it
+                self._release(slot)
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(DetectionError(error))
+
+    def _replace_worker(self, index: int) -> None:
+        """Fail the frames of a dead process, free their slots and start a new process"""
+        process = self._workers[index]
+        process.join()
+        with self._pending_lock:
+            lost = [
+                request_id for request_id, (_, _, worker) in self._pending.items()
+                if worker == index
+            ]
+            entries = [self._pending.pop(request_id) for request_id in lost]
+            connection, self._results[index] = self._results[index], None
+        if connection is not None:
+            connection.close()
+
+        self.logger.error(
+            f"{process.name} died with exit code {process.exitcode}, "
+            f"failing {len(entries)} frames and starting a replacement"
+        )
+        # Started first, so a caller retrying a failed frame finds a process
+        self._spawn(index)
+        error = DetectionError(f"{process.name} died (exit code {process.exitcode})")
+        for future, slot, _ in entries:
+            self._release(slot)
+            future.set_exception(error)
+
+    def _release(self, slot: int) -> None:
+        """Return a slot to the ring (no-op once the ring is closed)"""
+        if self.ring is not None:
+            self.ring.release(slot)
+
+    def _shutdown_workers(self) -> None:
+        """Ask the processes to exit and terminate stragglers"""
+        for requests in self._requests:
+            requests.put(_STOP)
+        for process in self._workers:
+            process.join(timeout=10)
+            if process.is_alive():
+                self.logger.warning(f"Terminating unresponsive {process.name}")
+                process.terminate()
+                process.join()
+        for connection in self._results:
+            if connection is not None:
+                connection.close()
+        self._workers = []
+        self._requests = []
+        self._results = []
+
+    def _close_ring(self) -> None:
+        """Free the shared memory"""
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+class RemoteFrameDetector:
+    """Per-frame detector for the video pipeline backed by an InferenceServer"""
+
+    def __init__(self, server: InferenceServer, camera_id: Optional[str] = None):
+        """
+        Initialize remote frame detector
+
+        Args:
+            server: Running inference server
+            camera_id: Optional camera profile id
+        """
+        self.server = server
+        self.camera_id = camera_id
+        self.detector_calls = 0
+
+    def detect(
+        self,
+        frame: np.ndarray,
+        crop_origin: Optional[Tuple[int, int, int, int]] = None
+    ) -> DetectionBatch:
+        """
+        Detect faces and plates in a frame
+
+        Args:
+            frame: RGB frame
+            crop_origin: (x, y, frame width, frame height) when the frame is a crop of a
+                larger frame, so the profile ROIs stay in frame coordinates
+
+        Returns:
+            Cleaned DetectionBatch with faces and plates
+        """
+        self.detector_calls += 1
+        return DetectionBatch.concatenate(self.server.detect(frame, self.camera_id, crop_origin))
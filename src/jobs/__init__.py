@@ -0,0 +1,41 @@
+"""Job queue module (API enqueues, workers on any node process)"""
+
+from pathlib import Path
+
+from .base import Job, JobQueue, WorkerStats
+from .sqlite import SQLiteJobQueue
+from .worker import JobWorker
+from src.utils.exceptions import JobQueueError
+
+QUEUE_FILE = "queue.db"
+
+
+def create_job_queue(settings) -> JobQueue:
+    """
+    Create the job queue backend configured in the settings
+
+    Args:
+        settings: Settings instance
+
+    Returns:
+        JobQueue instance
+
+    Raises:
+        JobQueueError: If the backend is unknown or cannot be opened
+    """
+    if settings.job_queue_backend == "sqlite":
+        return SQLiteJobQueue(
+            Path(settings.jobs_dir) / QUEUE_FILE,
+            retry_delay=settings.job_retry_delay
+        )
+    raise JobQueueError(f"Unknown job queue backend: {settings.job_queue_backend}")
+
+
+__all__ = [
+    "Job",
+    "JobQueue",
+    "WorkerStats",
+    "SQLiteJobQueue",
+    "JobWorker",
+    "create_job_queue",
+]
@@ -0,0 +1,150 @@
+"""Job queue abstraction"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class Job:
+    """A unit of work claimed by one worker at a time"""
+    job_id: str
+    payload: Dict[str, Any]
+    status: str = "queued"  # queued, running, completed, failed
+    attempts: int = 0
+    max_attempts: int = 3
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return asdict(self)
+
+
+@dataclass
+class WorkerStats:
+    """Throughput counters of one worker"""
+    worker_id: str
+    hostname: str
+    started_at: float
+    last_seen: float
+    completed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def jobs_per_second(self) -> float:
+        """Completed jobs per second since the worker started"""
+        uptime = self.last_seen - self.started_at
+        return self.completed / uptime if uptime > 0 else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """Fraction of the uptime spent processing jobs"""
+        uptime = self.last_seen - self.started_at
+        return min(1.0, self.busy_seconds / uptime) if uptime > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        data = asdict(self)
+        data["jobs_per_second"] = round(self.jobs_per_second, 3)
+        data["utilization"] = round(self.utilization, 3)
+        return data
+
+
+class JobQueue(ABC):
+    """
+    Abstract base class for job queues
+
+    Jobs are claimed under a lease: a worker that stops heartbeating loses the
+    job when the lease expires, and another worker picks it up. Failed jobs
+    are retried until max_attempts is reached.
+    """
+
+    @abstractmethod
+    def enqueue(self, payload: Dict[str, Any], max_attempts: int = 3) -> Job:
+        """
+        Add a job
+
+        Args:
+            payload: JSON-serializable job description
+            max_attempts: Attempts before the job is marked failed
+
+        Returns:
+            The queued Job
+        """
+        pass
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """
+        Claim the oldest available job
+
+        Args:
+            worker_id: Claiming worker
+            lease_seconds: Lease duration
+
+        Returns:
+            The claimed Job or None if no job is available
+        """
+        pass
+
+    @abstractmethod
+    def give_up_expired(self) -> List[Job]:
+        """
+        Fail running jobs whose lease expired with no attempts left
+
+        Returns:
+            The jobs marked failed (their inputs can be removed)
+        """
+        pass
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a lease (returns False if the lease was lost)"""
+        pass
+
+    @abstractmethod
+    def complete(
+        self,
+        job_id: str,
+        worker_id: str,
+        result: Dict[str, Any],
+        busy_seconds: float = 0.0
+    ) -> bool:
+        """Mark a claimed job completed (returns False if the lease was lost)"""
+        pass
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str, busy_seconds: float = 0.0) -> bool:
+        """Record a failed attempt; the job is retried while attempts remain"""
+        pass
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job"""
+        pass
+
+    @abstractmethod
+    def register_worker(self, worker_id: str, hostname: str) -> None:
+        """Register a worker (resets its counters)"""
+        pass
+
+    @abstractmethod
+    def worker_heartbeat(self, worker_id: str) -> None:
+        """Record that a worker is alive"""
+        pass
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        pass
+
+    @abstractmethod
+    def workers(self) -> List[WorkerStats]:
+        """Per-worker throughput stats"""
+        pass
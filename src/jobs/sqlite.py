@@ -0,0 +1,288 @@
+"""SQLite job queue backend
+
+The database file can live on a volume shared by the API and the worker
+nodes; claims run in IMMEDIATE transactions, so concurrent workers never get
+the same job. It uses a rollback journal: WAL mode keeps its index in shared
+memory, which does not work across hosts on a network filesystem. Writers
+wait up to 30 seconds for the lock. The volume must provide working POSIX
+file locks; many NFS setups do not, so prefer a local disk unless locking on
+the share is known to be reliable.
+"""
+
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from src.jobs.base import Job, JobQueue, WorkerStats
+from src.utils.exceptions import JobQueueError
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    available_at REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, available_at, created_at);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    hostname TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    busy_seconds REAL NOT NULL DEFAULT 0
+);
+"""
+
+_JOB_COLUMNS = (
+    "job_id, payload, status, attempts, max_attempts, lease_owner, "
+    "lease_expires_at, result, error, created_at, updated_at"
+)
+
+
+class SQLiteJobQueue(JobQueue):
+    """Job queue stored in a single SQLite database file"""
+
+    def __init__(self, path: Union[str, Path], retry_delay: float = 5.0):
+        """
+        Initialize queue (creates the database if needed)
+
+        Args:
+            path: Database file
+            retry_delay: Base delay before a failed job is retried (multiplied by attempts)
+
+        Raises:
+            JobQueueError: If the database cannot be opened
+        """
+        self.path = Path(path)
+        self.retry_delay = retry_delay
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as connection:
+                # Also converts databases created in WAL mode
+                connection.execute("PRAGMA journal_mode=DELETE")
+                connection.executescript(_SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            raise JobQueueError(f"Cannot open job queue {self.path}: {str(e)}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection (safe across threads and processes)"""
+        connection = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction holding the database lock from the start"""
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, payload: Dict[str, Any], max_attempts: int = 3) -> Job:
+        now = time.time()
+        job = Job(
+            job_id=uuid.uuid4().hex,
+            payload=payload,
+            max_attempts=max(1, max_attempts),
+            created_at=now,
+            updated_at=now
+        )
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO jobs (job_id, payload, status, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job.job_id, json.dumps(payload), job.max_attempts, now, now, now)
+            )
+        return job
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        now = time.time()
+        with self._transaction() as connection:
+            # Expired leases without attempts left are left to give_up_expired()
+            row = connection.execute(
+                "SELECT job_id FROM jobs "
+                "WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'running' AND lease_expires_at < ? AND attempts < max_attempts) "
+                "ORDER BY created_at LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return None
+
+            connection.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires_at = ?, updated_at = ? WHERE job_id = ?",
+                (worker_id, now + lease_seconds, now, row[0])
+            )
+            return self._get(connection, row[0])
+
+    def give_up_expired(self) -> List[Job]:
+        now = time.time()
+        with self._transaction() as connection:
+            job_ids = [row[0] for row in connection.execute(
+                "SELECT job_id FROM jobs WHERE status = 'running' AND lease_expires_at < ? "
+                "AND attempts >= max_attempts",
+                (now,)
+            )]
+            jobs = []
+            for job_id in job_ids:
+                connection.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Lease expired', lease_owner = NULL, "
+                    "lease_expires_at = NULL, updated_at = ? WHERE job_id = ?",
+                    (now, job_id)
+                )
+                job = self._get(connection, job_id)
+                if job is not None:
+                    jobs.append(job)
+            return jobs
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? "
+                "WHERE job_id = ? AND lease_owner = ? AND status = 'running'",
+                (now + lease_seconds, now, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(
+        self,
+        job_id: str,
+        worker_id: str,
+        result: Dict[str, Any],
+        busy_seconds: float = 0.0
+    ) -> bool:
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = 'completed', result = ?, error = NULL, lease_owner = NULL, "
+                "lease_expires_at = NULL, updated_at = ? "
+                "WHERE job_id = ? AND lease_owner = ? AND status = 'running'",
+                (json.dumps(result), now, job_id, worker_id)
+            )
+            # A result discarded after losing the lease is not counted
+            if cursor.rowcount > 0:
+                self._record_worker(connection, worker_id, now, completed=1, busy_seconds=busy_seconds)
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str, busy_seconds: float = 0.0) -> bool:
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT attempts, max_attempts FROM jobs "
+                "WHERE job_id = ? AND lease_owner = ? AND status = 'running'",
+                (job_id, worker_id)
+            ).fetchone()
+            if row is None:
+                return False
+            self._record_worker(connection, worker_id, now, failed=1, busy_seconds=busy_seconds)
+
+            attempts, max_attempts = row
+            if attempts < max_attempts:
+                connection.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, lease_owner = NULL, "
+                    "lease_expires_at = NULL, available_at = ?, updated_at = ? WHERE job_id = ?",
+                    (error, now + self.retry_delay * attempts, now, job_id)
+                )
+            else:
+                connection.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, lease_owner = NULL, "
+                    "lease_expires_at = NULL, updated_at = ? WHERE job_id = ?",
+                    (error, now, job_id)
+                )
+            return True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._connect() as connection:
+            return self._get(connection, job_id)
+
+    def register_worker(self, worker_id: str, hostname: str) -> None:
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO workers (worker_id, hostname, started_at, last_seen) "
+                "VALUES (?, ?, ?, ?)",
+                (worker_id, hostname, now, now)
+            )
+
+    def worker_heartbeat(self, worker_id: str) -> None:
+        with self._transaction() as connection:
+            self._record_worker(connection, worker_id, time.time())
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as connection:
+            rows = connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def workers(self) -> List[WorkerStats]:
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT worker_id, hostname, started_at, last_seen, completed, failed, busy_seconds "
+                "FROM workers ORDER BY worker_id"
+            ).fetchall()
+        return [WorkerStats(*row) for row in rows]
+
+    @staticmethod
+    def _record_worker(
+        connection: sqlite3.Connection,
+        worker_id: str,
+        now: float,
+        completed: int = 0,
+        failed: int = 0,
+        busy_seconds: float = 0.0
+    ) -> None:
+        """Update a worker's counters and last-seen time"""
+        connection.execute(
+            "UPDATE workers SET last_seen = ?, completed = completed + ?, failed = failed + ?, "
+            "busy_seconds = busy_seconds + ? WHERE worker_id = ?",
+            (now, completed, failed, busy_seconds, worker_id)
+        )
+
+    @staticmethod
+    def _get(connection: sqlite3.Connection, job_id: str) -> Optional[Job]:
+        """Load a job row"""
+        row = connection.execute(
+            f"SELECT {_JOB_COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        (job_id, payload, status, attempts, max_attempts, lease_owner,
+         lease_expires_at, result, error, created_at, updated_at) = row
+        return Job(
+            job_id=job_id,
+            payload=json.loads(payload),
+            status=status,
+            attempts=attempts,
+            max_attempts=max_attempts,
+            lease_owner=lease_owner,
+            lease_expires_at=lease_expires_at,
+            result=json.loads(result) if result else None,
+            error=error,
+            created_at=created_at,
+            updated_at=updated_at
+        )
@@ -0,0 +1,150 @@
+"""Queue worker running detection outside the API process"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from src.anonymization.encoders import SUPPORTED_FORMATS, normalize_format
+from src.batch.directory import anonymize_file, init_worker
+from src.jobs.base import Job, JobQueue
+from src.utils.logger import get_logger
+from src.utils.tracing import current_request_id, tracer
+
+
+class JobWorker:
+    """Claims image jobs from a queue, anonymizes them and stores the results"""
+
+    def __init__(
+        self,
+        job_queue: JobQueue,
+        jobs_dir: Union[str, Path],
+        worker_id: Optional[str] = None,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 1.0,
+        threads: int = 1
+    ):
+        """
+        Initialize worker
+
+        Args:
+            job_queue: Queue to claim jobs from
+            jobs_dir: Shared jobs directory (inputs/ and results/ below it)
+            worker_id: Unique worker id (default: hostname-pid-random)
+            lease_seconds: Lease duration (extended by heartbeats while processing)
+            poll_interval: Seconds to wait when the queue is empty
+            threads: OpenCV/torch threads used by this worker
+        """
+        self.job_queue = job_queue
+        self.jobs_dir = Path(jobs_dir)
+        self.hostname = socket.gethostname()
+        self.worker_id = worker_id or f"{self.hostname}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.threads = threads
+        self.logger = get_logger(self.__class__.__name__)
+        self._initialized = False
+
+    def run(self, stop: Optional[threading.Event] = None, max_jobs: Optional[int] = None) -> int:
+        """
+        Process jobs until stopped
+
+        Args:
+            stop: Event ending the loop after the current job
+            max_jobs: Stop after this many jobs (None runs forever)
+
+        Returns:
+            Number of jobs processed
+        """
+        stop = stop or threading.Event()
+        self.job_queue.register_worker(self.worker_id, self.hostname)
+        self.logger.info(f"Worker {self.worker_id} started")
+
+        processed = 0
+        while not stop.is_set() and (max_jobs is None or processed < max_jobs):
+            for abandoned in self.job_queue.give_up_expired():
+                self.logger.warning(f"Job {abandoned.job_id} given up: lease expired on its last attempt")
+                self._remove_input(abandoned)
+            job = self.job_queue.claim(self.worker_id, self.lease_seconds)
+            if job is None:
+                self.job_queue.worker_heartbeat(self.worker_id)
+                stop.wait(self.poll_interval)
+                continue
+            self.process(job)
+            processed += 1
+
+        self.logger.info(f"Worker {self.worker_id} stopped after {processed} jobs")
+        return processed
+
+    def process(self, job: Job) -> None:
+        """Process one claimed job, keeping its lease alive meanwhile"""
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), daemon=True)
+        heartbeat.start()
+
+        start_time = time.perf_counter()
+        try:
+            # A failed model load fails this job; the next job tries again
+            if not self._initialized:
+                init_worker(None, self.threads)
+                self._initialized = True
+            result = self._run_job(job)
+        except Exception as e:
+            busy = time.perf_counter() - start_time
+            self.logger.warning(f"Job {job.job_id} failed (attempt {job.attempts}/{job.max_attempts}): {e}")
+            failed = self.job_queue.fail(job.job_id, self.worker_id, str(e), busy_seconds=busy)
+            # Without attempts left the job is not retried and its input is not needed
+            if failed and job.attempts >= job.max_attempts:
+                self._remove_input(job)
+            return
+        finally:
+            done.set()
+            heartbeat.join()
+
+        busy = time.perf_counter() - start_time
+        if not self.job_queue.complete(job.job_id, self.worker_id, result, busy_seconds=busy):
+            self.logger.warning(f"Lost the lease of job {job.job_id}, result discarded")
+            return
+        self._remove_input(job)
+        self.logger.info(
+            f"Job {job.job_id} completed in {busy:.2f}s: "
+            f"{result['faces']} faces, {result['plates']} plates"
+        )
+
+    def _remove_input(self, job: Job) -> None:
+        """Delete the stored input of a finished job"""
+        (self.jobs_dir / job.payload["input"]).unlink(missing_ok=True)
+
+    def _run_job(self, job: Job) -> Dict[str, Any]:
+        """Anonymize the job's input image into the results directory"""
+        payload = job.payload
+        output_format = normalize_format(payload.get("output_format") or "png")
+        source = self.jobs_dir / payload["input"]
+        output = Path("results") / f"{job.job_id}{SUPPORTED_FORMATS[output_format]}"
+        details = Path("results") / f"{job.job_id}.json"
+
+        # The job id names the trace of the job's spans
+        token = current_request_id.set(job.job_id)
+        try:
+            with tracer.span("job", job_id=job.job_id, attempt=job.attempts, worker_id=self.worker_id):
+                result = anonymize_file(
+                    str(source),
+                    str(self.jobs_dir / output),
+                    camera_id=payload.get("camera_id"),
+                    sidecar=str(self.jobs_dir / details),
+                    output_format=output_format
+                )
+        finally:
+            current_request_id.reset(token)
+        result.update(output=output.as_posix(), details=details.as_posix(), worker_id=self.worker_id)
+        return result
+
+    def _heartbeat(self, job: Job, done: threading.Event) -> None:
+        """Extend the lease until the job is done"""
+        while not done.wait(self.lease_seconds / 3):
+            if not self.job_queue.heartbeat(job.job_id, self.worker_id, self.lease_seconds):
+                self.logger.warning(f"Lease of job {job.job_id} lost")
+                return
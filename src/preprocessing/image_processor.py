@@ -28,23 +28,21 @@ class ImagePreprocessor:
         """
         # Convert to RGB if needed
         if image.mode != 'RGB':
-            self.logger.info(f"Converting image from {image.mode} to RGB")
+            self.logger.debug("Converting image from %s to RGB", image.mode)
             image = image.convert('RGB')
         
         # Resize if too large
         if max(image.size) > self.MAX_DIMENSION:
-            self.logger.info(
-                f"Resizing image from {image.size} "
-                f"(max dimension > {self.MAX_DIMENSION})"
+            self.logger.debug(
+                "Resizing image from %s (max dimension > %d)", image.size, self.MAX_DIMENSION
             )
             image = self._resize_image(image)
         
         # Convert to numpy array
         image_array = np.array(image)
         
-        self.logger.info(
-            f"Preprocessed image: shape={image_array.shape}, "
-            f"dtype={image_array.dtype}"
+        self.logger.debug(
+            "Preprocessed image: shape=%s, dtype=%s", image_array.shape, image_array.dtype
         )
         
         return image_array, image
@@ -83,9 +83,8 @@ class ImageValidator:
         # Validate format
         ImageValidator.validate_format(image)
         
-        logger.info(
-            f"Image validated: format={image.format}, "
-            f"size={image.size}, mode={image.mode}"
+        logger.debug(
+            "Image validated: format=%s, size=%s, mode=%s", image.format, image.size, image.mode
         )
         
         return image
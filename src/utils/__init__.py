@@ -1,19 +1,32 @@
 """Utility modules"""
 
-from .logger import setup_logger, get_logger
+from .logger import setup_logger, get_logger, log_context
 from .exceptions import (
     AnonymizationError,
     InvalidImageError,
     ModelLoadError,
     DetectionError,
+    EncodingError,
+    VideoProcessingError,
+    CameraProfileError,
+    BatchProcessingError,
+    JobQueueError,
+    EvaluationError,
 )
 
 __all__ = [
     "setup_logger",
     "get_logger",
+    "log_context",
     "AnonymizationError",
     "InvalidImageError",
     "ModelLoadError",
     "DetectionError",
+    "EncodingError",
+    "VideoProcessingError",
+    "CameraProfileError",
+    "BatchProcessingError",
+    "JobQueueError",
+    "EvaluationError",
 ]
 
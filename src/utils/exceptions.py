@@ -20,3 +20,32 @@ class DetectionError(AnonymizationError):
     """Raised when detection fails"""
     pass
 
+
+class EncodingError(AnonymizationError):
+    """Raised when output image encoding fails"""
+    pass
+
+
+class VideoProcessingError(AnonymizationError):
+    """Raised when a video cannot be decoded or encoded"""
+    pass
+
+
+class CameraProfileError(AnonymizationError):
+    """Raised when camera profiles are invalid or a camera is unknown"""
+    pass
+
+
+class BatchProcessingError(AnonymizationError):
+    """Raised when a batch run cannot continue (e.g. workers fail to start)"""
+    pass
+
+
+class JobQueueError(AnonymizationError):
+    """Raised when the job queue backend is unavailable or misconfigured"""
+    pass
+
+
+class EvaluationError(AnonymizationError):
+    """Raised when an evaluation dataset or configuration is invalid"""
+    pass
@@ -1,53 +1,291 @@
-"""Logging configuration and utilities"""
+"""Logging configuration and utilities
 
+Loggers returned by get_logger() are children of the application logger set
+up by setup_logger(), so they share its handlers. Records are handed to a
+queue in the logging thread and written by a listener thread, so a slow
+console or log file never blocks request handling.
+
+Worker processes do not inherit a running listener thread (and skip atexit
+handlers on exit), so they configure their own logging with
+setup_worker_logging(), which writes records directly from the logging thread.
+
+Records carry structured context: the current request id, the fields bound
+with log_context() for a request or job, and the fields passed per call as
+extra={"fields": {...}}. Messages should use %-style arguments
+(logger.debug("Found %d plates", count)) so they are only formatted when the
+record is actually emitted.
+
+Chatty events can be sampled: sample rates map an event name (the "event"
+extra) or a logger name to the fraction of records kept. Errors are never
+sampled out.
+"""
+
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
-from typing import Optional
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.utils.tracing import current_request_id
+
+# Parent of all application loggers
+APP_LOGGER = "htw-emerging-photo"
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Fields bound for the current request or job (never mutated, replaced on bind)
+_log_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+# Queue listeners started by setup_logger(), keyed by logger name
+_listeners: Dict[str, QueueListener] = {}
+
+# Handlers attached without a queue (worker processes), keyed by logger name
+_direct_handlers: Dict[str, List[logging.Handler]] = {}
+
+
+def bind_context(**fields: Any) -> Token:
+    """
+    Add fields to the log context of the current request
+
+    Returns:
+        Token for unbind_context()
+    """
+    return _log_context.set({**_log_context.get(), **fields})
+
+
+def unbind_context(token: Token) -> None:
+    """Restore the log context from before bind_context()"""
+    _log_context.reset(token)
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """Add fields to every record logged inside the with-block"""
+    token = bind_context(**fields)
+    try:
+        yield
+    finally:
+        unbind_context(token)
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """
+    Parse "event=rate,..." (e.g. "vehicle_search=0.1,PlateDetector=0.5")
+
+    Raises:
+        ValueError: If an entry is malformed or a rate is outside 0-1
+    """
+    rates = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        key, _, rate = (part.strip() for part in entry.partition("="))
+        rates[key] = float(rate)
+        if not 0.0 <= rates[key] <= 1.0:
+            raise ValueError(f"Sample rate of {key} must be between 0 and 1")
+    return rates
+
+
+class ContextFilter(logging.Filter):
+    """Attaches the request id and bound fields (runs in the logging thread)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = dict(_log_context.get())
+        request_id = current_request_id.get()
+        if request_id is not None:
+            context.setdefault("request_id", request_id)
+        record.context = context
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the records of configured events"""
+
+    def __init__(self, rates: Dict[str, float]):
+        """
+        Initialize filter
+
+        Args:
+            rates: Fraction kept per event name or logger name (short or full)
+        """
+        super().__init__()
+        self.rates = dict(rates)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR or not self.rates:
+            return True
+        rate = self.rates.get(getattr(record, "event", ""))
+        if rate is None:
+            rate = self.rates.get(record.name, self.rates.get(record.name.rsplit(".", 1)[-1]))
+        return rate is None or random.random() < rate
+
+
+class _ContextQueueHandler(QueueHandler):
+    """Queue handler that leaves the formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now (they may change later) and render the traceback,
+        # which references frames of this thread; the rest is formatted by the listener
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _structured_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    """Context and per-call fields of a record"""
+    return {**getattr(record, "context", {}), **(getattr(record, "fields", None) or {})}
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with the structured fields appended as key=value"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _structured_fields(record)
+        if fields:
+            line += " | " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record (for log pipelines)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_structured_fields(record)
+        }
+        event = getattr(record, "event", None)
+        if event is not None:
+            entry["event"] = event
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
 
 
 def setup_logger(
     name: str,
     level: str = "INFO",
-    log_file: Optional[str] = None
+    log_file: Optional[str] = None,
+    log_format: str = "text",
+    sample_rates: Optional[Dict[str, float]] = None,
+    queued: bool = True
 ) -> logging.Logger:
     """
     Set up a logger with console and optional file output
-    
+
+    Calling it again replaces the previous configuration of the logger.
+
     Args:
         name: Logger name
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: Optional path to log file
-        
+        log_format: "text" or "json"
+        sample_rates: Optional fraction of records kept per event or logger name
+        queued: Write records from a listener thread (False writes them directly)
+
     Returns:
         Configured logger instance
     """
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, level.upper()))
-    
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(getattr(logging, level.upper()))
-    
+
+    # Drop the handlers of a previous setup (the listener of a parent process
+    # has no thread in a forked worker; stopping it only queues its sentinel)
+    previous = _listeners.pop(name, None)
+    if previous is not None:
+        previous.stop()
+        for handler in previous.handlers:
+            handler.close()
+    for handler in _direct_handlers.pop(name, []):
+        logger.removeHandler(handler)
+        handler.close()
+    for handler in [h for h in logger.handlers if isinstance(h, _ContextQueueHandler)]:
+        logger.removeHandler(handler)
+
     # Formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_handler.setFormatter(formatter)
-    
-    logger.addHandler(console_handler)
-    
+    formatter: logging.Formatter
+    if log_format == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = TextFormatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+
+    # Console handler
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+
     # File handler (optional)
     if log_file:
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(getattr(logging, level.upper()))
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
+        handlers.append(logging.FileHandler(log_file))
+
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if not queued:
+        for handler in handlers:
+            handler.addFilter(SamplingFilter(sample_rates or {}))
+            handler.addFilter(ContextFilter())
+            logger.addHandler(handler)
+        _direct_handlers[name] = handlers
+        return logger
+
+    # Logging threads only filter and enqueue, the listener thread writes
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _ContextQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rates or {}))
+    queue_handler.addFilter(ContextFilter())
+    logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    _listeners[name] = listener
+
     return logger
 
 
-def get_logger(name: str) -> logging.Logger:
-    """Get an existing logger by name"""
-    return logging.getLogger(name)
+def shutdown_logging() -> None:
+    """Write out queued records and stop the listener threads"""
+    while _listeners:
+        _, listener = _listeners.popitem()
+        listener.stop()
+
+
+atexit.register(shutdown_logging)
+
+
+def setup_worker_logging(settings) -> logging.Logger:
+    """
+    Set up the application logger in a worker process
 
+    Replaces the configuration inherited from a forked parent, whose listener
+    thread does not exist in the worker.
+
+    Args:
+        settings: Settings instance (log level, format and sample rates)
+
+    Returns:
+        Configured application logger
+    """
+    return setup_logger(
+        APP_LOGGER,
+        level=settings.log_level,
+        log_format=settings.log_format,
+        sample_rates=parse_sample_rates(settings.log_sample_rates),
+        queued=False
+    )
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Get a logger below the application logger (shares its handlers)"""
+    if name == APP_LOGGER or name.startswith(APP_LOGGER + "."):
+        return logging.getLogger(name)
+    return logging.getLogger(f"{APP_LOGGER}.{name}")
@@ -0,0 +1,287 @@
+"""Opt-in profiling of production requests
+
+Two capture modes, chosen when a request starts:
+
+- A configurable fraction of requests runs its stages under cProfile (exact
+  call counts, noticeable overhead, so keep the fraction small).
+- With a latency threshold set, every other request is watched by a stack
+  sampler thread that snapshots the threads working on it every few
+  milliseconds. Requests that finish under the threshold are discarded, the
+  slow ones are kept as folded stacks (flame graph input).
+
+Captures are written to a directory together with a JSON file of request
+metadata; only the newest captures are kept.
+"""
+
+import cProfile
+import json
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from src.utils.logger import get_logger
+
+# Frames below these modules are the thread machinery, not request work
+_SKIPPED_FILES = ("threading.py", "concurrent/futures/thread.py")
+
+
+def _fold_stack(frame) -> str:
+    """Render a stack as 'outer;...;inner' (collapsed stack format)"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        if not code.co_filename.endswith(_SKIPPED_FILES):
+            names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class ProfileCapture:
+    """Profile data of one request"""
+
+    def __init__(self, mode: str, sampler: Optional["StackSampler"] = None):
+        """
+        Initialize capture
+
+        Args:
+            mode: "cprofile" (sampled request) or "sampling" (kept only when slow)
+            sampler: Stack sampler (sampling mode)
+        """
+        self.mode = mode
+        self.sampler = sampler
+        self.stats: Optional[pstats.Stats] = None
+        self.samples: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def section(self) -> Iterator[None]:
+        """Profile the work done by the current thread inside the with-block"""
+        if self.mode == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                with self._lock:
+                    if self.stats is None:
+                        self.stats = pstats.Stats(profile)
+                    else:
+                        self.stats.add(profile)
+        else:
+            sampler = self.sampler
+            assert sampler is not None, "sampling mode needs a sampler"
+            thread_id = threading.get_ident()
+            sampler.register(thread_id, self)
+            try:
+                yield
+            finally:
+                sampler.unregister(thread_id)
+
+    def add_sample(self, stack: str) -> None:
+        """Count one sampled stack"""
+        with self._lock:
+            self.samples[stack] += 1
+
+    def save(self, path_stem: Path) -> Path:
+        """
+        Write the profile next to path_stem
+
+        Returns:
+            Path of the profile file (.prof for cProfile, .folded for samples)
+        """
+        with self._lock:
+            if self.mode == "cprofile":
+                path = path_stem.with_suffix(".prof")
+                if self.stats is not None:
+                    self.stats.dump_stats(str(path))
+                else:
+                    path.touch()
+            else:
+                path = path_stem.with_suffix(".folded")
+                path.write_text(
+                    "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+                )
+        return path
+
+
+class StackSampler:
+    """Background thread sampling the stacks of threads working on watched requests"""
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Initialize sampler (the thread starts with the first registration)
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self._watched: Dict[int, ProfileCapture] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, thread_id: int, capture: ProfileCapture) -> None:
+        """Start sampling a thread into a capture"""
+        with self._lock:
+            self._watched[thread_id] = capture
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+
+    def unregister(self, thread_id: int) -> None:
+        """Stop sampling a thread"""
+        with self._lock:
+            self._watched.pop(thread_id, None)
+
+    def _run(self) -> None:
+        """Sampling loop"""
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                watched = list(self._watched.items())
+            if not watched:
+                continue
+            frames = sys._current_frames()
+            for thread_id, capture in watched:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    capture.add_sample(_fold_stack(frame))
+
+
+# Capture of the request being processed (inherited by its worker threads)
+current_capture: ContextVar[Optional[ProfileCapture]] = ContextVar("current_capture", default=None)
+
+
+@contextmanager
+def profile_section() -> Iterator[None]:
+    """Profile the with-block if the current request is being captured"""
+    capture = current_capture.get()
+    if capture is None:
+        yield
+        return
+    with capture.section():
+        yield
+
+
+def profiled(function: Callable) -> Callable:
+    """Decorator running a function inside profile_section()"""
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        with profile_section():
+            return function(*args, **kwargs)
+    return wrapper
+
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their captures"""
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        sample_rate: float = 0.0,
+        slow_threshold_ms: float = 0.0,
+        interval_ms: float = 5.0,
+        max_captures: int = 50
+    ):
+        """
+        Initialize profiler
+
+        Args:
+            directory: Directory receiving the captures
+            sample_rate: Fraction of requests run under cProfile
+            slow_threshold_ms: Keep stack samples of requests slower than this (0 disables)
+            interval_ms: Stack sampling interval
+            max_captures: Captures kept (oldest deleted first)
+        """
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+        self.max_captures = max(1, max_captures)
+        self.sampler = StackSampler(interval_ms / 1000.0)
+        self.logger = get_logger(self.__class__.__name__)
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        sample_rate: Optional[float] = None,
+        slow_threshold_ms: Optional[float] = None
+    ) -> None:
+        """Change the capture rules at runtime"""
+        if sample_rate is not None:
+            self.sample_rate = min(1.0, max(0.0, sample_rate))
+        if slow_threshold_ms is not None:
+            self.slow_threshold_ms = max(0.0, slow_threshold_ms)
+
+    def start_request(self) -> Optional[ProfileCapture]:
+        """
+        Choose the capture mode of a new request
+
+        Returns:
+            ProfileCapture, or None if the request is not profiled
+        """
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return ProfileCapture("cprofile")
+        if self.slow_threshold_ms > 0:
+            return ProfileCapture("sampling", self.sampler)
+        return None
+
+    def finish(
+        self,
+        capture: ProfileCapture,
+        elapsed_seconds: float,
+        metadata: Dict[str, Any]
+    ) -> Optional[Path]:
+        """
+        Store a capture if it was sampled or the request was slow
+
+        Args:
+            capture: Capture returned by start_request()
+            elapsed_seconds: Request duration
+            metadata: Request details written next to the profile
+
+        Returns:
+            Path of the stored profile, or None if the capture was discarded
+        """
+        elapsed_ms = elapsed_seconds * 1000
+        slow = self.slow_threshold_ms > 0 and elapsed_ms >= self.slow_threshold_ms
+        if capture.mode == "sampling" and not slow:
+            return None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = self.directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10 ** 9:09d}"
+        path = capture.save(stem)
+        stem.with_suffix(".json").write_text(json.dumps({
+            **metadata,
+            "mode": capture.mode,
+            "reason": "slow" if slow else "sampled",
+            "elapsed_ms": round(elapsed_ms, 2),
+            "profile": path.name
+        }, indent=2))
+        self._rotate()
+        self.logger.info(f"Stored {capture.mode} profile of a {elapsed_ms:.0f}ms request: {path}")
+        return path
+
+    def captures(self) -> List[str]:
+        """Names of the stored profiles, newest first"""
+        if not self.directory.exists():
+            return []
+        profiles = [
+            path for path in self.directory.iterdir() if path.suffix in (".prof", ".folded")
+        ]
+        return [path.name for path in sorted(profiles, key=lambda path: path.name, reverse=True)]
+
+    def _rotate(self) -> None:
+        """Delete the oldest captures beyond max_captures"""
+        with self._lock:
+            stems = sorted({path.stem for path in self.directory.iterdir()})
+            for stem in stems[:-self.max_captures]:
+                for path in self.directory.glob(f"{stem}.*"):
+                    path.unlink(missing_ok=True)
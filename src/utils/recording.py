@@ -0,0 +1,167 @@
+"""Opt-in recording of image request fingerprints for replay
+
+Each recorded request appends one JSON line to requests.jsonl in the
+recording directory: arrival time, upload format, size and dimensions,
+output format, camera id, status, detection counts, stage timings and total
+duration. Filenames are not recorded. With store_images the uploads are kept
+under images/, named by content hash so repeated uploads are stored once;
+python -m benchmarks.replay then sends the real images instead of synthetic
+frames of the recorded dimensions.
+
+Records are written by a background thread, so requests never wait on the
+disk; when the writer falls behind, new records are dropped.
+
+Stored uploads are the unredacted originals. Only enable store_images where
+keeping them is permitted.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Union
+
+from src.utils.logger import get_logger
+
+RECORD_FILE = "requests.jsonl"
+IMAGE_DIR = "images"
+
+# Ends the writer thread
+_STOP = object()
+
+# File extensions of stored uploads by magic bytes
+_SIGNATURES = ((b"\xff\xd8\xff", "jpg"), (b"\x89PNG\r\n\x1a\n", "png"), (b"RIFF", "webp"))
+
+
+def _extension(image_bytes: bytes) -> str:
+    """File extension of an upload ("bin" if unrecognized)"""
+    for signature, extension in _SIGNATURES:
+        if image_bytes.startswith(signature):
+            return extension
+    return "bin"
+
+
+class RequestRecorder:
+    """Appends request fingerprints (and optionally the uploads) to a recording directory"""
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        store_images: bool = False,
+        sample_rate: float = 1.0,
+        queue_size: int = 64
+    ):
+        """
+        Initialize recorder (files and the writer thread are created on the first record)
+
+        Args:
+            directory: Recording directory
+            store_images: Whether to keep the uploaded images
+            sample_rate: Fraction of requests recorded
+            queue_size: Records waiting for the writer thread (more are dropped)
+        """
+        self.directory = Path(directory)
+        self.store_images = store_images
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._writer: Optional[threading.Thread] = None
+        self._file: Optional[TextIO] = None
+        self._lock = threading.Lock()
+        self.logger = get_logger(self.__class__.__name__)
+
+    def should_record(self) -> bool:
+        """Whether to record the current request"""
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def record(self, fields: Dict[str, Any], image_bytes: Optional[bytes] = None) -> None:
+        """
+        Queue one request for the writer thread (never blocks)
+
+        Args:
+            fields: Fingerprint of the request
+            image_bytes: Upload, stored when store_images is set
+        """
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_records, name="request-recorder", daemon=True
+                )
+                self._writer.start()
+        try:
+            self._queue.put_nowait((fields, image_bytes))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1:
+                self.logger.warning("Recording queue full, dropping records")
+
+    def _write_records(self) -> None:
+        """Writer thread: append queued records until stopped"""
+        while True:
+            entry = self._queue.get()
+            if entry is _STOP:
+                return
+            self._write(*entry)
+
+    def _write(self, fields: Dict[str, Any], image_bytes: Optional[bytes]) -> None:
+        """Append one record (failures are logged, never raised)"""
+        try:
+            if self.store_images and image_bytes:
+                fields = {**fields, "image": self._store_image(image_bytes)}
+            line = json.dumps(fields, default=str) + "\n"
+            if self._file is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.directory / RECORD_FILE, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+        except OSError as e:
+            self.logger.warning("Failed to record request: %s", e)
+
+    def _store_image(self, image_bytes: bytes) -> str:
+        """Write an upload once per content and return its path relative to the directory"""
+        name = f"{hashlib.sha256(image_bytes).hexdigest()[:32]}.{_extension(image_bytes)}"
+        path = self.directory / IMAGE_DIR / name
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            temporary.write_bytes(image_bytes)
+            os.replace(temporary, path)
+        return f"{IMAGE_DIR}/{name}"
+
+    def close(self) -> None:
+        """Write the queued records, stop the writer thread and close the record file"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(_STOP)
+            writer.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_recording(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """
+    Read the records of a recording directory (or requests.jsonl file), oldest arrival first
+
+    Returns:
+        Records with "image" resolved to an absolute path where present
+    """
+    path = Path(path)
+    record_file = path / RECORD_FILE if path.is_dir() else path
+    records = []
+    with open(record_file, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("image"):
+                record["image"] = str(record_file.parent / record["image"])
+            records.append(record)
+    records.sort(key=lambda record: record.get("arrival", 0.0))
+    return records
@@ -0,0 +1,313 @@
+"""Span tracing exported as JSON lines
+
+Spans follow the OpenTelemetry model (trace id, span id, parent id, name,
+start/end time, attributes, status) without depending on its SDK. The current
+span is kept in a context variable, so spans opened in worker threads started
+via run_in_threadpool, the pipeline engine or copy_context().run nest under
+the span that was current when the work was handed over. Inference processes
+receive the trace id and parent span id with each frame.
+
+The trace id of a request is its request id (taken from the inbound request
+id header or generated), so the spans of one request can be found with grep.
+Each finished span is appended to a JSON lines file as one line by a
+background thread, so requests never wait on the disk; several processes may
+append to the same file.
+
+Tracing is off until configure_tracing() installs an exporter; until then
+span() hands out a shared no-op span.
+"""
+
+import json
+import multiprocessing.util
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, NamedTuple, Optional, TextIO, Union
+
+# Accepted inbound request ids (anything else is replaced by a generated id)
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:\-]{1,128}$")
+
+
+class SpanContext(NamedTuple):
+    """Identity of a span, used to continue a trace in another thread or process"""
+    trace_id: str
+    span_id: str
+
+
+class Span:
+    """A timed operation with attributes"""
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self._start_perf = time.perf_counter()
+        self._duration: Optional[float] = None
+
+    @property
+    def context(self) -> SpanContext:
+        """Trace and span id of this span"""
+        return SpanContext(self.trace_id, self.span_id)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set one attribute"""
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        """Set several attributes"""
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException) -> None:
+        """Mark the span as failed"""
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        """Stop the clock"""
+        self._duration = time.perf_counter() - self._start_perf
+        self.end_time = self.start_time + self._duration
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary (one exported line)"""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": round(self.start_time, 6),
+            "end_time": round(self.end_time, 6) if self.end_time is not None else None,
+            "duration_ms": round(self._duration * 1000, 3) if self._duration is not None else None,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name
+        }
+
+
+class _NoopSpan:
+    """Span handed out while tracing is off (attributes are dropped)"""
+
+    context = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+# Ends the writer thread of an exporter
+_STOP = object()
+
+
+class JsonLinesExporter:
+    """Appends finished spans to a file from a writer thread, one JSON object per line"""
+
+    def __init__(self, path: Union[str, Path], queue_size: int = 1024):
+        """
+        Initialize exporter (the file and the writer thread are created on the first span)
+
+        Args:
+            path: JSON lines file
+            queue_size: Spans waiting for the writer thread (more are dropped)
+        """
+        self.path = Path(path)
+        self.queue_size = max(1, queue_size)
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_pid: Optional[int] = None
+        self._file: Optional[TextIO] = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        """Queue one span for the writer thread (never blocks)"""
+        # A forked process inherits the exporter but not its writer thread
+        if self._writer is None or self._writer_pid != os.getpid():
+            self._start_writer()
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _start_writer(self) -> None:
+        """Start the writer thread of this process"""
+        with self._lock:
+            pid = os.getpid()
+            if self._writer is not None and self._writer_pid == pid:
+                return
+            if self._writer_pid != pid:
+                self._queue = queue.Queue(maxsize=self.queue_size)
+            self._writer = threading.Thread(
+                target=self._write_spans, args=(self._queue,), name="span-exporter", daemon=True
+            )
+            self._writer_pid = pid
+            self._writer.start()
+            # Pool workers exit without running atexit handlers, but they do run the
+            # multiprocessing finalizers (which also run at exit of the main process)
+            multiprocessing.util.Finalize(None, self.close, exitpriority=0)
+
+    def _write_spans(self, spans: queue.Queue) -> None:
+        """Writer thread: append queued spans until stopped"""
+        while True:
+            span = spans.get()
+            if span is _STOP:
+                return
+            line = json.dumps(span, default=str) + "\n"
+            try:
+                if self._file is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                # One write per line keeps lines of concurrent processes apart (O_APPEND)
+                self._file.write(line)
+                self._file.flush()
+            except OSError:
+                # Tracing never fails the traced work
+                with self._lock:
+                    self.dropped += 1
+
+    def close(self) -> None:
+        """Write out the queued spans, stop the writer thread and close the file"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None and self._writer_pid == os.getpid():
+            self._queue.put(_STOP)
+            writer.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# Request id of the request being handled (also the trace id of its spans)
+current_request_id: ContextVar[Optional[str]] = ContextVar("current_request_id", default=None)
+
+# Innermost open span (or the remote parent of a continued trace)
+_current_span: ContextVar[Optional[Union[Span, SpanContext]]] = ContextVar("current_span", default=None)
+
+
+def new_request_id() -> str:
+    """Generate a request id"""
+    return uuid.uuid4().hex
+
+
+def resolve_request_id(value: Optional[str]) -> str:
+    """Use an inbound request id if it is well-formed, otherwise generate one"""
+    if value and _REQUEST_ID_PATTERN.match(value):
+        return value
+    return new_request_id()
+
+
+class Tracer:
+    """Creates spans and hands the finished ones to the exporter"""
+
+    def __init__(self):
+        self.exporter: Optional[JsonLinesExporter] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether spans are recorded"""
+        return self.exporter is not None
+
+    def configure(self, exporter: Optional[JsonLinesExporter]) -> None:
+        """Install an exporter (None turns tracing off)"""
+        if self.exporter is not None and self.exporter is not exporter:
+            self.exporter.close()
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Union[Span, _NoopSpan]]:
+        """
+        Trace the with-block as a child of the current span
+
+        Without a current span a new trace is started, named after the current
+        request id if there is one. Exceptions mark the span as failed and are
+        re-raised.
+
+        Args:
+            name: Span name (stage or operation)
+            **attributes: Initial attributes
+
+        Yields:
+            The span (a no-op span while tracing is off)
+        """
+        exporter = self.exporter
+        if exporter is None:
+            yield NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        if parent is not None:
+            span = Span(name, parent.trace_id, parent.span_id, attributes)
+        else:
+            span = Span(name, current_request_id.get() or new_request_id(), None, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            exporter.export(span)
+
+
+tracer = Tracer()
+
+
+def current_span() -> Union[Span, _NoopSpan]:
+    """Innermost open span of this context (a no-op span if there is none)"""
+    span = _current_span.get()
+    return span if isinstance(span, Span) else NOOP_SPAN
+
+
+def current_span_context() -> Optional[SpanContext]:
+    """Identity of the current span, to be sent along with work for another process"""
+    span = _current_span.get()
+    if span is None:
+        return None
+    return span.context if isinstance(span, Span) else span
+
+
+@contextmanager
+def continue_trace(parent: Optional[SpanContext]) -> Iterator[None]:
+    """Make spans opened in the with-block children of a span from another process"""
+    if parent is None:
+        yield
+        return
+    token = _current_span.set(SpanContext(*parent))
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+
+
+def configure_tracing(settings) -> None:
+    """Install the JSON lines exporter if tracing is enabled in the settings"""
+    if settings.tracing_enabled and not tracer.enabled:
+        tracer.configure(JsonLinesExporter(settings.tracing_path))
@@ -0,0 +1,31 @@
+"""Video anonymization module"""
+
+from .pipeline import (
+    FrameDetector,
+    VideoAnonymizer,
+    VideoInfo,
+    VideoStats,
+    build_frame_detector,
+    probe_video,
+    read_frames,
+    wrap_frame_detector,
+)
+from .motion import MotionGate, MotionGatedDetector, MotionStats
+from .tracking import DetectionTracker, TrackedFrameDetector, TrackerStats
+
+__all__ = [
+    "DetectionTracker",
+    "FrameDetector",
+    "MotionGate",
+    "MotionGatedDetector",
+    "MotionStats",
+    "TrackedFrameDetector",
+    "TrackerStats",
+    "VideoAnonymizer",
+    "VideoInfo",
+    "VideoStats",
+    "build_frame_detector",
+    "probe_video",
+    "read_frames",
+    "wrap_frame_detector",
+]
@@ -0,0 +1,242 @@
+"""Motion-gated detection for static cameras
+
+A downscaled grayscale reference frame is kept per stream. Each new frame is
+compared against it: when nothing changed meaningfully the previous detections
+are reused, and when only parts of the scene changed the detectors run on
+those dirty regions alone.
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+from src.detection.base import DetectionBatch
+from src.detection.boxes import box_areas, clip_boxes, iou_matrix, merge_overlapping
+
+
+class MotionGate:
+    """Background model based on frame differencing of downscaled grayscale frames"""
+
+    def __init__(
+        self,
+        analysis_width: int = 160,
+        threshold: int = 25,
+        min_changed_fraction: float = 0.001,
+        padding: int = 32
+    ):
+        """
+        Initialize motion gate
+
+        Args:
+            analysis_width: Width of the frame used for differencing (pixels)
+            threshold: Gray level difference counted as a change
+            min_changed_fraction: Fraction of changed pixels below which a frame is static
+            padding: Padding added around dirty regions (full resolution pixels)
+        """
+        self.analysis_width = analysis_width
+        self.threshold = threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.padding = padding
+        self.reference: Optional[np.ndarray] = None
+        self._current: Optional[np.ndarray] = None
+        self._scale = 1.0
+
+    def reset(self) -> None:
+        """Forget the background model"""
+        self.reference = None
+        self._current = None
+
+    def changed_regions(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Find the regions of a frame that changed since the reference
+
+        Args:
+            frame: RGB frame
+
+        Returns:
+            Dirty regions of shape (K, 4) in frame coordinates (empty when the
+            frame is static), or None when there is no usable reference
+        """
+        height, width = frame.shape[:2]
+        self._scale = min(1.0, self.analysis_width / width)
+        small = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        if self._scale < 1.0:
+            size = (max(1, round(width * self._scale)), max(1, round(height * self._scale)))
+            small = cv2.resize(small, size, interpolation=cv2.INTER_AREA)
+        self._current = cv2.GaussianBlur(small, (5, 5), 0)
+
+        if self.reference is None or self.reference.shape != self._current.shape:
+            return None
+
+        mask: np.ndarray = (cv2.absdiff(self._current, self.reference) > self.threshold).astype(np.uint8)
+        if mask.mean() < self.min_changed_fraction:
+            return np.zeros((0, 4))
+
+        mask = cv2.dilate(mask, np.ones((3, 3), np.uint8), iterations=2)
+        count, _, components, _ = cv2.connectedComponentsWithStats(mask)
+        rects = components[1:count, :4].astype(np.float64)
+        regions = np.concatenate([rects[:, :2], rects[:, :2] + rects[:, 2:]], axis=1)
+        regions = regions / self._scale
+        regions[:, :2] -= self.padding
+        regions[:, 2:] += self.padding
+
+        regions, _ = merge_overlapping(clip_boxes(regions, width, height))
+        return np.round(regions)
+
+    def commit(self, regions: Optional[np.ndarray] = None) -> None:
+        """
+        Update the reference with the last analyzed frame
+
+        Args:
+            regions: Regions to update (frame coordinates); None updates the whole frame
+        """
+        if self._current is None:
+            return
+        if regions is None or self.reference is None:
+            self.reference = self._current.copy()
+            return
+
+        height, width = self.reference.shape[:2]
+        for x1, y1, x2, y2 in np.asarray(regions).reshape(-1, 4) * self._scale:
+            x1, y1 = max(0, int(x1)), max(0, int(y1))
+            x2, y2 = min(width, int(np.ceil(x2))), min(height, int(np.ceil(y2)))
+            self.reference[y1:y2, x1:x2] = self._current[y1:y2, x1:x2]
+
+
+@dataclass
+class MotionStats:
+    """Counters of the motion-gated detector"""
+    frames: int = 0
+    static_frames: int = 0  # Previous detections reused
+    partial_frames: int = 0  # Detection on dirty regions only
+    full_frames: int = 0
+    detected_area: float = 0.0  # Sum of the frame fractions passed to the detectors
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary (with the mean detected area per frame)"""
+        data = asdict(self)
+        data["mean_detected_area"] = round(self.detected_area / self.frames, 4) if self.frames else 0.0
+        return data
+
+
+class MotionGatedDetector:
+    """Frame detector that skips static frames and detects only in dirty regions"""
+
+    stats_name = "motion"
+
+    def __init__(
+        self,
+        frame_detector,
+        gate: MotionGate,
+        max_dirty_fraction: float = 0.5,
+        refresh_interval: int = 250
+    ):
+        """
+        Initialize motion-gated detector
+
+        Args:
+            frame_detector: Detector run on full frames and dirty regions, with a
+                detect(frame, crop_origin=None) method (e.g. FrameDetector)
+            gate: Motion gate holding the background model
+            max_dirty_fraction: Above this changed fraction of the frame, the full frame is detected
+            refresh_interval: Run full detection at least every N frames (0 disables)
+        """
+        self.frame_detector = frame_detector
+        self.gate = gate
+        self.max_dirty_fraction = max_dirty_fraction
+        self.refresh_interval = refresh_interval
+        self.detector_calls = 0
+        self.stats = MotionStats()
+        self._previous: Optional[DetectionBatch] = None
+        self._frames_since_full = 0
+
+    def reset(self) -> None:
+        """Start a new stream"""
+        self.gate.reset()
+        self._previous = None
+        self._frames_since_full = 0
+
+    def detect(self, frame: np.ndarray) -> DetectionBatch:
+        """
+        Detect regions of a frame, reusing detections where nothing changed
+
+        Args:
+            frame: RGB frame
+
+        Returns:
+            DetectionBatch for the whole frame
+        """
+        height, width = frame.shape[:2]
+        self.stats.frames += 1
+        self._frames_since_full += 1
+
+        regions = self.gate.changed_regions(frame)
+        previous = self._previous
+        refresh_due = bool(self.refresh_interval) and self._frames_since_full >= self.refresh_interval
+        dirty_fraction = 1.0
+
+        if regions is not None and previous is not None and not refresh_due:
+            if len(regions) == 0:
+                self.stats.static_frames += 1
+                return previous
+            regions = self._expand(regions, previous, width, height)
+            dirty_fraction = box_areas(regions).sum() / (width * height)
+
+        self.detector_calls += 1
+        if regions is None or previous is None or refresh_due or dirty_fraction > self.max_dirty_fraction:
+            detections: DetectionBatch = self.frame_detector.detect(frame)
+            self.gate.commit()
+            self.stats.full_frames += 1
+            self.stats.detected_area += 1.0
+            self._frames_since_full = 0
+        else:
+            detections = self._detect_regions(frame, previous, regions)
+            self.gate.commit(regions)
+            self.stats.partial_frames += 1
+            self.stats.detected_area += dirty_fraction
+
+        self._previous = detections
+        return detections
+
+    def _detect_regions(
+        self,
+        frame: np.ndarray,
+        previous: DetectionBatch,
+        regions: np.ndarray
+    ) -> DetectionBatch:
+        """Replace the previous detections inside the dirty regions with fresh ones"""
+        height, width = frame.shape[:2]
+        outside = ~(iou_matrix(previous.xyxy, regions) > 0).any(axis=1)
+
+        batches = [previous.select(outside)]
+        for x1, y1, x2, y2 in regions.astype(int):
+            crop = np.ascontiguousarray(frame[y1:y2, x1:x2])
+            # Camera profile ROIs are placed in frame coordinates, not rescaled to the crop
+            detections = self.frame_detector.detect(crop, crop_origin=(x1, y1, width, height))
+            batches.append(detections.offset(x1, y1))
+        return DetectionBatch.concatenate(batches).renumber()
+
+    @staticmethod
+    def _expand(
+        regions: np.ndarray,
+        previous: DetectionBatch,
+        width: int,
+        height: int
+    ) -> np.ndarray:
+        """Grow dirty regions to cover the previous boxes they touch"""
+        if len(previous) == 0:
+            return regions
+
+        boxes = previous.xyxy.astype(np.float64)
+        touching = iou_matrix(regions, boxes) > 0
+        expanded = regions.astype(np.float64)
+        for index in range(len(expanded)):
+            hits = boxes[touching[index]]
+            if len(hits):
+                expanded[index, :2] = np.minimum(expanded[index, :2], hits[:, :2].min(axis=0))
+                expanded[index, 2:] = np.maximum(expanded[index, 2:], hits[:, 2:].max(axis=0))
+
+        expanded, _ = merge_overlapping(clip_boxes(expanded, width, height))
+        return np.round(expanded)
@@ -0,0 +1,509 @@
+"""Streaming video anonymization
+
+Frames are decoded lazily, passed through the detectors and the anonymizer,
+and re-encoded to an output file. Decode, inference and encode run in separate
+stages connected by bounded queues, so they overlap and memory use does not
+depend on the clip length.
+"""
+
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, Optional, Tuple, TypeVar, Union
+
+import cv2
+import numpy as np
+
+from src.anonymization.anonymizer import Anonymizer
+from src.detection.base import Detector, DetectionBatch
+from src.detection.boxes import clean_detections
+from src.detection.roi import CameraProfile, detect_in_roi
+from src.utils.exceptions import VideoProcessingError
+from src.video.motion import MotionGate, MotionGatedDetector
+from src.video.tracking import DetectionTracker, TrackedFrameDetector
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Marks the end of the frame stream in the stage queues
+_END = object()
+
+D = TypeVar("D")
+
+
+@dataclass
+class VideoInfo:
+    """Basic properties of a video file"""
+    fps: float
+    width: int
+    height: int
+    frame_count: int  # As reported by the container (may be 0 or approximate)
+
+
+def probe_video(path: Union[str, Path]) -> VideoInfo:
+    """
+    Read frame rate, size and frame count of a video
+
+    Args:
+        path: Path to the video file
+
+    Returns:
+        VideoInfo
+
+    Raises:
+        VideoProcessingError: If the video cannot be opened
+    """
+    capture = cv2.VideoCapture(str(path))
+    if not capture.isOpened():
+        raise VideoProcessingError(f"Cannot open video: {path}")
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        return VideoInfo(
+            fps=fps if fps and fps > 0 else 25.0,
+            width=int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            height=int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            frame_count=max(0, int(capture.get(cv2.CAP_PROP_FRAME_COUNT)))
+        )
+    finally:
+        capture.release()
+
+
+def read_frames(path: Union[str, Path]) -> Generator[np.ndarray, None, None]:
+    """
+    Decode a video lazily, one RGB frame at a time
+
+    Args:
+        path: Path to the video file
+
+    Yields:
+        Frames as RGB numpy arrays
+
+    Raises:
+        VideoProcessingError: If the video cannot be opened
+    """
+    capture = cv2.VideoCapture(str(path))
+    if not capture.isOpened():
+        raise VideoProcessingError(f"Cannot open video: {path}")
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    finally:
+        capture.release()
+
+
+class FrameDetector:
+    """Runs face and plate detection on a single frame"""
+
+    def __init__(
+        self,
+        face_detector: Detector,
+        plate_detector: Optional[Detector] = None,
+        nms_iou_threshold: float = 0.5,
+        merge_overlapping_regions: bool = True,
+        merge_iou_threshold: float = 0.0,
+        lock: Optional[threading.Lock] = None,
+        profile: Optional[CameraProfile] = None
+    ):
+        """
+        Initialize frame detector
+
+        Args:
+            face_detector: Face detector
+            plate_detector: Optional plate detector (None disables plates)
+            nms_iou_threshold: IoU threshold for duplicate removal
+            merge_overlapping_regions: Whether overlapping fills are merged
+            merge_iou_threshold: IoU above which boxes are merged
+            lock: Optional lock held while the models run (for shared detectors)
+            profile: Optional camera profile restricting each detector to its ROIs
+        """
+        self.face_detector = face_detector
+        self.plate_detector = plate_detector
+        self.nms_iou_threshold = nms_iou_threshold
+        self.merge_overlapping_regions = merge_overlapping_regions
+        self.merge_iou_threshold = merge_iou_threshold
+        self.lock = lock
+        self.profile = profile
+        self.detector_calls = 0
+
+    def detect(
+        self,
+        frame: np.ndarray,
+        crop_origin: Optional[Tuple[int, int, int, int]] = None
+    ) -> DetectionBatch:
+        """
+        Detect faces and plates in a frame
+
+        Args:
+            frame: RGB frame
+            crop_origin: (x, y, frame width, frame height) when the frame is a crop of a
+                larger frame, so the profile ROIs stay in frame coordinates
+
+        Returns:
+            Cleaned DetectionBatch with faces and plates
+        """
+        self.detector_calls += 1
+        height, width = frame.shape[:2]
+
+        with self.lock or nullcontext():
+            batches = [detect_in_roi(self.face_detector, frame, "face", self.profile, crop_origin)]
+            if self.plate_detector is not None:
+                try:
+                    batches.append(detect_in_roi(self.plate_detector, frame, "plate", self.profile, crop_origin))
+                except Exception as e:
+                    logger.warning("License plate detection failed on frame: %s", e)
+
+        return DetectionBatch.concatenate(
+            clean_detections(
+                batch,
+                width,
+                height,
+                nms_iou_threshold=self.nms_iou_threshold,
+                merge=self.merge_overlapping_regions,
+                merge_iou_threshold=self.merge_iou_threshold
+            )
+            for batch in batches
+        )
+
+
+def build_frame_detector(
+    settings,
+    face_detector: Detector,
+    plate_detector: Optional[Detector] = None,
+    lock: Optional[threading.Lock] = None,
+    profile: Optional[CameraProfile] = None
+) -> Union[FrameDetector, MotionGatedDetector, TrackedFrameDetector]:
+    """
+    Build the per-frame detector configured in the settings
+
+    Motion gating (for static cameras) skips detection on unchanged frames
+    and restricts it to dirty regions. With a keyframe interval above 1, full
+    detection only runs on keyframes and boxes are tracked in between (see
+    wrap_frame_detector).
+
+    Args:
+        settings: Settings instance
+        face_detector: Face detector
+        plate_detector: Plate detector (ignored when plate detection is disabled)
+        lock: Optional lock held while the models run
+        profile: Optional camera profile restricting each detector to its ROIs
+
+    Returns:
+        Object with a detect(frame) method and a detector_calls counter
+    """
+    frame_detector = FrameDetector(
+        face_detector,
+        plate_detector if settings.enable_plate_detection else None,
+        nms_iou_threshold=settings.nms_iou_threshold,
+        merge_overlapping_regions=settings.merge_overlapping_regions,
+        merge_iou_threshold=settings.merge_iou_threshold,
+        lock=lock,
+        profile=profile
+    )
+    return wrap_frame_detector(settings, frame_detector)
+
+
+def wrap_frame_detector(
+    settings,
+    frame_detector: D
+) -> Union[D, MotionGatedDetector, TrackedFrameDetector]:
+    """
+    Add the motion gating and keyframe tracking configured in the settings
+
+    Args:
+        settings: Settings instance
+        frame_detector: Object with a detect(frame) method and a detector_calls counter
+
+    Returns:
+        The wrapped (or unchanged) frame detector
+    """
+    detector: Union[D, MotionGatedDetector] = frame_detector
+    if settings.video_motion_gating:
+        gate = MotionGate(
+            analysis_width=settings.video_motion_analysis_width,
+            threshold=settings.video_motion_threshold,
+            min_changed_fraction=settings.video_motion_min_changed_fraction,
+            padding=settings.video_motion_padding
+        )
+        detector = MotionGatedDetector(
+            frame_detector,
+            gate,
+            max_dirty_fraction=settings.video_motion_max_dirty_fraction,
+            refresh_interval=settings.video_motion_refresh_interval
+        )
+    if settings.video_keyframe_interval <= 1:
+        return detector
+
+    tracker = DetectionTracker(
+        keyframe_interval=settings.video_keyframe_interval,
+        iou_threshold=settings.video_track_iou_threshold,
+        max_age=settings.video_track_max_age,
+        min_track_confidence=settings.video_track_min_confidence,
+        confidence_decay=settings.video_track_confidence_decay,
+        padding=settings.video_track_padding
+    )
+    return TrackedFrameDetector(detector, tracker)
+
+
+@dataclass
+class VideoStats:
+    """Throughput and stage timings of a video run"""
+    frames: int = 0
+    total_frames: int = 0  # Expected frames (from the container, may be 0)
+    faces: int = 0
+    plates: int = 0
+    detector_calls: int = 0
+    detector_calls_saved: int = 0  # Frames served by the tracker
+    decode_seconds: float = 0.0
+    inference_seconds: float = 0.0
+    encode_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+    source_fps: float = 0.0
+    detector_stats: Dict[str, Any] = field(default_factory=dict)  # Tracking/motion counters
+
+    @property
+    def fps(self) -> float:
+        """Processed frames per second (wall clock)"""
+        return self.frames / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        data = asdict(self)
+        data["fps"] = round(self.fps, 2)
+        return data
+
+
+class VideoAnonymizer:
+    """Anonymizes video files frame by frame in a bounded three-stage pipeline"""
+
+    def __init__(
+        self,
+        frame_detector: Any,
+        anonymizer: Anonymizer,
+        queue_size: int = 8,
+        codec: str = "mp4v",
+        log_every: int = 100
+    ):
+        """
+        Initialize video anonymizer
+
+        Args:
+            frame_detector: Detector applied to each frame (FrameDetector, a wrapper from
+                wrap_frame_detector or RemoteFrameDetector)
+            anonymizer: Anonymizer used to fill detected regions
+            queue_size: Frames buffered between stages (bounds memory use)
+            codec: FourCC code of the output video
+            log_every: Log progress every N frames (0 disables)
+        """
+        self.frame_detector = frame_detector
+        self.anonymizer = anonymizer
+        self.queue_size = max(1, queue_size)
+        self.codec = codec
+        self.log_every = log_every
+        self.logger = get_logger(self.__class__.__name__)
+
+    def process(
+        self,
+        input_path: Union[str, Path],
+        output_path: Union[str, Path],
+        progress: Optional[Callable[[VideoStats], None]] = None
+    ) -> VideoStats:
+        """
+        Anonymize a video file
+
+        Args:
+            input_path: Source video
+            output_path: Destination video (container chosen by extension)
+            progress: Optional callback invoked with the running stats
+
+        Returns:
+            VideoStats of the run
+
+        Raises:
+            VideoProcessingError: If decoding or encoding fails
+        """
+        info = probe_video(input_path)
+        stats = VideoStats(total_frames=info.frame_count, source_fps=info.fps)
+        if hasattr(self.frame_detector, "reset"):
+            self.frame_detector.reset()
+        calls_before = self.frame_detector.detector_calls
+
+        decoded: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        anonymized: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors: list = []
+
+        decoder = threading.Thread(
+            target=self._decode_stage,
+            args=(input_path, decoded, stop, stats, errors),
+            name="video-decode",
+            daemon=True
+        )
+        encoder = threading.Thread(
+            target=self._encode_stage,
+            args=(output_path, info.fps, anonymized, stop, stats, errors),
+            name="video-encode",
+            daemon=True
+        )
+
+        self.logger.info(
+            "Anonymizing video %s: %dx%d @ %.1ffps, ~%d frames",
+            input_path, info.width, info.height, info.fps, info.frame_count
+        )
+        start_time = time.perf_counter()
+        decoder.start()
+        encoder.start()
+
+        try:
+            while True:
+                frame = _get(decoded, stop)
+                if frame is _END or frame is None:
+                    break
+
+                inference_start = time.perf_counter()
+                detections = self.frame_detector.detect(frame)
+                self.anonymizer.fill_array(frame, detections)
+                stats.inference_seconds += time.perf_counter() - inference_start
+
+                face_count = int(np.count_nonzero(detections.labels == "face"))
+                stats.faces += face_count
+                stats.plates += len(detections) - face_count
+                stats.frames += 1
+                stats.elapsed_seconds = time.perf_counter() - start_time
+
+                if not _put(anonymized, frame, stop):
+                    break
+
+                if self.log_every and stats.frames % self.log_every == 0:
+                    self.logger.info(
+                        "Processed %d/%s frames (%.1f fps)",
+                        stats.frames, stats.total_frames or "?", stats.fps
+                    )
+                if progress is not None:
+                    progress(stats)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(anonymized, _END, stop)
+            decoder.join()
+            encoder.join()
+            stats.detector_calls = self.frame_detector.detector_calls - calls_before
+            stats.detector_calls_saved = max(0, stats.frames - stats.detector_calls)
+            stats.detector_stats = _detector_stats(self.frame_detector)
+            stats.elapsed_seconds = time.perf_counter() - start_time
+
+        if errors:
+            error = errors[0]
+            if isinstance(error, VideoProcessingError):
+                raise error
+            raise VideoProcessingError(f"Video anonymization failed: {str(error)}") from error
+
+        self.logger.info(
+            "Video anonymized: %d frames in %.2fs (%.1f fps), %d faces, %d plates, "
+            "%d detector calls (%d saved)",
+            stats.frames, stats.elapsed_seconds, stats.fps, stats.faces, stats.plates,
+            stats.detector_calls, stats.detector_calls_saved
+        )
+        return stats
+
+    def _decode_stage(
+        self,
+        input_path: Union[str, Path],
+        decoded: queue.Queue,
+        stop: threading.Event,
+        stats: VideoStats,
+        errors: list
+    ) -> None:
+        """Decode frames into the bounded queue"""
+        try:
+            frames = read_frames(input_path)
+            while not stop.is_set():
+                decode_start = time.perf_counter()
+                frame = next(frames, None)
+                stats.decode_seconds += time.perf_counter() - decode_start
+                if frame is None or not _put(decoded, frame, stop):
+                    break
+            frames.close()
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(decoded, _END, stop)
+
+    def _encode_stage(
+        self,
+        output_path: Union[str, Path],
+        fps: float,
+        anonymized: queue.Queue,
+        stop: threading.Event,
+        stats: VideoStats,
+        errors: list
+    ) -> None:
+        """Encode anonymized frames from the bounded queue"""
+        writer = None
+        try:
+            while True:
+                frame = _get(anonymized, stop)
+                if frame is _END or frame is None:
+                    break
+
+                encode_start = time.perf_counter()
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+                    writer = cv2.VideoWriter(
+                        str(output_path),
+                        cv2.VideoWriter.fourcc(*self.codec),
+                        fps,
+                        (width, height)
+                    )
+                    if not writer.isOpened():
+                        raise VideoProcessingError(
+                            f"Cannot open video writer for {output_path} (codec {self.codec})"
+                        )
+                writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+                stats.encode_seconds += time.perf_counter() - encode_start
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            if writer is not None:
+                writer.release()
+
+
+def _detector_stats(frame_detector) -> Dict[str, Any]:
+    """Collect the counters of wrapped frame detectors (tracking, motion)"""
+    collected = {}
+    while frame_detector is not None:
+        name = getattr(frame_detector, "stats_name", None)
+        if name is not None:
+            collected[name] = frame_detector.stats.to_dict()
+        frame_detector = getattr(frame_detector, "frame_detector", None)
+    return collected
+
+
+def _put(target: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Put an item, giving up when the pipeline is stopped (returns success)"""
+    while True:
+        try:
+            target.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            if stop.is_set():
+                return False
+
+
+def _get(source: queue.Queue, stop: threading.Event) -> Any:
+    """Get an item, returning None when the pipeline is stopped"""
+    while True:
+        try:
+            return source.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return None
@@ -0,0 +1,297 @@
+"""Frame-to-frame tracking of detections
+
+Full detection runs only on keyframes (every Nth frame, or earlier when a
+track becomes uncertain). In between, tracked boxes are predicted with a
+constant-velocity model, so intermediate frames are anonymized without
+running the detectors.
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.detection.base import DetectionBatch
+from src.detection.boxes import clip_boxes, iou_matrix
+
+
+class Track:
+    """A tracked box with a constant-velocity motion model"""
+
+    __slots__ = ("track_id", "label", "box", "velocity", "confidence", "misses", "frames_since_observed")
+
+    def __init__(self, track_id: int, label: str, box: np.ndarray, confidence: float):
+        """
+        Initialize track
+
+        Args:
+            track_id: Unique track id
+            label: Detection label ("face" or "plate")
+            box: Box (x1, y1, x2, y2)
+            confidence: Initial confidence (the detection score)
+        """
+        self.track_id = track_id
+        self.label = label
+        self.box = np.asarray(box, dtype=np.float64)
+        self.velocity = np.zeros(4)
+        self.confidence = confidence
+        self.misses = 0  # Keyframes without a matching detection
+        self.frames_since_observed = 0
+
+    def predict(self, confidence_decay: float) -> None:
+        """Advance the box by one frame"""
+        self.box = self.box + self.velocity
+        self.confidence *= confidence_decay
+        self.frames_since_observed += 1
+
+    def observe(self, box: np.ndarray, confidence: float, smoothing: float) -> None:
+        """
+        Correct the track with a matched detection
+
+        Args:
+            box: Detected box (x1, y1, x2, y2)
+            confidence: Detection score
+            smoothing: Weight of the new velocity estimate (0-1)
+        """
+        if self.frames_since_observed > 0:
+            # self.box is the prediction; the residual corrects the velocity
+            observed_velocity = self.velocity + (box - self.box) / self.frames_since_observed
+            self.velocity = smoothing * observed_velocity + (1 - smoothing) * self.velocity
+        self.box = np.asarray(box, dtype=np.float64)
+        self.confidence = confidence
+        self.misses = 0
+        self.frames_since_observed = 0
+
+
+@dataclass
+class TrackerStats:
+    """Keyframe and detector-call counters"""
+    frames: int = 0
+    keyframes: int = 0
+    forced_keyframes: int = 0  # Keyframes triggered by uncertain tracks
+    tracked_frames: int = 0  # Frames served from predicted tracks
+    tracks_created: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary (with detector calls saved)"""
+        data = asdict(self)
+        data["detector_calls_saved"] = self.tracked_frames
+        return data
+
+
+class DetectionTracker:
+    """IoU association plus constant-velocity prediction over detection batches"""
+
+    def __init__(
+        self,
+        keyframe_interval: int = 5,
+        iou_threshold: float = 0.3,
+        max_age: int = 1,
+        min_track_confidence: float = 0.5,
+        confidence_decay: float = 0.9,
+        padding: float = 0.05,
+        velocity_smoothing: float = 0.5
+    ):
+        """
+        Initialize tracker
+
+        Args:
+            keyframe_interval: Run full detection every N frames
+            iou_threshold: Minimum IoU to associate a detection with a track
+            max_age: Keyframes a track survives without a matching detection
+            min_track_confidence: A track below this forces the next frame to be a keyframe
+            confidence_decay: Confidence multiplier per predicted frame
+            padding: Box growth per predicted frame, as a fraction of box size
+            velocity_smoothing: Weight of new velocity estimates (0-1)
+        """
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_track_confidence = min_track_confidence
+        self.confidence_decay = confidence_decay
+        self.padding = padding
+        self.velocity_smoothing = velocity_smoothing
+        self.tracks: List[Track] = []
+        self.stats = TrackerStats()
+        self._next_id = 1
+        self._frames_since_keyframe: Optional[int] = None
+
+    def reset(self) -> None:
+        """Drop all tracks (the counters are kept)"""
+        self.tracks = []
+        self._frames_since_keyframe = None
+
+    def needs_detection(self) -> bool:
+        """Whether the next frame must run full detection"""
+        if self._frames_since_keyframe is None:
+            return True
+        if self._frames_since_keyframe + 1 >= self.keyframe_interval:
+            return True
+        return any(track.confidence < self.min_track_confidence for track in self.tracks)
+
+    def update(self, detections: DetectionBatch) -> DetectionBatch:
+        """
+        Process a keyframe: predict tracks to this frame and associate detections
+
+        Args:
+            detections: Detections of the keyframe
+
+        Returns:
+            Boxes of all live tracks
+        """
+        forced = (
+            self._frames_since_keyframe is not None
+            and self._frames_since_keyframe + 1 < self.keyframe_interval
+        )
+        self.stats.frames += 1
+        self.stats.keyframes += 1
+        self.stats.forced_keyframes += int(forced)
+        self._frames_since_keyframe = 0
+
+        for track in self.tracks:
+            track.predict(self.confidence_decay)
+
+        detection_boxes = detections.xyxy.astype(np.float64)
+        matched_tracks = set()
+        matched_detections = set()
+
+        for label in set(detections.labels.tolist()) | {t.label for t in self.tracks}:
+            track_indices = [i for i, t in enumerate(self.tracks) if t.label == label]
+            detection_indices = np.flatnonzero(detections.labels == label)
+            if not track_indices or len(detection_indices) == 0:
+                continue
+
+            track_boxes = np.stack([self.tracks[i].box for i in track_indices])
+            ious = iou_matrix(track_boxes, detection_boxes[detection_indices])
+
+            # Greedy association, best IoU first
+            for flat in np.argsort(-ious, axis=None, kind="stable"):
+                row, col = np.unravel_index(flat, ious.shape)
+                if ious[row, col] <= self.iou_threshold:
+                    break
+                track_index, detection_index = track_indices[row], int(detection_indices[col])
+                if track_index in matched_tracks or detection_index in matched_detections:
+                    continue
+                self.tracks[track_index].observe(
+                    detection_boxes[detection_index],
+                    float(detections.scores[detection_index]),
+                    self.velocity_smoothing
+                )
+                matched_tracks.add(track_index)
+                matched_detections.add(detection_index)
+
+        # Age unmatched tracks, drop the stale ones
+        survivors = []
+        for index, track in enumerate(self.tracks):
+            if index not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_age:
+                    continue
+            survivors.append(track)
+        self.tracks = survivors
+
+        # Start tracks for unmatched detections
+        for index in range(len(detections)):
+            if index in matched_detections:
+                continue
+            self.tracks.append(Track(
+                self._next_id,
+                str(detections.labels[index]),
+                detection_boxes[index],
+                float(detections.scores[index])
+            ))
+            self._next_id += 1
+            self.stats.tracks_created += 1
+
+        return self._current()
+
+    def predict(self) -> DetectionBatch:
+        """
+        Process an intermediate frame without detection
+
+        Returns:
+            Predicted boxes of all live tracks
+        """
+        self.stats.frames += 1
+        self.stats.tracked_frames += 1
+        self._frames_since_keyframe = (self._frames_since_keyframe or 0) + 1
+        for track in self.tracks:
+            track.predict(self.confidence_decay)
+        return self._current()
+
+    def _current(self) -> DetectionBatch:
+        """Current track boxes, padded by their prediction uncertainty"""
+        if not self.tracks:
+            return DetectionBatch.empty()
+
+        boxes = np.stack([track.box for track in self.tracks])
+        growth = np.array([self.padding * track.frames_since_observed for track in self.tracks])
+        size = boxes[:, 2:] - boxes[:, :2]
+        pad = np.repeat(growth[:, None], 2, axis=1) * size / 2
+        padded = np.concatenate([boxes[:, :2] - pad, boxes[:, 2:] + pad], axis=1)
+
+        return DetectionBatch.from_xyxy(
+            np.round(padded),
+            np.array([track.confidence for track in self.tracks]),
+            [track.label for track in self.tracks],
+            np.array([track.track_id for track in self.tracks])
+        )
+
+
+class TrackedFrameDetector:
+    """Frame detector that runs full detection only on keyframes"""
+
+    stats_name = "tracking"
+
+    def __init__(self, frame_detector, tracker: DetectionTracker):
+        """
+        Initialize tracked frame detector
+
+        Args:
+            frame_detector: Detector used on keyframes (e.g. FrameDetector)
+            tracker: Tracker predicting boxes between keyframes
+        """
+        self.frame_detector = frame_detector
+        self.tracker = tracker
+
+    @property
+    def detector_calls(self) -> int:
+        """Number of full detections run"""
+        return int(self.frame_detector.detector_calls)
+
+    @property
+    def stats(self) -> TrackerStats:
+        """Tracker counters"""
+        return self.tracker.stats
+
+    def reset(self) -> None:
+        """Start a new stream"""
+        self.tracker.reset()
+        if hasattr(self.frame_detector, "reset"):
+            self.frame_detector.reset()
+
+    def detect(self, frame: np.ndarray) -> DetectionBatch:
+        """
+        Detect (keyframes) or predict (intermediate frames) regions of a frame
+
+        Args:
+            frame: RGB frame
+
+        Returns:
+            DetectionBatch clipped to the frame
+        """
+        if self.tracker.needs_detection():
+            detections = self.tracker.update(self.frame_detector.detect(frame))
+        else:
+            detections = self.tracker.predict()
+
+        if len(detections) == 0:
+            return detections
+        height, width = frame.shape[:2]
+        clipped = DetectionBatch.from_xyxy(
+            clip_boxes(detections.xyxy, width, height),
+            detections.scores,
+            detections.labels,
+            detections.ids
+        )
+        return clipped.select((clipped.boxes[:, 2] > 0) & (clipped.boxes[:, 3] > 0))
@@ -1,8 +1,21 @@
 """Tests for API endpoints"""
 
+import base64
+import io
+
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
+from PIL import Image
+
+from src.anonymization import Anonymizer, EncoderOptions
+from src.anonymization.engine import ImageTask, PipelineEngine, Stage
 from src.api.app import create_app
+from src.api.routes import anonymization as route
+from src.api.routes import jobs as jobs_route
+from src.api.routes import video as video_route
+from src.detection.base import DetectionBatch
+from src.jobs import SQLiteJobQueue
 
 
 @pytest.fixture
@@ -54,3 +67,79 @@ def test_anonymize_oversized_file(client):
     response = client.post("/api/v1/anonymize", files=files)
     assert response.status_code in [400, 413]
 
+
+def test_metrics_endpoint(client):
+    """Test metrics are served in the Prometheus text format"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE anonymizer_stage_duration_seconds histogram" in response.text
+
+
+def test_full_pipeline_answers_503(client, monkeypatch):
+    """Test a request that finds the pipeline queue full is turned away with Retry-After"""
+    engine = PipelineEngine([Stage("decode", lambda task: None, queue_size=1)])
+    engine.submit(object())
+    monkeypatch.setattr(route, "get_pipeline_engine", lambda: engine)
+    monkeypatch.setattr(route, "get_components", lambda: None)
+    monkeypatch.setattr(route.settings, "pipeline_submit_timeout", 0.01)
+
+    files = {"file": ("test.jpg", b"image", "image/jpeg")}
+    response = client.post("/api/v1/anonymize", files=files)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_encode_stage_scales_boxes_to_output(monkeypatch):
+    """Test response boxes are in the frame of an output downscaled by max_output_dimension"""
+    monkeypatch.setattr(route, "anonymizer", Anonymizer())
+    task = ImageTask(image_bytes=b"", encoder_options=EncoderOptions(format="png", max_dimension=60))
+    task.processed_image = Image.new("RGB", (120, 80))
+    task.face_detections = DetectionBatch([(20, 10, 40, 20)], [0.9], "face")
+    task.plate_detections = DetectionBatch([(60, 40, 30, 10)], [0.8], "plate")
+
+    route.encode_image(task)
+
+    output = Image.open(io.BytesIO(base64.b64decode(task.anonymized_image)))
+    assert output.size == (60, 40)
+    assert task.face_detections.boxes.tolist() == [[10, 5, 20, 10]]
+    assert task.plate_detections.boxes.tolist() == [[30, 20, 15, 5]]
+    assert tuple(np.asarray(output)[7, 15]) == (255, 255, 0)
+
+
+def test_finished_video_jobs_are_evicted_with_their_files(tmp_path, monkeypatch):
+    """Test finished video jobs are dropped after the TTL or beyond the retention count"""
+    monkeypatch.setattr(video_route.settings, "video_job_ttl_seconds", 60.0)
+    monkeypatch.setattr(video_route.settings, "video_max_finished_jobs", 1)
+    monkeypatch.setattr(video_route, "jobs", {})
+    for job_id, finished_at in (("old", 0.0), ("recent", 95.0), ("newest", 99.0), ("running", None)):
+        output_path = tmp_path / f"{job_id}.anonymized.mp4"
+        output_path.write_bytes(b"video")
+        video_route.jobs[job_id] = video_route.VideoJob(
+            job_id=job_id,
+            input_path=tmp_path / f"{job_id}.mp4",
+            output_path=output_path,
+            finished_at=finished_at
+        )
+
+    assert video_route.evict_finished_jobs(now=100.0) == 2
+    assert set(video_route.jobs) == {"newest", "running"}
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "newest.anonymized.mp4", "running.anonymized.mp4"
+    ]
+
+
+def test_failed_enqueue_leaves_no_stored_input(tmp_path, monkeypatch):
+    """Test the uploaded input is removed when the job cannot be queued"""
+    class FullQueue(SQLiteJobQueue):
+        def enqueue(self, payload, max_attempts=3):
+            raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(jobs_route.settings, "jobs_dir", str(tmp_path))
+    monkeypatch.setattr(jobs_route, "job_queue", FullQueue(tmp_path / "queue.db"))
+    image = io.BytesIO()
+    Image.new("RGB", (32, 32)).save(image, format="PNG")
+
+    with pytest.raises(RuntimeError):
+        jobs_route.store_and_enqueue(image.getvalue(), "png", None, "a.png")
+    assert list((tmp_path / "inputs").iterdir()) == []
@@ -0,0 +1,170 @@
+"""Tests for directory batch processing"""
+
+import logging
+import os
+from concurrent.futures import Future
+from pathlib import Path
+
+from PIL import Image
+
+from src.batch import DirectoryAnonymizer, FolderWatcher, Manifest, iter_images
+from src.batch.watch import is_output
+from src.config import get_settings
+from src.utils.logger import APP_LOGGER, setup_logger, shutdown_logging
+
+
+def test_iter_images_walks_tree_and_skips_output(tmp_path):
+    """Test images are found recursively in stable order, excluding the output tree"""
+    for name in ["b.jpg", "a/c.PNG", "a/notes.txt", "out/old.png"]:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+
+    found = [path.relative_to(tmp_path).as_posix() for path in iter_images(tmp_path, exclude=tmp_path / "out")]
+
+    assert found == ["b.jpg", "a/c.PNG"]
+
+
+def test_manifest_resumes_after_truncated_line(tmp_path):
+    """Test a crash mid-write loses only the partial record"""
+    source = tmp_path / "image.jpg"
+    source.write_bytes(b"data")
+    stat = os.stat(source)
+    path = tmp_path / "manifest.jsonl"
+
+    with Manifest(path) as manifest:
+        manifest.append({"path": "image.jpg", "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "status": "ok"})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"path": "other.jpg", "sta')
+
+    manifest = Manifest(path).load()
+    assert manifest.is_current("image.jpg", stat)
+    assert manifest.get("other.jpg") is None
+
+    manifest.append({"path": "other.jpg", "status": "error"})
+    manifest.close()
+    assert Manifest(path).load().get("other.jpg")["status"] == "error"
+
+
+def test_manifest_detects_changed_files(tmp_path):
+    """Test files modified after processing are not skipped"""
+    source = tmp_path / "image.jpg"
+    source.write_bytes(b"data")
+    stat = os.stat(source)
+    manifest = Manifest(tmp_path / "manifest.jsonl")
+    manifest.append({"path": "image.jpg", "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "status": "ok"})
+    manifest.close()
+
+    source.write_bytes(b"changed data")
+    assert not manifest.is_current("image.jpg", os.stat(source))
+
+
+def test_sources_sharing_a_stem_get_separate_outputs(tmp_path, monkeypatch):
+    """Test a.jpg and a.png are not written to the same a.png output"""
+    monkeypatch.setenv("FACE_DETECTION_MODEL", "stub")
+    monkeypatch.setenv("PLATE_DETECTION_MODEL", "stub")
+    monkeypatch.setenv("STUB_DETECTOR_LATENCY_MS", "0")
+    get_settings.cache_clear()
+    (tmp_path / "in").mkdir()
+    for name in ["a.jpg", "a.png", "b.jpg"]:
+        Image.new("RGB", (64, 48)).save(tmp_path / "in" / name)
+    try:
+        stats = DirectoryAnonymizer(
+            tmp_path / "in", tmp_path / "out", workers=1, output_format="png"
+        ).run()
+    finally:
+        get_settings.cache_clear()
+
+    assert (stats.processed, stats.failed) == (3, 0)
+    outputs = sorted(path.name for path in (tmp_path / "out").glob("*.png"))
+    assert outputs == ["a.jpg.png", "a.png.png", "b.png"]
+
+
+def test_worker_processes_write_their_log_records(tmp_path, monkeypatch, capfd):
+    """Test records logged in the worker processes reach the console"""
+    monkeypatch.setenv("FACE_DETECTION_MODEL", "stub")
+    monkeypatch.setenv("PLATE_DETECTION_MODEL", "stub")
+    monkeypatch.setenv("STUB_DETECTOR_LATENCY_MS", "0")
+    monkeypatch.setenv("LOG_LEVEL", "DEBUG")
+    get_settings.cache_clear()
+    (tmp_path / "in").mkdir()
+    Image.new("RGB", (64, 48)).save(tmp_path / "in" / "a.jpg")
+    app_logger = logging.getLogger(APP_LOGGER)
+    previous_level = app_logger.level
+    setup_logger(APP_LOGGER, level="DEBUG")
+    try:
+        DirectoryAnonymizer(tmp_path / "in", tmp_path / "out", workers=1).run()
+    finally:
+        shutdown_logging()
+        app_logger.setLevel(previous_level)
+        get_settings.cache_clear()
+
+    # Only the workers run detection
+    assert "Running face detection" in capfd.readouterr().out
+
+
+class RecordingPool:
+    """Executor stand-in that records submissions"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+        return Future()
+
+
+def test_watcher_waits_for_files_to_settle(tmp_path):
+    """Test files are only submitted once size and mtime stop changing"""
+    watcher = FolderWatcher(
+        tmp_path / "uploads",
+        tmp_path / "originals",
+        tmp_path / "failed",
+        settle_seconds=0.0,
+        output_format="jpeg",
+        use_inotify=False
+    )
+    source = tmp_path / "uploads" / "frame.png"
+    source.parent.mkdir()
+    source.write_bytes(b"partial")
+    (tmp_path / "uploads" / "old.anonymized.png").write_bytes(b"output")
+    pool = RecordingPool()
+
+    watcher.poll(pool)
+    assert pool.submitted == []
+
+    source.write_bytes(b"partial write grew")
+    watcher.poll(pool)
+    assert pool.submitted == []
+
+    watcher.poll(pool)
+    assert [Path(args[0]).name for args in pool.submitted] == ["frame.png"]
+    assert Path(pool.submitted[0][1]).name == "frame.anonymized.jpg"
+
+
+def test_only_watcher_output_names_are_ignored():
+    """Test inputs that merely contain the output marker are still ingested"""
+    assert is_output(Path("frame.anonymized.jpg"))
+    assert is_output(Path("frame.anonymized.png"))
+    assert not is_output(Path("frame.anonymized-copy.jpg"))
+    assert not is_output(Path("frame.anonymized.final.png"))
+
+
+def test_watcher_outputs_of_sources_sharing_a_stem_do_not_collide(tmp_path):
+    """Test a.jpg and a.png get their own outputs, also when a.png arrives after a.jpg was handled"""
+    watcher = FolderWatcher(tmp_path / "in", tmp_path / "originals", tmp_path / "failed", output_format="png")
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "b.jpg").write_bytes(b"x")
+    assert watcher.output_paths(tmp_path / "in" / "b.jpg")[0].name == "b.anonymized.png"
+
+    for name in ("a.jpg", "a.png"):
+        (tmp_path / "in" / name).write_bytes(b"x")
+    names = [path.name for name in ("a.jpg", "a.png") for path in watcher.output_paths(tmp_path / "in" / name)]
+    assert names == [
+        "a.jpg.anonymized.png", "a.jpg.anonymized.json", "a.png.anonymized.png", "a.png.anonymized.json"
+    ]
+
+    # b.jpg was anonymized and moved away; a later b.png must not overwrite its output
+    (tmp_path / "in" / "b.jpg").rename(tmp_path / "in" / "b.anonymized.png")
+    (tmp_path / "in" / "b.png").write_bytes(b"x")
+    assert watcher.output_paths(tmp_path / "in" / "b.png")[0].name == "b.png.anonymized.png"
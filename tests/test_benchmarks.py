@@ -0,0 +1,74 @@
+"""Tests for the micro-benchmark harness"""
+
+from benchmarks.cases import build_cases
+from benchmarks.harness import Case, compare, load_results, run_case, save_results
+
+
+def test_run_case_reports_percentiles_and_allocations(tmp_path):
+    """Test a case is timed, its allocations traced and the baseline round-trips"""
+    case = Case("allocate", "tiny", lambda: (lambda: bytearray(256 * 1024)), {"kb": 256})
+    result = run_case(case, iterations=5, warmup=1)
+
+    assert result.key == "allocate[tiny,kb=256]"
+    assert result.iterations == 5
+    assert 0 <= result.p50_ms <= result.p95_ms
+    assert result.peak_alloc_kb >= 256
+
+    baseline = load_results(save_results([result], tmp_path / "baseline.json"))
+    (comparison,) = compare([result], baseline)
+    assert comparison.change == 0.0
+
+
+def test_cases_cover_components_at_each_size():
+    """Test every component has a case per frame size"""
+    keys = [case.key for case in build_cases(["vga"])]
+    assert "anonymize[vga,boxes=100]" in keys
+    assert "encode_image[vga,format=png]" in keys
+    assert "detect_plates_with_contours[vga]" in keys
+    assert len({case.name for case in build_cases(["vga"])}) == 7
+
+
+def test_load_test_summary_separates_errors_and_unavailable():
+    """Test a load test level reports percentiles of successes and 503s separately from other errors"""
+    from benchmarks.loadtest import RequestRecord, parse_mix, summarize
+
+    records = [RequestRecord("vga", 200, 0.01 * i) for i in range(1, 9)]
+    records += [RequestRecord("4k", 503, 0.001), RequestRecord("4k", 0, 5.0, "timeout")]
+    report = summarize(4, records, elapsed=2.0)
+
+    assert report.throughput == 4.0
+    assert report.errors == 2 and report.unavailable == 1
+    assert report.unavailable_rate == 0.1
+    assert report.max_ms == 80.0
+    assert report.by_size["4k"] == {"requests": 2, "p50_ms": 0.0, "p95_ms": 0.0}
+    assert parse_mix("vga=3,4k=1") == {"vga": 0.75, "4k": 0.25}
+
+
+def test_stub_detector_returns_boxes_without_model():
+    """Test the stub detector returns the configured boxes inside the image"""
+    import numpy as np
+
+    from src.detection.stub import StubDetector
+
+    detector = StubDetector("plate", latency_ms=0, boxes=3)
+    batch = detector.detect(np.zeros((480, 640, 3), dtype=np.uint8))
+
+    assert len(batch) == 3 and detector.calls == 1
+    assert (batch.boxes[:, 0] + batch.boxes[:, 2] <= 640).all()
+    assert set(batch.labels) == {"plate"}
+
+
+def test_replay_compares_recorded_and_replayed_distributions():
+    """Test Server-Timing stages of a replay line up with the recorded timings"""
+    from benchmarks.replay import compare_distributions, distributions, parse_server_timing
+
+    assert parse_server_timing("decode;dur=1.5, face_detect;dur=20, total;dur=30.25") == {
+        "decode": 1.5, "face_detect": 20.0, "total": 30.25
+    }
+    recorded = [{"status": 200, "duration_ms": 10.0, "timings_ms": {"decode": 2.0}}, {"status": 500}]
+    replayed = [{"status": 200, "latency_ms": 25.0, "timings_ms": {"decode": 4.0, "total": 20.0}}]
+
+    rows = {row["metric"]: row for row in compare_distributions(distributions(recorded), distributions(replayed))}
+    assert rows["server"]["p95_change"] == 1.0
+    assert rows["decode"]["current"]["p50_ms"] == 4.0
+    assert rows["client"]["baseline"] is None
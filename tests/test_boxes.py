@@ -0,0 +1,50 @@
+"""Tests for vectorized box operations"""
+
+import numpy as np
+
+from src.detection.base import DetectionBatch
+from src.detection.boxes import clip_boxes, iou_matrix, nms, merge_overlapping, clean_detections
+
+
+def test_clip_boxes():
+    """Test boxes are clipped to the image area"""
+    clipped = clip_boxes(np.array([[-10, -5, 50, 60], [90, 90, 130, 120]]), width=100, height=100)
+    assert clipped.tolist() == [[0, 0, 50, 60], [90, 90, 100, 100]]
+
+
+def test_iou_matrix():
+    """Test pairwise IoU values"""
+    a = np.array([[0, 0, 10, 10]])
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+    ious = iou_matrix(a, b)
+    assert ious.shape == (1, 3)
+    np.testing.assert_allclose(ious[0], [1.0, 50 / 150, 0.0])
+
+
+def test_nms_keeps_best_of_duplicates():
+    """Test NMS drops lower-scored overlapping boxes"""
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60]])
+    keep = nms(boxes, np.array([0.6, 0.9, 0.5]), iou_threshold=0.5)
+    assert keep.tolist() == [1, 2]
+
+
+def test_merge_overlapping_is_transitive():
+    """Test chains of overlapping boxes merge into one union box"""
+    boxes = np.array([[0, 0, 10, 10], [8, 0, 20, 10], [18, 0, 30, 10], [50, 50, 60, 60]])
+    merged, groups = merge_overlapping(boxes)
+    assert merged.tolist() == [[0, 0, 30, 10], [50, 50, 60, 60]]
+    assert groups.tolist() == [0, 0, 0, 1]
+
+
+def test_clean_detections_per_label():
+    """Test cleaning clips, deduplicates and never merges across labels"""
+    faces = DetectionBatch.from_xyxy(np.array([[0, 0, 10, 10]]), np.array([0.9]), "face")
+    plates = DetectionBatch.from_xyxy(
+        np.array([[-20, 0, 10, 10], [-18, 1, 10, 10], [90, 90, 140, 95]]),
+        np.array([0.8, 0.7, 0.6]),
+        "plate"
+    )
+    cleaned = clean_detections(faces + plates, width=100, height=100)
+    assert cleaned.labels.tolist() == ["face", "plate", "plate"]
+    assert cleaned.xyxy.tolist() == [[0, 0, 10, 10], [0, 0, 10, 10], [90, 90, 100, 95]]
+    assert cleaned.scores.tolist() == [0.9, 0.8, 0.6]
@@ -0,0 +1,61 @@
+"""Tests for the perceptual-hash near-duplicate cache"""
+
+import random
+
+import cv2
+import numpy as np
+
+from src.cache import BKTree, NearDuplicateCache, dhash, hamming_distance
+
+
+def create_scene(seed=0):
+    """Create a smooth synthetic scene"""
+    rng = np.random.default_rng(seed)
+    image = cv2.resize(rng.integers(0, 255, (12, 16, 3), dtype=np.uint8), (320, 240))
+    return cv2.GaussianBlur(image, (0, 0), 5)
+
+
+def test_dhash_tolerates_reencoding():
+    """Test JPEG re-encoding keeps the hash close while another scene differs"""
+    image = create_scene()
+    _, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 50])
+    reencoded = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+    assert hamming_distance(dhash(image), dhash(reencoded)) <= 6
+    assert hamming_distance(dhash(image), dhash(create_scene(seed=1))) > 40
+
+
+def test_bktree_search_matches_brute_force():
+    """Test range queries return exactly the hashes within the radius"""
+    rng = random.Random(0)
+    keys = [rng.getrandbits(32) for _ in range(300)]
+    tree = BKTree()
+    values = [object() for _ in keys]
+    for key, value in zip(keys, values):
+        tree.add(key, value)
+    for value in values[:100]:
+        tree.remove(value)
+
+    query = keys[150] ^ 0b1011
+    expected = sorted(
+        hamming_distance(query, key) for key in keys[100:] if hamming_distance(query, key) <= 8
+    )
+    assert [distance for distance, _ in tree.search(query, 8)] == expected
+    assert len(tree) == 200
+
+
+def test_cache_is_scoped_per_camera_and_evicts_lru():
+    """Test lookups only hit the same camera and the oldest entry is evicted"""
+    cache = NearDuplicateCache(max_distance=2, max_entries=2)
+    shape = (240, 320, 3)
+
+    cache.store(0b0000, shape, "a", scope="cam-1")
+    cache.store(0b1111 << 8, shape, "b", scope="cam-1")
+    assert cache.lookup(0b0001, shape, scope="cam-1") == "a"
+    assert cache.lookup(0b0001, shape, scope="cam-2") is None
+    assert cache.lookup(0b0001, (10, 10, 3), scope="cam-1") is None
+
+    cache.store(0b1111 << 16, shape, "c", scope="cam-1")
+    assert cache.lookup(0b1111 << 8, shape, scope="cam-1") is None
+    assert cache.lookup(0b0000, shape, scope="cam-1") == "a"
+    assert cache.stats.evictions == 1
@@ -0,0 +1,62 @@
+"""Tests for array-backed detection batches"""
+
+import numpy as np
+
+from src.detection.base import BoundingBox, Detection, DetectionBatch
+from src.anonymization.result_formatter import ResultFormatter
+
+
+def create_batch():
+    """Create a batch with two plates"""
+    return DetectionBatch.from_xyxy(
+        np.array([[10.7, 20.2, 110.9, 60.5], [200, 300, 260, 330]]),
+        np.array([0.876, 0.5]),
+        "plate"
+    )
+
+
+def test_from_xyxy_truncates_to_xywh():
+    """Test corner coordinates are converted like int() on single boxes"""
+    batch = create_batch()
+    assert batch.boxes.tolist() == [[10, 20, 100, 40], [200, 300, 60, 30]]
+    assert batch.ids.tolist() == [1, 2]
+
+
+def test_to_dict_matches_detection_to_dict():
+    """Test to_dict() keeps the Detection.to_dict() layout"""
+    batch = create_batch()
+    assert batch.to_dict() == [detection.to_dict() for detection in batch]
+
+
+def test_from_detections_roundtrip():
+    """Test conversion from and to Detection objects"""
+    detections = [
+        Detection(id=3, bbox=BoundingBox(x=1, y=2, width=3, height=4), confidence=0.9, label="face")
+    ]
+    batch = DetectionBatch.from_detections(detections)
+    assert batch.to_detections() == detections
+
+
+def test_concatenate_and_select():
+    """Test batches concatenate with + and select with masks"""
+    faces = DetectionBatch(np.array([[0, 0, 5, 5]]), np.array([0.99]), "face")
+    combined = faces + create_batch()
+    assert len(combined) == 3
+    assert combined.labels.tolist() == ["face", "plate", "plate"]
+    plates = combined.select(combined.labels == "plate")
+    assert plates.renumber().ids.tolist() == [1, 2]
+
+
+def test_formatter_accepts_batches():
+    """Test ResultFormatter consumes batches directly"""
+    response = ResultFormatter.format_response(
+        success=True,
+        processing_time=0.1,
+        anonymized_image="",
+        face_detections=DetectionBatch.empty("face"),
+        plate_detections=create_batch(),
+        anonymization_color="#FFFF00"
+    )
+    assert response["summary"]["total_plates"] == 2
+    assert response["plates_anonymized"][0]["confidence"] == 0.88
+    assert response["plates_anonymized"][0]["bbox"] == {"x": 10, "y": 20, "width": 100, "height": 40}
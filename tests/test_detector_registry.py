@@ -0,0 +1,62 @@
+"""Tests for the detector backend registry"""
+
+import sys
+
+import numpy as np
+import pytest
+
+import src.detection
+from src.anonymization.pipeline import create_detectors
+from src.config import Settings
+from src.detection import DetectionBatch, Detector, StubDetector, available_backends, create_detector, register_detector
+from src.detection import registry
+from src.utils.exceptions import ModelLoadError
+
+
+def test_settings_select_registered_backends():
+    """Test the configured model names select backends and unknown names fail with the choices"""
+    settings = Settings(face_detection_model="stub", plate_detection_model="stub", stub_detector_boxes=3)
+    face_detector, plate_detector = create_detectors(settings)
+
+    assert isinstance(face_detector, StubDetector) and face_detector.label == "face"
+    assert len(plate_detector.detect(np.zeros((120, 160, 3), dtype=np.uint8))) == 3
+    assert {"retinaface", "onnx", "classical", "stub"} <= set(available_backends("face"))
+
+    with pytest.raises(ModelLoadError, match="available: .*stub"):
+        create_detector("plate", "missing", settings)
+    with pytest.raises(ModelLoadError, match="PLATE_MODEL_PATH"):
+        create_detector("plate", "onnx", settings)
+
+
+def test_register_detector_adds_a_backend(monkeypatch):
+    """Test a registered factory is created from the settings"""
+    # Registered into a copy, so the backend is gone after the test
+    monkeypatch.setitem(registry._backends, "face", dict(registry._backends["face"]))
+
+    class EmptyDetector(Detector):
+        def load_model(self):
+            pass
+
+        def detect(self, image):
+            return DetectionBatch.empty("face")
+
+    register_detector("face", "empty")(lambda settings: EmptyDetector())
+    settings = Settings(face_detection_model="empty", enable_plate_detection=False)
+
+    face_detector, plate_detector = create_detectors(settings)
+    assert isinstance(face_detector, EmptyDetector)
+    assert plate_detector is None
+    assert "empty" in available_backends("face")
+
+
+def test_classical_plate_backend_needs_no_model_packages(monkeypatch):
+    """Test the classical plate backend is created and runs without torch, ultralytics or huggingface_hub"""
+    for name in ("torch", "ultralytics", "huggingface_hub"):
+        monkeypatch.setitem(sys.modules, name, None)
+    # Import the plate modules afresh, with the model packages unavailable
+    for name in [name for name in sys.modules if name.startswith("src.detection.plates")]:
+        monkeypatch.delitem(sys.modules, name)
+    monkeypatch.delattr(src.detection, "plates", raising=False)
+
+    detector = create_detector("plate", "classical", Settings(plate_detection_model="classical"))
+    assert len(detector.detect(np.zeros((120, 160, 3), dtype=np.uint8))) == 0
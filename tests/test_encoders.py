@@ -0,0 +1,54 @@
+"""Tests for output image encoders"""
+
+import pytest
+import numpy as np
+from PIL import Image
+import io
+
+from src.anonymization.encoders import EncoderOptions, ImageEncoder, normalize_format
+from src.utils.exceptions import EncodingError
+
+
+def create_test_array(size=(120, 80)):
+    """Create a test RGB array"""
+    width, height = size
+    array = np.zeros((height, width, 3), dtype=np.uint8)
+    array[:, : width // 2] = (255, 255, 0)
+    return array
+
+
+def test_normalize_format_aliases():
+    """Test format names are normalized"""
+    assert normalize_format("JPG") == "jpeg"
+    assert normalize_format("png") == "png"
+    assert normalize_format("WebP") == "webp"
+
+
+def test_normalize_format_invalid():
+    """Test unsupported format is rejected"""
+    with pytest.raises(EncodingError):
+        normalize_format("gif")
+
+
+@pytest.mark.parametrize("output_format", ["png", "jpeg", "webp"])
+def test_encode_roundtrip(output_format):
+    """Test encoded bytes decode to an image of the same size and format"""
+    encoder = ImageEncoder(EncoderOptions(format=output_format))
+    data = encoder.encode(create_test_array())
+    decoded = Image.open(io.BytesIO(data))
+    assert decoded.format == output_format.upper()
+    assert decoded.size == (120, 80)
+
+
+def test_encode_png_preserves_colors():
+    """Test PNG output keeps RGB channel order"""
+    encoder = ImageEncoder(EncoderOptions(format="png"))
+    decoded = np.array(Image.open(io.BytesIO(encoder.encode(create_test_array()))))
+    assert tuple(decoded[0, 0]) == (255, 255, 0)
+
+
+def test_encode_max_dimension():
+    """Test outputs larger than max_dimension are downscaled"""
+    encoder = ImageEncoder(EncoderOptions(format="jpeg", max_dimension=60))
+    decoded = Image.open(io.BytesIO(encoder.encode(create_test_array())))
+    assert decoded.size == (60, 40)
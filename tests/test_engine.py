@@ -0,0 +1,60 @@
+"""Tests for the stage-pipelined engine"""
+
+import threading
+
+import pytest
+
+from src.anonymization.engine import PipelineEngine, Stage
+
+
+def test_stages_overlap_across_items():
+    """Test a later item enters the first stage while an earlier one is still in the second"""
+    second_stage_entered = threading.Event()
+    release_second_stage = threading.Event()
+    second_item_decoded = threading.Event()
+
+    def first(item):
+        if item["id"] == 2:
+            second_item_decoded.set()
+
+    def second(item):
+        second_stage_entered.set()
+        release_second_stage.wait(timeout=5)
+        item["done"] = True
+
+    engine = PipelineEngine([Stage("first", first), Stage("second", second)])
+    engine.start()
+    try:
+        a = engine.submit({"id": 1})
+        assert second_stage_entered.wait(timeout=5)
+        b = engine.submit({"id": 2})
+        assert second_item_decoded.wait(timeout=5)
+        release_second_stage.set()
+        assert a.result(timeout=5)["done"] and b.result(timeout=5)["done"]
+    finally:
+        release_second_stage.set()
+        engine.stop()
+
+    stats = engine.stats()
+    assert stats["first"]["processed"] == 2
+    assert stats["second"]["processed"] == 2
+    assert 0.0 < stats["second"]["utilization"] <= 1.0
+
+
+def test_stage_error_skips_later_stages():
+    """Test a failing stage resolves the future with its error and is counted"""
+    reached = []
+
+    def fail(item):
+        raise ValueError("bad input")
+
+    engine = PipelineEngine([Stage("decode", fail), Stage("encode", reached.append)])
+    engine.start()
+    try:
+        with pytest.raises(ValueError):
+            engine.submit({}).result(timeout=5)
+    finally:
+        engine.stop()
+
+    assert reached == []
+    assert engine.stats()["decode"]["failed"] == 1
@@ -0,0 +1,45 @@
+"""Tests for the detector evaluation harness"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.detection.stub import StubDetector
+from src.evaluation import average_precision, evaluate, load_dataset, match_predictions, parse_config
+
+
+def test_matching_and_average_precision():
+    """Test predictions match ground truth once, best score first, and AP ranks by score"""
+    ground_truth = np.array([[0, 0, 10, 10], [20, 20, 30, 30]])
+    predictions = np.array([[0, 0, 10, 10], [1, 1, 10, 10], [50, 50, 60, 60]])
+    scores = np.array([0.9, 0.95, 0.8])
+
+    true_positive = match_predictions(predictions, scores, ground_truth, iou_threshold=0.5)
+    assert true_positive.tolist() == [False, True, False]
+
+    assert average_precision(np.array([True, True]), np.array([0.9, 0.8]), ground_truth=2) == 1.0
+    # Half the ground truth found at precision 1: 51 of the 101 recall points
+    assert average_precision(true_positive, scores, ground_truth=2) == pytest.approx(51 / 101)
+    assert np.isnan(average_precision(true_positive, scores, ground_truth=0))
+
+
+def test_evaluate_yolo_dataset_with_stub_backend(tmp_path):
+    """Test a YOLO-labeled folder is scored through the configured detector backends"""
+    (tmp_path / "images").mkdir()
+    (tmp_path / "labels").mkdir()
+    image = np.zeros((240, 320, 3), dtype=np.uint8)
+    Image.fromarray(image).save(tmp_path / "images" / "frame.png")
+    x, y, w, h = StubDetector("face", latency_ms=0, boxes=1).detect(image).boxes[0]
+    (tmp_path / "labels" / "frame.txt").write_text(f"0 {(x + w / 2) / 320} {(y + h / 2) / 240} {w / 320} {h / 240}\n")
+
+    dataset = load_dataset(tmp_path / "images")
+    config = parse_config(
+        "stub:face_detection_model=stub,enable_plate_detection=false,stub_detector_latency_ms=0,stub_detector_boxes=1"
+    )
+    result = evaluate(dataset, config, warmup=0)
+
+    assert result.images == 1 and list(result.labels) == ["face"]
+    assert result.labels["face"].recall == 1.0
+    assert result.labels["face"].precision == 1.0
+    assert result.map50 == 1.0
+    assert result.meets_targets() == {"face": True}
@@ -0,0 +1,62 @@
+"""Tests for the shared-memory frame ring and the inference processes"""
+
+import numpy as np
+import pytest
+
+from src.inference import FrameRing, InferenceServer
+from src.utils.exceptions import DetectionError
+
+
+def test_frame_is_visible_to_attached_ring():
+    """Test a frame written by the owner is read back without pickling"""
+    owner = FrameRing(slots=2, slot_bytes=64 * 48 * 3)
+    reader = FrameRing(slots=2, slot_bytes=64 * 48 * 3, name=owner.name)
+    try:
+        frame = np.random.default_rng(0).integers(0, 255, (48, 64, 3), dtype=np.uint8)
+        slot = owner.acquire()
+        shape, dtype = owner.write(slot, frame)
+
+        view = reader.view(slot, shape, dtype)
+        assert np.array_equal(view, frame)
+        del view
+    finally:
+        reader.close()
+        owner.close()
+
+
+def test_slots_are_bounded_and_sized():
+    """Test oversized frames are rejected and acquire times out when all slots are taken"""
+    ring = FrameRing(slots=1, slot_bytes=16)
+    try:
+        slot = ring.acquire()
+        with pytest.raises(DetectionError):
+            ring.write(slot, np.zeros((4, 4, 3), dtype=np.uint8))
+        with pytest.raises(DetectionError):
+            ring.acquire(timeout=0.01)
+
+        ring.release(slot)
+        assert ring.acquire(timeout=0.01) == slot
+    finally:
+        ring.close()
+
+
+def test_dead_process_fails_its_frames_and_is_replaced(monkeypatch):
+    """Test a process dying mid-frame fails the frame, frees its slot and is restarted"""
+    monkeypatch.setenv("FACE_DETECTION_MODEL", "stub")
+    monkeypatch.setenv("PLATE_DETECTION_MODEL", "stub")
+    monkeypatch.setenv("STUB_DETECTOR_LATENCY_MS", "2000")
+    server = InferenceServer(processes=1, slots=1, slot_bytes=64 * 48 * 3, timeout=20)
+    server.start()
+    # The replacement process answers quickly
+    monkeypatch.setenv("STUB_DETECTOR_LATENCY_MS", "1")
+    try:
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        future = server.submit(frame)
+        server._workers[0].kill()
+
+        with pytest.raises(DetectionError, match="died"):
+            future.result(timeout=1)
+        (faces, plates), _ = server.submit(frame).result(timeout=20)
+        assert len(faces) == 2 and len(plates) == 2
+    finally:
+        server.stop()
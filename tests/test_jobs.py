@@ -0,0 +1,103 @@
+"""Tests for the SQLite job queue"""
+
+import threading
+import time
+
+from src.jobs import JobWorker, SQLiteJobQueue
+
+
+def test_claim_is_exclusive_and_completes(tmp_path):
+    """Test a claimed job is not handed out twice and records worker stats"""
+    queue = SQLiteJobQueue(tmp_path / "queue.db")
+    queue.register_worker("w1", "host")
+    job = queue.enqueue({"input": "inputs/a.jpg"})
+
+    claimed = queue.claim("w1", lease_seconds=60)
+    assert claimed.job_id == job.job_id
+    assert claimed.attempts == 1
+    assert queue.claim("w2", lease_seconds=60) is None
+
+    assert queue.complete(job.job_id, "w1", {"faces": 1}, busy_seconds=0.5)
+    assert queue.get(job.job_id).result == {"faces": 1}
+    assert queue.counts()["completed"] == 1
+    assert queue.workers()[0].completed == 1
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    """Test a job whose worker stopped heartbeating moves to another worker"""
+    queue = SQLiteJobQueue(tmp_path / "queue.db")
+    queue.register_worker("w1", "host")
+    job = queue.enqueue({"input": "inputs/a.jpg"})
+    queue.claim("w1", lease_seconds=0.01)
+    time.sleep(0.05)
+
+    reclaimed = queue.claim("w2", lease_seconds=60)
+    assert reclaimed.job_id == job.job_id
+    assert reclaimed.lease_owner == "w2"
+    assert not queue.complete(job.job_id, "w1", {}, busy_seconds=1.0)
+    assert not queue.fail(job.job_id, "w1", "boom", busy_seconds=1.0)
+    assert not queue.heartbeat(job.job_id, "w1", 60)
+    # The stale worker's discarded outcomes are not counted
+    stale = queue.workers()[0]
+    assert (stale.completed, stale.failed, stale.busy_seconds) == (0, 0, 0.0)
+
+
+def test_failed_job_is_retried_until_max_attempts(tmp_path):
+    """Test failures requeue the job until its attempts are used up"""
+    queue = SQLiteJobQueue(tmp_path / "queue.db", retry_delay=0.0)
+    job = queue.enqueue({"input": "inputs/a.jpg"}, max_attempts=2)
+
+    queue.claim("w1", lease_seconds=60)
+    queue.fail(job.job_id, "w1", "boom")
+    assert queue.get(job.job_id).status == "queued"
+
+    queue.claim("w1", lease_seconds=60)
+    queue.fail(job.job_id, "w1", "boom again")
+    failed = queue.get(job.job_id)
+    assert failed.status == "failed"
+    assert failed.error == "boom again"
+    assert queue.claim("w1", lease_seconds=60) is None
+
+
+def test_worker_init_failure_fails_the_job(tmp_path, monkeypatch):
+    """Test a worker whose models fail to load fails the claimed job instead of crashing"""
+    def broken_init(*args):
+        raise RuntimeError("no weights")
+
+    monkeypatch.setattr("src.jobs.worker.init_worker", broken_init)
+    queue = SQLiteJobQueue(tmp_path / "queue.db", retry_delay=60.0)
+    queue.register_worker("w1", "host")
+    job = queue.enqueue({"input": "inputs/a.jpg"})
+
+    JobWorker(queue, tmp_path, worker_id="w1").process(queue.claim("w1", lease_seconds=60))
+
+    failed = queue.get(job.job_id)
+    assert (failed.status, failed.error) == ("queued", "no weights")
+    assert queue.workers()[0].failed == 1
+
+
+def test_inputs_of_permanently_failed_jobs_are_removed(tmp_path, monkeypatch):
+    """Test a job out of attempts loses its input, whether it failed or its lease expired"""
+    def broken_init(*args):
+        raise RuntimeError("no weights")
+
+    monkeypatch.setattr("src.jobs.worker.init_worker", broken_init)
+    queue = SQLiteJobQueue(tmp_path / "queue.db", retry_delay=60.0)
+    (tmp_path / "inputs").mkdir()
+    for name in ("a.jpg", "b.jpg"):
+        (tmp_path / "inputs" / name).write_bytes(b"x")
+    failing = queue.enqueue({"input": "inputs/a.jpg"}, max_attempts=1)
+    expiring = queue.enqueue({"input": "inputs/b.jpg"}, max_attempts=1)
+    worker = JobWorker(queue, tmp_path, worker_id="w1", poll_interval=0.01)
+
+    worker.process(queue.claim("w1", lease_seconds=60))
+    assert queue.get(failing.job_id).status == "failed"
+    assert not (tmp_path / "inputs" / "a.jpg").exists()
+
+    queue.claim("w2", lease_seconds=0.01)
+    time.sleep(0.05)
+    stop = threading.Event()
+    threading.Timer(0.2, stop.set).start()
+    worker.run(stop)
+    assert (queue.get(expiring.job_id).status, queue.get(expiring.job_id).error) == ("failed", "Lease expired")
+    assert not (tmp_path / "inputs" / "b.jpg").exists()
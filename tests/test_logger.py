@@ -0,0 +1,53 @@
+"""Tests for structured logging"""
+
+import json
+import logging
+
+from src.utils.logger import get_logger, log_context, parse_sample_rates, setup_logger, shutdown_logging
+from src.utils.tracing import current_request_id
+
+
+def test_records_carry_request_context_and_fields(tmp_path):
+    """Test JSON records include the request id, bound context and per-call fields"""
+    log_file = tmp_path / "app.log"
+    setup_logger("test-structured", level="INFO", log_file=str(log_file), log_format="json")
+    logger = logging.getLogger("test-structured.PlateDetector")
+
+    token = current_request_id.set("req-7")
+    try:
+        with log_context(camera_id="cam-1"):
+            logger.info("Found %d plates", 2, extra={"event": "summary", "fields": {"plates": 2}})
+            logger.debug("Not emitted at INFO: %s", object())
+    finally:
+        current_request_id.reset(token)
+    shutdown_logging()
+
+    lines = log_file.read_text().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["message"] == "Found 2 plates"
+    assert record["request_id"] == "req-7"
+    assert record["camera_id"] == "cam-1"
+    assert record["plates"] == 2
+    assert record["event"] == "summary"
+
+
+def test_sampling_drops_configured_events_but_keeps_errors(tmp_path):
+    """Test sampled-out events are dropped while errors always pass"""
+    log_file = tmp_path / "app.log"
+    setup_logger(
+        "test-sampled",
+        log_file=str(log_file),
+        sample_rates=parse_sample_rates("PlateDetector=0, vehicle_search=1.0")
+    )
+    logger = logging.getLogger("test-sampled.PlateDetector")
+
+    for _ in range(10):
+        logger.info("Per-box chatter")
+    logger.info("Kept by event", extra={"event": "vehicle_search"})
+    logger.error("Always kept")
+    shutdown_logging()
+
+    messages = [line.split(" - ")[-1] for line in log_file.read_text().splitlines()]
+    assert messages == ["Kept by event", "Always kept"]
+    assert get_logger("Anonymizer").name == "htw-emerging-photo.Anonymizer"
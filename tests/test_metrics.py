@@ -0,0 +1,59 @@
+"""Tests for the in-process metrics registry"""
+
+from src.utils.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test observations land in le buckets and sum/count are rendered"""
+    histogram = Histogram("test_seconds", "Test", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.1, stage="a")
+    histogram.observe(5.0, stage="a")
+
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{stage="a",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="a"} 3' in lines
+    assert histogram.count(stage="a") == 3
+
+
+def test_registry_renders_counters_and_gauges():
+    """Test counters, set gauges and callback gauges are exported"""
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("test_total", "Test", ("kind",)))
+    gauge = registry.register(Gauge("test_depth", "Test", ("queue",)))
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    gauge.set(3, queue="x")
+    gauge.set_function(lambda: 7, queue="y")
+
+    text = registry.render()
+    assert 'test_total{kind="a"} 3' in text
+    assert 'test_depth{queue="x"} 3' in text
+    assert 'test_depth{queue="y"} 7' in text
+
+
+def test_stage_timings_follow_the_request_into_pipeline_threads():
+    """Test stages timed in engine threads are added to the submitting request's timings"""
+    from src.anonymization.engine import PipelineEngine, Stage
+    from src.utils.metrics import collect_timings, timed_stage
+
+    def decode(item):
+        with timed_stage("decode"):
+            pass
+
+    engine = PipelineEngine([Stage("decode", decode)])
+    engine.start()
+    try:
+        with collect_timings() as timings:
+            engine.submit({}).result(timeout=5)
+            with timed_stage("encode"):
+                pass
+    finally:
+        engine.stop()
+
+    assert list(timings.seconds()) == ["decode", "encode"]
+    header = timings.server_timing(total_seconds=0.5)
+    assert header.startswith("decode;dur=")
+    assert header.endswith("total;dur=500.0")
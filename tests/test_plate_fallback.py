@@ -0,0 +1,118 @@
+"""Tests for the budgeted two-stage plate fallback
+
+The YOLO results are stood in by numpy, and plates.detector imports torch and
+ultralytics only when loading the model, so these run without the model packages.
+"""
+
+import numpy as np
+import cv2
+
+from src.detection.plates.detector import PlateDetector
+
+
+class _Tensor:
+    """Minimal stand-in for a torch tensor"""
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class _Boxes:
+    """Minimal stand-in for ultralytics Boxes (one row per box)"""
+
+    def __init__(self, rows):
+        rows = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+        self.xyxy = _Tensor(rows[:, :4])
+        self.conf = _Tensor(rows[:, 4])
+        self.cls = _Tensor(rows[:, 5])
+
+    def __len__(self):
+        return len(self.xyxy.values)
+
+
+class _Result:
+    def __init__(self, rows):
+        self.boxes = _Boxes(rows)
+
+
+class OfflinePlateDetector(PlateDetector):
+    """PlateDetector that skips model loading (no weights, torch or ultralytics)"""
+
+    def load_model(self) -> None:
+        self.model = None
+        self.device = "cpu"
+
+
+def create_vehicle_image(size=(1280, 720)):
+    """Create a synthetic frame with a plate-like rectangle inside a vehicle"""
+    width, height = size
+    image = np.full((height, width, 3), 90, dtype=np.uint8)
+    cv2.rectangle(image, (200, 200), (1000, 650), (40, 40, 160), -1)
+    cv2.rectangle(image, (500, 520), (700, 570), (255, 255, 255), -1)
+    for x in range(515, 690, 22):
+        cv2.rectangle(image, (x, 530), (x + 10, 560), (0, 0, 0), -1)
+    return image
+
+
+def test_fallback_skips_small_and_capped_vehicles():
+    """Test tiny vehicles are skipped and only the largest are searched"""
+    detector = OfflinePlateDetector(two_stage_min_vehicle_area=10000, two_stage_max_vehicles=1)
+    results = [_Result([
+        (200, 200, 1000, 650, 0.9, 2),
+        (10, 10, 40, 40, 0.9, 2),  # too small
+        (1050, 100, 1250, 300, 0.9, 7),  # over the cap
+        (0, 0, 500, 500, 0.9, 0),  # not a vehicle
+    ])]
+
+    detector._detect_plates_two_stage(create_vehicle_image(), results)
+
+    stats = detector.get_fallback_stats()
+    assert stats["invocations"] == 1
+    assert stats["vehicles_found"] == 3
+    assert stats["vehicles_skipped_small"] == 1
+    assert stats["vehicles_skipped_cap"] == 1
+    assert stats["vehicles_searched"] == 1
+
+
+def test_fallback_downscaled_boxes_stay_inside_vehicle():
+    """Test plates found in a downscaled crop map back to image coordinates"""
+    detector = OfflinePlateDetector(two_stage_max_crop_dimension=400)
+    results = [_Result([(200, 200, 1000, 650, 0.9, 2)])]
+
+    detections = detector._detect_plates_two_stage(create_vehicle_image(), results)
+
+    assert detector.get_fallback_stats()["crops_downscaled"] == 1
+    for detection in detections:
+        bbox = detection.bbox
+        assert 200 <= bbox.x and bbox.x + bbox.width <= 1001
+        assert 200 <= bbox.y and bbox.y + bbox.height <= 651
+
+
+def test_fallback_zero_budget_searches_nothing():
+    """Test an exhausted time budget is recorded"""
+    detector = OfflinePlateDetector(two_stage_time_budget_ms=0.0)
+    results = [_Result([(200, 200, 1000, 650, 0.9, 2)])]
+
+    detector._detect_plates_two_stage(create_vehicle_image(), results)
+
+    stats = detector.get_fallback_stats()
+    assert stats["invocations"] == 1
+    assert stats["vehicles_skipped_budget"] == 1
+    assert stats["vehicles_searched"] == 0
+    assert stats["budget_exhausted"] == 1
+
+
+def test_vehicle_search_stops_at_deadline():
+    """Test a search started after its deadline returns without searching"""
+    detector = OfflinePlateDetector()
+    image = create_vehicle_image()
+
+    assert detector._search_vehicle(image, (200, 200, 1000, 650), deadline=0.0) is None
+    assert detector._find_plates_in_region(image[200:650, 200:1000], 200, 200, deadline=0.0) is None
+    detector.close()
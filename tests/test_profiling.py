@@ -0,0 +1,51 @@
+"""Tests for the request profiler"""
+
+import time
+
+from src.utils.profiling import RequestProfiler, current_capture, profiled
+
+
+@profiled
+def busy_stage():
+    """Spin long enough to be sampled"""
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_slow_request_is_kept_and_fast_one_discarded(tmp_path):
+    """Test sampling captures are only stored above the latency threshold"""
+    profiler = RequestProfiler(tmp_path, slow_threshold_ms=10, interval_ms=1)
+
+    capture = profiler.start_request()
+    token = current_capture.set(capture)
+    try:
+        busy_stage()
+    finally:
+        current_capture.reset(token)
+
+    assert profiler.finish(capture, 0.001, {"faces": 0}) is None
+    path = profiler.finish(capture, 0.05, {"faces": 0})
+    assert path.suffix == ".folded"
+    assert "busy_stage" in path.read_text()
+    assert path.with_suffix(".json").exists()
+
+
+def test_sampled_requests_use_cprofile_and_rotate(tmp_path):
+    """Test sampled requests write .prof files and only the newest captures are kept"""
+    profiler = RequestProfiler(tmp_path, sample_rate=1.0, max_captures=2)
+
+    for _ in range(3):
+        capture = profiler.start_request()
+        assert capture.mode == "cprofile"
+        token = current_capture.set(capture)
+        try:
+            busy_stage()
+        finally:
+            current_capture.reset(token)
+        profiler.finish(capture, 0.05, {})
+
+    captures = profiler.captures()
+    assert len(captures) == 2
+    assert all(name.endswith(".prof") for name in captures)
+    assert len(list(tmp_path.glob("*.json"))) == 2
@@ -0,0 +1,44 @@
+"""Tests for the request recorder"""
+
+import threading
+
+from src.utils.recording import RequestRecorder, load_recording
+
+
+def test_recorder_appends_fingerprints_and_stores_each_image_once(tmp_path):
+    """Test records are read back oldest first with their stored upload"""
+    recorder = RequestRecorder(tmp_path, store_images=True)
+    upload = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+    recorder.record({"arrival": 20.0, "status": 200, "duration_ms": 12.5}, upload)
+    recorder.record({"arrival": 10.0, "status": 200, "duration_ms": 8.0}, upload)
+    recorder.close()
+
+    records = load_recording(tmp_path)
+    assert [record["arrival"] for record in records] == [10.0, 20.0]
+    assert records[0]["image"] == records[1]["image"]
+    assert records[0]["image"].endswith(".png")
+    assert len(list((tmp_path / "images").iterdir())) == 1
+    assert "filename" not in records[0]
+
+
+def test_record_does_not_wait_for_the_disk(tmp_path, monkeypatch):
+    """Test records are written by the writer thread and dropped when it falls behind"""
+    recorder = RequestRecorder(tmp_path, queue_size=1)
+    writing, release = threading.Event(), threading.Event()
+    write = recorder._write
+
+    def slow_write(fields, image_bytes):
+        writing.set()
+        release.wait(5)
+        write(fields, image_bytes)
+
+    monkeypatch.setattr(recorder, "_write", slow_write)
+    recorder.record({"arrival": 1.0})
+    assert writing.wait(5)
+    recorder.record({"arrival": 2.0})
+    recorder.record({"arrival": 3.0})
+    assert recorder.dropped == 1
+
+    release.set()
+    recorder.close()
+    assert [record["arrival"] for record in load_recording(tmp_path)] == [1.0, 2.0]
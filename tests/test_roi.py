@@ -0,0 +1,65 @@
+"""Tests for camera ROI profiles"""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.detection.base import Detector, DetectionBatch
+from src.detection.roi import CameraProfile, detect_in_roi, load_camera_profiles
+from src.utils.exceptions import CameraProfileError
+
+
+class RecordingDetector(Detector):
+    """Detector returning one box at (2, 3) and remembering the input shape"""
+
+    def __init__(self):
+        self.shapes = []
+
+    def load_model(self) -> None:
+        pass
+
+    def detect(self, image: np.ndarray) -> DetectionBatch:
+        self.shapes.append(image.shape[:2])
+        return DetectionBatch(np.array([[2, 3, 4, 4]]), np.array([0.8]), "plate")
+
+
+def test_profile_region_scales_pixel_polygons():
+    """Test polygon bounds are scaled from the profile frame size to the image"""
+    profile = CameraProfile.from_dict("cam", {
+        "frame_size": [200, 100],
+        "plate": [[[20, 50], [180, 50], [100, 100]]]
+    })
+    assert profile.region("plate", 100, 50) == (10, 25, 90, 50)
+    assert profile.region("face", 100, 50) is None
+
+
+def test_detect_in_roi_crops_and_maps_back():
+    """Test the detector sees only the ROI crop and boxes return in image coordinates"""
+    profile = CameraProfile.from_dict("cam", {"plate": [[[0.5, 0.5], [1, 0.5], [1, 1]]]})
+    detector = RecordingDetector()
+
+    detections = detect_in_roi(detector, np.zeros((40, 60, 3), dtype=np.uint8), "plate", profile)
+
+    assert detector.shapes == [(20, 30)]
+    assert detections.boxes[0].tolist() == [32, 23, 4, 4]
+
+
+def test_empty_roi_disables_detector():
+    """Test an empty polygon list skips the detector"""
+    profile = CameraProfile.from_dict("cam", {"face": []})
+    detector = RecordingDetector()
+
+    detections = detect_in_roi(detector, np.zeros((40, 60, 3), dtype=np.uint8), "face", profile)
+
+    assert len(detections) == 0
+    assert detector.shapes == []
+
+
+def test_load_camera_profiles_rejects_bad_polygons(tmp_path):
+    """Test malformed profile files raise CameraProfileError"""
+    path = tmp_path / "cameras.json"
+    path.write_text(json.dumps({"cam": {"plate": [[[0, 0], [1, 1]]]}}))
+
+    with pytest.raises(CameraProfileError):
+        load_camera_profiles(path)
@@ -0,0 +1,71 @@
+"""Tests for span tracing"""
+
+import contextvars
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from src.utils.metrics import timed_stage
+from src.utils.tracing import JsonLinesExporter, current_request_id, tracer
+
+
+def test_spans_nest_across_threads_and_export_json_lines(tmp_path):
+    """Test stage and worker-thread spans share the request's trace and parent links"""
+    path = tmp_path / "spans.jsonl"
+    tracer.configure(JsonLinesExporter(path))
+    token = current_request_id.set("req-1")
+    try:
+        with timed_stage("plate_fallback", model="yolov8n.pt") as stage:
+            def search():
+                with tracer.span("vehicle_search") as span:
+                    span.set_attribute("plates", 1)
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(contextvars.copy_context().run, search).result()
+            stage.set_attribute("plates", 1)
+    finally:
+        current_request_id.reset(token)
+        tracer.configure(None)
+
+    child, parent = [json.loads(line) for line in path.read_text().splitlines()]
+    assert child["name"] == "vehicle_search"
+    assert parent["name"] == "plate_fallback"
+    assert child["trace_id"] == parent["trace_id"] == "req-1"
+    assert child["parent_id"] == parent["span_id"]
+    assert parent["parent_id"] is None
+    assert parent["attributes"] == {"model": "yolov8n.pt", "plates": 1}
+    assert child["thread"] != parent["thread"]
+
+
+def test_request_id_header_is_echoed_or_generated():
+    """Test the request id middleware keeps valid inbound ids and replaces invalid ones"""
+    from fastapi.testclient import TestClient
+    from src.api.app import create_app
+
+    client = TestClient(create_app())
+    assert client.get("/health", headers={"X-Request-ID": "abc-123"}).headers["X-Request-ID"] == "abc-123"
+    generated = client.get("/health", headers={"X-Request-ID": "bad id\t"}).headers["X-Request-ID"]
+    assert len(generated) == 32
+
+
+def _traced_job() -> None:
+    with tracer.span("worker_job"):
+        pass
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_spans_are_written_by_forked_workers_and_flushed_on_close(tmp_path):
+    """Test a forked worker starts its own writer thread and writes its spans before exiting"""
+    path = tmp_path / "spans.jsonl"
+    tracer.configure(JsonLinesExporter(path))
+    try:
+        with tracer.span("parent"):
+            pass
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork")) as pool:
+            pool.submit(_traced_job).result(timeout=20)
+    finally:
+        tracer.configure(None)
+
+    assert sorted(json.loads(line)["name"] for line in path.read_text().splitlines()) == ["parent", "worker_job"]
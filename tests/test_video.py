@@ -0,0 +1,173 @@
+"""Tests for the streaming video pipeline"""
+
+import numpy as np
+import cv2
+
+from src.anonymization.anonymizer import Anonymizer
+from src.detection.base import Detector, DetectionBatch
+from src.detection.roi import CameraProfile
+from src.video import (
+    DetectionTracker,
+    FrameDetector,
+    MotionGate,
+    MotionGatedDetector,
+    TrackedFrameDetector,
+    VideoAnonymizer,
+    read_frames,
+)
+
+
+class FixedFaceDetector(Detector):
+    """Detector returning the same face box on every frame"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def load_model(self) -> None:
+        pass
+
+    def detect(self, image: np.ndarray) -> DetectionBatch:
+        self.calls += 1
+        return DetectionBatch(np.array([[8, 8, 16, 16]]), np.array([0.9]), "face")
+
+
+def create_test_video(path, frames=12, size=(64, 48)):
+    """Write a small synthetic video"""
+    width, height = size
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (width, height))
+    for index in range(frames):
+        frame = np.full((height, width, 3), 40, dtype=np.uint8)
+        cv2.circle(frame, (10 + 3 * index, 30), 5, (0, 0, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def test_video_pipeline_anonymizes_every_frame(tmp_path):
+    """Test every decoded frame is detected, filled and re-encoded"""
+    source = tmp_path / "input.avi"
+    output = tmp_path / "output.avi"
+    create_test_video(source)
+
+    detector = FixedFaceDetector()
+    video_anonymizer = VideoAnonymizer(
+        FrameDetector(detector),
+        Anonymizer(),
+        queue_size=2,
+        codec="MJPG"
+    )
+    stats = video_anonymizer.process(source, output)
+
+    assert stats.frames == 12
+    assert stats.faces == 12
+    assert detector.calls == 12
+    assert stats.fps > 0
+
+    frames = list(read_frames(output))
+    assert len(frames) == 12
+    # Filled region is yellow (allowing for lossy compression)
+    center = frames[0][12, 12].astype(int)
+    assert center[0] > 200 and center[1] > 200 and center[2] < 60
+
+
+def test_fill_array_matches_rectangle_fill():
+    """Test in-place fill covers the same inclusive rectangle as anonymize()"""
+    anonymizer = Anonymizer()
+    image = np.zeros((20, 20, 3), dtype=np.uint8)
+    anonymizer.fill_array(image, DetectionBatch(np.array([[2, 3, 4, 5]]), np.array([0.9]), "face"))
+    filled = np.argwhere(image[:, :, 0] == 255)
+    assert filled.min(axis=0).tolist() == [3, 2]
+    assert filled.max(axis=0).tolist() == [8, 6]
+
+
+def test_tracker_skips_detection_between_keyframes(tmp_path):
+    """Test tracked frames reuse predicted boxes instead of running the detector"""
+    source = tmp_path / "input.avi"
+    create_test_video(source)
+
+    detector = FixedFaceDetector()
+    tracked = TrackedFrameDetector(FrameDetector(detector), DetectionTracker(keyframe_interval=4))
+    stats = VideoAnonymizer(tracked, Anonymizer(), codec="MJPG").process(source, tmp_path / "out.avi")
+
+    assert stats.frames == 12
+    assert stats.faces == 12
+    assert detector.calls == 3
+    assert stats.detector_calls == 3
+    assert stats.detector_calls_saved == 9
+
+
+def test_tracker_follows_constant_motion():
+    """Test predicted boxes move with the velocity observed between keyframes"""
+    tracker = DetectionTracker(keyframe_interval=2, padding=0.0, confidence_decay=1.0)
+    tracker.update(DetectionBatch(np.array([[10, 10, 20, 20]]), np.array([0.9]), "face"))
+    tracker.predict()
+    tracker.update(DetectionBatch(np.array([[14, 10, 20, 20]]), np.array([0.9]), "face"))
+
+    predicted = tracker.predict()
+    assert len(predicted) == 1
+    assert predicted.ids.tolist() == [1]
+    # Half of the observed 2px/frame (velocity smoothing 0.5)
+    assert predicted.boxes[0].tolist() == [15, 10, 20, 20]
+
+
+def test_uncertain_track_forces_keyframe():
+    """Test a track decaying below the minimum confidence triggers detection"""
+    tracker = DetectionTracker(keyframe_interval=10, min_track_confidence=0.5, confidence_decay=0.5)
+    tracker.update(DetectionBatch(np.array([[0, 0, 10, 10]]), np.array([0.9]), "face"))
+    assert not tracker.needs_detection()
+
+    tracker.predict()
+    assert tracker.needs_detection()
+
+
+def test_motion_gate_reuses_detections_on_static_frames():
+    """Test unchanged frames skip detection and changed regions are detected alone"""
+    detector = FixedFaceDetector()
+    gated = MotionGatedDetector(FrameDetector(detector), MotionGate(analysis_width=64, padding=4))
+
+    frame = np.full((48, 64, 3), 40, dtype=np.uint8)
+    first = gated.detect(frame)
+    second = gated.detect(frame.copy())
+    assert detector.calls == 1
+    assert second is first
+    assert gated.stats.static_frames == 1
+
+    moved = frame.copy()
+    moved[30:40, 40:50] = 220
+    detections = gated.detect(moved)
+    assert detector.calls == 2
+    assert gated.stats.partial_frames == 1
+    # The unchanged face is kept, the crop detection is mapped back to frame coordinates
+    assert len(detections) == 2
+    assert detections.boxes[0].tolist() == [8, 8, 16, 16]
+    assert detections.boxes[1, 0] >= 32 and detections.boxes[1, 1] >= 22
+
+
+def test_motion_gate_keeps_profile_rois_in_frame_coordinates():
+    """Test dirty region crops are detected only where they overlap the camera ROI"""
+    detector = FixedFaceDetector()
+    profile = CameraProfile.from_dict("cam", {"face": [[[0, 0], [0.5, 0], [0.5, 1], [0, 1]]]})
+    gated = MotionGatedDetector(
+        FrameDetector(detector, profile=profile),
+        MotionGate(analysis_width=64, padding=4)
+    )
+
+    frame = np.full((48, 64, 3), 40, dtype=np.uint8)
+    gated.detect(frame)
+    assert detector.calls == 1
+
+    # A change right of the face ROI is not detected (the ROI is not rescaled to the crop)
+    outside = frame.copy()
+    outside[30:40, 44:54] = 220
+    detections = gated.detect(outside)
+    assert gated.stats.partial_frames == 1
+    assert detector.calls == 1
+    assert len(detections) == 1
+
+    # A change inside it is, and the box is mapped back to frame coordinates
+    inside = outside.copy()
+    inside[38:46, 4:14] = 220
+    detections = gated.detect(inside)
+    assert gated.stats.partial_frames == 2
+    assert detector.calls == 2
+    assert len(detections) == 2
+    assert detections.boxes[1, 0] < 32